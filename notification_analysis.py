@@ -6,198 +6,237 @@ This script analyzes the notification system in the Pinkquill codebase
 and compares it against the required specification.
 """
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional
-from enum import Enum
-
-class Status(Enum):
-    IMPLEMENTED = "✅ IMPLEMENTED"
-    PARTIAL = "⚠️  PARTIAL"
-    MISSING = "❌ MISSING"
-
-@dataclass
-class NotificationFeature:
-    name: str
-    description: str
-    status: Status
-    notes: str
-    location: Optional[str] = None
-
-# Define required notification types from the specification
-REQUIRED_NOTIFICATION_TYPES = {
-    # Post Reactions
-    "admire": "User admired your post",
-    "snap": "User snapped for your post",
-    "ovation": "User gave standing ovation to your post",
-    "support": "User showed support for your post",
-    "inspired": "User was inspired by your post",
-    "applaud": "User applauded your post",
-
-    # Post Interactions
-    "comment": "Someone commented on your post",
-    "reply": "Someone replied to your comment",
-    "comment_like": "Someone liked your comment",
-    "relay": "Someone relayed (reposted) your post",
-    "save": "Someone saved your post",
-    "mention": "Someone mentioned/tagged you in a post",
-
-    # Follow System
-    "follow": "Someone followed you",
-    "follow_request": "Someone requested to follow you (private account)",
-    "follow_request_accepted": "Your follow request was accepted",
-
-    # Collaboration System
-    "collaboration_invite": "Invited to collaborate on a post",
-    "collaboration_accepted": "Someone accepted your collaboration invite",
-    "collaboration_declined": "Someone declined your collaboration invite",
-
-    # Community Features
-    "community_invite": "Invited to join a community",
-    "community_join_request": "Someone requested to join your community",
-    "community_join_approved": "Your community join request was approved",
-    "community_role_change": "Your role in community changed",
-    "community_muted": "You were muted in a community",
-    "community_banned": "You were banned from a community",
-}
+from __future__ import annotations
 
-def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
-    """Analyze the notification system implementation."""
+import argparse
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Sequence, Tuple
 
-    results = {
-        "Post Reactions": [],
-        "Post Interactions": [],
-        "Follow System": [],
-        "Collaborations": [],
-        "Communities": [],
-        "Real-time Updates": [],
-        "Navigation/Linking": [],
-        "UI/UX Features": [],
-    }
+from pinkquill_analysis import (
+    DEFAULT_FAN_OUT,
+    REQUIRED_NOTIFICATION_TYPES,
+    REQUIRED_REALTIME_TABLES,
+    NotificationFeature,
+    QueryPlan,
+    RoundTripModel,
+    ScanIndex,
+    Schema,
+    Status,
+    advise_tree,
+    classify_notification_types,
+    discover_migrations,
+    discover_query_files,
+    incremental_scan,
+    load_schema,
+    parse_duration,
+    scan_tree,
+    verify_type_constraint,
+)
+from pinkquill_analysis.advisor import SEQ_SCAN
+from pinkquill_analysis.index import INDEX_DIRECTORY
+from pinkquill_analysis.instrument import Profiler, file_bytes, phase
+from pinkquill_analysis.logs import DEFAULT_BUCKET, FailureLog, analyze_logs
+from pinkquill_analysis.roundtrips import NOTIFY
+from pinkquill_analysis.queries import QUERY_SOURCES
+from pinkquill_analysis.records import FORMATS, RecordWriter, feature_record, issue_record, open_writer
+from pinkquill_analysis.realtime import (
+    BROADCAST,
+    DEFAULT_EVENTS,
+    DEFAULT_FLAG_FRACTION,
+    DEFAULT_INSERT_RATE,
+    DEFAULT_ROWS_PER_USER,
+    DEFAULT_SKEW,
+    DEFAULT_USERS,
+    OWNER,
+    Amplification,
+    Subscription,
+    scan_subscription_files,
+    scan_subscriptions,
+    simulate,
+)
+from pinkquill_analysis.schema import REALTIME_PUBLICATION, is_migration_file
+from pinkquill_analysis.scanner import FileScan, NOTIFY_FUNCTION, discover_source_files
+from pinkquill_analysis.source import DefinitionIndex, LineIndex, mask_comments
 
-    # ========================================
-    # POST REACTIONS
-    # ========================================
+# The other modes' engines load NumPy, sqlite3 or asyncio; each mode imports its own
+if TYPE_CHECKING:
+    from pinkquill_analysis.channels import ChannelGraph
+    from pinkquill_analysis.coalesce import EventStream, PanelModel, PolicyResult
+    from pinkquill_analysis.payload import PayloadReport
+    from pinkquill_analysis.perf import Regression
+    from pinkquill_analysis.retention import RetentionPlan
+    from pinkquill_analysis.rls import RlsReport
+    from pinkquill_analysis.standin import LoadResult
+    from pinkquill_analysis.toggles import ToggleReport
+    from pinkquill_analysis.workload import WorkloadProfile, WorkloadStats
 
-    results["Post Reactions"].extend([
-        NotificationFeature(
-            name="admire",
-            description="Notification when user admires your post",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification via createNotification() in PostCard.tsx:458",
-            location="components/feed/PostCard.tsx:458"
-        ),
-        NotificationFeature(
-            name="snap",
-            description="Notification when user snaps for your post",
-            status=Status.PARTIAL,
-            notes="Type defined but all reactions use 'admire' notification type (line 493-494)",
-            location="components/feed/PostCard.tsx:493"
-        ),
-        NotificationFeature(
-            name="ovation (standing ovation)",
-            description="Notification when user gives standing ovation",
-            status=Status.PARTIAL,
-            notes="Type defined but all reactions use 'admire' notification type",
-            location="components/feed/PostCard.tsx:493"
-        ),
-        NotificationFeature(
-            name="support",
-            description="Notification when user shows support",
-            status=Status.PARTIAL,
-            notes="Type defined but all reactions use 'admire' notification type",
-            location="components/feed/PostCard.tsx:493"
-        ),
-        NotificationFeature(
-            name="inspired",
-            description="Notification when user was inspired",
-            status=Status.PARTIAL,
-            notes="Type defined but all reactions use 'admire' notification type",
-            location="components/feed/PostCard.tsx:493"
-        ),
-        NotificationFeature(
-            name="applaud",
-            description="Notification when user applauds",
-            status=Status.PARTIAL,
-            notes="Type defined but all reactions use 'admire' notification type",
-            location="components/feed/PostCard.tsx:493"
-        ),
-    ])
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Unindexed non-realtime queries are summarised by suggestion; list this many
+MAX_LISTED_SUGGESTIONS = 8
+
+# Round-trip section: notification-sending handlers and per-item call sites listed
+MAX_LISTED_HANDLERS = 10
+MAX_LISTED_BATCHES = 10
+
+# Payload section: largest selects, and selects with unread columns, listed
+MAX_LISTED_PAYLOADS = 12
+
+# Failure log section: error messages and time buckets listed
+MAX_LISTED_ERRORS = 8
+MAX_LISTED_BUCKETS = 8
+
+# RLS section: read policies listed by cost
+MAX_LISTED_POLICIES = 10
+# Slowest files listed under --profile
+MAX_LISTED_FILES = 10
+
+# Options that select a mode other than the report, with their argparse dests
+MODE_FLAGS = (
+    ("--perf", "perf"),
+    ("--standin", "standin"),
+    ("--retention", "retention"),
+    ("--history", "history"),
+    ("--toggles", "toggles"),
+    ("--rls", "rls"),
+    ("--payload", "payload"),
+    ("--bench", "bench"),
+    ("--channels", "channels"),
+    ("--coalesce", "coalesce"),
+    ("--workload", "workload"),
+    ("--simulate-realtime", "simulate_realtime"),
+    ("--watch", "watch"),
+)
+
+# Files the hand-listed features below are found in
+NOTIFICATION_PANEL = "components/notifications/NotificationPanel.tsx"
+NOTIFICATION_HOOKS = "lib/hooks/useNotifications.ts"
+LEGACY_HOOKS = "lib/hooks.legacy.ts"
+POST_PAGE = "app/post/[id]/page.tsx"
+
+class _FeatureLocator:
+    """Current locations of the hand-listed features, so the report follows the code as it moves.
+
+    Each lookup falls back to the bare path when the file or anchor is gone.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[str, Optional[Tuple[str, LineIndex]]] = {}
+        self._definitions: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+
+    def _read(self, path: str) -> Optional[Tuple[str, LineIndex]]:
+        if path not in self._files:
+            try:
+                with open(os.path.join(self.root, path), "rb") as handle:
+                    text = handle.read().decode("utf-8", errors="replace")
+                self._files[path] = (text, LineIndex(text))
+            except OSError:
+                self._files[path] = None
+        return self._files[path]
+
+    def definition(self, path: str, name: str) -> str:
+        """path:first-last line of the function or const called name."""
+
+        source = self._read(path)
+        if source is None:
+            return path
+        text, lines = source
+        if path not in self._definitions:
+            self._definitions[path] = DefinitionIndex(mask_comments(text)).spans()
+        for start, end, defined in self._definitions[path]:
+            if defined == name:
+                return f"{path}:{lines.line_of(start)}-{lines.line_of(max(start, end - 1))}"
+        return path
+
+    def find(self, path: str, pattern: str) -> Optional[str]:
+        """path:line of the first match of pattern, or None when there is none."""
+
+        source = self._read(path)
+        match = re.search(pattern, source[0]) if source else None
+        return f"{path}:{source[1].line_of(match.start())}" if match else None
+
+    def text(self, path: str, pattern: str) -> str:
+        """path:line of the first match of pattern."""
+
+        return self.find(path, pattern) or path
+
+    def subscription(self, path: str, owner: str, table: str) -> Optional[Subscription]:
+        """The first postgres_changes subscription on table inside owner."""
+
+        if path not in self._subscriptions:
+            source = self._read(path)
+            self._subscriptions[path] = scan_subscriptions(path, source[0]) if source else []
+        return next((item for item in self._subscriptions[path] if item.owner == owner and item.table == table), None)
+
+    def realtime(self, name: str, description: str, path: str, owner: str, table: str) -> NotificationFeature:
+        subscription = self.subscription(path, owner, table)
+        if subscription is None:
+            return NotificationFeature(name=name, description=description, status=Status.MISSING,
+                                       notes=f"No postgres_changes subscription on {table} in {owner}", location=path)
+        return NotificationFeature(name=name, description=description, status=Status.IMPLEMENTED,
+                                   notes=f"Supabase postgres_changes subscription on {table} in {owner} "
+                                         f"(channel {subscription.channel})",
+                                   location=subscription.location)
+
+    def comment_link(self, name: str, description: str) -> NotificationFeature:
+        """Whether reply notifications land on their comment: the panel links with
+        ?comment= and the post page reads it and scrolls the comment into view."""
+
+        link = self.find(NOTIFICATION_PANEL, r"\?comment=\$\{")
+        if link is None:
+            return NotificationFeature(name=name, description=description, status=Status.PARTIAL,
+                                       notes="Links to the post page without the comment id",
+                                       location=self.definition(NOTIFICATION_PANEL, "getNotificationLink"))
+        reads = self.find(POST_PAGE, r"searchParams\.get\(\s*['\"]comment['\"]\s*\)")
+        scrolls = self.find(POST_PAGE, r"\.scrollIntoView\s*\(")
+        if reads is None or scrolls is None:
+            return NotificationFeature(name=name, description=description, status=Status.PARTIAL,
+                                       notes=f"Links with ?comment= but {POST_PAGE} doesn't "
+                                             f"{'read it' if reads is None else 'scroll to the comment'}",
+                                       location=link)
+        return NotificationFeature(name=name, description=description, status=Status.IMPLEMENTED,
+                                   notes=f"Links to /post/{{post_id}}?comment={{comment_id}}; the post page reads "
+                                         f"?comment ({reads}) and scrolls the comment into view",
+                                   location=scrolls)
+
+def analyze_notification_system(
+    root: str = REPO_ROOT,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    scans: Optional[List[FileScan]] = None,
+) -> Dict[str, List[NotificationFeature]]:
+    """Analyze the notification system implementation.
+
+    Pass `scans` to classify already-scanned files instead of reading the tree.
+    """
 
     # ========================================
-    # POST INTERACTIONS
+    # NOTIFICATION TYPES (scanned from source)
     # ========================================
 
-    results["Post Interactions"].extend([
-        NotificationFeature(
-            name="comment",
-            description="Notification when someone comments on your post",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in PostDetailModal.tsx:692 and app/post/[id]/page.tsx:516",
-            location="components/feed/PostDetailModal.tsx:692"
-        ),
-        NotificationFeature(
-            name="reply",
-            description="Notification when someone replies to your comment",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in useComments.ts:271-278 when replying",
-            location="lib/hooks/useComments.ts:271"
-        ),
-        NotificationFeature(
-            name="comment_like",
-            description="Notification when someone likes your comment",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in useComments.ts:334-340",
-            location="lib/hooks/useComments.ts:334"
-        ),
-        NotificationFeature(
-            name="relay",
-            description="Notification when someone relays (reposts) your post",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in PostCard.tsx:566",
-            location="components/feed/PostCard.tsx:566"
-        ),
-        NotificationFeature(
-            name="save",
-            description="Notification when someone saves your post",
-            status=Status.MISSING,
-            notes="Type defined but NO createNotification call in handleSave (PostCard.tsx:521-539)",
-            location="components/feed/PostCard.tsx:521"
-        ),
-        NotificationFeature(
-            name="mention",
-            description="Notification when tagged/mentioned in a post",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in hooks.legacy.ts:5383 and 5678",
-            location="lib/hooks.legacy.ts:5383"
-        ),
-    ])
+    if scans is None and use_cache:
+        scans, _ = incremental_scan(root, workers=workers, required=REQUIRED_NOTIFICATION_TYPES)
+    elif scans is None:
+        scans = scan_tree(root, workers=workers)
+
+    results = classify_notification_types(scans, REQUIRED_NOTIFICATION_TYPES)
+    for category in ("Real-time Updates", "Navigation/Linking", "UI/UX Features"):
+        results.setdefault(category, [])
+    locate = _FeatureLocator(root)
 
     # ========================================
     # FOLLOW SYSTEM
     # ========================================
 
     results["Follow System"].extend([
-        NotificationFeature(
-            name="follow",
-            description="Notification when someone follows you",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in useProfile.ts:303 and 307",
-            location="lib/hooks/useProfile.ts:303"
-        ),
-        NotificationFeature(
-            name="follow_request",
-            description="Notification when someone requests to follow (private account)",
-            status=Status.IMPLEMENTED,
-            notes="Creates 'follow_request' notification for private accounts in useProfile.ts:307",
-            location="lib/hooks/useProfile.ts:307"
-        ),
-        NotificationFeature(
-            name="follow_request_accepted",
-            description="Notification when your follow request is accepted",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in useProfile.ts:323 and 520",
-            location="lib/hooks/useProfile.ts:323"
-        ),
         NotificationFeature(
             name="Follow Request UI",
             description="Accept/Decline buttons in notification panel",
@@ -212,27 +251,6 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
     # ========================================
 
     results["Collaborations"].extend([
-        NotificationFeature(
-            name="collaboration_invite",
-            description="Notification when invited to collaborate",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in hooks.legacy.ts:5060 and 5644",
-            location="lib/hooks.legacy.ts:5060"
-        ),
-        NotificationFeature(
-            name="collaboration_accepted",
-            description="Notification when collaboration is accepted",
-            status=Status.IMPLEMENTED,
-            notes="Created in respondToInvite when accept=true",
-            location="lib/hooks.legacy.ts:5100-5115"
-        ),
-        NotificationFeature(
-            name="collaboration_declined",
-            description="Notification when collaboration is declined",
-            status=Status.IMPLEMENTED,
-            notes="Created in respondToInvite when accept=false",
-            location="lib/hooks.legacy.ts:5100-5115"
-        ),
         NotificationFeature(
             name="Collaboration Invite UI",
             description="Accept/Decline buttons in notification panel",
@@ -245,7 +263,7 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
             description="Accept/decline when clicking notification to go to post",
             status=Status.PARTIAL,
             notes="Notification links to post page but accept/decline UI on post page needs verification",
-            location="NotificationPanel.tsx:583-584"
+            location=locate.text(NOTIFICATION_PANEL, r"type === 'collaboration_invite'")
         ),
     ])
 
@@ -254,54 +272,12 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
     # ========================================
 
     results["Communities"].extend([
-        NotificationFeature(
-            name="community_invite",
-            description="Notification when invited to join a community",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in hooks.legacy.ts:4165",
-            location="lib/hooks.legacy.ts:4165"
-        ),
-        NotificationFeature(
-            name="community_join_request",
-            description="Notification when someone requests to join your community",
-            status=Status.MISSING,
-            notes="Type defined but no createNotification call found for this type",
-            location=None
-        ),
-        NotificationFeature(
-            name="community_join_approved",
-            description="Notification when your join request is approved",
-            status=Status.IMPLEMENTED,
-            notes="Created in useJoinRequests.approve()",
-            location="lib/hooks.legacy.ts (useJoinRequests)"
-        ),
-        NotificationFeature(
-            name="community_role_change",
-            description="Notification when your role changes",
-            status=Status.MISSING,
-            notes="Type defined but no createNotification call found",
-            location=None
-        ),
-        NotificationFeature(
-            name="community_muted",
-            description="Notification when you are muted",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in hooks.legacy.ts:3958",
-            location="lib/hooks.legacy.ts:3958"
-        ),
-        NotificationFeature(
-            name="community_banned",
-            description="Notification when you are banned",
-            status=Status.IMPLEMENTED,
-            notes="Creates notification in hooks.legacy.ts:3991",
-            location="lib/hooks.legacy.ts:3991"
-        ),
         NotificationFeature(
             name="Community Invite UI",
             description="Accept/Decline buttons for community invites",
             status=Status.IMPLEMENTED,
             notes="useCommunityInvitations hook with accept/decline",
-            location="lib/hooks.legacy.ts:3523-3557"
+            location=locate.definition(LEGACY_HOOKS, "useCommunityInvitations")
         ),
     ])
 
@@ -310,34 +286,14 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
     # ========================================
 
     results["Real-time Updates"].extend([
-        NotificationFeature(
-            name="Notification real-time subscription",
-            description="Live updates when new notifications arrive",
-            status=Status.IMPLEMENTED,
-            notes="Supabase postgres_changes subscription in useNotifications.ts:116-131",
-            location="lib/hooks/useNotifications.ts:116"
-        ),
-        NotificationFeature(
-            name="Unread count real-time",
-            description="Live unread badge count updates",
-            status=Status.IMPLEMENTED,
-            notes="Separate subscription in useUnreadCount:184-204",
-            location="lib/hooks/useNotifications.ts:184"
-        ),
-        NotificationFeature(
-            name="Follow requests real-time",
-            description="Live updates for new follow requests",
-            status=Status.IMPLEMENTED,
-            notes="Subscription in useFollowRequests:550-573",
-            location="lib/hooks/useProfile.ts:550"
-        ),
-        NotificationFeature(
-            name="Collaboration invites real-time",
-            description="Live updates for collaboration invites",
-            status=Status.IMPLEMENTED,
-            notes="Subscription on post_collaborators table",
-            location="lib/hooks.legacy.ts (useCollaborators)"
-        ),
+        locate.realtime("Notification real-time subscription", "Live updates when new notifications arrive",
+                        NOTIFICATION_HOOKS, "useNotifications", "notifications"),
+        locate.realtime("Unread count real-time", "Live unread badge count updates",
+                        NOTIFICATION_HOOKS, "useUnreadCount", "notifications"),
+        locate.realtime("Follow requests real-time", "Live updates for new follow requests",
+                        "lib/hooks/useProfile.ts", "useFollowRequests", "follows"),
+        locate.realtime("Collaboration invites real-time", "Live updates for collaboration invites",
+                        LEGACY_HOOKS, "useCollaborators", "post_collaborators"),
     ])
 
     # ========================================
@@ -350,35 +306,29 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
             description="Clicking post notifications takes to post",
             status=Status.IMPLEMENTED,
             notes="getNotificationLink returns /post/{post_id}",
-            location="NotificationPanel.tsx:587-590"
+            location=locate.definition(NOTIFICATION_PANEL, "getNotificationLink")
         ),
         NotificationFeature(
             name="Follow notification → Profile",
             description="Clicking follow notifications takes to profile",
             status=Status.IMPLEMENTED,
             notes="getNotificationLink returns /studio/{username}",
-            location="NotificationPanel.tsx:570-574"
+            location=locate.text(NOTIFICATION_PANEL, r"return `/studio/")
         ),
         NotificationFeature(
             name="Community notification → Community",
             description="Clicking community notifications takes to community",
             status=Status.IMPLEMENTED,
             notes="getNotificationLink returns /community/{slug}",
-            location="NotificationPanel.tsx:575-577"
-        ),
-        NotificationFeature(
-            name="Comment reply → Specific comment",
-            description="Clicking reply notification scrolls to comment",
-            status=Status.PARTIAL,
-            notes="Links to post page but doesn't scroll to specific comment",
-            location="NotificationPanel.tsx:587"
+            location=locate.text(NOTIFICATION_PANEL, r"return `/community/\$\{notification\.community\.slug\}`;")
         ),
+        locate.comment_link("Comment reply → Specific comment", "Clicking reply notification scrolls to comment"),
         NotificationFeature(
             name="Collaboration invite → Post with accept/decline",
             description="Clicking collaboration invite shows post with options",
             status=Status.IMPLEMENTED,
             notes="Links to /post/{post_id}, CollaborationInviteCard has actions",
-            location="NotificationPanel.tsx:579-585"
+            location=locate.text(NOTIFICATION_PANEL, r"type === 'collaboration_invite'")
         ),
     ])
 
@@ -392,72 +342,429 @@ def analyze_notification_system() -> Dict[str, List[NotificationFeature]]:
             description="Mark individual notifications as read",
             status=Status.IMPLEMENTED,
             notes="markAsRead function in useMarkAsRead hook",
-            location="lib/hooks/useNotifications.ts:214"
+            location=locate.definition(NOTIFICATION_HOOKS, "markAsRead")
         ),
         NotificationFeature(
             name="Mark all as read",
             description="Mark all notifications as read at once",
             status=Status.IMPLEMENTED,
             notes="markAllAsRead function in useMarkAsRead hook",
-            location="lib/hooks/useNotifications.ts:218"
+            location=locate.definition(NOTIFICATION_HOOKS, "markAllAsRead")
         ),
         NotificationFeature(
             name="Unread indicator",
             description="Visual indicator for unread notifications",
             status=Status.IMPLEMENTED,
             notes="Gradient line and background styling for unread",
-            location="NotificationPanel.tsx:612-614"
+            location=locate.text(NOTIFICATION_PANEL, r"!notification\.read &&")
         ),
         NotificationFeature(
             name="Notification icons",
             description="Distinct icons for each notification type",
             status=Status.IMPLEMENTED,
             notes="Full icon set with gradients for all types",
-            location="NotificationPanel.tsx:17-440"
+            location=locate.definition(NOTIFICATION_PANEL, "getNotificationIcon")
         ),
         NotificationFeature(
             name="Content preview",
             description="Show comment/reply content preview",
             status=Status.IMPLEMENTED,
             notes="Shows truncated content for comments/replies",
-            location="NotificationPanel.tsx:637-641"
+            location=locate.text(NOTIFICATION_PANEL, r"notification\.content &&")
         ),
         NotificationFeature(
             name="Time ago display",
             description="Relative timestamps (2m, 3h, etc.)",
             status=Status.IMPLEMENTED,
             notes="getTimeAgo helper function",
-            location="NotificationPanel.tsx:442-452"
+            location=locate.definition(NOTIFICATION_PANEL, "getTimeAgo")
         ),
     ])
 
     return results
 
-def print_analysis_report():
-    """Print a comprehensive analysis report."""
+def build_issues(
+    results: Dict[str, List[NotificationFeature]],
+    schema: Optional[Schema] = None,
+    plans: Optional[List[QueryPlan]] = None,
+    roundtrips: Optional[RoundTripModel] = None,
+) -> List[Dict[str, str]]:
+    """Turn scanned MISSING/PARTIAL notification types, schema gaps, unindexed hot queries and
+    per-item notification inserts into prioritised issues."""
+
+    issues = []
+
+    for candidate in roundtrips.batch_candidates() if roundtrips else []:
+        if candidate.call.kind == NOTIFY:
+            issues.append({
+                "rule": "notification-per-recipient",
+                "priority": "MEDIUM",
+                "issue": f"{NOTIFY_FUNCTION}() called once per recipient",
+                "detail": f"{candidate.requests} inserts for {roundtrips.fan_out} recipients "
+                          f"(inside {' > '.join(candidate.call.loops)})",
+                "fix": candidate.suggestion,
+                "location": f"{candidate.location} ({candidate.call.handler})",
+            })
+
+    for plan in plans or []:
+        if plan.hot and plan.problem and plan.suggestion:
+            issues.append({
+                "rule": "realtime-query-unindexed",
+                "priority": "MEDIUM",
+                "issue": f"Realtime-triggered query on {plan.query.table} has no matching index ({plan.access})",
+                "detail": f"{plan.query.describe()} re-runs on every postgres_changes event",
+                "fix": plan.suggestion,
+                "location": f"{plan.query.location} ({plan.query.handler})",
+            })
+
+    if schema is not None:
+        constraint = verify_type_constraint(schema, REQUIRED_NOTIFICATION_TYPES)
+        if constraint.missing:
+            issues.append({
+                "rule": "type-constraint",
+                "priority": "HIGH",
+                "issue": f"{constraint.name} rejects {len(constraint.missing)} required type(s)",
+                "detail": "Inserts of " + ", ".join(f"'{t}'" for t in constraint.missing) + " fail the CHECK constraint",
+                "fix": f"Add a migration that re-creates {constraint.name} with every required type",
+                "location": constraint.constraint.source,
+            })
+        elif not constraint.verified:
+            issues.append({
+                "rule": "type-constraint-unverified",
+                "priority": "LOW",
+                "issue": f"{constraint.name} could not be checked against the required types",
+                "detail": (f"CHECK ({constraint.constraint.expression}) doesn't list its allowed values in a form the replay reads"
+                           if constraint.constraint else "No migration here defines it; it may only exist in the live database"),
+                "fix": f"Confirm {constraint.name} allows every required type",
+                "location": constraint.constraint.source if constraint.constraint else "(no constraint in migrations)",
+            })
+        for table in REQUIRED_REALTIME_TABLES:
+            if not schema.published(table):
+                issues.append({
+                    "rule": "realtime-publication",
+                    "priority": "MEDIUM",
+                    "issue": f"{table} is not in the {REALTIME_PUBLICATION} publication",
+                    "detail": "No migration adds it, so postgres_changes subscriptions on it may receive nothing",
+                    "fix": f"ALTER PUBLICATION {REALTIME_PUBLICATION} ADD TABLE {table};",
+                    "location": "supabase/migrations/",
+                })
+
+    for category, features in results.items():
+        for feature in features:
+            if feature.name not in REQUIRED_NOTIFICATION_TYPES or feature.status == Status.IMPLEMENTED:
+                continue
+            if feature.status == Status.MISSING:
+                issues.append({
+                    "rule": "notification-type-missing",
+                    "priority": "MEDIUM",
+                    "issue": f"{feature.name} notification missing",
+                    "detail": f"{REQUIRED_NOTIFICATION_TYPES[feature.name]} - but nothing sends it",
+                    "fix": f"Add createNotification(..., '{feature.name}', ...) to the {category.lower()} flow",
+                    "location": feature.location or "(no call site)",
+                })
+            else:
+                issues.append({
+                    "rule": "notification-type-partial",
+                    "priority": "LOW",
+                    "issue": f"{feature.name} notification not statically confirmed",
+                    "detail": feature.notes,
+                    "fix": "Verify the variable type argument can take this value",
+                    "location": feature.location or "(no call site)",
+                })
+
+    for feature in results.get("Navigation/Linking", []):
+        if feature.status != Status.IMPLEMENTED:
+            issues.append({
+                "rule": "navigation",
+                "priority": "LOW",
+                "issue": f"{feature.name} incomplete",
+                "detail": feature.notes,
+                "fix": "Link to the specific item and bring it into view on the target page",
+                "location": feature.location or "(no location)",
+            })
+
+    priority_order = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+    issues.sort(key=lambda issue: priority_order[issue["priority"]])
+    return issues
+
+def _banner(lines: List[str], title: str):
+    lines.append("\n" + "=" * 80)
+    lines.append(title)
+    lines.append("=" * 80)
+
+def _constraint_lines(schema: Schema) -> List[str]:
+    check = verify_type_constraint(schema, REQUIRED_NOTIFICATION_TYPES)
+    lines = []
+
+    if check.constraint is None:
+        lines.append(f"\n  ⚠️  No {check.name} constraint found in the migrations; the required types can't be checked")
+        return lines
+
+    lines.append(f"\n  {check.name} (last defined at {check.constraint.source}):")
+    if check.constraint.allowed_values is None:
+        lines.append(f"      CHECK ({check.constraint.expression})")
+        lines.append("  ⚠️  Could not read the allowed values from the expression")
+        return lines
+
+    if check.missing:
+        lines.append(f"\n  ❌ Rejects {len(check.missing)} required type(s):")
+        lines.append("      " + ", ".join(f"'{t}'" for t in check.missing))
+    else:
+        lines.append(f"\n  ✅ Allows all {len(REQUIRED_NOTIFICATION_TYPES)} required notification types")
+    if check.unexpected:
+        lines.append("  ⚠️  Also allows types not in the specification: " + ", ".join(f"'{t}'" for t in check.unexpected))
+
+    table = schema.tables.get(check.table)
+    if table is not None:
+        origin = f"created in {table.created_in}" if table.created_in else "base table not created by any migration here"
+        lines.append(f"\n  {check.table}: {origin}")
+        if table.columns:
+            lines.append("      Columns from migrations: " + ", ".join(table.columns))
+        indexes = schema.indexes_on(check.table)
+        if indexes:
+            lines.append("      Indexes: " + ", ".join(f"{index.name}({', '.join(index.column_names)})" for index in indexes))
+        lines.append(f"      Row level security: {'enabled' if table.rls_enabled else 'not enabled by migrations'}")
+    return lines
+
+def _publication_lines(schema: Schema) -> List[str]:
+    lines = [f"\n  Required Supabase real-time publications:\n"]
+
+    for table in REQUIRED_REALTIME_TABLES:
+        statement = f"ALTER PUBLICATION {REALTIME_PUBLICATION} ADD TABLE {table};"
+        if schema.published(table):
+            lines.append(f"  ✅ {statement}  ({schema.publication_sources[f'{REALTIME_PUBLICATION}.{table}']})")
+        else:
+            lines.append(f"  ❌ {statement}  (not found in any migration)")
+
+    others = [t for t in schema.publications.get(REALTIME_PUBLICATION, []) if t not in REQUIRED_REALTIME_TABLES]
+    if others:
+        lines.append(f"\n  Also published: {', '.join(others)}")
+    return lines
+
+def _access_text(plan: QueryPlan) -> str:
+    if plan.access == SEQ_SCAN:
+        text = "sequential scan"
+        if plan.needs_sort:
+            text += " + sort"
+        return text
+    text = f"{plan.access} via {plan.index}"
+    if plan.unindexed:
+        text += f" (filters {', '.join(plan.unindexed)} row by row)"
+    return text
+
+def _advisor_lines(plans: List[QueryPlan]) -> List[str]:
+    hot = [plan for plan in plans if plan.hot]
+    files = {plan.query.path for plan in plans}
+    lines = [f"\n  {len(plans)} queries in {len(files)} files ({', '.join(QUERY_SOURCES)}); "
+             f"{len(hot)} re-run from postgres_changes callbacks"]
+
+    if hot:
+        lines.append("\n  Realtime-triggered queries:")
+    for plan in sorted(hot, key=lambda p: (not p.problem, p.query.path, p.query.line)):
+        icon = "❌" if plan.problem else "✅"
+        lines.append(f"\n  {icon} {plan.query.location} ({plan.query.handler})")
+        lines.append(f"      {plan.query.describe()}")
+        lines.append(f"      Plan: {_access_text(plan)}")
+        if plan.problem and plan.suggestion:
+            lines.append(f"      Suggest: {plan.suggestion}")
+
+    cold = {}
+    for plan in plans:
+        if not plan.hot and plan.problem and plan.suggestion:
+            cold.setdefault(plan.suggestion, []).append(plan)
+    if cold:
+        ranked = sorted(cold.items(), key=lambda item: (-len(item[1]), item[0]))
+        lines.append(f"\n  Other queries without a matching index: {sum(len(p) for p in cold.values())} "
+                     f"({len(cold)} suggested indexes, most shared first):")
+        for suggestion, served in ranked[:MAX_LISTED_SUGGESTIONS]:
+            lines.append(f"      {len(served):>2}× {suggestion}")
+        if len(ranked) > MAX_LISTED_SUGGESTIONS:
+            lines.append(f"      ... and {len(ranked) - MAX_LISTED_SUGGESTIONS} more")
+
+    lines.append("\n  Indexes created outside the migrations (e.g. in the Supabase dashboard) are not visible here.")
+    return lines
+
+def _roundtrip_lines(roundtrips: RoundTripModel) -> List[str]:
+    costs = roundtrips.handler_costs()
+    senders = [cost for cost in costs if cost.emits_notifications]
+    lines = [f"\n  {len(costs)} handlers reach the database; {len(senders)} of them send notifications.",
+             f"  Counts assume {roundtrips.fan_out} items per loop (--fan-out) and the most expensive if/else arm.",
+             "  requests = round-trips sent, serial = round-trips awaited one after another"]
+
+    if senders:
+        lines.append("\n  Notification-sending handlers:")
+        lines.append(f"      {'requests':>8} {'serial':>6}  handler")
+    for cost in senders[:MAX_LISTED_HANDLERS]:
+        lines.append(f"      {cost.requests:>8} {cost.serial:>6}  {cost.location}")
+    if len(senders) > MAX_LISTED_HANDLERS:
+        lines.append(f"      ... and {len(senders) - MAX_LISTED_HANDLERS} more")
+
+    candidates = roundtrips.batch_candidates()
+    if candidates:
+        lines.append(f"\n  Round-trips sent once per loop item: {len(candidates)} call sites, most requests first:")
+    for candidate in candidates[:MAX_LISTED_BATCHES]:
+        call = candidate.call
+        icon = "❌" if call.kind == NOTIFY else "⚠️ "
+        what = f"{call.target} {call.operation}" if call.operation and call.kind != NOTIFY else f"{call.target}()"
+        lines.append(f"\n  {icon} {candidate.location} ({call.handler})")
+        lines.append(f"      {candidate.requests}× {what} inside {' > '.join(call.loops)}")
+        lines.append(f"      Suggest: {candidate.suggestion}")
+    if len(candidates) > MAX_LISTED_BATCHES:
+        lines.append(f"\n  ... and {len(candidates) - MAX_LISTED_BATCHES} more")
+    return lines
+
+_AUDIENCE_TEXT = {
+    OWNER: "the row owner's sessions",
+    BROADCAST: "every session (no filter)",
+}
+
+def _amplification_lines(result: Amplification, insert_rate: float) -> List[str]:
+    lines = [f"\n  Replayed {result.events:,} INSERTs on {result.table}: {result.users:,} concurrent users, "
+             f"{result.sessions} session(s) each",
+             f"  Each user starts with {result.rows_per_user} rows, {DEFAULT_FLAG_FRACTION:.0%} unread; "
+             f"recipients follow Zipf({DEFAULT_SKEW}).",
+             "  Row counts come from the index advisor's plans against the migrated schema."]
+
+    if not result.loads:
+        lines.append(f"\n  No postgres_changes subscription hears INSERTs on {result.table}.")
+        return lines
+
+    lines.append(f"\n  Subscriptions that hear an INSERT on {result.table}:")
+    for load in result.loads:
+        subscription = load.subscription
+        audience = _AUDIENCE_TEXT.get(subscription.audience, f"clients viewing that {subscription.filter_column}")
+        lines.append(f"\n  {subscription.location} ({subscription.owner})  channel {subscription.channel}")
+        lines.append(f"      filter {subscription.filter or '(none)'} -> {audience}"
+                     + ("; debounced" if subscription.debounced else ""))
+        if not load.plans:
+            lines.append("      applies the payload, no queries")
+            continue
+        lines.append(f"      refetches via {', '.join(subscription.handlers)}:")
+        for plan in load.plans:
+            lines.append(f"        {plan.query.describe()}  [{_access_text(plan)}]")
+        lines.append(f"      per insert: {load.deliveries / result.events:,.1f} deliveries, "
+                     f"{load.queries / result.events:,.1f} queries, "
+                     f"{load.rows_examined / result.events:,.0f} rows examined, "
+                     f"{load.rows_returned / result.events:,.1f} returned")
+
+    woken = result.per_insert("deliveries")
+    queries = result.per_insert("queries")
+    examined = result.per_insert("rows_examined")
+    returned = result.per_insert("rows_returned")
+    embedded = result.per_insert("rows_embedded")
+    lines.append("\n  Per insert, all channels:")
+    lines.append(f"      channels woken   {woken:,.1f}")
+    lines.append(f"      queries          {queries:,.1f}")
+    lines.append(f"      rows examined    {examined:,.0f} (p50 {result.percentile(0.5):,}, p99 {result.percentile(0.99):,})")
+    lines.append(f"      rows returned    {returned:,.1f} (+{embedded:,.1f} embedded lookups)")
+
+    inserts_per_second = result.users * insert_rate / 3600
+    lines.append(f"\n  Load at {result.users:,} users x {insert_rate:g} inserts/user/hour ({inserts_per_second:,.1f} inserts/s):")
+    lines.append(f"      {queries * inserts_per_second:,.1f} queries/s, {examined * inserts_per_second:,.0f} rows examined/s, "
+                 f"{(returned + embedded) * inserts_per_second:,.0f} rows returned/s")
+    if queries:
+        lines.append(f"      Applying payload.new in the callbacks instead of refetching would remove these "
+                     f"{queries * inserts_per_second:,.1f} queries/s;")
+        lines.append("      counts can move by +1/-1 locally.")
+    return lines
 
-    print("=" * 80)
-    print("PINKQUILL NOTIFICATION SYSTEM ANALYSIS")
-    print("=" * 80)
-    print()
+def _workload_lines(stats: WorkloadStats) -> List[str]:
+    profile = stats.profile
+    lines = [f"\n  Generated {stats.events:,} events for {profile.users:,} users over {profile.days} day(s) "
+             f"in {stats.elapsed:.2f}s ({stats.events_per_second:,.0f} events/s, seed {profile.seed})",
+             f"  createNotification rules dropped {stats.self_notifications:,} self-notifications; "
+             f"{stats.rows:,} rows inserted"]
 
-    results = analyze_notification_system()
+    rows_per_day = stats.rows / profile.days
+    lines.append("\n  Inserts into notifications:")
+    if stats.rows_per_second >= 1:
+        lines.append(f"      average    {stats.rows_per_second:,.1f} rows/s")
+    else:
+        # Small runs: rows/s would round to zero
+        lines.append(f"      average    {stats.rows_per_second * 3600:,.1f} rows/hour")
+    lines.append(f"      peak       {stats.peak_rows_per_second:,} rows/s (busiest second)")
+    lines.append(f"      per day    {rows_per_day:,.0f} rows, {stats.bytes_per_day / 1e6:,.1f} MB of heap "
+                 f"(min {min(stats.rows_per_day):,}, max {max(stats.rows_per_day):,})")
+    for days in (30, 365):
+        lines.append(f"      {days:>3} days   {rows_per_day * days:,.0f} rows, {stats.bytes_per_day * days / 1e9:,.2f} GB of heap "
+                     "before indexes")
+
+    share = stats.users_with_unread / profile.users if profile.users else 0.0
+    lines.append("\n  Unread rows per user at the end of the run:")
+    lines.append("      " + ", ".join(f"p{p:g} {value:,}" for p, value in stats.unread_percentiles.items())
+                 + f", max {stats.max_unread:,}")
+    lines.append(f"      {stats.users_with_unread:,} users ({share:.0%}) have unread notifications "
+                 f"(each user opens the panel on {profile.daily_read_probability:.0%} of days)")
+
+    lines.append("\n  Rows by type:")
+    for name, count in sorted(stats.by_type.items(), key=lambda item: (-item[1], item[0])):
+        lines.append(f"      {name:<26} {count:>12,} ({count / stats.rows:.1%})" if stats.rows else f"      {name:<26} 0")
+    return lines
+
+def _failure_text(failures: FailureLog, notification_type: str) -> str:
+    count = failures.by_type[notification_type]
+    rate = failures.per_hour(count)
+    return (f"{count:,}" + (f" ({rate:,.1f}/h)" if rate is not None else "")
+            + f", mostly {failures.top_error(notification_type)}")
+
+def _failure_lines(failures: FailureLog) -> List[str]:
+    total = failures.total
+    span = f" over {failures.hours:,.1f}h" if failures.first is not None else ""
+    lines = [f"\n  {total:,} failure(s) in {len(failures.files)} file(s), {failures.bytes / 1e6:,.1f} MB{span}: "
+             f"{failures.failed:,} insert error(s), {failures.unexpected:,} unexpected (network) error(s)"
+             + (f"; {failures.undated:,} line(s) without a timestamp" if failures.undated else "")]
+    if not total:
+        return lines
+
+    lines.append("\n  By notification type:")
+    for name, count in sorted(failures.by_type.items(), key=lambda item: (-item[1], item[0])):
+        lines.append(f"      {name:<22} {_failure_text(failures, name)}")
+
+    lines.append("\n  By error:")
+    errors = sorted(failures.by_error.items(), key=lambda item: (-item[1], item[0]))
+    for error, count in errors[:MAX_LISTED_ERRORS]:
+        lines.append(f"      {count:>10,} ({count / total:>6.1%})  {error}")
+    if len(errors) > MAX_LISTED_ERRORS:
+        lines.append(f"      +{len(errors) - MAX_LISTED_ERRORS} more")
+
+    if failures.by_bucket:
+        counts = sorted(failures.by_bucket.values())
+        lines.append(f"\n  Per {failures.bucket / 60:g} minute bucket (UTC): {len(counts)} bucket(s) with failures, "
+                     f"median {counts[len(counts) // 2]:,}, peak {counts[-1]:,}; busiest:")
+        busiest = sorted(failures.by_bucket.items(), key=lambda item: (-item[1], item[0]))[:MAX_LISTED_BUCKETS]
+        for start, count in sorted(busiest):
+            lines.append(f"      {time.strftime('%Y-%m-%d %H:%M', time.gmtime(start))}  {count:>10,}")
+    return lines
+
+def render_report_sections(
+    results: Dict[str, List[NotificationFeature]],
+    schema: Optional[Schema] = None,
+    plans: Optional[List[QueryPlan]] = None,
+    roundtrips: Optional[RoundTripModel] = None,
+    failures: Optional[FailureLog] = None,
+) -> List[Tuple[str, str]]:
+    """Render the report as (section title, text) pairs, in print order."""
+
+    sections = []
+
+    lines = ["=" * 80, "PINKQUILL NOTIFICATION SYSTEM ANALYSIS", "=" * 80, ""]
+    sections.append(("HEADER", "\n".join(lines)))
 
     total_implemented = 0
     total_partial = 0
     total_missing = 0
 
     for category, features in results.items():
-        print(f"\n{'─' * 80}")
-        print(f"  {category.upper()}")
-        print(f"{'─' * 80}")
+        lines = [f"\n{'─' * 80}", f"  {category.upper()}", f"{'─' * 80}"]
 
         for feature in features:
-            print(f"\n  {feature.status.value} {feature.name}")
-            print(f"      Description: {feature.description}")
-            print(f"      Notes: {feature.notes}")
+            lines.append(f"\n  {feature.status.value} {feature.name}")
+            lines.append(f"      Description: {feature.description}")
+            lines.append(f"      Notes: {feature.notes}")
             if feature.location:
-                print(f"      Location: {feature.location}")
+                lines.append(f"      Location: {feature.location}")
+            if failures is not None and feature.name in failures.by_type:
+                lines.append(f"      Logged failures: {_failure_text(failures, feature.name)}")
 
             if feature.status == Status.IMPLEMENTED:
                 total_implemented += 1
@@ -466,106 +773,1316 @@ def print_analysis_report():
             else:
                 total_missing += 1
 
+        sections.append((category.upper(), "\n".join(lines)))
+
     # Summary
     total = total_implemented + total_partial + total_missing
-    print("\n" + "=" * 80)
-    print("SUMMARY")
-    print("=" * 80)
-    print(f"\n  Total Features Analyzed: {total}")
-    print(f"  ✅ Fully Implemented:    {total_implemented} ({100*total_implemented//total}%)")
-    print(f"  ⚠️  Partially Implemented: {total_partial} ({100*total_partial//total}%)")
-    print(f"  ❌ Missing:              {total_missing} ({100*total_missing//total}%)")
+    lines = []
+    _banner(lines, "SUMMARY")
+    lines.append(f"\n  Total Features Analyzed: {total}")
+    lines.append(f"  ✅ Fully Implemented:    {total_implemented} ({100*total_implemented//total}%)")
+    lines.append(f"  ⚠️  Partially Implemented: {total_partial} ({100*total_partial//total}%)")
+    lines.append(f"  ❌ Missing:              {total_missing} ({100*total_missing//total}%)")
+    sections.append(("SUMMARY", "\n".join(lines)))
 
     # Critical Issues
-    print("\n" + "=" * 80)
-    print("CRITICAL ISSUES TO FIX")
-    print("=" * 80)
-
-    issues = [
-        {
-            "priority": "HIGH",
-            "issue": "Reaction notifications all use 'admire' type",
-            "detail": "snap, ovation, support, inspired, applaud should send their specific notification types",
-            "fix": "Change PostCard.tsx:493 from 'admire' to the actual reactionType variable",
-            "location": "components/feed/PostCard.tsx:493"
-        },
-        {
-            "priority": "MEDIUM",
-            "issue": "Save notifications not implemented",
-            "detail": "No createNotification call when a user saves a post",
-            "fix": "Add createNotification(post.authorId, user.id, 'save', post.id) in handleSave",
-            "location": "components/feed/PostCard.tsx:539"
-        },
-        {
-            "priority": "MEDIUM",
-            "issue": "community_join_request notification missing",
-            "detail": "Admins don't get notified when someone requests to join their community",
-            "fix": "Add notification creation in join request flow",
-            "location": "lib/hooks.legacy.ts (useCommunityJoin)"
-        },
-        {
-            "priority": "LOW",
-            "issue": "community_role_change notification missing",
-            "detail": "Users aren't notified when their role changes",
-            "fix": "Add notification in role change function",
-            "location": "lib/hooks.legacy.ts (useCommunityModeration)"
-        },
-        {
-            "priority": "LOW",
-            "issue": "Reply notification doesn't scroll to comment",
-            "detail": "Clicking a reply notification goes to post but doesn't scroll to the specific comment",
-            "fix": "Add comment_id to notification and scroll to it on post page load",
-            "location": "NotificationPanel.tsx:587"
-        },
-    ]
+    lines = []
+    _banner(lines, "CRITICAL ISSUES TO FIX")
+
+    issues = build_issues(results, schema, plans, roundtrips)
 
     for issue in issues:
-        print(f"\n  [{issue['priority']}] {issue['issue']}")
-        print(f"      Detail: {issue['detail']}")
-        print(f"      Fix: {issue['fix']}")
-        print(f"      Location: {issue['location']}")
+        lines.append(f"\n  [{issue['priority']}] {issue['issue']}")
+        lines.append(f"      Detail: {issue['detail']}")
+        lines.append(f"      Fix: {issue['fix']}")
+        lines.append(f"      Location: {issue['location']}")
+    sections.append(("CRITICAL ISSUES TO FIX", "\n".join(lines)))
 
     # Database Schema Check
-    print("\n" + "=" * 80)
-    print("DATABASE NOTIFICATION TYPES")
-    print("=" * 80)
-    print("""
-  The notifications table constraint should include all these types:
+    lines = []
+    _banner(lines, "DATABASE NOTIFICATION TYPES")
+    if schema is None:
+        lines.append("\n  (schema not loaded)")
+    else:
+        lines.extend(_constraint_lines(schema))
+    sections.append(("DATABASE NOTIFICATION TYPES", "\n".join(lines)))
 
-  -- Reactions
-  'admire', 'snap', 'ovation', 'support', 'inspired', 'applaud'
+    # Real-time Configuration
+    lines = []
+    _banner(lines, "REAL-TIME CONFIGURATION")
+    if schema is None:
+        lines.append("\n  (schema not loaded)")
+    else:
+        lines.extend(_publication_lines(schema))
+    sections.append(("REAL-TIME CONFIGURATION", "\n".join(lines)))
 
-  -- Post interactions
-  'comment', 'reply', 'comment_like', 'relay', 'save', 'mention'
+    # Query Index Advisor
+    if plans is not None:
+        lines = []
+        _banner(lines, "QUERY INDEX ADVISOR")
+        lines.extend(_advisor_lines(plans))
+        sections.append(("QUERY INDEX ADVISOR", "\n".join(lines)))
 
-  -- Follow system
-  'follow', 'follow_request', 'follow_request_accepted'
+    # Database Round-trips
+    if roundtrips is not None:
+        lines = []
+        _banner(lines, "DATABASE ROUND-TRIPS")
+        lines.extend(_roundtrip_lines(roundtrips))
+        sections.append(("DATABASE ROUND-TRIPS", "\n".join(lines)))
 
-  -- Collaborations
-  'collaboration_invite', 'collaboration_accepted', 'collaboration_declined'
+    # Logged createNotification() failures
+    if failures is not None:
+        lines = []
+        _banner(lines, "NOTIFICATION FAILURE LOGS")
+        lines.extend(_failure_lines(failures))
+        sections.append(("NOTIFICATION FAILURE LOGS", "\n".join(lines)))
 
-  -- Communities
-  'community_invite', 'community_join_request', 'community_join_approved',
-  'community_role_change', 'community_muted', 'community_banned'
-    """)
+    lines = []
+    _banner(lines, "END OF ANALYSIS")
+    sections.append(("END OF ANALYSIS", "\n".join(lines)))
 
-    # Real-time Configuration
-    print("\n" + "=" * 80)
-    print("REAL-TIME CONFIGURATION")
-    print("=" * 80)
-    print("""
-  Required Supabase real-time publications:
-
-  ✅ ALTER PUBLICATION supabase_realtime ADD TABLE notifications;
-  ✅ ALTER PUBLICATION supabase_realtime ADD TABLE follows;
-  ✅ ALTER PUBLICATION supabase_realtime ADD TABLE post_collaborators;
-  ✅ ALTER PUBLICATION supabase_realtime ADD TABLE messages;
-  ✅ ALTER PUBLICATION supabase_realtime ADD TABLE reactions;
-    """)
-
-    print("\n" + "=" * 80)
-    print("END OF ANALYSIS")
-    print("=" * 80)
+    return sections
+
+def _roundtrip_model(scans: List[FileScan], fan_out: int) -> RoundTripModel:
+    return RoundTripModel([(scan.path, scan.database_calls) for scan in scans], NOTIFY_FUNCTION, fan_out)
+
+def _scan_index(root: str, use_cache: bool, profiler: Optional[Profiler]) -> Optional[ScanIndex]:
+    """The scan index the scan and the query advisor share, or None with --no-cache."""
+
+    if not use_cache:
+        return None
+    with phase(profiler, "scan index"):
+        return ScanIndex(root, REQUIRED_NOTIFICATION_TYPES)
+
+def _scanned(root: str, workers: Optional[int], index: Optional[ScanIndex], profiler: Optional[Profiler]) -> List[FileScan]:
+    if index is not None:
+        scans, _ = incremental_scan(root, workers=workers, required=REQUIRED_NOTIFICATION_TYPES, profiler=profiler, index=index)
+        return scans
+    return scan_tree(root, workers=workers, profiler=profiler)
+
+def _replayed(root: str, use_cache: bool, profiler: Optional[Profiler]) -> Schema:
+    with phase(profiler, "sql replay") as item:
+        schema, stats = load_schema(root, use_cache=use_cache)
+        item.files += stats.files
+        if use_cache:
+            item.lookups += stats.files
+            item.hits += stats.files - stats.parsed
+    if profiler is not None:
+        # Measured after the phase so the stat calls don't count against it
+        item.bytes += file_bytes(root, discover_migrations(root))
+    return schema
+
+def _read_logs(logs: Sequence[str], log_bucket: float, workers: Optional[int], profiler: Optional[Profiler]) -> Optional[FailureLog]:
+    if not logs:
+        return None
+    with phase(profiler, "failure logs") as item:
+        failures = analyze_logs(logs, bucket=log_bucket, workers=workers)
+        item.files += len(failures.files)
+        item.bytes += failures.bytes
+    return failures
+
+def _subscriptions(root: str, profiler: Optional[Profiler]) -> List[Subscription]:
+    with phase(profiler, "subscriptions") as item:
+        paths = discover_source_files(root)
+        subscriptions = scan_subscription_files(root, paths)
+        item.files += len(paths)
+    if profiler is not None:
+        item.bytes += file_bytes(root, paths)
+    return subscriptions
+
+def _channel_graph(root: str, profiler: Optional[Profiler]) -> ChannelGraph:
+    from pinkquill_analysis.channels import build_graph
+
+    with phase(profiler, "channel graph") as item:
+        graph = build_graph(root)
+        item.files += len(graph.modules)
+    if profiler is not None:
+        item.bytes += file_bytes(root, graph.modules)
+    return graph
+
+def _event_stream(events_path: Optional[str], profile: WorkloadProfile, profiler: Optional[Profiler]) -> EventStream:
+    """Rows exported to events_path, or the synthetic workload's."""
+
+    from pinkquill_analysis.coalesce import load_events, synthetic_events
+
+    with phase(profiler, "event load") as item:
+        if events_path:
+            stream = load_events(events_path)
+            item.files += 1
+            item.bytes += os.path.getsize(events_path)
+        else:
+            stream = synthetic_events(profile)
+    return stream
+
+def _size_phases(root: str, profiler: Optional[Profiler]):
+    """Bytes of the query files; measured after the phases so the stat calls don't count against them."""
+
+    if profiler is None:
+        return
+    paths = discover_query_files(root)
+    profiler.phases["query advisor"].files += len(paths)
+    profiler.phases["query advisor"].bytes += file_bytes(root, paths)
+
+def print_analysis_report(
+    root: str = REPO_ROOT,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    fan_out: int = DEFAULT_FAN_OUT,
+    logs: Sequence[str] = (),
+    log_bucket: float = DEFAULT_BUCKET,
+    profiler: Optional[Profiler] = None,
+):
+    """Print a comprehensive analysis report, with failure counts from production logs if given any."""
+
+    index = _scan_index(root, use_cache, profiler)
+    scans = _scanned(root, workers, index, profiler)
+    with phase(profiler, "classification") as item:
+        results = analyze_notification_system(root, scans=scans)
+        item.files += len(scans)
+    schema = _replayed(root, use_cache, profiler)
+    plans = advise_tree(root, schema, index=index, profiler=profiler)
+    with phase(profiler, "round-trip model") as item:
+        roundtrips = _roundtrip_model(scans, fan_out)
+        item.files += len(scans)
+    failures = _read_logs(logs, log_bucket, workers, profiler)
+    with phase(profiler, "rendering"):
+        for _, text in render_report_sections(results, schema, plans, roundtrips, failures):
+            print(text)
+    _size_phases(root, profiler)
+
+def stream_analysis_report(
+    writer: RecordWriter,
+    root: str = REPO_ROOT,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    fan_out: int = DEFAULT_FAN_OUT,
+    logs: Sequence[str] = (),
+    log_bucket: float = DEFAULT_BUCKET,
+    profiler: Optional[Profiler] = None,
+):
+    """Write the report as records: features as soon as the scan is classified, then issues and a summary."""
+
+    index = _scan_index(root, use_cache, profiler)
+    scans = _scanned(root, workers, index, profiler)
+    with phase(profiler, "classification") as item:
+        results = analyze_notification_system(root, scans=scans)
+        item.files += len(scans)
+    failures = _read_logs(logs, log_bucket, workers, profiler)
+    statuses = {status: 0 for status in Status}
+    with phase(profiler, "rendering"):
+        for category, features in results.items():
+            for feature in features:
+                statuses[feature.status] += 1
+                writer.write(feature_record(category, feature, failures.by_type.get(feature.name, 0) if failures else None))
+
+    schema = _replayed(root, use_cache, profiler)
+    plans = advise_tree(root, schema, index=index, profiler=profiler)
+    with phase(profiler, "round-trip model") as item:
+        roundtrips = _roundtrip_model(scans, fan_out)
+        item.files += len(scans)
+    with phase(profiler, "rendering"):
+        issues = build_issues(results, schema, plans, roundtrips)
+        for issue in issues:
+            writer.write(issue_record(issue))
+
+        summary = {"type": "summary", "features": sum(statuses.values()),
+                   **{status.name.lower(): count for status, count in statuses.items()},
+                   "issues": {priority: sum(1 for issue in issues if issue["priority"] == priority)
+                              for priority in ("HIGH", "MEDIUM", "LOW")}}
+        if failures is not None:
+            summary["logged_failures"] = failures.total
+        writer.write(summary)
+    _size_phases(root, profiler)
+
+def watch_analysis_report(
+    root: str = REPO_ROOT,
+    workers: Optional[int] = None,
+    poll_interval: float = 0.5,
+    force_polling: bool = False,
+    fan_out: int = DEFAULT_FAN_OUT,
+):
+    """Print the report, then re-print only the sections that change as files are edited."""
+
+    from pinkquill_analysis.watch import RESCAN_ALL, WATCHED_DIRECTORIES, InotifyWatcher, TreeState, create_watcher
+
+    index = ScanIndex(root, REQUIRED_NOTIFICATION_TYPES)
+    scans, _ = incremental_scan(root, workers=workers, required=REQUIRED_NOTIFICATION_TYPES, index=index)
+    state = TreeState(root, scans, index)
+    schema, _ = load_schema(root)
+    query_files = set(discover_query_files(root))
+    plans = advise_tree(root, schema, index=index)
+
+    scans = state.ordered()
+    sections = render_report_sections(analyze_notification_system(root, scans=scans), schema, plans,
+                                      _roundtrip_model(scans, fan_out))
+    for _, text in sections:
+        print(text)
+    previous = dict(sections)
+
+    watcher = create_watcher(root, poll_interval=poll_interval, force_polling=force_polling)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {poll_interval}s"
+    print(f"\nWatching {', '.join(d + '/' for d in WATCHED_DIRECTORIES)} ({mode}); Ctrl+C to stop", flush=True)
+
+    try:
+        while True:
+            changed = watcher.wait()
+            started = time.perf_counter()
+            relevant = state.apply(changed)
+            migrations = {path for path in changed if is_migration_file(path)}
+            if RESCAN_ALL in changed or migrations:
+                # The type constraint, publication and advisor checks all read the schema
+                schema, _ = load_schema(root)
+            if RESCAN_ALL in changed or migrations or changed & query_files:
+                query_files = set(discover_query_files(root))
+                plans = advise_tree(root, schema, index=index)
+            relevant = sorted(set(relevant) | migrations | (changed & query_files))
+            if not relevant:
+                continue
+
+            scans = state.ordered()
+            sections = render_report_sections(analyze_notification_system(root, scans=scans), schema, plans,
+                                              _roundtrip_model(scans, fan_out))
+            updated = [(title, text) for title, text in sections if previous.get(title) != text]
+            previous = dict(sections)
+            if not updated:
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            print(f"\n[{time.strftime('%H:%M:%S')}] {', '.join(relevant)} changed: "
+                  f"{len(updated)} section(s) updated in {elapsed_ms:.0f}ms")
+            for _, text in updated:
+                print(text)
+            print(flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def print_realtime_simulation(
+    root: str = REPO_ROOT,
+    table: str = "notifications",
+    users: int = DEFAULT_USERS,
+    events: int = DEFAULT_EVENTS,
+    sessions: int = 1,
+    seed: int = 0,
+    insert_rate: float = DEFAULT_INSERT_RATE,
+    profiler: Optional[Profiler] = None,
+):
+    """Replay synthetic INSERTs through the realtime subscriptions and print the read amplification."""
+
+    schema = _replayed(root, True, profiler)
+    subscriptions = _subscriptions(root, profiler)
+    with phase(profiler, "simulation"):
+        result = simulate(subscriptions, schema, table=table, users=users, events=events,
+                          sessions=sessions, rows_per_user=DEFAULT_ROWS_PER_USER, seed=seed)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "REALTIME AMPLIFICATION")
+        lines.extend(_amplification_lines(result, insert_rate))
+        print("\n".join(lines))
+
+def print_workload(users: Optional[int] = None, days: int = 7, seed: int = 0, profiler: Optional[Profiler] = None):
+    """Generate a synthetic notification workload and print its load figures."""
+
+    from pinkquill_analysis.workload import WorkloadProfile, generate_workload
+
+    profile = WorkloadProfile(days=days, seed=seed)
+    if users is not None:
+        profile.users = users
+    with phase(profiler, "simulation"):
+        stats = generate_workload(profile)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "SYNTHETIC NOTIFICATION WORKLOAD")
+        lines.extend(_workload_lines(stats))
+        print("\n".join(lines))
+
+def _saved(value: float, baseline: float) -> str:
+    return f"{1 - value / baseline:.1%}" if baseline and value != baseline else "-"
+
+def _coalescing_lines(stream: EventStream, results: List[PolicyResult], panel: Optional[PanelModel]) -> List[str]:
+    from pinkquill_analysis.coalesce import DIGEST, UPDATE
+
+    lines = [f"\n  Replayed {stream.rows:,} notification rows ({stream.source}) spanning {_duration_text(stream.days * 86400)}"]
+    if stream.skipped:
+        lines.append(f"  Skipped {stream.skipped:,} rows with unknown notification types")
+    if panel is None:
+        lines.append("  No subscription on notifications refetches rows; broadcasts and refetch bytes are not modelled")
+    else:
+        lines.append(f"  Panel: {panel.location} refetches the newest {panel.limit} rows on every "
+                     f"{'/'.join(panel.events) or '(no)'} change")
+
+    baseline = results[0]
+    lines.append("")
+    lines.append(f"  {'policy':<24} {'rows':>11} {'saved':>7} {'heap MB':>9} {'broadcasts':>11} {'saved':>7} "
+                 f"{'refetch GB':>11} {'saved':>7}  delay p50/p95")
+    for result in results:
+        delay = "/".join(_duration_text(result.delay[p]) for p in (50, 95)) if result.delay else "-"
+        lines.append(f"  {result.policy.name:<24} {result.rows:>11,} {_saved(result.rows, baseline.rows):>7} "
+                     f"{result.row_bytes / 1e6:>9,.1f} {result.broadcasts:>11,} {_saved(result.broadcasts, baseline.broadcasts):>7} "
+                     f"{result.fetch_bytes / 1e9:>11,.2f} {_saved(result.fetch_bytes, baseline.fetch_bytes):>7}  {delay}")
+
+    if panel is not None:
+        lines.append(f"\n  Events behind the newest {panel.limit} rows at the end (p50/p95/p99 of users with rows):")
+        for result in results:
+            lines.append(f"      {result.policy.name:<24} " + "/".join(f"{result.panel_events[p]:,.0f}" for p in (50, 95, 99))
+                         if result.panel_events else f"      {result.policy.name:<24} -")
+        if "UPDATE" in panel.events and any(result.policy.delivery == UPDATE and result.coalesced for result in results):
+            lines.append(f"\n  The subscription hears UPDATEs, so {UPDATE} policies still broadcast (and refetch) once per event; "
+                         f"{DIGEST} policies, or an INSERT-only subscription, are what cut the refetches")
+    return lines
+
+def _duration_text(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+def print_coalescing(
+    root: str = REPO_ROOT,
+    events_path: Optional[str] = None,
+    policies: Optional[Sequence[str]] = None,
+    users: Optional[int] = None,
+    days: int = 7,
+    seed: int = 0,
+    profiler: Optional[Profiler] = None,
+):
+    """Replay notification rows through coalescing policies and print what each one saves."""
+
+    from pinkquill_analysis.coalesce import DEFAULT_POLICIES, panel_model, parse_policy, simulate as simulate_coalescing
+    from pinkquill_analysis.workload import WorkloadProfile
+
+    parsed = [parse_policy(spec) for spec in policies or DEFAULT_POLICIES]
+    # Savings are measured against the uncoalesced stream
+    if not parsed or parsed[0].name != "none":
+        parsed = [parse_policy("none")] + [policy for policy in parsed if policy.name != "none"]
+    profile = WorkloadProfile(days=days, seed=seed)
+    if users is not None:
+        profile.users = users
+    stream = _event_stream(events_path, profile, profiler)
+    schema = _replayed(root, True, profiler)
+    with phase(profiler, "simulation"):
+        panel = panel_model(root, schema)
+        results = simulate_coalescing(stream, parsed, panel)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "NOTIFICATION COALESCING")
+        lines.extend(_coalescing_lines(stream, results, panel))
+        print("\n".join(lines))
+
+def _census_lines(graph: ChannelGraph, items: int) -> List[str]:
+    channels = graph.channels
+    routes = graph.routes()
+    owners = {channel.owner for channel in channels}
+    lines = [f"\n  {len(channels)} .channel() call(s) in {len(owners)} hook(s)/component(s); "
+             f"lists are assumed to render {items} items",
+             "  'always' skips elements behind &&, || or a ternary; 'up to' counts every element a route can render"]
+
+    lines.append("\n  Channels:")
+    for channel in channels:
+        per_item = sum(1 for route in routes if channel in route.per_item)
+        fixed = sum(1 for route in routes if channel in route.fixed)
+        reach = ", ".join(part for part in (f"per item on {per_item} route(s)" if per_item else "",
+                                            f"once on {fixed} route(s)" if fixed else "") if part) or "no route"
+        cleanup = "removeChannel ✓" if channel.cleaned else "NO removeChannel"
+        lines.append(f"      {channel.name:<42} {channel.owner or '?':<26} {cleanup:<17} {reach}")
+        lines.append(f"          {channel.location}")
+
+    lines.append(f"\n  Open at once per route ({items} items per list):")
+    lines.append(f"      {'route':<52} {'always':>7} {'up to':>7} {'topics':>7}  per item")
+    for route in sorted(routes, key=lambda route: (-route.open(items, mounted=False), route.route)):
+        per_item = sum(route.per_item.values())
+        lines.append(f"      {route.route:<52} {route.open(items):>7} {route.open(items, mounted=False):>7} "
+                     f"{route.topics(items, mounted=False):>7}  {f'+{per_item}' if per_item else '-'}")
+
+    duplicated = {}
+    for route in routes:
+        for channel, count in route.fixed.items():
+            if count > 1:
+                duplicated.setdefault(channel, {}).setdefault(count, []).append(route.route)
+    if duplicated:
+        lines.append("\n  Opened more than once per page by the same code (one topic when the name's variables match, e.g. ${userId}):")
+        for channel, counts in sorted(duplicated.items(), key=lambda item: item[0].location):
+            for count, names in sorted(counts.items(), reverse=True):
+                lines.append(f"      {channel.name} ({channel.owner}) x{count} on {len(names)} route(s)")
+
+    missing = [channel for channel in channels if not channel.cleaned]
+    lines.append("\n  Channels with no removeChannel() cleanup:")
+    if not missing:
+        lines.append("      (none)")
+    for channel in missing:
+        kept = f"kept in {channel.variable}" if channel.variable else "never stored"
+        lines.append(f"      ❌ {channel.name} in {channel.owner} ({kept}) - {channel.location}")
+    return lines
+
+def print_channel_census(root: str = REPO_ROOT, items: Optional[int] = None, profiler: Optional[Profiler] = None):
+    """Count the realtime channels each route opens and flag channels that are never removed."""
+
+    from pinkquill_analysis.channels import DEFAULT_POSTS
+
+    items = DEFAULT_POSTS if items is None else items
+    graph = _channel_graph(root, profiler)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "REALTIME CHANNEL CENSUS")
+        lines.extend(_census_lines(graph, items))
+        print("\n".join(lines))
+
+def _kilobytes(value: float) -> str:
+    return f"{value / 1000:,.1f} KB"
+
+def _payload_lines(report: PayloadReport) -> List[str]:
+    from pinkquill_analysis.payload import CHILD_ROWS, UNBOUNDED_ROWS
+
+    estimates = report.estimates
+    components = sum(1 for estimate in estimates if estimate.query.path.endswith(".tsx"))
+    lines = [f"\n  {len(estimates)} select() projection(s): {len(estimates) - components} in the data hooks, "
+             f"{components} in components a subscription reruns",
+             f"  Rows per call: the query's limit, range or single(); {UNBOUNDED_ROWS} when it has none (marked ~), "
+             f"{CHILD_ROWS} per to-many embed"]
+    if report.sizes.fitted:
+        lines.append(f"  Column sizes: fitted from {report.sizes.rows:,} sampled row(s) for {len(report.sizes.fitted)} "
+                     "column(s), guessed from name and type for the rest")
+    else:
+        lines.append("  Column sizes: guessed from column name and type (--sample fits them from exported rows)")
+
+    lines.append(f"\n  Realtime refetches at {report.event_rate:g} event(s)/min per client:")
+    lines.append(f"      {'channel':<42} {'hears':<7} {'selects':>7} {'per event':>11} {'per minute':>11}")
+    for load in sorted(report.refetches, key=lambda load: -load.event_bytes):
+        subscription = load.subscription
+        hears = "all" if subscription.event == "*" else subscription.event
+        lines.append(f"      {subscription.channel:<42} {hears:<7} {len(load.estimates):>7} "
+                     f"{_kilobytes(load.event_bytes):>11} {_kilobytes(load.minute_bytes):>11}"
+                     + ("  (debounced)" if subscription.debounced else ""))
+        lines.append(f"          {subscription.location} ({subscription.owner})")
+
+    lines.append("\n  Largest payloads per call:")
+    lines.append(f"      {'per call':>11} {'rows':>6} {'per row':>8}  query")
+    for estimate in sorted(estimates, key=lambda estimate: -estimate.call_bytes)[:MAX_LISTED_PAYLOADS]:
+        rows = f"{'' if estimate.bounded else '~'}{estimate.rows:,}"
+        lines.append(f"      {_kilobytes(estimate.call_bytes):>11} {rows:>6} {estimate.row_bytes:>6,.0f} B  "
+                     f"{estimate.query.table} in {estimate.hook or '?'} ({estimate.query.location})")
+
+    refetched = {estimate.query.location for load in report.refetches for estimate in load.estimates}
+    wasteful = [estimate for estimate in estimates if estimate.unread]
+    lines.append("\n  Projected columns the consumers never read (largest first):")
+    if not wasteful:
+        lines.append("      (none)")
+    for estimate in sorted(wasteful, key=lambda estimate: -estimate.unread_bytes)[:MAX_LISTED_PAYLOADS]:
+        readers = ", ".join(consumer.rsplit(":", 1)[1] for consumer in estimate.consumers)
+        share = estimate.unread_bytes / estimate.call_bytes if estimate.call_bytes else 0.0
+        lines.append(f"\n      {estimate.query.table} in {estimate.hook} ({estimate.query.location}), read by {readers}")
+        excerpts = [item for item in estimate.unread if item.excerpt is not None]
+        unread = [item for item in estimate.unread if item.excerpt is None]
+        for item in excerpts:
+            lines.append(f"          {item.name}: only the first {item.excerpt} characters are shown "
+                         f"(~{item.row_bytes:,.0f} B/row fetched and dropped)")
+        if unread:
+            names = ", ".join(item.name for item in unread)
+            lines.append(f"          never read: {names} ({sum(item.row_bytes for item in unread):,.0f} B/row)")
+        saving = f"          trimming saves {_kilobytes(estimate.unread_bytes)} of {_kilobytes(estimate.call_bytes)} per call ({share:.0%})"
+        if estimate.query.location in refetched:
+            saving += f", {_kilobytes(estimate.unread_bytes * report.event_rate)}/min per client on realtime refetches"
+        lines.append(saving)
+
+    unresolved = sorted({table for estimate in estimates for table in estimate.selection.unresolved})
+    if any(item.excerpt is not None for estimate in wasteful for item in estimate.unread):
+        lines.append("\n  An excerpt only shrinks the fetch once a generated column or a view serves it")
+    if unresolved:
+        lines.append(f"\n  `*` on tables with no columns in the migrations or lib/types (sized from the named columns only):")
+        lines.append(f"      {', '.join(unresolved)}")
+    return lines
+
+def print_payload_estimate(
+    root: str = REPO_ROOT,
+    samples: Sequence[str] = (),
+    event_rate: Optional[float] = None,
+    profiler: Optional[Profiler] = None,
+):
+    """Estimate the bytes each select() fetches and list the projected columns nobody reads."""
+
+    from pinkquill_analysis.payload import DEFAULT_EVENT_RATE, estimate_payloads, fit_sizes
+
+    event_rate = DEFAULT_EVENT_RATE if event_rate is None else event_rate
+    schema = _replayed(root, True, profiler)
+    graph = _channel_graph(root, profiler)
+    with phase(profiler, "simulation") as item:
+        sizes = fit_sizes(samples) if samples else None
+        item.files += len(samples)
+        report = estimate_payloads(root, schema, graph, sizes=sizes, event_rate=event_rate)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "SELECT PAYLOAD ESTIMATE")
+        lines.extend(_payload_lines(report))
+        print("\n".join(lines))
+
+def _helper_text(report: RlsReport, name: str) -> str:
+    function = report.functions[name]
+    return f"{name}() ({function.language}{', SECURITY DEFINER' if function.security_definer else ''})"
+
+def _rls_lines(report: RlsReport) -> List[str]:
+    scales = report.scales
+    policies = report.ranked
+    lines = [f"\n  {len(report.costs)} policies and {len(report.functions)} functions after replaying {len(report.files)} "
+             "file(s): the setup scripts, then lib/*-fix.sql, then the migrations",
+             f"  Scale: {scales[0].communities:,} communities, {scales[0].users:,} users; cost = index tuples a read touches "
+             "checking one community's rows (one user's for tables that aren't per community)",
+             "  Helper calls: plpgsql / SECURITY DEFINER functions run once per row checked, on top of that; Postgres can't inline them"]
+    header = "".join(f"{scale.members:>10,}" for scale in scales)
+
+    lines.append("\n  Read policies most likely to dominate latency (members per community across):")
+    lines.append(f"      {'policy':<48} {'table':<26}{header}")
+    listed = [cost for cost in policies if cost.per_read[-1] or cost.helpers][:MAX_LISTED_POLICIES]
+    for rank, cost in enumerate(listed, 1):
+        policy = cost.policy
+        reads = "".join(f"{value:>10,.0f}" for value in cost.per_read)
+        lines.append(f"  {rank:>2}. {policy.name[:48]:<48} {policy.table:<26}{reads}")
+        per_row = [_helper_text(report, name) for name in cost.helpers]
+        if cost.uid_calls:
+            per_row.append(f"auth.uid() x{cost.uid_calls}")
+        lines.append(f"          {policy.source} {policy.command.upper()}"
+                     + (f"; per row: {', '.join(per_row)}" if per_row else ""))
+        for probe in cost.probes:
+            columns = ", ".join(probe.columns) or "no equality"
+            access = f"{probe.index}, ~{probe.matched:,.0f} row(s)" if probe.index else f"scans all {probe.matched:,.0f} rows"
+            when = "once per statement" if probe.once else "per row"
+            lines.append(f"          {'NOT ' if probe.negated else ''}EXISTS {probe.table} ({columns}) {when}: {access}")
+        for suggestion in cost.suggestions:
+            lines.append(f"          -> {suggestion}")
+
+    lines.append("\n  Per table, all read policies ORed (a row pays for each policy until one passes):")
+    lines.append(f"      {'table':<26} {'policies':>8} {'calls/row':>9}{header}  selects / embeds")
+    tables: Dict[str, List] = {}
+    for cost in policies:
+        tables.setdefault(cost.policy.table, []).append(cost)
+    totals = sorted(tables.items(), key=lambda item: -sum(cost.per_read[-1] for cost in item[1]))
+    for table, costs in totals:
+        if not any(cost.per_read[-1] or cost.helpers for cost in costs):
+            continue
+        reads = "".join(f"{sum(cost.per_read[index] for cost in costs):>10,.0f}" for index in range(len(scales)))
+        calls = sum(len(cost.helpers) for cost in costs)
+        selects, embeds = report.reads.get(table, ([], []))
+        parents = sorted({site.rsplit(" (", 1)[1].rstrip(")") for site in embeds})
+        lines.append(f"      {table:<26} {len(costs):>8} {calls:>9}{reads}  {len(selects)} / {len(embeds)}"
+                     + (f" (under {', '.join(parents)})" if parents else ""))
+
+    unindexed = sorted({f"{probe.table} ({', '.join(probe.columns)}) in \"{cost.policy.name}\""
+                        for cost in report.costs for probe in cost.probes if probe.index is None and probe.columns})
+    lines.append("\n  Policy lookups with no index on their predicate columns:")
+    lines.extend(f"      {item}" for item in unindexed)
+    if not unindexed:
+        lines.append("      (none: every lookup seeks on an index)")
+    return lines
+
+def print_rls_costs(
+    root: str = REPO_ROOT,
+    members: Optional[Sequence[int]] = None,
+    communities: Optional[int] = None,
+    users: Optional[int] = None,
+    profiler: Optional[Profiler] = None,
+):
+    """Rank the RLS policies by the index work they add to reads as communities grow."""
+
+    from pinkquill_analysis.rls import DEFAULT_COMMUNITIES, MEMBER_SCALES, RlsScale, analyze_policies
+
+    members = MEMBER_SCALES if members is None else members
+    communities = DEFAULT_COMMUNITIES if communities is None else communities
+    schema = _replayed(root, True, profiler)
+    users = RlsScale.users if users is None else users
+    with phase(profiler, "simulation"):
+        report = analyze_policies(root, schema, [RlsScale(count, communities, users) for count in members])
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "RLS POLICY COST")
+        lines.extend(_rls_lines(report))
+        print("\n".join(lines))
+
+def _toggle_lines(report: ToggleReport) -> List[str]:
+    interactions = report.replays[0].interactions if report.replays else 0
+    lines = [f"\n  {len(report.emitters)} createNotification() call(s) in toggle handlers; "
+             f"{interactions:,} synthetic (actor, post) traces each: a first tap, then another with the action's repeat probability",
+             f"  Guards on every call: {', '.join(report.shared_guards) or '(none: no lookup, upsert or unique index on notifications)'}",
+             f"  Each row wakes {len(report.subscriptions)} subscription(s) on the recipient's clients, "
+             f"{report.refetches_per_row} refetch(es) in all"
+             + (f" ({sum(1 for item in report.subscriptions if item.debounced)} debounced)" if report.subscriptions else "")]
+
+    lines.append("\n  Handlers (rows per 1,000 interactions: written / kept by a dedupe on recipient, actor, type, post):")
+    lines.append(f"      {'handler':<34} {'type':<10} {'emits on':<14} {'repeat':>6} {'written':>8} {'kept':>8} {'ampl':>6} {'worst':>5}")
+    for replay in sorted(report.replays, key=lambda item: -item.amplification):
+        emitter = replay.emitter
+        per_thousand = 1000 / replay.interactions
+        lines.append(f"      {emitter.handler[:34]:<34} {emitter.notification_type or '(chosen)':<10} "
+                     f"{'/'.join(emitter.emits) or '-':<14} {replay.repeat:>6.0%} {replay.written * per_thousand:>8,.0f} "
+                     f"{replay.kept * per_thousand:>8,.0f} {replay.amplification:>5.2f}x {replay.worst:>5}")
+        lines.append(f"          {emitter.location} if {emitter.condition}"
+                     + (f"; guarded by {', '.join(emitter.guards)}" if emitter.guards else ""))
+
+    lines.append("\n  Where server-side dedupe saves the most inserts (actions weighted by WorkloadProfile volume):")
+    lines.append(f"      {'action':<10} {'handlers':>8} {'extra rows/1k':>13} {'refetches/1k':>12} {'share':>7}")
+    actions = report.actions()
+    for action, replays, share in actions:
+        extra = sum(replay.duplicates / replay.interactions for replay in replays) / len(replays) * 1000
+        lines.append(f"      {action:<10} {len(replays):>8} {extra:>13,.1f} {extra * report.refetches_per_row:>12,.1f} {share:>7.1%}")
+    if not actions:
+        lines.append("      (none: every toggle notification is deduplicated)")
+    return lines
+
+def print_toggle_duplicates(root: str = REPO_ROOT, interactions: Optional[int] = None, seed: int = 0,
+                            profiler: Optional[Profiler] = None):
+    """Replay toggle traces through the handlers that notify on toggle and count duplicate rows."""
+
+    from pinkquill_analysis.toggles import DEFAULT_INTERACTIONS, analyze_toggles
+
+    interactions = DEFAULT_INTERACTIONS if interactions is None else interactions
+    schema = _replayed(root, True, profiler)
+    subscriptions = _subscriptions(root, profiler)
+    with phase(profiler, "simulation"):
+        report = analyze_toggles(root, schema, subscriptions, interactions=interactions, seed=seed)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "TOGGLE NOTIFICATION DUPLICATES")
+        lines.extend(_toggle_lines(report))
+        print("\n".join(lines))
+
+def _size_text(value: float) -> str:
+    for unit, scale in (("TB", 1e12), ("GB", 1e9), ("MB", 1e6)):
+        if value >= scale:
+            return f"{value / scale:,.1f} {unit}"
+    return _kilobytes(value)
+
+def _rows_text(value: float) -> str:
+    for unit, scale in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if value >= scale:
+            return f"{value / scale:,.1f}{unit}"
+    return f"{value:,.0f}"
+
+def _retention_lines(plan: RetentionPlan) -> List[str]:
+    from pinkquill_analysis.retention import PAGE_BYTES, STRATEGIES
+
+    growth, row = plan.growth, plan.row
+    lines = [f"\n  Growth: {growth.source}: {growth.rows_per_day:,.0f} rows/day for {growth.users:,} users "
+             f"({growth.rows_per_user_day:.2f} per user)",
+             f"  Each user opens the panel on {growth.read_probability:.0%} of days: ~{growth.unread():,.1f} unread rows per user",
+             f"  Row: ~{row.tuple_bytes:,.0f} B on disk, {row.rows_per_page} per {PAGE_BYTES // 1024} KB page"]
+    for source in (NOTIFY_FUNCTION, "default"):
+        widths = [f"{column.name} {'~' if column.filled < 1 or column.name in ('type', 'content') else ''}{column.bytes:,.0f} B"
+                  + (f" in {column.filled:.0%}" if column.filled < 1 else "")
+                  for column in row.columns if column.source == source and column.filled]
+        if widths:
+            lines.append(f"      {', '.join(widths)}  ({'inserted by ' + source + '()' if source == NOTIFY_FUNCTION else 'defaults'})")
+    never = [column.name for column in row.columns if not column.filled]
+    if never:
+        lines.append(f"      always NULL: {', '.join(never)}")
+    lines.append("  Indexes: " + ", ".join(f"{index.name} ({', '.join(index.column_names)})" for index in plan.indexes))
+
+    count = plan.count
+    if count is None:
+        lines.append("  No exact unread count on notifications in the data hooks")
+    else:
+        access = f"{count.access} on {count.plan.index}" if count.plan.index else count.access
+        lines.append(f"  Unread count: {count.query.location} ({count.query.handler}), {access} as migrated")
+        if count.plan.suggestion:
+            lines.append(f"      suggested: {count.plan.suggestion}")
+    lines.append(f"  TTL {_duration_text(plan.ttl)}; archive moves read rows after {_duration_text(plan.archive_after)}")
+
+    header = "".join(f"{f'{months} months':>16}" for months in plan.months)
+    lines.append(f"\n  {'':<32}{header}")
+    for strategy, description in STRATEGIES.items():
+        projections = plan.strategy(strategy)
+        lines.append(f"  {strategy}: {description}")
+        rows = [("rows", [_rows_text(item.rows) for item in projections]),
+                ("table + indexes", [_size_text(item.heap_bytes + item.index_bytes) for item in projections]),
+                ("count pages, as migrated", [f"{item.count_pages:,.0f}" for item in projections]),
+                ("count pages, suggested index", [f"{item.indexed_count_pages:,.0f}" for item in projections])]
+        if strategy == "counter":
+            rows[2:] = [("count pages, counter lookup", [f"{item.count_pages:,.0f}" for item in projections]),
+                        ("counter table", [_size_text(item.extra_bytes) for item in projections])]
+        if any(item.archived_rows for item in projections):
+            rows.append(("archived", [f"{_rows_text(item.archived_rows)} ({_size_text(item.archive_bytes)})" for item in projections]))
+        if any(item.churn_per_day for item in projections):
+            verb = "moved" if strategy == "archive" else "deleted"
+            rows.append((f"rows {verb}/day", [_rows_text(item.churn_per_day) for item in projections]))
+        for label, values in rows:
+            lines.append(f"      {label:<28}" + "".join(f"{value:>16}" for value in values))
+
+    last = plan.strategy("keep")[-1]
+    lines.append(f"\n  useUnreadCount refetches on every change to the user's notifications: at {plan.months[-1]} months "
+                 f"and one count per inserted row, counting touches {_size_text(last.count_pages * PAGE_BYTES * growth.rows_per_day)} of pages/day "
+                 f"as migrated, {_size_text(last.indexed_count_pages * PAGE_BYTES * growth.rows_per_day)}/day with the suggested index")
+    lines.append("  The counter also writes one counter row per insert and per mark-read; partitions drop without DELETE churn or vacuum")
+    return lines
+
+def print_retention_plan(
+    root: str = REPO_ROOT,
+    events_path: Optional[str] = None,
+    users: Optional[int] = None,
+    days: int = 7,
+    seed: int = 0,
+    rows_per_day: Optional[float] = None,
+    months: Optional[Sequence[int]] = None,
+    ttl: Optional[float] = None,
+    archive_after: Optional[float] = None,
+    workers: Optional[int] = None,
+    profiler: Optional[Profiler] = None,
+):
+    """Project notifications table growth and the unread count's cost under each retention strategy."""
+
+    from pinkquill_analysis.payload import load_table_columns
+    from pinkquill_analysis.retention import (
+        DEFAULT_ARCHIVE_AFTER,
+        DEFAULT_MONTHS,
+        DEFAULT_TTL,
+        growth_from_stream,
+        plan_retention,
+    )
+    from pinkquill_analysis.workload import WorkloadProfile
+
+    months = DEFAULT_MONTHS if months is None else months
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    archive_after = DEFAULT_ARCHIVE_AFTER if archive_after is None else archive_after
+    profile = WorkloadProfile(days=days, seed=seed)
+    if users is not None:
+        profile.users = users
+    stream = _event_stream(events_path, profile, profiler)
+    if events_path:
+        growth = growth_from_stream(stream, users)
+    else:
+        growth = growth_from_stream(stream, profile.users, profile.daily_read_probability)
+    if rows_per_day is not None:
+        growth.source += f", rate set to {rows_per_day:,.0f} rows/day"
+        growth.rows_per_day = rows_per_day
+    schema = _replayed(root, True, profiler)
+    scans = _scanned(root, workers, _scan_index(root, True, profiler), profiler)
+    with phase(profiler, "simulation"):
+        plan = plan_retention(root, schema, load_table_columns(root, schema), scans, growth,
+                              months=months, ttl=ttl, archive_after=archive_after)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "NOTIFICATIONS RETENTION PLAN")
+        lines.extend(_retention_lines(plan))
+        print("\n".join(lines))
+
+def _milliseconds(values: List[float]) -> str:
+    from pinkquill_analysis.standin import percentile
+
+    return "  ".join(f"{label} {percentile(values, fraction) * 1000:,.1f}"
+                     for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))) + " ms"
+
+def _standin_lines(result: LoadResult) -> List[str]:
+    from pinkquill_analysis.standin import percentile
+
+    lines = [f"\n  {result.users:,} users x {result.sessions} session(s): {result.sockets:,} sockets, "
+             f"{result.subscriptions:,} postgres_changes subscriptions, clients in {result.processes} process(es)",
+             "  Channels each client joins, and what it reruns on every event:"]
+    for hook in result.hooks:
+        lines.append(f"\n  {hook.owner}  channel {hook.channel}")
+        for subscription in hook.subscriptions:
+            lines.append(f"      {subscription.event} on {subscription.table}, filter {subscription.filter}  ({subscription.location})")
+        for refetch in hook.refetches:
+            size = "count only" if refetch.query.head else f"~{_kilobytes(refetch.row_bytes)} a row"
+            lines.append(f"      refetch: {refetch.query.describe()}  ({size})")
+
+    rates = result.client_rates()
+    busiest = max(rates, default=0.0)
+    lines.extend([
+        f"\n  Driver: {result.events:,} inserts on {result.table} in bursts of {result.burst:,} every {result.interval:g}s, "
+        f"recipients Zipf({result.skew})",
+        f"  Delivered {result.deliveries:,} changes and answered {result.selects:,} refetch selects in {result.wall:.1f}s, "
+        f"{_size_text(result.bytes_sent)} sent",
+        f"      broadcast latency  {_milliseconds(result.latencies)}",
+        f"      refetch round-trip {_milliseconds(result.round_trips)}",
+        f"      messages/client/s  mean {sum(rates) / len(rates) if rates else 0.0:,.2f}, "
+        f"p99 {percentile(rates, 0.99):,.2f}, max {busiest:,.2f}",
+        f"  Stand-in CPU: {result.server_cpu:.2f}s over {result.wall:.1f}s ({result.server_cpu / result.wall:.0%} of a core), "
+        f"{result.cpu_per_thousand * 1000:,.1f} ms/s per 1k subscriptions",
+        f"  Client processes CPU: {result.client_cpu:.2f}s, on the same {os.cpu_count() or 1} CPU(s) as the stand-in",
+    ])
+    if not result.settled:
+        lines.append(f"  Not every refetch was answered within the settle timeout: {result.selects:,} answered; "
+                     "the box is saturated, try smaller or sparser bursts")
+    return lines
+
+def print_standin_load(
+    root: str = REPO_ROOT,
+    table: str = "notifications",
+    hooks: Optional[Sequence[str]] = None,
+    users: int = DEFAULT_USERS,
+    sessions: int = 1,
+    events: int = DEFAULT_EVENTS,
+    burst: Optional[int] = None,
+    interval: Optional[float] = None,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    profiler: Optional[Profiler] = None,
+):
+    """Push bursts of inserts through a local realtime stand-in to simulated hook clients and print the fan-out load."""
+
+    from pinkquill_analysis.payload import load_table_columns
+    from pinkquill_analysis.standin import DEFAULT_BURST, DEFAULT_HOOKS, DEFAULT_INTERVAL, load_hooks, run_load
+
+    hooks = DEFAULT_HOOKS if hooks is None else hooks
+    burst = DEFAULT_BURST if burst is None else burst
+    interval = DEFAULT_INTERVAL if interval is None else interval
+    schema = _replayed(root, True, profiler)
+    subscriptions = _subscriptions(root, profiler)
+    with phase(profiler, "simulation"):
+        tables = load_table_columns(root, schema)
+        result = run_load(load_hooks(subscriptions, tables, hooks), tables, table=table, users=users,
+                          sessions=sessions, events=events, burst=burst, interval=interval, seed=seed, workers=workers)
+    with phase(profiler, "rendering"):
+        lines = []
+        _banner(lines, "REALTIME STAND-IN LOAD TEST")
+        lines.extend(_standin_lines(result))
+        print("\n".join(lines))
+
+def _perf_lines(result: Dict, regressions: Optional[List[Regression]], baseline: str, threshold: float) -> List[str]:
+    lines = [f"\n  Python {result['python']}, {result['cpus']} CPU(s), fastest of {result['runs']} run(s); "
+             "cold has no scan index, warm reuses it",
+             "",
+             f"  {'scale':>6} {'files':>8} {'lines':>10} {'notify':>7} {'channels':>9}"
+             f"  {'cold s':>8} {'peak MB':>8}  {'warm s':>8} {'peak MB':>8}"]
+    for entry in result["results"]:
+        tree, cold, warm = entry["tree"], entry["cold"], entry["warm"]
+        lines.append(f"  {str(entry['scale']) + 'x':>6} {tree['files']:>8,} {tree['lines']:>10,} {tree['notify_calls']:>7,} "
+                     f"{tree['channels']:>9,}  {cold['seconds']:>8.2f} {cold['peak_kb'] / 1024:>8.1f}  "
+                     f"{warm['seconds']:>8.2f} {warm['peak_kb'] / 1024:>8.1f}")
+    names = list(result["results"][0]["phases"]) if result["results"] else []
+    lines.append("\n  Parse phase seconds, one process, nothing cached:")
+    lines.append(f"  {'scale':>6} " + "".join(f"{name:>14}" for name in names))
+    for entry in result["results"]:
+        lines.append(f"  {str(entry['scale']) + 'x':>6} " + "".join(f"{entry['phases'][name]:>14.3f}" for name in names))
+
+    if regressions is None:
+        lines.append(f"\n  No baseline at {baseline}; wrote this result there")
+    elif regressions:
+        lines.append(f"\n  {len(regressions)} regression(s) over {threshold:.0%} against {baseline}:")
+        for item in regressions:
+            lines.append(f"      {item.scale}x {item.metric}: {item.baseline:,.3f} -> {item.current:,.3f} (+{item.change:.0%})")
+    else:
+        lines.append(f"\n  No regression over {threshold:.0%} against {baseline}")
+    return lines
+
+def print_perf_suite(
+    root: str = REPO_ROOT,
+    scales: Optional[Sequence[int]] = None,
+    runs: int = 1,
+    baseline: Optional[str] = None,
+    threshold: Optional[float] = None,
+    output: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> bool:
+    """Time the analyzer on synthetic trees at each scale, write the result and compare it with the baseline.
+
+    Returns False when a metric regressed past the threshold.
+    """
+
+    from pinkquill_analysis.bench import write_result
+    from pinkquill_analysis.perf import DEFAULT_THRESHOLD, PERF_SCALES, compare, run_suite
+
+    scales = PERF_SCALES if scales is None else scales
+    threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+    command = [sys.executable, os.path.abspath(__file__)] + (["--workers", str(workers)] if workers else [])
+    result = run_suite(root, command, scales=scales, runs=runs,
+                       progress=lambda message: print(f"  ... {message}", flush=True))
+    output = output or os.path.join(root, INDEX_DIRECTORY, "perf.json")
+    baseline = baseline or os.path.join(root, INDEX_DIRECTORY, "perf-baseline.json")
+    write_result(result, output)
+    if os.path.exists(baseline):
+        with open(baseline, "r", encoding="utf-8") as handle:
+            regressions = compare(result, json.load(handle), threshold)
+    else:
+        write_result(result, baseline)
+        regressions = None
+    lines = []
+    _banner(lines, "ANALYZER BENCHMARK")
+    lines.extend(_perf_lines(result, regressions, baseline, threshold))
+    lines.append(f"\n  Written to {output}")
+    print("\n".join(lines))
+    return not regressions
+
+def _benchmark_lines(result: Dict, output: str) -> List[str]:
+    lines = [f"\n  SQLite {result['sqlite']}, median and p95 of {result['runs']} runs per query; writes are rolled back",
+             f"  Advisor indexes: {', '.join(result['advised_indexes']) or '(none)'}",
+             "",
+             f"  {'rows':>12}  {'indexes':<20} {'query':<20} {'median ms':>10} {'p95 ms':>10}  plan"]
+    previous = None
+    for row in result["results"]:
+        if previous is not None and (row["rows"], row["indexes"]) != previous:
+            lines.append("")
+        previous = (row["rows"], row["indexes"])
+        access = row["plan"].split("; ")[0] if row["plan"] else "-"
+        lines.append(f"  {row['rows']:>12,}  {row['indexes']:<20} {row['query']:<20} "
+                     f"{row['median_ms']:>10.3f} {row['p95_ms']:>10.3f}  {access}")
+    if result["advised_index_misses"]:
+        lines.append("\n  Advisor indexes SQLite did not use (those advised timings don't measure them):")
+        for miss in result["advised_index_misses"]:
+            lines.append(f"    {miss['rows']:>12,}  {miss['query']:<20} {miss['index']}: {miss['plan']}")
+    lines.append(f"\n  Written to {output}")
+    return lines
+
+def print_history(
+    root: str = REPO_ROOT,
+    revisions: str = "HEAD",
+    max_count: Optional[int] = None,
+    output: Optional[str] = None,
+    workers: Optional[int] = None,
+    fan_out: int = DEFAULT_FAN_OUT,
+    output_format: str = "text",
+):
+    """Measure each commit in a range and write the series as it comes: CSV, or JSON/JSON lines records.
+
+    The text format means CSV, or JSON for a .json output.
+    """
+
+    from pinkquill_analysis.history import iter_history, write_history
+
+    started = time.perf_counter()
+    metrics = iter_history(root, revisions, max_count=max_count, workers=workers, fan_out=fan_out)
+    if output_format == "text":
+        output_format = "json" if output and output.endswith(".json") else "csv"
+    if output is None:
+        write_history(metrics, sys.stdout, output_format)
+        return
+    with open(output, "w", newline="") as handle:
+        commits, parsed, files = write_history(metrics, handle, output_format)
+    print(f"Wrote {commits} commit(s) to {output} in {time.perf_counter() - started:.1f}s: "
+          f"parsed {parsed:,} of {files:,} source files, reused the rest by blob hash")
+
+def print_benchmark(
+    root: str = REPO_ROOT,
+    sizes: Optional[Tuple[int, ...]] = None,
+    runs: Optional[int] = None,
+    output: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+):
+    """Time the notification queries in SQLite at each size and write the JSON result."""
+
+    from pinkquill_analysis.bench import BENCH_SIZES, DEFAULT_RUNS, run_benchmark, write_result
+
+    sizes = BENCH_SIZES if sizes is None else sizes
+    runs = DEFAULT_RUNS if runs is None else runs
+    schema = _replayed(root, True, profiler)
+    output = output or os.path.join(root, INDEX_DIRECTORY, "bench.json")
+    with phase(profiler, "simulation"):
+        result = run_benchmark(root, schema, sizes=sizes, runs=runs,
+                               progress=lambda message: print(f"  ... {message}", flush=True))
+    with phase(profiler, "rendering"):
+        write_result(result, output)
+        lines = []
+        _banner(lines, "SQLITE QUERY BENCHMARK")
+        lines.extend(_benchmark_lines(result, output))
+        print("\n".join(lines))
+
+def _profile_lines(profiler: Profiler, output: Optional[str]) -> List[str]:
+    total = profiler.wall
+    lines = [f"\n  {'phase':<18} {'wall ms':>9} {'cpu ms':>9} {'share':>6} {'files':>7} {'bytes':>10} {'cache hits':>11}"]
+    for item in profiler.phases.values():
+        hits = f"{item.hit_rate:.0%} of {item.lookups:,}" if item.hit_rate is not None else "-"
+        lines.append(f"  {item.name:<18} {item.wall * 1000:>9,.1f} {item.cpu * 1000:>9,.1f} "
+                     f"{item.wall / total if total else 0:>6.1%} {f'{item.files:,}' if item.files else '-':>7} "
+                     f"{_size_text(item.bytes) if item.bytes else '-':>10} {hits:>11}")
+    lines.append(f"  {'total':<18} {total * 1000:>9,.1f} {sum(item.cpu for item in profiler.phases.values()) * 1000:>9,.1f}")
+    lines.append("  CPU includes worker processes")
+
+    slowest = profiler.slowest(MAX_LISTED_FILES)
+    if slowest:
+        lines.append(f"\n  Slowest files ({len(profiler.files):,} scanned, {sum(cost.seconds for cost in profiler.files) * 1000:,.1f} ms in all):")
+        for cost in slowest:
+            lines.append(f"      {cost.seconds * 1000:>8,.1f} ms {_kilobytes(cost.bytes):>10}  {cost.path}")
+    elif "scan index" in profiler.phases:
+        lines.append("\n  No file was scanned: every one came from the scan index (--no-cache to profile scanning)")
+    if output:
+        kind = "Chrome trace events" if output.endswith(".json") else "pstats dump"
+        lines.append(f"\n  {kind} written to {output}")
+    return lines
+
+def print_profile(profiler: Profiler, output: Optional[str] = None, handle=None):
+    """Print the per-phase summary (to stderr, so it stays out of the report)."""
+
+    lines = []
+    _banner(lines, "ANALYSIS PROFILE")
+    lines.extend(_profile_lines(profiler, output))
+    print("\n".join(lines), file=handle or sys.stderr)
+
+def _reader_gone():
+    """stdout's reader stopped early (head, a bot that has what it needs); don't fail on the exit flush."""
+
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analyze the Pinkquill notification system.")
+    parser.add_argument("--root", default=REPO_ROOT, help="repository root to analyze (default: this checkout)")
+    parser.add_argument("--workers", type=int, default=None, help="scanner processes, or --standin client processes (default: one per CPU)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the .pinkquill-analysis/ scan index")
+    parser.add_argument("--watch", action="store_true", help="keep running and re-report sections as source files change")
+    parser.add_argument("--poll", action="store_true", help="with --watch, poll file stats instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between polls (default: 0.5)")
+    parser.add_argument("--fan-out", type=int, default=DEFAULT_FAN_OUT,
+                        help=f"items assumed per loop when counting round-trips (default: {DEFAULT_FAN_OUT})")
+    parser.add_argument("--simulate-realtime", nargs="?", const="notifications", metavar="TABLE",
+                        help="replay synthetic INSERTs on TABLE (default: notifications) through the realtime subscriptions")
+    parser.add_argument("--workload", action="store_true",
+                        help="generate a synthetic notification workload (needs NumPy) and report rows/s, unread and growth")
+    parser.add_argument("--users", type=int, default=None,
+                        help=f"simulated users (default: {DEFAULT_USERS} for --simulate-realtime and --standin, "
+                             "100000 for --workload, --coalesce, --rls and --retention)")
+    parser.add_argument("--days", type=int, default=7, help="days of workload to generate (default: %(default)s)")
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS, help=f"simulated inserts (default: {DEFAULT_EVENTS})")
+    parser.add_argument("--sessions", type=int, default=1, help="open sessions (tabs/devices) per user (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for simulations (default: 0)")
+    parser.add_argument("--insert-rate", type=float, default=DEFAULT_INSERT_RATE,
+                        help=f"inserts per user per hour for load figures (default: {DEFAULT_INSERT_RATE:g})")
+    parser.add_argument("--coalesce", nargs="?", const="", metavar="EXPORT",
+                        help="replay notification rows (a CSV/JSON lines export of the table, or the synthetic "
+                             "workload) through coalescing policies")
+    parser.add_argument("--policy", action="append", default=None, metavar="KEY/WINDOW[/DELIVERY]",
+                        help="coalescing policy, e.g. post+type/15m/digest; repeatable (default: none, post+type/15m, "
+                             "post+type/15m/digest, post+kind/1h, post+kind/1h/digest, type/1d/digest)")
+    parser.add_argument("--channels", action="store_true",
+                        help="count the realtime channels each route opens and flag channels with no removeChannel()")
+    parser.add_argument("--posts", type=int, default=None,
+                        help="items per rendered list for --channels (default: 20, useFeed's page size)")
+    parser.add_argument("--bench", action="store_true",
+                        help="time the notification queries in SQLite with and without indexes and write a JSON result")
+    parser.add_argument("--bench-sizes", default=None,
+                        help="comma-separated notification row counts (default: 1000,100000,10000000)")
+    parser.add_argument("--bench-runs", type=int, default=None, help="runs per query (default: 20)")
+    parser.add_argument("--bench-output", default=None, help=f"result file (default: {INDEX_DIRECTORY}/bench.json)")
+    parser.add_argument("--payload", action="store_true",
+                        help="estimate the bytes each select() fetches, per realtime event and per minute, and list "
+                             "projected columns the consuming components never read")
+    parser.add_argument("--sample", action="append", default=None, metavar="[TABLE=]EXPORT",
+                        help="rows exported from a table (CSV/JSON lines, optionally gzipped) to fit --payload's column "
+                             "sizes from; the table defaults to the file name; repeatable")
+    parser.add_argument("--event-rate", type=float, default=None,
+                        help="realtime events per minute a client's subscription hears, for --payload (default: 1)")
+    parser.add_argument("--rls", action="store_true",
+                        help="cost the RLS policies' subqueries and helper calls per read as communities grow")
+    parser.add_argument("--members", default=None,
+                        help="comma-separated members per community for --rls (default: 10,100,1000,10000)")
+    parser.add_argument("--communities", type=int, default=None, help="communities for --rls (default: 500)")
+    parser.add_argument("--toggles", action="store_true",
+                        help="replay toggle traces through the handlers that notify on admire/reaction/save/relay "
+                             "and report duplicate notification rows per action")
+    parser.add_argument("--interactions", type=int, default=None,
+                        help="(actor, post) traces per handler for --toggles (default: 100,000)")
+    parser.add_argument("--logs", action="append", default=None, metavar="LOG",
+                        help="production log (plain or .gz) to count [createNotification] failures in, reported next to "
+                             "each notification type's status; repeatable")
+    parser.add_argument("--log-bucket", default="1h", help="time bucket for --logs failure counts (default: %(default)s)")
+    parser.add_argument("--history", nargs="?", const="HEAD", metavar="RANGE",
+                        help="measure coverage, round-trips and channels at each first-parent commit in a git range "
+                             "(default: all of HEAD) and write the series as CSV")
+    parser.add_argument("--history-count", type=int, default=None, help="only the newest N commits of --history")
+    parser.add_argument("--history-output", default=None,
+                        help="file for the --history series; JSON when it ends in .json (default: CSV on stdout)")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="report output: text, or json/jsonl/sarif records streamed as they are produced; "
+                             "--history takes json and jsonl too (default: text)")
+    parser.add_argument("--retention", nargs="?", const="", metavar="EXPORT",
+                        help="project notifications table size and unread-count cost over months under retention "
+                             "strategies, from an export of the table or the synthetic workload (needs NumPy)")
+    parser.add_argument("--months", default=None, help="horizons for --retention, comma-separated (default: 12,24,36)")
+    parser.add_argument("--rows-per-day", type=float, default=None,
+                        help="measured notification inserts per day for --retention (default: the workload's rate)")
+    parser.add_argument("--ttl", default=None, help="row TTL for --retention (default: 90d)")
+    parser.add_argument("--archive-after", default=None, help="age at which --retention archives read rows (default: 30d)")
+    parser.add_argument("--standin", nargs="?", const="notifications", metavar="TABLE",
+                        help="load-test realtime fan-out: push bursts of inserts on TABLE (default: notifications) "
+                             "through a local realtime stand-in to simulated clients of the notification hooks")
+    parser.add_argument("--hooks", default=None,
+                        help="hooks the --standin clients mount, comma-separated "
+                             "(default: useNotifications,useUnreadCount,useFollowRequests)")
+    parser.add_argument("--burst", type=int, default=None, help="inserts per --standin burst (default: 250)")
+    parser.add_argument("--burst-interval", type=float, default=None, help="seconds between --standin bursts (default: 0.25)")
+    parser.add_argument("--perf", nargs="?", const="", metavar="SCALES",
+                        help="benchmark the analyzer on synthetic trees at these multiples of this tree's size "
+                             "(default: 1,10,100), against a stored baseline; exits 1 on a regression")
+    parser.add_argument("--perf-runs", type=int, default=1, help="runs per --perf measurement, fastest kept (default: 1)")
+    parser.add_argument("--perf-baseline", default=None,
+                        help=f"baseline result for --perf, written when missing (default: {INDEX_DIRECTORY}/perf-baseline.json)")
+    parser.add_argument("--perf-threshold", type=float, default=None,
+                        help="growth over the baseline that counts as a regression (default: 0.25)")
+    parser.add_argument("--perf-output", default=None, help=f"--perf result file (default: {INDEX_DIRECTORY}/perf.json)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="OUTPUT",
+                        help="time each phase of the report or simulation mode (wall, CPU, files, bytes, cache hits) "
+                             "and print a summary to stderr; OUTPUT ending in .json gets Chrome trace events, any other "
+                             "name a pstats dump; not with --perf, --watch or --history")
+    args = parser.parse_args(argv)
+
+    modes = [flag for flag, dest in MODE_FLAGS if getattr(args, dest) not in (None, False)]
+    if len(modes) > 1:
+        parser.error(f"{', '.join(modes)} are separate modes; run one at a time")
+    if args.format != "text" and modes and modes != ["--history"]:
+        parser.error(f"--format {args.format} is for the report and --history; {modes[0]} only prints text")
+    if args.logs and modes:
+        parser.error(f"--logs feeds the report; {modes[0]} doesn't read it")
+    if args.profile is not None and (args.perf is not None or args.watch or args.history):
+        # --perf times its own runs, --watch never finishes and --history's work is spread over commits
+        parser.error("--profile times a single run of the report or a simulation; "
+                     "it can't be combined with --perf, --watch or --history")
+    with _profiling(parser, args.profile) as profiler:
+        _run(parser, args, profiler)
+
+@contextmanager
+def _profiling(parser: argparse.ArgumentParser, output: Optional[str]) -> Iterator[Optional[Profiler]]:
+    """A Profiler for the run under --profile; once it finishes, write OUTPUT and print the summary."""
+
+    if output is None:
+        yield None
+        return
+    profiler = Profiler()
+    # The trace comes from the profiler; a pstats dump needs cProfile running too
+    stats = cProfile.Profile() if output and not output.endswith(".json") else None
+    if stats:
+        stats.enable()
+    try:
+        yield profiler
+    finally:
+        if stats:
+            stats.disable()
+    try:
+        if stats:
+            stats.dump_stats(output)
+        elif output:
+            profiler.write_trace(output)
+    except OSError as error:
+        parser.error(str(error))
+    print_profile(profiler, output or None)
+
+def _integers(text: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """A comma-separated option's integers; None leaves the mode's default."""
+
+    return tuple(int(value) for value in text.split(",")) if text else None
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace, profiler: Optional[Profiler]):
+    if args.perf is not None:
+        try:
+            scales = _integers(args.perf)
+        except ValueError:
+            parser.error(f"--perf scales must be comma-separated integers, not {args.perf!r}")
+        try:
+            passed = print_perf_suite(args.root, scales=scales, runs=args.perf_runs, baseline=args.perf_baseline,
+                                      threshold=args.perf_threshold, output=args.perf_output, workers=args.workers)
+        except (RuntimeError, ValueError, OSError) as error:
+            parser.error(str(error))
+        if not passed:
+            sys.exit(1)
+        return
+
+    if args.standin:
+        users = DEFAULT_USERS if args.users is None else args.users
+        try:
+            hooks = tuple(args.hooks.split(",")) if args.hooks else None
+            print_standin_load(args.root, table=args.standin, hooks=hooks, users=users,
+                               sessions=args.sessions, events=args.events, burst=args.burst,
+                               interval=args.burst_interval, seed=args.seed, workers=args.workers, profiler=profiler)
+        except (RuntimeError, ValueError, OSError) as error:
+            parser.error(str(error))
+        return
+
+    if args.retention is not None:
+        try:
+            months = _integers(args.months)
+        except ValueError:
+            parser.error(f"--months must be comma-separated integers, not {args.months!r}")
+        try:
+            ttl = parse_duration(args.ttl) if args.ttl else None
+            archive_after = parse_duration(args.archive_after) if args.archive_after else None
+            print_retention_plan(args.root, events_path=args.retention or None, users=args.users, days=args.days,
+                                 seed=args.seed, rows_per_day=args.rows_per_day, months=months, ttl=ttl,
+                                 archive_after=archive_after, workers=args.workers, profiler=profiler)
+        except (RuntimeError, ValueError, OSError) as error:
+            parser.error(str(error))
+        return
+
+    if args.history:
+        try:
+            print_history(args.root, args.history, max_count=args.history_count, output=args.history_output,
+                          workers=args.workers, fan_out=args.fan_out, output_format=args.format)
+        except BrokenPipeError:
+            _reader_gone()
+        except (RuntimeError, OSError, ValueError) as error:
+            parser.error(str(error))
+        return
+
+    if args.toggles:
+        print_toggle_duplicates(args.root, interactions=args.interactions, seed=args.seed, profiler=profiler)
+        return
+
+    if args.rls:
+        try:
+            members = _integers(args.members)
+        except ValueError:
+            parser.error(f"--members must be comma-separated integers, not {args.members!r}")
+        print_rls_costs(args.root, members=members, communities=args.communities, users=args.users, profiler=profiler)
+        return
+
+    if args.payload:
+        try:
+            print_payload_estimate(args.root, samples=args.sample or (), event_rate=args.event_rate, profiler=profiler)
+        except (ValueError, OSError) as error:
+            parser.error(str(error))
+        return
+
+    if args.bench:
+        try:
+            sizes = _integers(args.bench_sizes)
+        except ValueError:
+            parser.error(f"--bench-sizes must be comma-separated integers, not {args.bench_sizes!r}")
+        print_benchmark(args.root, sizes=sizes, runs=args.bench_runs, output=args.bench_output, profiler=profiler)
+        return
+
+    if args.channels:
+        print_channel_census(args.root, items=args.posts, profiler=profiler)
+        return
+
+    if args.coalesce is not None:
+        try:
+            print_coalescing(args.root, events_path=args.coalesce or None, policies=args.policy,
+                             users=args.users, days=args.days, seed=args.seed, profiler=profiler)
+        except (RuntimeError, ValueError, OSError) as error:
+            parser.error(str(error))
+        return
+
+    if args.workload:
+        try:
+            print_workload(args.users, days=args.days, seed=args.seed, profiler=profiler)
+        except RuntimeError as error:
+            parser.error(str(error))
+        return
+
+    if args.simulate_realtime:
+        users = DEFAULT_USERS if args.users is None else args.users
+        print_realtime_simulation(args.root, table=args.simulate_realtime, users=users, events=args.events,
+                                  sessions=args.sessions, seed=args.seed, insert_rate=args.insert_rate, profiler=profiler)
+        return
+
+    if args.watch:
+        watch_analysis_report(args.root, workers=args.workers, poll_interval=args.poll_interval,
+                              force_polling=args.poll, fan_out=args.fan_out)
+        return
+
+    try:
+        log_bucket = parse_duration(args.log_bucket)
+    except ValueError as error:
+        parser.error(str(error))
+    try:
+        if args.format == "text":
+            print_analysis_report(args.root, workers=args.workers, use_cache=not args.no_cache, fan_out=args.fan_out,
+                                  logs=args.logs or (), log_bucket=log_bucket, profiler=profiler)
+        else:
+            writer = open_writer(args.format, sys.stdout)
+            stream_analysis_report(writer, args.root, workers=args.workers, use_cache=not args.no_cache,
+                                   fan_out=args.fan_out, logs=args.logs or (), log_bucket=log_bucket, profiler=profiler)
+            writer.close()
+    except BrokenPipeError:
+        _reader_gone()
+    except OSError as error:
+        parser.error(str(error))
 
 if __name__ == "__main__":
-    print_analysis_report()
+    main()
@@ -0,0 +1,162 @@
+"""
+Analysis engines behind notification_analysis.py.
+"""
+
+from importlib import import_module
+
+from .model import (
+    ANALYZER_VERSION,
+    NOTIFICATION_TYPE_CATEGORIES,
+    NotificationFeature,
+    REQUIRED_NOTIFICATION_TYPES,
+    REQUIRED_REALTIME_TABLES,
+    Status,
+    parse_duration,
+)
+from .scanner import CallSite, FileScan, discover_source_files, scan_files, scan_tree
+from .coverage import classify_notification_types
+from .index import INDEX_DIRECTORY, IndexStats, ScanIndex, incremental_scan
+from .schema import ConstraintCheck, ReplayStats, Schema, discover_migrations, load_schema, verify_type_constraint
+from .queries import Filter, QueryShape, discover_query_files, scan_queries
+from .advisor import QueryPlan, advise_tree, plan_query, suggest_index
+from .realtime import Amplification, Subscription, scan_subscription_files, scan_subscriptions, simulate
+from .roundtrips import DEFAULT_FAN_OUT, BatchCandidate, DatabaseCall, HandlerCost, RoundTripModel
+from .logs import FailureLog, analyze_logs, normalize_error
+from .records import SCHEMA_VERSION, RecordWriter, open_writer
+from .typeflow import ModuleTypes, TypeResolver, TypeSet, tokenize
+from .instrument import FileCost, Phase, Profiler
+
+# Engines behind the CLI's other modes pull in NumPy, sqlite3 or asyncio; they
+# are imported on first use so the default report doesn't pay for them
+_LAZY = {
+    "bench": ("BenchQuery", "BenchResult", "run_benchmark", "translate"),
+    "workload": ("WorkloadProfile", "WorkloadStats", "generate_rows", "generate_workload"),
+    "channels": ("Channel", "ChannelGraph", "RouteCensus", "build_graph", "scan_module"),
+    "coalesce": ("CoalescingPolicy", "EventStream", "PolicyResult", "load_events", "parse_policy", "replay", "synthetic_events"),
+    "payload": ("ColumnSizes", "PayloadEstimate", "PayloadReport", "estimate_payloads", "fit_sizes"),
+    "rls": ("PolicyCost", "RlsReport", "RlsScale", "analyze_policies", "load_policies"),
+    "toggles": ("ToggleEmitter", "ToggleReport", "analyze_toggles", "replay_toggles"),
+    "history": ("CommitMetrics", "GitObjects", "analyze_history", "iter_history", "list_commits", "write_history"),
+    "retention": ("Growth", "RetentionPlan", "growth_from_stream", "plan_retention"),
+    "standin": ("Hook", "LoadResult", "StandIn", "load_hooks", "run_load"),
+    "perf": ("Regression", "compare", "generate_tree", "run_suite"),
+}
+_LAZY_MODULES = {name: module for module, names in _LAZY.items() for name in names}
+
+def __getattr__(name):
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = [
+    "ANALYZER_VERSION",
+    "Amplification",
+    "BatchCandidate",
+    "BenchQuery",
+    "BenchResult",
+    "CallSite",
+    "Channel",
+    "ChannelGraph",
+    "CoalescingPolicy",
+    "ColumnSizes",
+    "CommitMetrics",
+    "ConstraintCheck",
+    "DEFAULT_FAN_OUT",
+    "DatabaseCall",
+    "EventStream",
+    "FailureLog",
+    "FileCost",
+    "FileScan",
+    "Filter",
+    "GitObjects",
+    "Growth",
+    "HandlerCost",
+    "Hook",
+    "INDEX_DIRECTORY",
+    "IndexStats",
+    "LoadResult",
+    "ModuleTypes",
+    "NOTIFICATION_TYPE_CATEGORIES",
+    "NotificationFeature",
+    "PayloadEstimate",
+    "PayloadReport",
+    "Phase",
+    "PolicyCost",
+    "PolicyResult",
+    "Profiler",
+    "QueryPlan",
+    "QueryShape",
+    "REQUIRED_NOTIFICATION_TYPES",
+    "REQUIRED_REALTIME_TABLES",
+    "RecordWriter",
+    "Regression",
+    "ReplayStats",
+    "RetentionPlan",
+    "RlsReport",
+    "RlsScale",
+    "RoundTripModel",
+    "RouteCensus",
+    "SCHEMA_VERSION",
+    "ScanIndex",
+    "Schema",
+    "StandIn",
+    "Status",
+    "Subscription",
+    "ToggleEmitter",
+    "ToggleReport",
+    "TypeResolver",
+    "TypeSet",
+    "WorkloadProfile",
+    "WorkloadStats",
+    "advise_tree",
+    "analyze_history",
+    "analyze_logs",
+    "analyze_policies",
+    "analyze_toggles",
+    "build_graph",
+    "classify_notification_types",
+    "compare",
+    "discover_migrations",
+    "discover_query_files",
+    "discover_source_files",
+    "estimate_payloads",
+    "fit_sizes",
+    "generate_rows",
+    "generate_tree",
+    "generate_workload",
+    "growth_from_stream",
+    "incremental_scan",
+    "iter_history",
+    "list_commits",
+    "load_events",
+    "load_hooks",
+    "load_policies",
+    "load_schema",
+    "normalize_error",
+    "open_writer",
+    "parse_duration",
+    "parse_policy",
+    "plan_query",
+    "plan_retention",
+    "replay",
+    "replay_toggles",
+    "run_benchmark",
+    "run_load",
+    "run_suite",
+    "scan_files",
+    "scan_module",
+    "scan_queries",
+    "scan_subscription_files",
+    "scan_subscriptions",
+    "scan_tree",
+    "simulate",
+    "suggest_index",
+    "synthetic_events",
+    "tokenize",
+    "translate",
+    "verify_type_constraint",
+    "write_history",
+]
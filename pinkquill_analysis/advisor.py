@@ -0,0 +1,250 @@
+"""
+Index advisor for Supabase query shapes.
+
+Matches each extracted query (see queries.py) against the indexes the
+migrations declare and works out, the way a B-tree planner would, whether
+the query can seek on an index, whether it still has to sort, and which
+composite index would serve it. Hot queries are the ones re-run from a
+`postgres_changes` callback, i.e. on every realtime event for every
+subscribed client.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .index import ScanIndex
+from .instrument import Profiler, phase
+from .queries import QueryShape, discover_query_files, scan_queries
+from .schema import Index, Schema
+from .source import mask_comments, split_arguments
+
+# Access paths, best first
+INDEX_ONLY = "index"          # every equality/range filter and the ORDER BY come from one index
+INDEX_FILTER = "index+filter"  # seeks on an index, filters the remaining predicates row by row
+INDEX_SORT = "index+sort"      # seeks on an index but still sorts the matching rows
+SEQ_SCAN = "seq scan"          # no index on any filtered or ordered column
+
+_REALTIME_RE = re.compile(r"\.\s*on\s*(\()\s*['\"]postgres_changes['\"]")
+_CALLED_RE = re.compile(r"([A-Za-z_$][\w$]*)(?:Ref\.current)?\s*(?:\?\.)?\s*\(")
+_PREDICATE_RE = re.compile(r"^\(?\s*(\w+)\s*(?:=\s*(\w+|'[^']*')|IS\s+(NOT\s+)?NULL)\s*\)?$", re.IGNORECASE)
+
+@dataclass
+class QueryPlan:
+    query: QueryShape
+    access: str
+    index: Optional[str] = None
+    # Filter columns the chosen index does not cover
+    unindexed: List[str] = field(default_factory=list)
+    needs_sort: bool = False
+    suggestion: Optional[str] = None
+    hot: bool = False
+
+    @property
+    def problem(self) -> bool:
+        return self.access in (SEQ_SCAN, INDEX_SORT) or bool(self.unindexed)
+
+def realtime_handlers(text: str) -> Set[str]:
+    """Names of functions a file calls from its postgres_changes callbacks.
+
+    `fetchCountRef.current()` counts as a call to fetchCount, the usual way
+    these hooks keep the latest callback without re-subscribing.
+    """
+
+    masked = mask_comments(text)
+    handlers = set()
+    for match in _REALTIME_RE.finditer(masked):
+        arguments, _ = split_arguments(masked, match.start(1))
+        for callback in arguments[2:]:
+            handlers.update(_CALLED_RE.findall(callback))
+    return handlers
+
+def _primary_key(table: str) -> Index:
+    # Tables the repo never CREATEs still have Supabase's uuid primary key
+    return Index(
+        name=f"{table}_pkey",
+        table=table,
+        columns=[{"name": "id", "expression": False, "descending": False}],
+        unique=True,
+        implicit=True,
+        source="(assumed)",
+    )
+
+def table_indexes(schema: Schema, table: str) -> List[Index]:
+    indexes = schema.indexes_on(table)
+    if not any(index.name == f"{table}_pkey" for index in indexes):
+        known = schema.tables.get(table)
+        if known is None or known.created_in is None:
+            indexes.append(_primary_key(table))
+    return indexes
+
+def _predicate_implied(where: Optional[str], query: QueryShape) -> bool:
+    """True when a partial index's WHERE clause is implied by the query's filters."""
+
+    if not where:
+        return True
+    equalities = {item.column: (item.value or "").lower() for item in query.filters if item.operator in ("eq", "is")}
+    for condition in re.split(r"\s+AND\s+", where, flags=re.IGNORECASE):
+        match = _PREDICATE_RE.match(condition.strip())
+        if not match:
+            return False
+        column, value, negated = match.group(1), match.group(2), match.group(3)
+        if match.group(2) is None:
+            if negated:
+                # col IS NOT NULL holds whenever the query pins col to a value
+                if not any(item.column == column and item.value not in (None, "null") for item in query.filters if item.kind == "equality"):
+                    return False
+            elif equalities.get(column) != "null":
+                return False
+        elif equalities.get(column) != value.lower():
+            return False
+    return True
+
+def _evaluate(index: Index, query: QueryShape) -> Tuple[int, bool, List[str]]:
+    """Return (seek columns, ORDER BY satisfied, filter columns left over) for one index."""
+
+    equality = query.columns("equality")
+    ranges = query.columns("range")
+    columns = index.columns
+
+    prefix = 0
+    while prefix < len(columns) and not columns[prefix]["expression"] and columns[prefix]["name"] in equality:
+        prefix += 1
+    used = prefix
+    if used < len(columns) and not columns[used]["expression"] and columns[used]["name"] in ranges:
+        used += 1
+
+    order = [(column, descending) for column, descending in query.order if column not in equality]
+    sorted_ok = not order
+    if order and used == prefix:
+        following = columns[prefix:prefix + len(order)]
+        if len(following) == len(order) and all(not c["expression"] and c["name"] == o[0] for c, o in zip(following, order)):
+            flips = {c["descending"] != o[1] for c, o in zip(following, order)}
+            # A B-tree can be read backwards, but not with mixed directions
+            sorted_ok = len(flips) == 1
+
+    covered = {column["name"] for column in columns[:used]}
+    leftover = [column for column in equality + ranges if column not in covered]
+    return used, sorted_ok, leftover
+
+def suggest_index(query: QueryShape) -> Optional[str]:
+    """CREATE INDEX statement serving the query: equality columns, then range, then ORDER BY."""
+
+    equality = [item for item in query.filters if item.kind == "equality" and not item.conditional]
+    constant = [item for item in equality if item.operator in ("eq", "is") and item.value in ("true", "false", "null")]
+    keys = [item.column for item in equality if item not in constant]
+    # Boolean/null flags on top of a real key make a smaller partial index instead
+    predicate = constant if keys else []
+    if not keys:
+        keys = [item.column for item in equality]
+
+    for column in query.columns("range"):
+        if column not in keys:
+            keys.append(column)
+            break
+    else:
+        for column, descending in query.order:
+            if column not in keys:
+                keys.append(f"{column} DESC" if descending else column)
+
+    if not keys:
+        return None
+
+    names = [key.split()[0] for key in keys]
+    name = f"idx_{query.table}_{'_'.join(names)}"
+    statement = f"CREATE INDEX {{name}} ON {query.table} ({', '.join(keys)})"
+    if predicate:
+        name += "_" + "_".join(f"{item.column}_{item.value}" for item in predicate)
+        statement += " WHERE " + " AND ".join(
+            f"{item.column} IS NULL" if item.value == "null" else f"{item.column} = {item.value}" for item in predicate
+        )
+    return statement.format(name=name) + ";"
+
+def plan_query(query: QueryShape, schema: Schema, hot: bool = False) -> QueryPlan:
+    """Pick the best declared index for a query and describe the access path."""
+
+    best = None
+    best_score = None
+    for index in table_indexes(schema, query.table):
+        if not _predicate_implied(index.where, query):
+            continue
+        used, sorted_ok, leftover = _evaluate(index, query)
+        if used == 0 and not (sorted_ok and query.order):
+            continue
+        score = (used, sorted_ok, -len(leftover), -len(index.columns))
+        if best_score is None or score > best_score:
+            best, best_score = (index, sorted_ok, leftover), score
+
+    filtered = bool(query.columns("equality") or query.columns("range"))
+    if best is None:
+        plan = QueryPlan(query=query, access=SEQ_SCAN, needs_sort=bool(query.order),
+                         unindexed=query.columns("equality") + query.columns("range"), hot=hot)
+    else:
+        index, sorted_ok, leftover = best
+        access = INDEX_SORT if not sorted_ok else (INDEX_FILTER if leftover else INDEX_ONLY)
+        plan = QueryPlan(query=query, access=access, index=index.name, unindexed=leftover,
+                         needs_sort=not sorted_ok, hot=hot)
+
+    if plan.problem and (filtered or query.order):
+        plan.suggestion = suggest_index(query)
+    return plan
+
+def advise(queries: Iterable[QueryShape], schema: Schema, hot_handlers: Dict[str, Set[str]]) -> List[QueryPlan]:
+    """Plan every query that has to find rows; hot_handlers maps path -> realtime-triggered handlers."""
+
+    plans = []
+    for query in queries:
+        if not query.reads:
+            continue
+        hot = query.handler is not None and query.handler in hot_handlers.get(query.path, ())
+        plans.append(plan_query(query, schema, hot))
+    return plans
+
+def consolidate(plans: Sequence[QueryPlan]) -> List[Tuple[str, List[QueryPlan]]]:
+    """Group problem plans by suggested index, hottest and most shared first."""
+
+    grouped: Dict[str, List[QueryPlan]] = {}
+    for plan in plans:
+        if plan.suggestion:
+            grouped.setdefault(plan.suggestion, []).append(plan)
+    return sorted(grouped.items(), key=lambda item: (-sum(p.hot for p in item[1]), -len(item[1]), item[0]))
+
+def advise_tree(
+    root: str,
+    schema: Schema,
+    paths: Optional[Sequence[str]] = None,
+    index: Optional[ScanIndex] = None,
+    profiler: Optional[Profiler] = None,
+) -> List[QueryPlan]:
+    """Extract and plan the queries in every query file under root.
+
+    With an index, unchanged files' query shapes and realtime handlers come
+    from it and only changed files are re-parsed; the index is saved after.
+    """
+
+    queries = []
+    hot_handlers = {}
+    with phase(profiler, "query advisor") as item:
+        for path in discover_query_files(root) if paths is None else paths:
+            cached = None
+            if index is not None:
+                cached, signature = index.lookup_queries(path)
+                item.lookups += 1
+            if cached is not None:
+                shapes, handlers = cached
+                item.hits += 1
+            else:
+                with open(os.path.join(root, path), "rb") as handle:
+                    text = handle.read().decode("utf-8", errors="replace")
+                shapes, handlers = scan_queries(path, text), realtime_handlers(text)
+                if index is not None:
+                    index.store_queries(path, shapes, handlers, signature)
+            queries.extend(shapes)
+            hot_handlers[path] = set(handlers)
+        plans = advise(queries, schema, hot_handlers)
+
+    if index is not None:
+        with phase(profiler, "scan index"):
+            index.save()
+    return plans
@@ -0,0 +1,443 @@
+"""
+SQLite stand-in benchmark for the notification queries.
+
+Creates notifications, profiles, posts and communities in SQLite with the
+columns the migrations declare plus the ones the benchmarked queries use
+(the base tables were created in the Supabase dashboard, so the migrations
+only ALTER them). It bulk-loads a synthetic dataset with one INSERT ...
+SELECT per table, so loading runs inside SQLite. Then it times the exact
+query shapes that useNotifications, useUnreadCount, useMarkAsRead and
+createNotification send, translated to SQL:
+
+- embedded relations (`actor:profiles!notifications_actor_id_fkey (...)`)
+  become LEFT JOINs;
+- `count: "exact", head: true` becomes SELECT count(*).
+
+Each size is timed three times, with progressively more indexes:
+
+- with no secondary indexes;
+- with the indexes the migrations declare;
+- with the advisor's suggestions added on top.
+
+The last variant lists every query whose plan doesn't use the index the
+advisor suggested for it, since its timings then don't measure that index.
+
+Writes run inside a transaction that is rolled back, so every run sees the
+same data. Results go to a JSON file with sorted keys and a fixed order,
+so they can be diffed across commits.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .advisor import advise, realtime_handlers
+from .model import REQUIRED_NOTIFICATION_TYPES
+from .queries import QueryShape, scan_queries
+from .schema import Schema
+from .source import split_arguments
+
+RESULT_VERSION = 2
+
+BENCH_TABLES = ("notifications", "profiles", "posts", "communities")
+BENCH_SIZES = (1_000, 100_000, 10_000_000)
+BENCH_SOURCE = "lib/hooks/useNotifications.ts"
+# Handler -> hook it belongs to, in report order
+BENCHMARKED = (
+    ("fetchNotifications", "useNotifications"),
+    ("fetchCount", "useUnreadCount"),
+    ("markAsRead", "useMarkAsRead"),
+    ("markAllAsRead", "useMarkAsRead"),
+    ("createNotification", "createNotification"),
+)
+DEFAULT_RUNS = 20
+
+# Index variants, timed in this order on the same data
+NO_INDEXES = "none"
+MIGRATION_INDEXES = "migrations"
+ADVISED_INDEXES = "migrations+advisor"
+
+# Rows in the other tables per notification
+_ROWS_PER_PROFILE = 50
+_ROWS_PER_POST = 10
+_ROWS_PER_COMMUNITY = 500
+# Share of notifications already read
+_READ_SHARE = 0.8
+
+_EMBED_RE = re.compile(r"^(?:([A-Za-z_]\w*)\s*:\s*)?([A-Za-z_]\w*)(?:!([A-Za-z_]\w*))?\s*\((.*)\)$", re.DOTALL)
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_]\w*$")
+_INTEGER_TYPES = ("INT", "BOOL", "SERIAL")
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_INDEX_NAME_RE = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)", re.IGNORECASE)
+
+@dataclass
+class Embed:
+    alias: str
+    table: str
+    # Foreign key column on the parent table
+    column: str
+    columns: List[str] = field(default_factory=list)
+    # The embed's own projection, nested embeds included
+    projection: str = ""
+
+@dataclass
+class BenchQuery:
+    name: str
+    hook: str
+    shape: QueryShape
+    sql: str
+    # Parameter name for each "?" in sql, in order
+    parameters: List[str] = field(default_factory=list)
+
+    @property
+    def writes(self) -> bool:
+        return self.shape.operation in ("insert", "update", "upsert", "delete")
+
+@dataclass
+class BenchResult:
+    rows: int
+    indexes: str
+    query: str
+    median_ms: float
+    p95_ms: float
+    plan: str
+
+def singular(table: str) -> str:
+    """Singular of a table name, as PostgREST's embed foreign keys use it: posts -> post."""
+
+    if table.endswith("ies"):
+        return table[:-3] + "y"
+    return table[:-1] if table.endswith("s") else table
+
+def parse_embeds(projection: Optional[str], table: str) -> Tuple[List[str], List[Embed]]:
+    """Split a select() projection into own columns and embedded relations."""
+
+    if not projection:
+        return ["*"], []
+    entries, _ = split_arguments("(" + projection + ")", 0)
+    columns, embeds = [], []
+    for entry in entries:
+        entry = entry.strip()
+        match = _EMBED_RE.match(entry)
+        if match:
+            alias, related, hint, inner = match.groups()
+            column = f"{singular(related)}_id"
+            # notifications_actor_id_fkey -> actor_id
+            if hint and hint.startswith(f"{table}_") and hint.endswith("_fkey"):
+                column = hint[len(table) + 1:-len("_fkey")]
+            inner_columns = [c.strip() for c in split_arguments("(" + inner + ")", 0)[0] if _IDENTIFIER_RE.match(c.strip())]
+            embeds.append(Embed(alias or related, related, column, inner_columns, inner.strip()))
+        elif entry == "*" or _IDENTIFIER_RE.match(entry):
+            columns.append(entry)
+    return columns or ["*"], embeds
+
+def _sql_value(value: Optional[str]) -> Optional[str]:
+    # true/false stay as written, not 1/0: SQLite only uses a partial index
+    # (WHERE read = false) for a query that spells its predicate the same way,
+    # down to the literal's case and the column's qualification
+    if value == "null":
+        return "NULL"
+    return value
+
+def _where(shape: QueryShape, parameters: List[str], qualified: bool = False) -> str:
+    # Unqualified unless joins need it, for the same reason as _sql_value
+    conditions = []
+    for item in shape.filters:
+        if item.conditional or item.column == "*":
+            continue
+        column = f"{shape.table}.{item.column}" if qualified else item.column
+        literal = _sql_value(item.value)
+        if item.operator == "is":
+            conditions.append(f"{column} IS {literal or 'NULL'}")
+        elif item.operator == "in":
+            conditions.append(f"{column} IN (?)")
+            parameters.append(item.column)
+        elif item.operator in _OPERATORS:
+            if literal is None:
+                parameters.append(item.column)
+            conditions.append(f"{column} {_OPERATORS[item.operator]} {literal or '?'}")
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+def translate(shape: QueryShape) -> Tuple[str, List[str]]:
+    """SQLite statement and parameter names for a query shape."""
+
+    parameters: List[str] = []
+    table = shape.table
+    if shape.operation == "insert":
+        columns = list(shape.values)
+        parameters.extend(columns)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", parameters
+    if shape.operation == "update":
+        assignments = []
+        for column, value in shape.values.items():
+            literal = _sql_value(value)
+            if literal is None:
+                parameters.append(column)
+            assignments.append(f"{column} = {literal or '?'}")
+        return f"UPDATE {table} SET {', '.join(assignments)}" + _where(shape, parameters), parameters
+    if shape.operation == "delete":
+        return f"DELETE FROM {table}" + _where(shape, parameters), parameters
+
+    if shape.head and shape.count:
+        return f"SELECT count(*) FROM {table}" + _where(shape, parameters), parameters
+
+    columns, embeds = parse_embeds(shape.projection, table)
+    selected = [f"{table}.{column}" for column in columns]
+    joins = []
+    for embed in embeds:
+        selected.extend(f"{embed.alias}.{column} AS \"{embed.alias}.{column}\"" for column in embed.columns)
+        joins.append(f" LEFT JOIN {embed.table} AS {embed.alias} ON {embed.alias}.id = {table}.{embed.column}")
+    sql = f"SELECT {', '.join(selected)} FROM {table}" + "".join(joins) + _where(shape, parameters, bool(joins))
+    if shape.order:
+        sql += " ORDER BY " + ", ".join(f"{table}.{column}{' DESC' if descending else ''}" for column, descending in shape.order)
+    if shape.limit is not None:
+        sql += f" LIMIT {shape.limit}"
+    return sql, parameters
+
+def benchmark_queries(root: str) -> List[BenchQuery]:
+    """The benchmarked query shapes from BENCH_SOURCE, in BENCHMARKED order."""
+
+    with open(os.path.join(root, BENCH_SOURCE), "r", encoding="utf-8") as handle:
+        shapes = [shape for shape in scan_queries(BENCH_SOURCE, handle.read()) if shape.table == "notifications"]
+    queries = []
+    for handler, hook in BENCHMARKED:
+        shape = next((shape for shape in shapes if shape.handler == handler), None)
+        if shape is not None:
+            sql, parameters = translate(shape)
+            queries.append(BenchQuery(handler, hook, shape, sql, parameters))
+    return queries
+
+def table_columns(schema: Schema, queries: Sequence[BenchQuery]) -> Dict[str, Dict[str, str]]:
+    """Column -> SQLite type for each benchmark table: migration columns plus those the queries use."""
+
+    tables: Dict[str, Dict[str, str]] = {name: {"id": "INTEGER PRIMARY KEY"} for name in BENCH_TABLES}
+    for name in BENCH_TABLES:
+        known = schema.tables.get(name)
+        for column in (known.columns.values() if known else ()):
+            if column.name != "id":
+                tables[name][column.name] = _affinity(column.data_type)
+
+    def need(table: str, column: str):
+        if table in tables and column not in tables[table] and column != "*":
+            tables[table][column] = _guess_type(column)
+
+    for query in queries:
+        shape = query.shape
+        for item in shape.filters:
+            need(shape.table, item.column)
+        for column, _ in shape.order:
+            need(shape.table, column)
+        for column in shape.values:
+            need(shape.table, column)
+        columns, embeds = parse_embeds(shape.projection, shape.table)
+        for column in columns:
+            need(shape.table, column)
+        for embed in embeds:
+            need(shape.table, embed.column)
+            for column in embed.columns:
+                need(embed.table, column)
+    need("notifications", "created_at")
+    return tables
+
+def _affinity(data_type: str) -> str:
+    upper = data_type.upper()
+    if any(marker in upper for marker in _INTEGER_TYPES):
+        return "INTEGER"
+    if upper.startswith("TIMESTAMP") or upper in ("NUMERIC", "REAL", "DOUBLE PRECISION"):
+        return "REAL"
+    # uuid keys are synthetic integers here; everything else is text
+    return "INTEGER" if upper == "UUID" else "TEXT"
+
+def _guess_type(column: str) -> str:
+    if column == "id" or column.endswith("_id"):
+        return "INTEGER"
+    if column.endswith("_at"):
+        return "REAL"
+    if column in ("read",) or column.startswith(("is_", "has_")):
+        return "INTEGER"
+    return "TEXT"
+
+def _hash(expression: str, modulus: int) -> str:
+    """Deterministic pseudo-random integer in [0, modulus) from a row number."""
+    return f"((({expression}) * 2654435761) % 4294967291) % {max(1, modulus)}"
+
+def _generated(table: str, column: str, column_type: str, counts: Dict[str, int]) -> str:
+    """SQL expression for one synthetic column value of row n."""
+
+    if column == "id":
+        return "n"
+    if column == "user_id" and table == "notifications":
+        # Cubed uniform: low user ids receive most notifications, like a popular few
+        fraction = f"({_hash('n + 7', 1000003)} / 1000003.0)"
+        return f"1 + CAST({counts['profiles']} * {fraction} * {fraction} * {fraction} AS INTEGER)"
+    if column.endswith("_id"):
+        related = {"user": "profiles", "actor": "profiles", "author": "profiles", "post": "posts",
+                   "community": "communities", "created_by": "profiles"}.get(column[:-3], None)
+        return "1 + " + _hash("n + 13", counts.get(related, counts["profiles"]))
+    if column == "type" and table == "notifications":
+        types = list(REQUIRED_NOTIFICATION_TYPES)
+        return "CASE n % {} {} END".format(len(types), " ".join(f"WHEN {i} THEN '{name}'" for i, name in enumerate(types)))
+    if column == "read":
+        return f"({_hash('n + 3', 100)} < {int(_READ_SHARE * 100)})"
+    if column_type == "REAL":
+        return "1700000000.0 + n"
+    if column_type == "INTEGER":
+        return "0"
+    return f"'{column}_' || n"
+
+def _load(connection: sqlite3.Connection, tables: Dict[str, Dict[str, str]], rows: int) -> Dict[str, int]:
+    counts = {
+        "notifications": rows,
+        "profiles": max(10, rows // _ROWS_PER_PROFILE),
+        "posts": max(10, rows // _ROWS_PER_POST),
+        "communities": max(2, rows // _ROWS_PER_COMMUNITY),
+    }
+    for name, columns in tables.items():
+        connection.execute(f"DROP TABLE IF EXISTS {name}")
+        connection.execute(f"CREATE TABLE {name} ({', '.join(f'{c} {t}' for c, t in columns.items())})")
+        expressions = ", ".join(_generated(name, column, column_type, counts) for column, column_type in columns.items())
+        connection.execute(
+            f"INSERT INTO {name} ({', '.join(columns)}) "
+            f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {counts[name]}) "
+            f"SELECT {expressions} FROM seq"
+        )
+    connection.commit()
+    return counts
+
+def _index_sql(schema: Schema, tables: Dict[str, Dict[str, str]]) -> List[str]:
+    statements = []
+    for index in schema.indexes.values():
+        if index.table not in tables or index.implicit or index.method != "btree":
+            continue
+        keys = []
+        for column in index.columns:
+            if not column["expression"] and column["name"] not in tables[index.table]:
+                break
+            keys.append(column["name"] + (" DESC" if column["descending"] else ""))
+        else:
+            statement = f"CREATE {'UNIQUE ' if index.unique else ''}INDEX {index.name} ON {index.table} ({', '.join(keys)})"
+            if index.where:
+                statement += f" WHERE {index.where}"
+            statements.append(statement)
+    return statements
+
+def _parameters(query: BenchQuery, run: int, runs: int, counts: Dict[str, int]) -> List:
+    # Spread the bound ids over the same skew the data has, heavy users first
+    fraction = run / max(1, runs)
+    values = {
+        "user_id": 1 + int(counts["profiles"] * fraction ** 3),
+        "id": 1 + int(fraction * (counts["notifications"] - 1)),
+        "actor_id": 1 + (run * 7919) % counts["profiles"],
+        "type": "admire",
+        "post_id": 1 + run % counts["posts"],
+        "community_id": None,
+        "comment_id": None,
+        "content": None,
+    }
+    return [values.get(name) for name in query.parameters]
+
+def _plan(connection: sqlite3.Connection, query: BenchQuery, counts: Dict[str, int]) -> str:
+    rows = connection.execute("EXPLAIN QUERY PLAN " + query.sql, _parameters(query, 0, 1, counts)).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+def _uses_index(plan: str, index: str) -> bool:
+    return re.search(rf"\bINDEX {re.escape(index)}\b", plan) is not None
+
+def _time(connection: sqlite3.Connection, query: BenchQuery, runs: int, counts: Dict[str, int]) -> Tuple[float, float]:
+    timings = []
+    for run in range(runs):
+        parameters = _parameters(query, run, runs, counts)
+        if query.writes:
+            connection.execute("BEGIN")
+        started = time.perf_counter()
+        connection.execute(query.sql, parameters).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+        if query.writes:
+            connection.rollback()
+    timings.sort()
+    return timings[len(timings) // 2], timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+
+def run_benchmark(
+    root: str,
+    schema: Schema,
+    sizes: Sequence[int] = BENCH_SIZES,
+    runs: int = DEFAULT_RUNS,
+    directory: Optional[str] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """Load each size, time every query under each index variant and return the JSON-ready result."""
+
+    queries = benchmark_queries(root)
+    tables = table_columns(schema, queries)
+    with open(os.path.join(root, BENCH_SOURCE), "r", encoding="utf-8") as handle:
+        hot = {BENCH_SOURCE: realtime_handlers(handle.read())}
+    advised = []
+    # Query name -> name of the index the advisor suggested for it
+    expected: Dict[str, str] = {}
+    for plan in advise([query.shape for query in queries], schema, hot):
+        if plan.problem and plan.suggestion:
+            if plan.suggestion not in advised:
+                advised.append(plan.suggestion)
+            name = _INDEX_NAME_RE.match(plan.suggestion)
+            if name and plan.query.handler:
+                expected[plan.query.handler] = name.group(1)
+
+    results: List[BenchResult] = []
+    misses: List[Dict] = []
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        for rows in sizes:
+            path = os.path.join(scratch, f"bench-{rows}.sqlite")
+            connection = sqlite3.connect(path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute("PRAGMA cache_size = -262144")
+            connection.execute("BEGIN")
+            if progress:
+                progress(f"loading {rows:,} notifications")
+            counts = _load(connection, tables, rows)
+
+            variants = ((NO_INDEXES, []), (MIGRATION_INDEXES, _index_sql(schema, tables)), (ADVISED_INDEXES, advised))
+            for variant, statements in variants:
+                for statement in statements:
+                    try:
+                        connection.execute(statement.rstrip(";"))
+                    except sqlite3.OperationalError:
+                        # Postgres-only syntax (expression indexes on jsonb, operator classes): skip it
+                        pass
+                connection.execute("ANALYZE")
+                if progress:
+                    progress(f"timing {rows:,} rows, indexes: {variant}")
+                for query in queries:
+                    median, p95 = _time(connection, query, runs, counts)
+                    plan = _plan(connection, query, counts)
+                    results.append(BenchResult(rows, variant, query.name, round(median, 3), round(p95, 3), plan))
+                    # The advised timings only mean something if SQLite actually picked the advised index
+                    if variant == ADVISED_INDEXES and query.name in expected and not _uses_index(plan, expected[query.name]):
+                        misses.append({"rows": rows, "query": query.name, "index": expected[query.name], "plan": plan})
+            connection.close()
+            os.remove(path)
+
+    return {
+        "version": RESULT_VERSION,
+        "sqlite": sqlite3.sqlite_version,
+        "runs": runs,
+        "sizes": list(sizes),
+        "advised_indexes": advised,
+        "advised_index_misses": misses,
+        "queries": {
+            query.name: {"hook": query.hook, "source": query.shape.location, "shape": query.shape.describe(), "sql": query.sql}
+            for query in queries
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+def write_result(result: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(result, handle, indent=2, sort_keys=True)
+        handle.write("\n")
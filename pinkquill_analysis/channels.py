@@ -0,0 +1,438 @@
+"""
+Realtime channel census.
+
+Builds a graph of the app's components and hooks: the hooks each top-level
+definition calls, the components it renders (inside a `.map()` list or
+behind a condition) and the `.channel()` calls it makes. Walking that graph
+from each route's layouts and page gives the channels open at once for a
+list of N posts, and every channel is checked for a removeChannel()
+cleanup in the hook or component that opens it.
+"""
+
+import os
+import posixpath
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .realtime import channel_name, outermost
+from .scanner import discover_source_files
+from .source import DefinitionIndex, LineIndex, body_extent, mask_comments, split_arguments
+
+APP_DIRECTORY = "app"
+PAGE_FILES = ("page.tsx", "page.ts")
+LAYOUT_FILES = ("layout.tsx", "layout.ts")
+# useFeed's DEFAULT_PAGE_SIZE
+DEFAULT_POSTS = 20
+
+HOOK = "hook"
+RENDER = "render"
+
+_CHANNEL_RE = re.compile(r"\.\s*channel\s*\(")
+_HOOK_CALL_RE = re.compile(r"use[A-Z][\w$]*\s*(?:<[^<>()]*>)?\s*\(")
+_JSX_RE = re.compile(r"<([A-Z][\w$]*(?:\.[A-Z][\w$]*)?)[\s/>]")
+_MAP_RE = re.compile(r"\.\s*(?:map|flatMap)\s*\(")
+_IMPORT_RE = re.compile(r"import\s+(?!type\b)(?:([A-Za-z_$][\w$]*)\s*,?\s*)?(?:\{([^}]*)\})?\s*from\s*['\"]([^'\"]+)['\"]")
+_REEXPORT_RE = re.compile(r"export\s+(?:\*|\{([^}]*)\})\s*from\s*['\"]([^'\"]+)['\"]")
+_DEFAULT_EXPORT_RE = re.compile(
+    r"export\s+default\s+(?:async\s+)?(?:function\s+([A-Za-z_$][\w$]*)|(?:React\.)?(?:memo|forwardRef)\s*\(\s*([A-Za-z_$][\w$]*)\s*[,)]|([A-Za-z_$][\w$]*)\s*;?\s*$)",
+    re.MULTILINE,
+)
+# `const Card = memo(CardComponent, areEqual)` / `const Card = CardComponent;`
+_ALIAS_RE = re.compile(
+    r"(?:const|let|var)\s+([A-Z][\w$]*)\s*=\s*(?:(?:React\.)?(?:memo|forwardRef)\s*\(\s*([A-Z][\w$]*)\s*[,)]|([A-Z][\w$]*)\s*;)"
+)
+_BINDING_RE = re.compile(r"(?:(?:const|let|var)\s+)?([A-Za-z_$][\w$]*(?:\.current)?)\s*=\s*(?:await\s+)?[\w$.\s]*$")
+_REF_STORE_RE = r"([A-Za-z_$][\w$]*)\.current\s*=\s*{}\b"
+_REMOVE_RE = re.compile(r"removeChannel\s*\(\s*([\w$.]+)\s*\)|([\w$.]+)\s*\.\s*unsubscribe\s*\(\s*\)")
+_REMOVE_ALL_RE = re.compile(r"\.\s*removeAllChannels\s*\(")
+# `cond && (`, `a || <`, `x ? (`, `: <`: an operator that introduces JSX
+_GUARD_RE = re.compile(r"(?:&&|\|\||\?(?![.?])|:)\s*[(<]")
+_REVERSED_TOKEN_RE = re.compile(r"[()\[\]{}\"]")
+_REVERSED_RETURN_RE = re.compile(r"\bnruter\b")
+# How far back to look for the `{` of the enclosing JSX expression
+_GUARD_WINDOW = 5000
+_WORD_OR_DOT_RE = re.compile(r"[\w$.]")
+_DECLARED_RE = re.compile(r"function\s*$")
+_RETURN_RE = re.compile(r"return\b")
+_RETURN_TAIL_RE = re.compile(r"(?:^|[^\w$.])return$")
+
+# Identity hashing: channels are counted in Counters
+@dataclass(eq=False)
+class Channel:
+    path: str
+    line: int
+    owner: Optional[str]
+    # Name as written, e.g. reactions:${postId}
+    name: str
+    # Variable or ref the channel is kept in, if any
+    variable: Optional[str] = None
+    cleaned: bool = False
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.line}"
+
+    @property
+    def templated(self) -> bool:
+        return "${" in self.name
+
+@dataclass
+class Edge:
+    target: str
+    kind: str
+    line: int
+    # Rendered inside a .map() callback: once per list item
+    per_item: bool = False
+    # Behind `cond &&`, a ternary or `||`: not necessarily mounted
+    conditional: bool = False
+    # Offset of the outermost `return` the element is in; different returns are alternatives
+    branch: Optional[int] = None
+
+@dataclass
+class Definition:
+    path: str
+    name: str
+    line: int
+    edges: List[Edge] = field(default_factory=list)
+    channels: List[Channel] = field(default_factory=list)
+
+@dataclass
+class Module:
+    path: str
+    definitions: Dict[str, Definition] = field(default_factory=dict)
+    # Local name -> (import specifier, exported name or "default")
+    imports: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    # (specifier, names or None for `export *`)
+    reexports: List[Tuple[str, Optional[List[str]]]] = field(default_factory=list)
+    default: Optional[str] = None
+
+def _names(clause: str) -> List[Tuple[str, str]]:
+    """`A, B as C, type D` -> [(A, A), (B, C)] as (exported, local)."""
+
+    pairs = []
+    for part in clause.split(","):
+        part = part.strip()
+        if not part or part.startswith("type "):
+            continue
+        exported, _, local = part.partition(" as ")
+        pairs.append((exported.strip(), (local or exported).strip()))
+    return pairs
+
+def _conditional(reversed_text: str, offset: int) -> bool:
+    """True when a `&&`, `||` or ternary guards the element in the JSX it is returned in.
+
+    Walks backwards (forwards over the reversed text) keeping only what is at
+    the element's own nesting level, through enclosing `{...}` expression
+    containers, until the `return` or the function body it belongs to.
+    Balanced groups and attribute strings before the element are skipped, so
+    `{open && (<div><Header /><Item /></div>)}` marks Item as guarded but
+    `{a && <A />}<Item />` does not.
+    """
+
+    position = len(reversed_text) - offset
+    limit = min(len(reversed_text), position + _GUARD_WINDOW)
+    kept = []
+    depth = 0
+    while position < limit:
+        token = _REVERSED_TOKEN_RE.search(reversed_text, position, limit)
+        end = token.start() if token else limit
+        if not depth:
+            segment = reversed_text[position:end]
+            statement = _REVERSED_RETURN_RE.search(segment)
+            if statement:
+                kept.append(segment[:statement.start()])
+                break
+            kept.append(segment)
+        if token is None:
+            break
+        character = token.group()
+        position = token.end()
+        if character == '"':
+            if not depth:
+                closing = reversed_text.find('"', position, limit)
+                position = closing + 1 if closing != -1 else limit
+        elif character in ")]}":
+            depth += 1
+        elif depth:
+            depth -= 1
+        elif character == "{":
+            # A function body (`=> {`, `) {`) ends the search; an expression container doesn't
+            if reversed_text[position:position + 80].lstrip().startswith((">=", ")")):
+                break
+        else:
+            kept.append(character)
+    return bool(_GUARD_RE.search("".join(kept)[::-1] + "<"))
+
+def _cleaned(masked: str, scope: Tuple[int, int], variable: Optional[str]) -> bool:
+    body = masked[scope[0]:scope[1]]
+    if _REMOVE_ALL_RE.search(body):
+        return True
+    if variable is None:
+        return False
+    kept = {variable}
+    if not variable.endswith(".current"):
+        kept.update(f"{ref}.current" for ref in re.findall(_REF_STORE_RE.format(re.escape(variable)), body))
+    removed = {match.group(1) or match.group(2) for match in _REMOVE_RE.finditer(body)}
+    return bool(kept & removed)
+
+def scan_module(path: str, text: str) -> Module:
+    """Top-level definitions of one file with their hook calls, rendered components and channels."""
+
+    module = Module(path)
+    masked = mask_comments(text)
+    lines = LineIndex(text)
+    spans = DefinitionIndex(masked).spans()
+
+    for match in _IMPORT_RE.finditer(masked):
+        default, named, specifier = match.groups()
+        if default:
+            module.imports[default] = (specifier, "default")
+        for exported, local in _names(named or ""):
+            module.imports[local] = (specifier, exported)
+    for match in _REEXPORT_RE.finditer(masked):
+        module.reexports.append((match.group(2), [local for _, local in _names(match.group(1))] if match.group(1) else None))
+    for match in _ALIAS_RE.finditer(masked):
+        module.aliases[match.group(1)] = match.group(2) or match.group(3)
+    default = _DEFAULT_EXPORT_RE.search(masked)
+    if default:
+        module.default = next(name for name in default.groups() if name)
+
+    top = []
+    end = -1
+    for start, stop, name in spans:
+        if start >= end:
+            top.append((start, stop, name))
+            module.definitions.setdefault(name, Definition(path, name, lines.line_of(start)))
+            end = stop
+
+    def owner(offset: int) -> Optional[Definition]:
+        span = outermost(top, offset)
+        return module.definitions.get(span[2]) if span else None
+
+    for match in _HOOK_CALL_RE.finditer(masked):
+        start = match.start()
+        if start and _WORD_OR_DOT_RE.match(masked, start - 1) or _DECLARED_RE.search(masked, max(0, start - 12), start):
+            continue
+        definition = owner(start)
+        name = masked[start:match.end()].split("(")[0].split("<")[0].strip()
+        if definition is not None and name != definition.name:
+            definition.edges.append(Edge(name, HOOK, lines.line_of(start)))
+
+    if path.endswith(".tsx"):
+        lists = [(match.start(), split_arguments(masked, match.end() - 1)[1]) for match in _MAP_RE.finditer(masked)]
+        reversed_text = masked[::-1]
+        returns = []
+        for match in _RETURN_RE.finditer(masked):
+            start = match.start()
+            if start and _WORD_OR_DOT_RE.match(masked, start - 1) or returns and start < returns[-1][1]:
+                continue
+            returns.append((start, body_extent(masked, match.end())))
+        for match in _JSX_RE.finditer(masked):
+            start = match.start()
+            before = masked[max(0, start - 200):start].rstrip()
+            # `useState<Post>(`, `Array<Post>` and `Record<K, Post>` are type arguments, not elements
+            if not before or before[-1] in ",<" or _WORD_OR_DOT_RE.match(before[-1]) and not _RETURN_TAIL_RE.search(before):
+                continue
+            definition = owner(start)
+            if definition is None:
+                continue
+            definition.edges.append(Edge(
+                match.group(1).split(".")[0],
+                RENDER,
+                lines.line_of(start),
+                per_item=any(begin < start < finish for begin, finish in lists),
+                conditional=_conditional(reversed_text, start),
+                branch=next((begin for begin, finish in returns if begin < start < finish), None),
+            ))
+
+    for match in _CHANNEL_RE.finditer(masked):
+        span = outermost(top, match.start())
+        scope = (span[0], span[1]) if span else (0, len(masked))
+        arguments, _ = split_arguments(masked, match.end() - 1)
+        statement = max(masked.rfind(";", 0, match.start()), masked.rfind("{", 0, match.start()), masked.rfind("}", 0, match.start())) + 1
+        binding = _BINDING_RE.search(masked, statement, match.start())
+        variable = binding.group(1) if binding else None
+        channel = Channel(
+            path=path,
+            line=lines.line_of(match.start()),
+            owner=span[2] if span else None,
+            name=channel_name(masked, arguments[0] if arguments else "", scope),
+            variable=variable,
+            cleaned=_cleaned(masked, scope, variable),
+        )
+        definition = owner(match.start())
+        if definition is not None:
+            definition.channels.append(channel)
+
+    return module
+
+@dataclass
+class RouteCensus:
+    route: str
+    # Layouts outermost first, then the page
+    files: List[str]
+    # Channel -> instances opened once per page / once per list item; mounted counts skip conditional renders
+    fixed: Counter = field(default_factory=Counter)
+    per_item: Counter = field(default_factory=Counter)
+    mounted_fixed: Counter = field(default_factory=Counter)
+    mounted_per_item: Counter = field(default_factory=Counter)
+
+    def open(self, items: int, mounted: bool = True) -> int:
+        """Channels open at once with `items` list items rendered."""
+
+        fixed, per_item = (self.mounted_fixed, self.mounted_per_item) if mounted else (self.fixed, self.per_item)
+        return sum(fixed.values()) + items * sum(per_item.values())
+
+    def topics(self, items: int, mounted: bool = True) -> int:
+        """Distinct channel names: per-item channels named after the item are one topic each."""
+
+        fixed, per_item = (self.mounted_fixed, self.mounted_per_item) if mounted else (self.fixed, self.per_item)
+        names = {channel.name for channel in fixed}
+        shared = {channel.name for channel in per_item if not channel.templated} - names
+        return len(names) + len(shared) + items * len({channel.name for channel in per_item if channel.templated})
+
+class ChannelGraph:
+    """Components, hooks and channels across the source tree, with imports resolved."""
+
+    def __init__(self, modules: Dict[str, Module]):
+        self.modules = modules
+        self._totals: Dict[Tuple[str, str], Tuple[Counter, Counter, Counter, Counter]] = {}
+
+    @property
+    def channels(self) -> List[Channel]:
+        return sorted((channel for module in self.modules.values() for definition in module.definitions.values()
+                       for channel in definition.channels), key=lambda channel: (channel.path, channel.line))
+
+    def _module_path(self, importer: str, specifier: str) -> Optional[str]:
+        if specifier.startswith("@/"):
+            base = specifier[2:]
+        elif specifier.startswith("."):
+            base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+        else:
+            return None
+        for candidate in (base, base + ".ts", base + ".tsx", base + "/index.ts", base + "/index.tsx"):
+            if candidate in self.modules:
+                return candidate
+        return None
+
+    def resolve(self, path: str, name: str, depth: int = 0) -> Optional[Definition]:
+        """The definition `name` refers to in `path`: local, aliased, imported or re-exported."""
+
+        module = self.modules.get(path)
+        if module is None or depth > 8:
+            return None
+        if name in module.definitions:
+            return module.definitions[name]
+        if name in module.aliases and module.aliases[name] != name:
+            return self.resolve(path, module.aliases[name], depth + 1)
+        if name in module.imports:
+            specifier, exported = module.imports[name]
+            target = self._module_path(path, specifier)
+            if target is None:
+                return None
+            if exported == "default":
+                default = self.modules[target].default
+                return self.resolve(target, default, depth + 1) if default else None
+            return self.resolve(target, exported, depth + 1)
+        for specifier, names in module.reexports:
+            if names is None or name in names:
+                target = self._module_path(path, specifier)
+                found = self.resolve(target, name, depth + 1) if target else None
+                if found is not None:
+                    return found
+        return None
+
+    def default_definition(self, path: str) -> Optional[Definition]:
+        module = self.modules.get(path)
+        return self.resolve(path, module.default) if module and module.default else None
+
+    def totals(self, definition: Definition, visiting: Optional[Set[Tuple[str, str]]] = None):
+        """(fixed, per item, mounted fixed, mounted per item) channel counters for one rendered instance."""
+
+        key = (definition.path, definition.name)
+        if key in self._totals:
+            return self._totals[key]
+        visiting = visiting or set()
+        if key in visiting:
+            return Counter(), Counter(), Counter(), Counter()
+        visiting.add(key)
+
+        # Hooks and elements outside any return always count; each return is one alternative render
+        branches: Dict[Optional[int], Tuple[Counter, Counter, Counter, Counter]] = {}
+        for edge in definition.edges:
+            target = self.resolve(definition.path, edge.target)
+            if target is None:
+                continue
+            fixed, per_item, mounted_fixed, mounted_per_item = branches.setdefault(edge.branch, (Counter(), Counter(), Counter(), Counter()))
+            child_fixed, child_per_item, child_mounted_fixed, child_mounted_per_item = self.totals(target, visiting)
+            # Lists inside a list item are counted once per item; their own length isn't known
+            if edge.per_item:
+                per_item.update(child_fixed + child_per_item)
+                if not edge.conditional:
+                    mounted_per_item.update(child_mounted_fixed + child_mounted_per_item)
+            else:
+                fixed.update(child_fixed)
+                per_item.update(child_per_item)
+                if not edge.conditional:
+                    mounted_fixed.update(child_mounted_fixed)
+                    mounted_per_item.update(child_mounted_per_item)
+
+        always = branches.pop(None, (Counter(), Counter(), Counter(), Counter()))
+        fixed, per_item, mounted_fixed, mounted_per_item = (Counter(definition.channels) + always[0], always[1],
+                                                            Counter(definition.channels) + always[2], always[3])
+        if branches:
+            # The branch that opens the most channels, per-item ones first
+            widest = max(branches.values(), key=lambda branch: (sum(branch[1].values()), sum(branch[0].values())))
+            fixed.update(widest[0])
+            per_item.update(widest[1])
+            widest = max(branches.values(), key=lambda branch: (sum(branch[3].values()), sum(branch[2].values())))
+            mounted_fixed.update(widest[2])
+            mounted_per_item.update(widest[3])
+
+        visiting.discard(key)
+        self._totals[key] = (fixed, per_item, mounted_fixed, mounted_per_item)
+        return self._totals[key]
+
+    def routes(self) -> List[RouteCensus]:
+        """Every app/ page with its layouts, in route order."""
+
+        censuses = []
+        for path in sorted(self.modules):
+            directory, filename = posixpath.split(path)
+            if filename not in PAGE_FILES or not (directory + "/").startswith(APP_DIRECTORY + "/"):
+                continue
+            files = []
+            parts = directory.split("/")
+            for depth in range(1, len(parts) + 1):
+                for layout in LAYOUT_FILES:
+                    candidate = "/".join(parts[:depth] + [layout])
+                    if candidate in self.modules:
+                        files.append(candidate)
+            files.append(path)
+            # Route groups like (feed) don't appear in the URL
+            route = "/" + "/".join(part for part in parts[1:] if not (part.startswith("(") and part.endswith(")")))
+
+            census = RouteCensus(route, files)
+            for file in files:
+                definition = self.default_definition(file)
+                if definition is None:
+                    continue
+                fixed, per_item, mounted_fixed, mounted_per_item = self.totals(definition)
+                census.fixed.update(fixed)
+                census.per_item.update(per_item)
+                census.mounted_fixed.update(mounted_fixed)
+                census.mounted_per_item.update(mounted_per_item)
+            censuses.append(census)
+        return censuses
+
+def build_graph(root: str, paths: Optional[Sequence[str]] = None) -> ChannelGraph:
+    """Scan every source file (or the given ones) into a ChannelGraph."""
+
+    modules = {}
+    for path in discover_source_files(root) if paths is None else paths:
+        with open(os.path.join(root, path), "rb") as handle:
+            modules[path] = scan_module(path, handle.read().decode("utf-8", errors="replace"))
+    return ChannelGraph(modules)
@@ -0,0 +1,345 @@
+"""
+Notification coalescing simulator.
+
+Replays a stream of notification rows, synthetic or exported from the
+notifications table, through coalescing policies: rows for the same
+recipient that share a key (post and type, say) inside a time window become
+one aggregate row ("N people reacted"). Per policy it counts the rows
+written, the realtime changes NotificationPanel's subscription hears, and
+the bytes it refetches on each of them, all vectorized with NumPy.
+
+Policies are written KEY/WINDOW[/DELIVERY], e.g. `post+type/15m` or
+`post+kind/1h/digest`. KEY joins columns with `+` (recipient is implied;
+`kind` is the type with the reaction types folded together). With `update`
+delivery the first event inserts the row and later ones update it in place;
+with `digest` the group is written once, when its window closes.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .bench import Embed, benchmark_queries, parse_embeds, table_columns
+from .model import parse_duration
+from .payload import ColumnSizes, read_records
+from .realtime import scan_subscription_files
+from .schema import Schema
+from .workload import NO_ID, NOTIFICATION_TYPES, REACTION_TYPES, WorkloadProfile, generate_rows, row_bytes
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - workload.py reports the missing dependency
+    np = None
+
+UPDATE = "update"
+DIGEST = "digest"
+
+# Types a policy folds by default: engagement where "N people ..." reads naturally
+COALESCABLE_TYPES = REACTION_TYPES + ("comment_like", "relay", "save", "follow")
+KEY_COLUMNS = ("actor", "post", "community", "comment", "type", "kind")
+DEFAULT_POLICIES = ("none", "post+type/15m", "post+type/15m/digest", "post+kind/1h", "post+kind/1h/digest", "type/1d/digest")
+
+PANEL_TABLE = "notifications"
+PANEL_LIMIT = 50
+
+# actor_count integer on the row, and `"actor_count":N,` in its JSON
+_AGGREGATE_ROW_BYTES = 4
+_AGGREGATE_JSON_BYTES = 17
+
+_SHORT_OFFSET_RE = re.compile(r"([+-]\d\d)$")
+
+# Column-name guesses for the panel's payload, shared with the payload estimator
+_SIZES = ColumnSizes()
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("the coalescing simulator needs NumPy (pip install numpy)")
+
+@dataclass(frozen=True)
+class CoalescingPolicy:
+    name: str
+    # Columns besides the recipient that must match for two events to share a row
+    key: Tuple[str, ...] = ()
+    # Seconds per (tumbling) window; 0 never coalesces
+    window: float = 0.0
+    delivery: str = UPDATE
+    types: Tuple[str, ...] = COALESCABLE_TYPES
+
+def parse_policy(spec: str) -> CoalescingPolicy:
+    """`post+type/15m/digest` -> CoalescingPolicy; `none` is the uncoalesced baseline."""
+
+    spec = spec.strip()
+    if spec == "none":
+        return CoalescingPolicy(spec)
+    parts = spec.split("/")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"bad policy {spec!r}: expected KEY/WINDOW[/DELIVERY]")
+    key = tuple(column for column in parts[0].split("+") if column and column != "recipient")
+    unknown = [column for column in key if column not in KEY_COLUMNS]
+    if unknown:
+        raise ValueError(f"bad policy {spec!r}: unknown key column(s) {', '.join(unknown)}; use {'+'.join(KEY_COLUMNS)}")
+    delivery = parts[2] if len(parts) == 3 else UPDATE
+    if delivery not in (UPDATE, DIGEST):
+        raise ValueError(f"bad policy {spec!r}: delivery is {UPDATE} or {DIGEST}")
+    return CoalescingPolicy(spec, key, parse_duration(parts[1]), delivery)
+
+@dataclass
+class EventStream:
+    """Notification rows as columns (see workload.py), ordered by time."""
+
+    columns: Dict[str, "np.ndarray"]
+    source: str
+    # Rows whose type isn't in REQUIRED_NOTIFICATION_TYPES
+    skipped: int = 0
+
+    @property
+    def rows(self) -> int:
+        return len(self.columns["time"])
+
+    @property
+    def days(self) -> float:
+        times = self.columns["time"]
+        return float(times.max() - times.min()) / 86400 if len(times) else 0.0
+
+def _ordered(columns: Dict[str, "np.ndarray"]) -> Dict[str, "np.ndarray"]:
+    order = np.argsort(columns["time"], kind="stable")
+    return {name: values[order] for name, values in columns.items()}
+
+def synthetic_events(profile: Optional[WorkloadProfile] = None) -> EventStream:
+    """The synthetic workload's rows, all days together."""
+
+    _require_numpy()
+    profile = profile or WorkloadProfile()
+    days = list(generate_rows(profile))
+    columns = {name: np.concatenate([day[name] for day in days]) for name in days[0]}
+    return EventStream(_ordered(columns), f"synthetic, {profile.users:,} users, {profile.days} day(s), seed {profile.seed}")
+
+def _timestamp(text: str) -> float:
+    # Postgres writes `2024-05-01 12:34:56.789+00`; fromisoformat wants +00:00
+    text = _SHORT_OFFSET_RE.sub(r"\1:00", text.strip().replace("Z", "+00:00"))
+    return datetime.fromisoformat(text).timestamp()
+
+def _codes(values: List[str]) -> "np.ndarray":
+    """Map ids to dense integers; empty ids become NO_ID."""
+
+    labels, codes = np.unique(np.array(values, dtype=object).astype(str), return_inverse=True)
+    codes = codes.astype(np.int64)
+    empty = np.flatnonzero((labels == "") | (labels == "None"))
+    if len(empty):
+        codes[np.isin(codes, empty)] = NO_ID
+    return codes
+
+def load_events(path: str) -> EventStream:
+    """Read an export of the notifications table (CSV or JSON lines, optionally gzipped)."""
+
+    _require_numpy()
+    fields = {"recipient": "user_id", "actor": "actor_id", "post": "post_id", "community": "community_id", "comment": "comment_id"}
+    values: Dict[str, List] = {name: [] for name in fields}
+    types, times = [], []
+    skipped = 0
+    for record in read_records(path):
+        type_name = record.get("type") or ""
+        if type_name not in NOTIFICATION_TYPES:
+            skipped += 1
+            continue
+        types.append(NOTIFICATION_TYPES.index(type_name))
+        times.append(_timestamp(record["created_at"]))
+        for name, column in fields.items():
+            values[name].append(record.get(column) or "")
+
+    # Users are one id space: the same person is a recipient here and an actor there
+    people = _codes(values["recipient"] + values["actor"])
+    count = len(types)
+    columns = {
+        "recipient": people[:count],
+        "actor": people[count:],
+        "post": _codes(values["post"]),
+        "community": _codes(values["community"]),
+        "comment": _codes(values["comment"]),
+        "type": np.array(types, dtype=np.int8),
+        "time": np.array(times, dtype=np.float64),
+    }
+    if count:
+        columns["time"] -= columns["time"].min()
+    return EventStream(_ordered(columns), os.path.basename(path), skipped)
+
+@dataclass
+class PanelModel:
+    """What NotificationPanel does on a realtime change: refetch its newest `limit` rows."""
+
+    location: str
+    limit: int = PANEL_LIMIT
+    # Change events that trigger the refetch
+    events: Tuple[str, ...] = ("INSERT", "UPDATE")
+    columns: List[str] = field(default_factory=list)
+    embeds: List[Embed] = field(default_factory=list)
+
+    def row_bytes(self, columns: Dict[str, "np.ndarray"]) -> "np.ndarray":
+        """Estimated JSON bytes of each row in the refetch, embeds included."""
+
+        count = len(columns["time"])
+        total = np.zeros(count, dtype=np.int64)
+        for column in self.columns:
+            present = _present(columns, column, count)
+            total += np.where(present, _json_bytes(column), len(column) + 8)
+        for embed in self.embeds:
+            full = len(embed.alias) + 5 + sum(_json_bytes(column) for column in embed.columns)
+            total += np.where(_present(columns, embed.column, count), full, len(embed.alias) + 8)
+        return total
+
+def _json_bytes(column: str) -> int:
+    """`"column":value,` for a typical value of the column, by its name."""
+    return int(_SIZES.field_bytes(None, column))
+
+def _present(columns: Dict[str, "np.ndarray"], column: str, count: int) -> "np.ndarray":
+    # post_id -> the workload's post column; columns it doesn't model are always set
+    name = column[:-3] if column.endswith("_id") else column
+    if name in ("post", "community", "comment"):
+        return columns[name] != NO_ID
+    return np.ones(count, dtype=bool)
+
+def panel_model(root: str, schema: Schema) -> Optional[PanelModel]:
+    """The panel's refetch, from the notifications subscription whose callback reloads rows."""
+
+    for subscription in scan_subscription_files(root):
+        if subscription.table != PANEL_TABLE:
+            continue
+        for query in subscription.queries:
+            if query.table == PANEL_TABLE and query.operation == "select" and not query.head:
+                columns, embeds = parse_embeds(query.projection, PANEL_TABLE)
+                if columns == ["*"]:
+                    columns = list(table_columns(schema, benchmark_queries(root)).get(PANEL_TABLE, {}))
+                events = tuple(event for event in ("INSERT", "UPDATE") if subscription.hears(PANEL_TABLE, event))
+                return PanelModel(subscription.location, query.limit or PANEL_LIMIT, events, columns, embeds)
+    return None
+
+@dataclass
+class PolicyResult:
+    policy: CoalescingPolicy
+    events: int
+    rows: int
+    # Events folded into a row another event created
+    coalesced: int
+    row_bytes: int
+    # Realtime changes the panel hears, and the bytes of the refetches they trigger
+    broadcasts: int
+    fetch_bytes: int
+    # Seconds between an event and the change that delivers it: percentile -> seconds
+    delay: Dict[float, float] = field(default_factory=dict)
+    # Events behind the newest `limit` rows at the end, over users with rows: percentile -> events
+    panel_events: Dict[float, float] = field(default_factory=dict)
+
+def _key_column(columns: Dict[str, "np.ndarray"], name: str) -> "np.ndarray":
+    if name == "kind":
+        reactions = np.isin(columns["type"], [NOTIFICATION_TYPES.index(type_name) for type_name in REACTION_TYPES])
+        return np.where(reactions, -1, columns["type"].astype(np.int64))
+    return columns[name]
+
+def _groups(columns: Dict[str, "np.ndarray"], policy: CoalescingPolicy) -> Tuple["np.ndarray", "np.ndarray", int]:
+    """Group id per event (groups numbered in order of their first event), window end per event, group count."""
+
+    times = columns["time"]
+    count = len(times)
+    ends = times.copy()
+    if policy.window <= 0 or not count:
+        return np.arange(count), ends, count
+
+    folded = np.flatnonzero(np.isin(columns["type"], [NOTIFICATION_TYPES.index(name) for name in policy.types]))
+    bucket = np.floor(times[folded] / policy.window).astype(np.int64)
+    keys = [columns["recipient"][folded]] + [_key_column(columns, name)[folded] for name in policy.key] + [bucket]
+    # lexsort's last key is the primary one; ties keep stream (time) order
+    order = np.lexsort(keys[::-1])
+    starts = np.ones(len(order), dtype=bool)
+    for key in keys:
+        ordered = key[order]
+        starts[1:] &= ordered[1:] == ordered[:-1]
+    starts = ~starts
+    starts[:1] = True
+
+    labels = np.empty(count, dtype=np.int64)
+    labels[folded[order]] = folded[order][np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+    alone = np.ones(count, dtype=bool)
+    alone[folded] = False
+    labels[alone] = np.flatnonzero(alone)
+    ends[folded] = (bucket + 1) * policy.window
+
+    # Renumber by first event so group ids follow the stream
+    firsts, groups = np.unique(labels, return_inverse=True)
+    return groups, ends, len(firsts)
+
+def _rows_so_far(recipients: "np.ndarray", times: "np.ndarray", inserts: "np.ndarray") -> "np.ndarray":
+    """For each change, the rows its recipient has once the change is applied."""
+
+    order = np.lexsort((times, recipients))
+    added = inserts[order].astype(np.int64)
+    total = np.cumsum(added)
+    ordered = recipients[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = ordered[1:] != ordered[:-1]
+    before = np.maximum.accumulate(np.where(first, total - added, 0))
+    result = np.empty(len(order), dtype=np.int64)
+    result[order] = total - before
+    return result
+
+def _percentiles(values: "np.ndarray", points=(50, 95, 99)) -> Dict[float, float]:
+    return {p: float(np.percentile(values, p)) for p in points} if len(values) else {}
+
+def replay(stream: EventStream, policy: CoalescingPolicy, panel: Optional[PanelModel] = None) -> PolicyResult:
+    """Run one policy over the stream."""
+
+    _require_numpy()
+    columns = stream.columns
+    times = columns["time"]
+    groups, ends, count = _groups(columns, policy)
+    sizes = np.bincount(groups, minlength=count)
+    _, firsts = np.unique(groups, return_index=True)
+    heads = {name: values[firsts] for name, values in columns.items()}
+    aggregate = sizes > 1
+
+    stored = int(row_bytes(heads).sum()) + _AGGREGATE_ROW_BYTES * int(aggregate.sum())
+    result = PolicyResult(policy, len(times), count, len(times) - count, stored, 0, 0)
+
+    if policy.delivery == DIGEST:
+        # One INSERT per group when its window closes
+        change_times = ends[firsts]
+        change_users = heads["recipient"]
+        inserts = np.ones(count, dtype=bool)
+        result.delay = _percentiles(ends - times)
+    else:
+        # INSERT for the first event of a group, UPDATE for the rest
+        change_times = times
+        change_users = columns["recipient"]
+        inserts = np.zeros(len(times), dtype=bool)
+        inserts[firsts] = True
+
+    if panel is not None:
+        heard = np.zeros(len(inserts), dtype=bool)
+        if "INSERT" in panel.events:
+            heard |= inserts
+        if "UPDATE" in panel.events:
+            heard |= ~inserts
+        visible = np.minimum(_rows_so_far(change_users, change_times, inserts), panel.limit)
+        per_row = panel.row_bytes(heads) + np.where(aggregate, _AGGREGATE_JSON_BYTES, 0)
+        result.broadcasts = int(heard.sum())
+        result.fetch_bytes = int(visible[heard].sum() * per_row.mean()) if count else 0
+
+        # Newest `limit` rows per user at the end, and how many events they stand for
+        last = ends[firsts].copy()
+        if policy.delivery == UPDATE:
+            np.maximum.at(last, groups, times)
+        order = np.lexsort((-last, heads["recipient"]))
+        users = heads["recipient"][order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = users[1:] != users[:-1]
+        starts = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+        shown = np.arange(len(order)) - starts < panel.limit
+        per_user = np.bincount(users[shown], weights=sizes[order][shown])
+        result.panel_events = _percentiles(per_user[np.unique(users)])
+    return result
+
+def simulate(stream: EventStream, policies: Sequence[CoalescingPolicy], panel: Optional[PanelModel] = None) -> List[PolicyResult]:
+    """replay() each policy over the same stream."""
+
+    return [replay(stream, policy, panel) for policy in policies]
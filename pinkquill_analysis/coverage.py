@@ -0,0 +1,129 @@
+"""
+Classify notification type coverage from scanned call sites.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Sequence
+
+from .model import NOTIFICATION_TYPE_CATEGORIES, NotificationFeature, REQUIRED_NOTIFICATION_TYPES, Status
+from .scanner import CallSite, FileScan
+from .typeflow import TypeResolver
+
+# How many call sites to spell out in a feature's notes before summarising
+MAX_LISTED_SITES = 4
+
+def _describe_sites(sites: Sequence[CallSite]) -> str:
+    described = []
+    for site in sites[:MAX_LISTED_SITES]:
+        handler = f" ({site.handler})" if site.handler else ""
+        described.append(f"{site.location}{handler}")
+    if len(sites) > MAX_LISTED_SITES:
+        described.append(f"+{len(sites) - MAX_LISTED_SITES} more")
+    return ", ".join(described)
+
+def classify_notification_types(
+    scans: Iterable[FileScan],
+    required: Mapping[str, str] = REQUIRED_NOTIFICATION_TYPES,
+    categories: Mapping[str, Sequence[str]] = NOTIFICATION_TYPE_CATEGORIES,
+) -> Dict[str, List[NotificationFeature]]:
+    """Work out IMPLEMENTED/PARTIAL/MISSING for every required notification type.
+
+    IMPLEMENTED: some call site passes the type as a string literal, or a
+    variable that typeflow resolves to a set of literals including it.
+    PARTIAL: no such call site, but the type's literal appears in a file
+    whose createNotification() calls pass a variable we could not resolve.
+    MISSING: neither.
+    """
+
+    literal_sites: Dict[str, List[CallSite]] = defaultdict(list)
+    resolved_sites: Dict[str, List[CallSite]] = defaultdict(list)
+    dynamic_sites: List[CallSite] = []
+    candidate_sites: Dict[str, List[CallSite]] = defaultdict(list)
+
+    scans = list(scans)
+    resolver = TypeResolver({scan.path: scan.types for scan in scans if scan.types})
+    for scan in scans:
+        file_dynamic = []
+        for site in scan.call_sites:
+            for literal in site.type_literals:
+                literal_sites[literal].append(site)
+            if not site.is_dynamic:
+                continue
+            literals, complete = resolver.resolve(scan.path, site.type_set) if site.type_set else (frozenset(), False)
+            for literal in literals:
+                resolved_sites[literal].append(site)
+            if not complete:
+                file_dynamic.append(site)
+        for literal in scan.literals:
+            candidate_sites[literal].extend(file_dynamic)
+        dynamic_sites.extend(file_dynamic)
+
+    results: Dict[str, List[NotificationFeature]] = {}
+    categorised = set()
+
+    for category, types in categories.items():
+        results[category] = []
+        for notification_type in types:
+            if notification_type not in required:
+                continue
+            categorised.add(notification_type)
+            results[category].append(_classify(notification_type, required[notification_type], literal_sites,
+                                               resolved_sites, candidate_sites, dynamic_sites))
+
+    uncategorised = [t for t in required if t not in categorised]
+    if uncategorised:
+        results["Other Notification Types"] = [
+            _classify(t, required[t], literal_sites, resolved_sites, candidate_sites, dynamic_sites) for t in uncategorised
+        ]
+
+    return results
+
+def _classify(
+    notification_type: str,
+    description: str,
+    literal_sites: Mapping[str, List[CallSite]],
+    resolved_sites: Mapping[str, List[CallSite]],
+    candidate_sites: Mapping[str, List[CallSite]],
+    dynamic_sites: Sequence[CallSite],
+) -> NotificationFeature:
+    sites = literal_sites.get(notification_type, [])
+    if sites:
+        return NotificationFeature(
+            name=notification_type,
+            description=description,
+            status=Status.IMPLEMENTED,
+            notes=f"createNotification(..., '{notification_type}', ...) at {_describe_sites(sites)}",
+            location=sites[0].location,
+        )
+
+    sites = resolved_sites.get(notification_type, [])
+    if sites:
+        expressions = sorted({site.type_expression for site in sites})
+        return NotificationFeature(
+            name=notification_type,
+            description=description,
+            status=Status.IMPLEMENTED,
+            notes=f"createNotification(..., {', '.join(expressions)}, ...) resolves to '{notification_type}' at {_describe_sites(sites)}",
+            location=sites[0].location,
+        )
+
+    candidates = candidate_sites.get(notification_type, [])
+    if candidates:
+        return NotificationFeature(
+            name=notification_type,
+            description=description,
+            status=Status.PARTIAL,
+            notes=f"Only reachable through a variable type argument at {_describe_sites(candidates)}",
+            location=candidates[0].location,
+        )
+
+    notes = "No createNotification call found for this type"
+    if dynamic_sites:
+        notes += f" ({len(dynamic_sites)} call sites pass an unresolved variable)"
+    return NotificationFeature(
+        name=notification_type,
+        description=description,
+        status=Status.MISSING,
+        notes=notes,
+        location=None,
+    )
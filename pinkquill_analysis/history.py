@@ -0,0 +1,257 @@
+"""
+Notification metrics over the project's git history.
+
+analyze_history() walks a range of commits (first parent only, oldest
+first) and measures each one the way the report measures HEAD: notification
+type coverage, round-trips from notification-sending handlers and realtime
+channels. Nothing is checked out. Commits, trees and blobs are read from
+one long-lived `git cat-file --batch` process. A tree or blob whose hash was
+seen before is not read or parsed again. Adjacent commits share almost all
+their blobs, so the range is split into contiguous chunks, one per worker,
+and each worker keeps its own caches.
+"""
+
+import csv
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .channels import DEFAULT_POSTS, ChannelGraph, Module, scan_module
+from .coverage import classify_notification_types
+from .model import REQUIRED_NOTIFICATION_TYPES, Status
+from .records import open_writer
+from .roundtrips import DEFAULT_FAN_OUT, RoundTripModel
+from .scanner import NOTIFY_FUNCTION, SOURCE_DIRECTORIES, FileScan, is_source_file, scan_source
+
+# Below this many commits per worker a process pool costs more than it saves
+PARALLEL_MIN_COMMITS = 16
+
+_TREE_MODE = b"40000"
+
+class GitObjects:
+    """Objects read through one `git cat-file --batch` process."""
+
+    def __init__(self, root: str):
+        self._process = subprocess.Popen(["git", "-C", root, "cat-file", "--batch"],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, name: str) -> Tuple[str, bytes]:
+        """(type, content) of the object a hash or revision names."""
+
+        self._process.stdin.write(name.encode() + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise RuntimeError(f"git has no object {name!r}")
+        data = self._process.stdout.read(int(header[2]))
+        # Each object is followed by a newline
+        self._process.stdout.read(1)
+        return header[1].decode(), data
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+    def __enter__(self) -> "GitObjects":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+@dataclass
+class Commit:
+    sha: str
+    # Committer time, epoch seconds
+    time: int
+    subject: str
+
+def list_commits(root: str, revisions: str, max_count: Optional[int] = None) -> List[Commit]:
+    """Commits in a range like `v1.0..HEAD` (or a revision's whole history), oldest first."""
+
+    command = ["git", "-C", root, "log", "--first-parent", "--reverse", "--format=%H%x00%ct%x00%s"]
+    if max_count:
+        # --reverse applies after the limit, so this keeps the newest commits
+        command.append(f"--max-count={max_count}")
+    result = subprocess.run(command + [revisions, "--"], capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip() or f"git log {revisions} failed")
+    commits = []
+    for line in result.stdout.splitlines():
+        sha, timestamp, subject = line.split("\0", 2)
+        commits.append(Commit(sha, int(timestamp), subject))
+    return commits
+
+@dataclass
+class CommitMetrics:
+    commit: str
+    date: str
+    subject: str
+    files: int
+    # Required notification types by status, as in the report
+    types_implemented: int
+    types_partial: int
+    types_missing: int
+    call_sites: int
+    # Handlers that send notifications, and the round-trips they make between them
+    notifying_handlers: int
+    notify_requests: int
+    notify_serial: int
+    # Round-trips sent once per loop item
+    per_item_calls: int
+    channels: int
+    unremoved_channels: int
+    # Most channels any route has open with a page of posts rendered
+    peak_route_channels: int
+    # Source blobs parsed for this commit (the rest were reused)
+    parsed: int
+
+class _Walker:
+    """Source files of commits, with parsed blobs and listed trees cached by hash."""
+
+    def __init__(self, objects: GitObjects):
+        self.objects = objects
+        self._trees: Dict[str, List[Tuple[str, str, bool]]] = {}
+        self._blobs: Dict[Tuple[str, str], Tuple[FileScan, Module]] = {}
+
+    def _tree(self, sha: str) -> List[Tuple[str, str, bool]]:
+        """(name, hash, is a tree) for each entry of a tree object."""
+
+        if sha not in self._trees:
+            _, data = self.objects.read(sha)
+            entries = []
+            position = 0
+            while position < len(data):
+                space = data.index(b" ", position)
+                nul = data.index(b"\0", space)
+                mode, name = data[position:space], data[space + 1:nul].decode("utf-8", errors="replace")
+                entries.append((name, data[nul + 1:nul + 21].hex(), mode == _TREE_MODE))
+                position = nul + 21
+            self._trees[sha] = entries
+        return self._trees[sha]
+
+    def _files(self, tree: str, prefix: str):
+        for name, sha, is_tree in self._tree(tree):
+            path = prefix + name
+            if is_tree:
+                yield from self._files(sha, path + "/")
+            elif is_source_file(path):
+                yield path, sha
+
+    def sources(self, commit: str) -> List[Tuple[str, str]]:
+        """(path, blob hash) of every scannable source file in a commit, sorted by path."""
+
+        _, data = self.objects.read(commit)
+        # A commit object starts `tree <hash>`
+        root = data[5:45].decode()
+        files = []
+        for name, sha, is_tree in self._tree(root):
+            if is_tree and name in SOURCE_DIRECTORIES:
+                files.extend(self._files(sha, name + "/"))
+        return sorted(files)
+
+    def parse(self, path: str, sha: str) -> Tuple[Tuple[FileScan, Module], bool]:
+        """The scan and channel module for a blob, and whether it had to be parsed."""
+
+        key = (path, sha)
+        if key in self._blobs:
+            return self._blobs[key], False
+        _, data = self.objects.read(sha)
+        text = data.decode("utf-8", errors="replace")
+        self._blobs[key] = (scan_source(path, text), scan_module(path, text))
+        return self._blobs[key], True
+
+def _measure(walker: _Walker, commit: Commit, fan_out: int = DEFAULT_FAN_OUT, items: int = DEFAULT_POSTS) -> CommitMetrics:
+    scans, modules, parsed = [], {}, 0
+    for path, sha in walker.sources(commit.sha):
+        (scan, module), fresh = walker.parse(path, sha)
+        scans.append(scan)
+        modules[path] = module
+        parsed += fresh
+
+    statuses = [feature.status for features in classify_notification_types(scans, REQUIRED_NOTIFICATION_TYPES).values()
+                for feature in features]
+    model = RoundTripModel([(scan.path, scan.database_calls) for scan in scans], NOTIFY_FUNCTION, fan_out)
+    senders = [cost for cost in model.handler_costs() if cost.emits_notifications]
+    graph = ChannelGraph(modules)
+    channels = graph.channels
+    return CommitMetrics(
+        commit=commit.sha,
+        date=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(commit.time)),
+        subject=commit.subject,
+        files=len(scans),
+        types_implemented=statuses.count(Status.IMPLEMENTED),
+        types_partial=statuses.count(Status.PARTIAL),
+        types_missing=statuses.count(Status.MISSING),
+        call_sites=sum(len(scan.call_sites) for scan in scans),
+        notifying_handlers=len(senders),
+        notify_requests=sum(cost.requests for cost in senders),
+        notify_serial=max((cost.serial for cost in senders), default=0),
+        per_item_calls=len(model.batch_candidates()),
+        channels=len(channels),
+        unremoved_channels=sum(1 for channel in channels if not channel.cleaned),
+        peak_route_channels=max((census.open(items) for census in graph.routes()), default=0),
+        parsed=parsed,
+    )
+
+def _measure_chunk(commits: Sequence[Commit], root: str, fan_out: int, items: int) -> List[CommitMetrics]:
+    with GitObjects(root) as objects:
+        walker = _Walker(objects)
+        return [_measure(walker, commit, fan_out, items) for commit in commits]
+
+def iter_history(
+    root: str,
+    revisions: str = "HEAD",
+    max_count: Optional[int] = None,
+    workers: Optional[int] = None,
+    fan_out: int = DEFAULT_FAN_OUT,
+    items: int = DEFAULT_POSTS,
+) -> Iterator[CommitMetrics]:
+    """Measure every first-parent commit in a range, yielding them oldest first as they finish."""
+
+    commits = list_commits(root, revisions, max_count)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(commits) // PARALLEL_MIN_COMMITS))
+    if workers == 1:
+        with GitObjects(root) as objects:
+            walker = _Walker(objects)
+            for commit in commits:
+                yield _measure(walker, commit, fan_out, items)
+        return
+
+    bounds = [len(commits) * index // workers for index in range(workers + 1)]
+    chunks = [commits[low:high] for low, high in zip(bounds, bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(partial(_measure_chunk, root=root, fan_out=fan_out, items=items), chunks):
+            yield from chunk
+
+def analyze_history(root: str, revisions: str = "HEAD", **options) -> List[CommitMetrics]:
+    """Measure every first-parent commit in a range, oldest first."""
+
+    return list(iter_history(root, revisions, **options))
+
+def write_history(metrics: Iterable[CommitMetrics], handle, output_format: str = "csv") -> Tuple[int, int, int]:
+    """Write the series as CSV (one row per commit) or as json/jsonl "commit" records.
+
+    Returns (commits, source files parsed, source files measured).
+    """
+
+    if output_format not in ("csv", "json", "jsonl"):
+        raise ValueError(f"history is written as csv, json or jsonl, not {output_format}")
+    commits = parsed = files = 0
+    writer = csv.writer(handle) if output_format == "csv" else open_writer(output_format, handle)
+    if output_format == "csv":
+        writer.writerow([item.name for item in fields(CommitMetrics)])
+    for item in metrics:
+        if output_format == "csv":
+            writer.writerow(list(asdict(item).values()))
+        else:
+            writer.write({"type": "commit", **asdict(item)})
+        commits, parsed, files = commits + 1, parsed + item.parsed, files + item.files
+    if output_format != "csv":
+        writer.close()
+    return commits, parsed, files
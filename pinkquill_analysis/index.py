@@ -0,0 +1,215 @@
+"""
+Persistent incremental scan index.
+
+Per-file scan results are stored under .pinkquill-analysis/ keyed by
+modification time, size and content hash. On a re-run only files whose
+content actually changed are re-parsed; everything else is served from the
+index. Query files also keep the index advisor's query shapes and realtime
+handlers in their entry, so a changed file drops both. The whole index is
+dropped when the analyzer version or the set of required notification
+types changes.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .instrument import Profiler, phase
+from .model import ANALYZER_VERSION, REQUIRED_NOTIFICATION_TYPES
+from .queries import QueryShape
+from .scanner import FileScan, discover_source_files, scan_files
+
+INDEX_DIRECTORY = ".pinkquill-analysis"
+INDEX_FILENAME = "scan-index.json"
+
+def index_fingerprint(required: Mapping[str, str] = REQUIRED_NOTIFICATION_TYPES) -> str:
+    """Hash of everything that makes cached scan results stale when it changes."""
+
+    payload = json.dumps({"version": ANALYZER_VERSION, "required": sorted(required.items())})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Outcomes of check_file()
+STAT_MATCH = "stat"
+HASH_MATCH = "hash"
+CHANGED = "changed"
+
+def check_file(absolute: str, entry: Optional[dict]) -> Tuple[str, Tuple[int, int, str]]:
+    """Compare a file on disk with a cached entry's signature.
+
+    Returns the outcome and the current (mtime_ns, size, sha256) signature.
+    STAT_MATCH trusts mtime and size and does not read the file; HASH_MATCH
+    means the file was touched but its content is unchanged.
+    """
+
+    stat = os.stat(absolute)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return STAT_MATCH, (stat.st_mtime_ns, stat.st_size, entry["sha256"])
+
+    with open(absolute, "rb") as handle:
+        digest = hashlib.sha256(handle.read()).hexdigest()
+    signature = (stat.st_mtime_ns, stat.st_size, digest)
+
+    if entry and entry["sha256"] == digest:
+        return HASH_MATCH, signature
+    return CHANGED, signature
+
+def signature_entry(signature: Tuple[int, int, str], **payload) -> dict:
+    mtime_ns, size, digest = signature
+    return {"mtime_ns": mtime_ns, "size": size, "sha256": digest, **payload}
+
+def refresh_entry(entry: dict, signature: Tuple[int, int, str]):
+    entry["mtime_ns"], entry["size"], entry["sha256"] = signature
+
+@dataclass
+class IndexStats:
+    files: int = 0
+    stat_hits: int = 0
+    hash_hits: int = 0
+    rescanned: int = 0
+    removed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.stat_hits + self.hash_hits) / self.files if self.files else 0.0
+
+class ScanIndex:
+    """On-disk cache of FileScan results for one repository root."""
+
+    def __init__(self, root: str, required: Mapping[str, str] = REQUIRED_NOTIFICATION_TYPES, directory: Optional[str] = None):
+        self.root = root
+        self.path = os.path.join(directory or os.path.join(root, INDEX_DIRECTORY), INDEX_FILENAME)
+        self.fingerprint = index_fingerprint(required)
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+
+        if data.get("fingerprint") != self.fingerprint:
+            # Analyzer or spec changed: start from scratch
+            self.dirty = True
+            return
+        self.entries = data.get("files", {})
+
+    def save(self):
+        """Write the index back if anything changed (atomically)."""
+
+        if not self.dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump({"fingerprint": self.fingerprint, "files": self.entries}, handle, separators=(",", ":"))
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+    def lookup(self, path: str) -> Tuple[Optional[FileScan], Tuple[int, int, str], str]:
+        """Return the cached scan for path if it is still valid.
+
+        Also returns the file's current signature and how it was validated
+        (see check_file).
+        """
+
+        entry = self.entries.get(path)
+        state, signature = check_file(os.path.join(self.root, path), entry)
+        if state == CHANGED or "scan" not in entry:
+            return None, signature, state
+        if state == HASH_MATCH:
+            refresh_entry(entry, signature)
+            self.dirty = True
+        return FileScan.from_dict(entry["scan"]), signature, state
+
+    def store(self, scan: FileScan, signature: Tuple[int, int, str]):
+        self.entries[scan.path] = signature_entry(signature, scan=scan.to_dict())
+        self.dirty = True
+
+    def lookup_queries(self, path: str) -> Tuple[Optional[Tuple[List[QueryShape], List[str]]], Tuple[int, int, str]]:
+        """Return the cached query shapes and realtime handlers for path if still valid, and its signature."""
+
+        entry = self.entries.get(path)
+        state, signature = check_file(os.path.join(self.root, path), entry)
+        if state == CHANGED or "queries" not in entry:
+            return None, signature
+        if state == HASH_MATCH:
+            refresh_entry(entry, signature)
+            self.dirty = True
+        return ([QueryShape.from_dict(query) for query in entry["queries"]], entry["handlers"]), signature
+
+    def store_queries(self, path: str, queries: Sequence[QueryShape], handlers: Sequence[str], signature: Tuple[int, int, str]):
+        """Add query results to path's entry; an entry for other content is replaced."""
+
+        entry = self.entries.get(path)
+        if entry is None or entry["sha256"] != signature[2]:
+            entry = self.entries[path] = signature_entry(signature)
+        entry["queries"] = [query.to_dict() for query in queries]
+        entry["handlers"] = sorted(handlers)
+        self.dirty = True
+
+    def retain(self, paths: List[str]) -> int:
+        """Drop entries for files that no longer exist; return how many."""
+
+        keep = set(paths)
+        stale = [path for path in self.entries if path not in keep]
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.dirty = True
+        return len(stale)
+
+def incremental_scan(
+    root: str,
+    workers: Optional[int] = None,
+    required: Mapping[str, str] = REQUIRED_NOTIFICATION_TYPES,
+    directory: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+    index: Optional[ScanIndex] = None,
+) -> Tuple[List[FileScan], IndexStats]:
+    """Scan the tree, re-parsing only files whose content changed since the last run.
+
+    Pass index to share one loaded ScanIndex with advise_tree().
+    """
+
+    with phase(profiler, "discovery") as item:
+        paths = discover_source_files(root)
+        item.files += len(paths)
+
+    with phase(profiler, "scan index") as item:
+        if index is None:
+            index = ScanIndex(root, required, directory)
+        stats = IndexStats(files=len(paths))
+        stats.removed = index.retain(paths)
+
+        scans: Dict[str, FileScan] = {}
+        pending: Dict[str, Tuple[int, int, str]] = {}
+
+        for path in paths:
+            cached, signature, state = index.lookup(path)
+            if cached is None:
+                pending[path] = signature
+            else:
+                scans[path] = cached
+                if state == STAT_MATCH:
+                    stats.stat_hits += 1
+                else:
+                    stats.hash_hits += 1
+        item.files += len(paths)
+        item.lookups += len(paths)
+        item.hits += stats.stat_hits + stats.hash_hits
+
+    if pending:
+        for scan in scan_files(root, pending, workers=workers, profiler=profiler):
+            scans[scan.path] = scan
+            index.store(scan, pending[scan.path])
+        stats.rescanned = len(pending)
+
+    with phase(profiler, "scan index"):
+        index.save()
+    return [scans[path] for path in paths], stats
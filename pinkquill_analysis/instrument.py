@@ -0,0 +1,129 @@
+"""
+Per-phase instrumentation of the analysis pipeline.
+
+A Profiler collects phases: wall and CPU time, files and bytes processed,
+and cache hits against lookups where the phase has a cache. A phase entered
+more than once (the scan index is read before the scan and written after)
+adds up, and each entry is kept as a span for the trace. Files scanned in
+worker processes report their own time, so the slowest files can be listed
+and shown on per-process tracks; work the workers time inside a file
+(tokenizing) is split out of the enclosing phase with split().
+
+Pipeline functions take `profiler: Optional[Profiler] = None` and open
+phases through phase(), which costs nothing without one. CPU time includes
+worker processes once their pool has shut down; cProfile only ever sees
+this process.
+"""
+
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+@dataclass
+class Phase:
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    files: int = 0
+    bytes: int = 0
+    hits: int = 0
+    lookups: int = 0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        return self.hits / self.lookups if self.lookups else None
+
+@dataclass
+class FileCost:
+    phase: str
+    path: str
+    seconds: float
+    bytes: int
+    # Epoch seconds the work started, and the process that did it
+    started: float
+    pid: int
+
+def _cpu_seconds() -> float:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+def file_bytes(root: str, paths: Iterable[str]) -> int:
+    return sum(os.path.getsize(os.path.join(root, path)) for path in paths)
+
+class Profiler:
+    def __init__(self):
+        self.started = time.time()
+        self.phases: Dict[str, Phase] = {}
+        self.files: List[FileCost] = []
+        # (phase, epoch start, seconds, CPU seconds) of each time a phase was entered
+        self.spans: List[Tuple[str, float, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        item = self.phases.setdefault(name, Phase(name))
+        started, wall, cpu = time.time(), time.perf_counter(), _cpu_seconds()
+        try:
+            yield item
+        finally:
+            elapsed, used = time.perf_counter() - wall, _cpu_seconds() - cpu
+            item.wall += elapsed
+            item.cpu += used
+            self.spans.append((name, started, elapsed, used))
+
+    def split(self, name: str, part: str, fraction: float) -> Phase:
+        """Move fraction of the last `name` span's wall and CPU time to phase `part`."""
+
+        index = max(i for i, span in enumerate(self.spans) if span[0] == name)
+        _, started, elapsed, used = self.spans[index]
+        fraction = min(max(fraction, 0.0), 1.0)
+        item, piece = self.phases[name], self.phases.setdefault(part, Phase(part))
+        item.wall -= elapsed * fraction
+        item.cpu -= used * fraction
+        piece.wall += elapsed * fraction
+        piece.cpu += used * fraction
+        self.spans.append((part, started, elapsed * fraction, used * fraction))
+        return piece
+
+    def file(self, phase: str, path: str, seconds: float, size: int, started: float, pid: int):
+        self.files.append(FileCost(phase, path, seconds, size, started, pid))
+
+    @property
+    def wall(self) -> float:
+        return sum(item.wall for item in self.phases.values())
+
+    def slowest(self, count: int) -> List[FileCost]:
+        return sorted(self.files, key=lambda cost: -cost.seconds)[:count]
+
+    def trace(self) -> Dict:
+        """Chrome trace-event JSON (chrome://tracing, Perfetto): phases on this process's track, files on their workers'."""
+
+        pid = os.getpid()
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "args": {"name": "notification_analysis"}}]
+        for name, started, seconds, _ in self.spans:
+            phase = self.phases[name]
+            events.append({"ph": "X", "cat": "phase", "name": name, "pid": pid, "tid": pid,
+                           "ts": round((started - self.started) * 1e6), "dur": round(seconds * 1e6),
+                           "args": {"files": phase.files, "bytes": phase.bytes, "hits": phase.hits, "lookups": phase.lookups}})
+        for cost in self.files:
+            events.append({"ph": "X", "cat": cost.phase, "name": cost.path, "pid": pid, "tid": cost.pid,
+                           "ts": round((cost.started - self.started) * 1e6), "dur": round(cost.seconds * 1e6),
+                           "args": {"bytes": cost.bytes}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.trace(), handle)
+
+@contextmanager
+def phase(profiler: Optional[Profiler], name: str) -> Iterator[Phase]:
+    """profiler.phase(name), or a throwaway Phase when not profiling."""
+
+    if profiler is None:
+        yield Phase(name)
+        return
+    with profiler.phase(name) as item:
+        yield item
@@ -0,0 +1,298 @@
+"""
+Streaming analysis of createNotification() failure logs.
+
+createNotification() never throws; it logs and returns false:
+
+    [createNotification] Failed to create notification: { type: 'admire', userId: '...', actorId: '...', error: '...' }
+    [createNotification] Unexpected error: fetch failed
+
+Production logs of these run to gigabytes, often gzipped. analyze_logs()
+reads them with bounded memory: plain files are memory-mapped and searched
+for the "[createNotification]" marker directly, so lines that aren't ours
+are never decoded, and a big file is split into byte ranges scanned in a
+process pool; gzipped files are read in blocks, one file per worker. Lines
+may be plain text (console output, with a timestamp prefix) or JSON log
+entries with the text under "message".
+
+Failures are counted by notification type, by error message (UUIDs and
+numbers folded so one constraint violation is one message) and by time
+bucket.
+"""
+
+import calendar
+import gzip
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .scanner import NOTIFY_FUNCTION
+
+DEFAULT_BUCKET = 3600.0
+# Type recorded for "Unexpected error" lines, which don't log one
+UNKNOWN_TYPE = "(unknown)"
+
+MARKER = f"[{NOTIFY_FUNCTION}]".encode()
+FAILED = b"Failed to create notification:"
+UNEXPECTED = b"Unexpected error:"
+
+# Plain files at least this big are split across workers
+SHARD_MIN_BYTES = 64 * 1024 * 1024
+# Decompressed bytes read from a gzipped file at a time
+READ_BLOCK = 16 * 1024 * 1024
+# Longest logged failure object, and how far back a line's timestamp prefix can start
+MAX_RECORD_BYTES = 4096
+MAX_PREFIX_BYTES = 512
+MAX_MESSAGE_CHARS = 120
+
+# `2024-05-01T12:34:56.789Z`, `2024-05-01 12:34:56`
+_ISO_RE = re.compile(rb"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)(?::(\d\d))?")
+_BRACE_RE = re.compile(rb"[{}]")
+# `type: 'admire'` from console output, `"type": "admire"` from JSON.stringify
+_FIELD_RE = re.compile(r"""["']?\b(type|userId|actorId|error)["']?\s*:\s*(["'`])((?:\\.|(?!\2)[^\\])*)\2""")
+_ESCAPE_RE = re.compile(r"\\(.)")
+_UUID_RE = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"(?<![\w.])\d+(?:\.\d+)?")
+# Postgres detail: `Key (post_id)=(...) is not present`
+_KEY_VALUE_RE = re.compile(r"(Key \([^)]*\)=\()[^)]*(\))")
+_TIME_FIELDS = ("timestamp", "time", "ts", "@timestamp", "date")
+_MESSAGE_FIELDS = ("message", "msg")
+
+@dataclass
+class FailureLog:
+    """Counts of logged createNotification() failures."""
+
+    bucket: float = DEFAULT_BUCKET
+    files: List[str] = field(default_factory=list)
+    bytes: int = 0
+    failed: int = 0
+    unexpected: int = 0
+    by_type: Dict[str, int] = field(default_factory=dict)
+    by_error: Dict[str, int] = field(default_factory=dict)
+    by_type_error: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # Bucket start (epoch seconds) -> failures
+    by_bucket: Dict[int, int] = field(default_factory=dict)
+    undated: int = 0
+    first: Optional[float] = None
+    last: Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return self.failed + self.unexpected
+
+    @property
+    def hours(self) -> float:
+        """Time the dated failures span, at least one bucket."""
+
+        if self.first is None:
+            return 0.0
+        return max(self.last - self.first, self.bucket) / 3600
+
+    def per_hour(self, count: int) -> Optional[float]:
+        return count / self.hours if self.hours else None
+
+    def top_error(self, notification_type: str) -> Optional[str]:
+        errors = [(count, error) for (name, error), count in self.by_type_error.items() if name == notification_type]
+        return max(errors)[1] if errors else None
+
+    def add(self, notification_type: str, error: str, when: Optional[float], unexpected: bool = False):
+        if unexpected:
+            self.unexpected += 1
+        else:
+            self.failed += 1
+        self.by_type[notification_type] = self.by_type.get(notification_type, 0) + 1
+        self.by_error[error] = self.by_error.get(error, 0) + 1
+        key = (notification_type, error)
+        self.by_type_error[key] = self.by_type_error.get(key, 0) + 1
+        if when is None:
+            self.undated += 1
+            return
+        start = int(when // self.bucket * self.bucket)
+        self.by_bucket[start] = self.by_bucket.get(start, 0) + 1
+        self.first = when if self.first is None else min(self.first, when)
+        self.last = when if self.last is None else max(self.last, when)
+
+    def merge(self, other: "FailureLog"):
+        self.files.extend(path for path in other.files if path not in self.files)
+        self.bytes += other.bytes
+        self.failed += other.failed
+        self.unexpected += other.unexpected
+        self.undated += other.undated
+        for mine, theirs in ((self.by_type, other.by_type), (self.by_error, other.by_error),
+                             (self.by_type_error, other.by_type_error), (self.by_bucket, other.by_bucket)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        for when in (other.first, other.last):
+            if when is not None:
+                self.first = when if self.first is None else min(self.first, when)
+                self.last = when if self.last is None else max(self.last, when)
+
+def normalize_error(message: str) -> str:
+    """Fold the ids and numbers out of an error message so equal failures group together."""
+
+    message = _KEY_VALUE_RE.sub(r"\1…\2", message.strip())
+    message = _NUMBER_RE.sub("N", _UUID_RE.sub("<uuid>", message))
+    message = " ".join(message.split())
+    return message[:MAX_MESSAGE_CHARS] or "(no message)"
+
+def _iso_seconds(text: bytes) -> Optional[float]:
+    match = _ISO_RE.search(text)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = (int(value or 0) for value in match.groups())
+    # Offsets are ignored: production logs are UTC
+    return float(calendar.timegm((year, month, day, hour, minute, second)))
+
+def _entry_time(entry: dict) -> Optional[float]:
+    for name in _TIME_FIELDS:
+        value = entry.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Milliseconds since the epoch are 13 digits
+            return value / 1000 if value > 1e11 else float(value)
+        if isinstance(value, str):
+            return _iso_seconds(value.encode())
+    return None
+
+def _object_end(buffer, start: int) -> Optional[int]:
+    """Offset just past the `{...}` logged after start, or None if the buffer ends first.
+
+    Without an object on the line the record is the rest of the line; past
+    MAX_RECORD_BYTES the object is cut off.
+    """
+
+    window = bytes(buffer[start:start + MAX_RECORD_BYTES])
+    truncated = len(window) < MAX_RECORD_BYTES
+    opening = window.find(b"{")
+    newline = window.find(b"\n")
+    if opening < 0 or 0 <= newline < opening:
+        if newline >= 0:
+            return start + newline
+        return None if truncated else start + MAX_RECORD_BYTES
+    depth = 0
+    for match in _BRACE_RE.finditer(window, opening):
+        depth += 1 if match.group() == b"{" else -1
+        if not depth:
+            return start + match.end()
+    return None if truncated else start + MAX_RECORD_BYTES
+
+def _record(log: FailureLog, text: str, when: Optional[float]):
+    """Count one logged line (the text from the marker on)."""
+
+    body = text[len(MARKER):].lstrip()
+    if body.startswith(UNEXPECTED.decode()):
+        log.add(UNKNOWN_TYPE, normalize_error(body[len(UNEXPECTED):]), when, unexpected=True)
+    elif body.startswith(FAILED.decode()):
+        fields = {name: _ESCAPE_RE.sub(r"\1", value) for name, _, value in _FIELD_RE.findall(body)}
+        log.add(fields.get("type") or UNKNOWN_TYPE, normalize_error(fields.get("error", "")), when)
+
+def _scan(buffer, log: FailureLog, start: int, end: int, final: bool) -> Optional[Tuple[int, int]]:
+    """Count the failures whose marker starts in buffer[start:end].
+
+    Returns None when done, or (line start, marker) of a record the buffer
+    cuts off when more data follows (final is False).
+    """
+
+    position = start
+    while True:
+        at = buffer.find(MARKER, position, end + len(MARKER) - 1)
+        if at < 0:
+            return None
+        floor = max(0, at - MAX_PREFIX_BYTES)
+        line_start = buffer.rfind(b"\n", floor, at) + 1 or floor
+        line_end = buffer.find(b"\n", at)
+        if line_end < 0:
+            if not final:
+                return line_start, at
+            line_end = len(buffer)
+
+        prefix = buffer[line_start:at]
+        if prefix.lstrip().startswith(b"{"):
+            # A JSON log entry: the logged text is its message, escapes and all
+            try:
+                entry = json.loads(buffer[line_start:line_end])
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict):
+                message = next((entry[name] for name in _MESSAGE_FIELDS if isinstance(entry.get(name), str)), "")
+                marker = message.find(MARKER.decode())
+                if marker >= 0:
+                    _record(log, message[marker:], _entry_time(entry))
+                position = line_end
+                continue
+
+        record_end = line_end
+        failed = buffer.find(FAILED, at + len(MARKER), min(line_end, at + len(MARKER) + len(FAILED) + 8))
+        if failed >= 0:
+            record_end = _object_end(buffer, failed + len(FAILED))
+            if record_end is None:
+                if not final:
+                    return line_start, at
+                record_end = len(buffer)
+        _record(log, bytes(buffer[at:record_end]).decode("utf-8", errors="replace"), _iso_seconds(prefix))
+        position = max(record_end, at + len(MARKER))
+
+def _scan_range(path: str, start: int, end: int, bucket: float = DEFAULT_BUCKET) -> FailureLog:
+    """Scan the failures whose marker starts in a byte range of a plain file."""
+
+    log = FailureLog(bucket, [path], end - start)
+    with open(path, "rb") as handle:
+        if end <= start:
+            return log
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            _scan(buffer, log, start, end, final=True)
+    return log
+
+def _scan_gzip(path: str, bucket: float = DEFAULT_BUCKET) -> FailureLog:
+    log = FailureLog(bucket, [path])
+    with gzip.open(path, "rb") as handle:
+        carry, skip = b"", 0
+        while True:
+            block = handle.read(READ_BLOCK)
+            log.bytes += len(block)
+            buffer = carry + block
+            final = not block
+            resume = _scan(buffer, log, skip, len(buffer), final)
+            if final:
+                return log
+            if resume:
+                line_start, at = resume
+                carry, skip = buffer[line_start:], at - line_start
+            else:
+                # A marker split across blocks is found again in the carried tail
+                tail = buffer.rfind(b"\n") + 1
+                carry, skip = buffer[max(tail, len(buffer) - MAX_RECORD_BYTES):], 0
+
+def _tasks(paths: Iterable[str], workers: int, bucket: float) -> List[partial]:
+    tasks = []
+    for path in paths:
+        if path.endswith(".gz"):
+            tasks.append(partial(_scan_gzip, path, bucket=bucket))
+            continue
+        size = os.path.getsize(path)
+        shards = workers if size >= SHARD_MIN_BYTES else 1
+        bounds = [size * index // shards for index in range(shards + 1)]
+        tasks.extend(partial(_scan_range, path, low, high, bucket=bucket) for low, high in zip(bounds, bounds[1:]))
+    return tasks
+
+def _run(task: partial) -> FailureLog:
+    return task()
+
+def analyze_logs(paths: Iterable[str], bucket: float = DEFAULT_BUCKET, workers: Optional[int] = None) -> FailureLog:
+    """Count the createNotification() failures logged in the given files (plain or .gz)."""
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tasks = _tasks(paths, workers, bucket)
+    if workers <= 1 or len(tasks) <= 1:
+        parts = [task() for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_run, tasks))
+    log = FailureLog(bucket)
+    for part in parts:
+        log.merge(part)
+    return log
@@ -0,0 +1,93 @@
+"""
+Shared data model for the notification analysis.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from enum import Enum
+
+# Bump whenever scanning, query extraction or classification logic changes; cached results
+# from other versions are discarded.
+ANALYZER_VERSION = "4"
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+class Status(Enum):
+    IMPLEMENTED = "✅ IMPLEMENTED"
+    PARTIAL = "⚠️  PARTIAL"
+    MISSING = "❌ MISSING"
+
+@dataclass
+class NotificationFeature:
+    name: str
+    description: str
+    status: Status
+    notes: str
+    location: Optional[str] = None
+
+# Define required notification types from the specification
+REQUIRED_NOTIFICATION_TYPES = {
+    # Post Reactions
+    "admire": "User admired your post",
+    "snap": "User snapped for your post",
+    "ovation": "User gave standing ovation to your post",
+    "support": "User showed support for your post",
+    "inspired": "User was inspired by your post",
+    "applaud": "User applauded your post",
+
+    # Post Interactions
+    "comment": "Someone commented on your post",
+    "reply": "Someone replied to your comment",
+    "comment_like": "Someone liked your comment",
+    "relay": "Someone relayed (reposted) your post",
+    "save": "Someone saved your post",
+    "mention": "Someone mentioned/tagged you in a post",
+
+    # Follow System
+    "follow": "Someone followed you",
+    "follow_request": "Someone requested to follow you (private account)",
+    "follow_request_accepted": "Your follow request was accepted",
+
+    # Collaboration System
+    "collaboration_invite": "Invited to collaborate on a post",
+    "collaboration_accepted": "Someone accepted your collaboration invite",
+    "collaboration_declined": "Someone declined your collaboration invite",
+
+    # Community Features
+    "community_invite": "Invited to join a community",
+    "community_join_request": "Someone requested to join your community",
+    "community_join_approved": "Your community join request was approved",
+    "community_role_change": "Your role in community changed",
+    "community_muted": "You were muted in a community",
+    "community_banned": "You were banned from a community",
+}
+
+# Report category for each group of notification types above
+NOTIFICATION_TYPE_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "Post Reactions": ("admire", "snap", "ovation", "support", "inspired", "applaud"),
+    "Post Interactions": ("comment", "reply", "comment_like", "relay", "save", "mention"),
+    "Follow System": ("follow", "follow_request", "follow_request_accepted"),
+    "Collaborations": ("collaboration_invite", "collaboration_accepted", "collaboration_declined"),
+    "Communities": (
+        "community_invite",
+        "community_join_request",
+        "community_join_approved",
+        "community_role_change",
+        "community_muted",
+        "community_banned",
+    ),
+}
+
+# Tables the client subscribes to with postgres_changes; each must be in the
+# supabase_realtime publication or the subscription silently receives nothing
+REQUIRED_REALTIME_TABLES = ("notifications", "follows", "post_collaborators", "messages", "reactions")
+
+def parse_duration(text: str) -> float:
+    """`30s`, `15m`, `1h`, `1d` (a bare number is seconds) -> seconds."""
+
+    match = _DURATION_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"bad duration {text!r}: expected e.g. 30s, 15m, 1h, 1d")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
@@ -0,0 +1,796 @@
+"""
+Select payload estimator.
+
+Parses every `.select(...)` projection in the data hooks, resolves `*` and
+embedded relations against the schema replayed from the migrations (filled
+in from the row interfaces in lib/types, since most base tables predate the
+migrations) and sizes the JSON PostgREST sends back with a column-size
+model: typical value lengths guessed from column names and types, or fitted
+from sampled rows exported from the tables. Queries a realtime subscription
+reruns are priced per minute at a given event rate, and each projection is
+compared with the properties the components consuming its hook read.
+"""
+
+import csv
+import gzip
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from .bench import parse_embeds, singular
+from .channels import HOOK, ChannelGraph
+from .queries import QueryShape, scan_query_files
+from .realtime import Subscription, outermost, scan_subscription_files
+from .schema import Schema
+from .source import DefinitionIndex, body_extent, mask_comments, split_arguments
+
+TYPES_SOURCE = "lib/types/index.ts"
+
+# Realtime events a client's subscription hears per minute
+DEFAULT_EVENT_RATE = 1.0
+# Rows assumed for a select with no limit/range/single, and per to-many embed
+UNBOUNDED_ROWS = 100
+CHILD_ROWS = 3
+
+# Typical JSON value lengths, by column name
+_JSON_VALUE_BYTES = (
+    (re.compile(r"(^|_)id$"), 38),
+    (re.compile(r"_at$"), 34),
+    (re.compile(r"url$"), 90),
+    (re.compile(r"^content$"), 280),
+    (re.compile(r"^title$"), 40),
+    (re.compile(r"name$|^slug$"), 18),
+    (re.compile(r"^type$"), 12),
+    (re.compile(r"^(read|is_\w+)$"), 5),
+)
+# ... by declared type, for names the patterns above don't cover
+_TYPE_VALUE_BYTES = (
+    (re.compile(r"^uuid$", re.IGNORECASE), 38),
+    (re.compile(r"^(timestamp|date)", re.IGNORECASE), 34),
+    (re.compile(r"^bool", re.IGNORECASE), 5),
+    (re.compile(r"int|^numeric|^real|^double|^number$", re.IGNORECASE), 6),
+    (re.compile(r"^jsonb?$", re.IGNORECASE), 160),
+    (re.compile(r"\[\]$|^array$", re.IGNORECASE), 40),
+    (re.compile(r"^enum$"), 12),
+)
+# ... and for the columns whose size the table decides: posts are essays, poems and journal entries
+_TABLE_VALUE_BYTES = {
+    ("posts", "content"): 2400,
+    ("comments", "content"): 280,
+    ("messages", "content"): 120,
+}
+_DEFAULT_VALUE_BYTES = 20
+_NULL_BYTES = 4
+
+_INTERFACE_RE = re.compile(r"export\s+interface\s+([A-Za-z_]\w*)\s*(?:<[^{]*>)?\s*(?:extends\s+([\w\s,<>]+?))?\s*\{")
+_TYPE_ALIAS_RE = re.compile(r"export\s+type\s+([A-Za-z_]\w*)\s*=")
+_FIELD_RE = re.compile(r"^\s*(?:readonly\s+)?([A-Za-z_]\w*)(\?)?\s*:\s*(.+?);?\s*$")
+# `// Joined data`, `// Computed counts`, `// User-specific flags`: fields that are not columns
+_DERIVED_SECTION_RE = re.compile(r"^\s*//\s*(?:joined|computed|user-specific|optional\b.*\bdata)", re.IGNORECASE)
+_NUMERIC_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+# `a.b?.c`: property chains, read left to right
+_LINK = r"(?:\s*!)?(?:\s*\[[^\[\]\n]*\])*\s*\??\.\s*"
+_CHAIN_RE = re.compile(r"[A-Za-z_$][\w$]*(?:" + _LINK + r"[A-Za-z_$][\w$]*)+")
+# `!` and `[i]` between links: a non-null assertion and one element of a list read the same rows
+_CHAIN_SPLIT_RE = re.compile(_LINK)
+_EXCERPT_RE = re.compile(r"\s*\(\s*0\s*,\s*(\d+)\s*\)")
+_EXCERPT_METHODS = ("substring", "slice", "substr")
+_SPREAD_RE = re.compile(r"\.\.\.\s*([A-Za-z_$][\w$]*(?:" + _LINK + r"[A-Za-z_$][\w$]*)*)")
+_DESTRUCTURE_RE = re.compile(r"\{([^{}]*)\}\s*=\s*([A-Za-z_$][\w$]*(?:" + _LINK + r"[A-Za-z_$][\w$]*)*)")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_$][\w$]*$")
+_WORD_RE = re.compile(r"[A-Za-z_$][\w$]*")
+# `const { data, error } =`, `const [a, b] =`, `let rows: Row[] =`
+_BINDING_TEXT = r"(?:const|let|var)\s+(\{[^{}]*\}|\[[^\[\]]*\]|[A-Za-z_$][\w$]*)\s*(?::[^=;]+)?=(?![=>])\s*"
+_DECLARATION_RE = re.compile(_BINDING_TEXT)
+# ... directly before a `supabase.from(...)` chain
+_QUERY_BINDING_RE = re.compile(_BINDING_TEXT + r"(?:await\s+)?[\w$.\s]*$")
+_CALLBACK_RE = re.compile(r"\.\s*(?:map|flatMap|filter|forEach|find|some|every|sort)\s*\(\s*(?:async\s+)?\(?\s*([A-Za-z_$][\w$]*)")
+# How far back from a `.map(` its receiver is looked for
+_RECEIVER_WINDOW = 300
+_ELEMENT_RE = re.compile(r"<([A-Z][\w$]*)(?=[\s/>])")
+_ATTRIBUTE_RE = re.compile(r"\s*(?:([A-Za-z_$][\w$-]*)\s*=?\s*|(?=\{))")
+_CALL_RE = re.compile(r"([A-Za-z_$][\w$]*)\s*\(")
+_CALL_AFTER_RE = re.compile(r"\s*\(")
+_REFERENCE_RE = re.compile(r"[A-Za-z_$][\w$]*(?:" + _LINK + r"[A-Za-z_$][\w$]*)*")
+_WORD_OR_DOT_RE = re.compile(r"[\w$.]")
+_NOT_CALLS = {"if", "for", "while", "switch", "catch", "return", "function", "typeof", "await", "new"}
+# A query result's `{ data }` is the rows themselves
+_RESULT_KEYS = {"data"}
+# Components and functions rows are followed into
+_MAX_HOPS = 3
+
+@dataclass
+class ColumnSizes:
+    """Typical JSON value length of each column: fitted from sampled rows where there are any, else guessed."""
+
+    # "table.column" -> mean JSON value length over the sampled rows
+    fitted: Dict[str, float] = field(default_factory=dict)
+    # Rows the fit saw
+    rows: int = 0
+
+    def value_bytes(self, table: Optional[str], column: str, data_type: Optional[str] = None) -> float:
+        key = f"{table}.{column}"
+        if key in self.fitted:
+            return self.fitted[key]
+        if (table, column) in _TABLE_VALUE_BYTES:
+            return _TABLE_VALUE_BYTES[(table, column)]
+        for patterns, text in ((_JSON_VALUE_BYTES, column), (_TYPE_VALUE_BYTES, data_type or "")):
+            size = next((size for pattern, size in patterns if pattern.search(text)), None)
+            if size is not None:
+                return size
+        return _DEFAULT_VALUE_BYTES
+
+    def field_bytes(self, table: Optional[str], column: str, data_type: Optional[str] = None) -> float:
+        """`"column":value,` for a typical value of the column."""
+        return len(column) + 4 + self.value_bytes(table, column, data_type)
+
+def read_records(path: str):
+    """Rows of an export: CSV, a JSON array or JSON lines, optionally gzipped."""
+
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        if name.endswith(".json"):
+            yield from json.load(handle)
+        elif name.endswith((".jsonl", ".ndjson")):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(handle)
+
+def _value_length(value) -> int:
+    """Bytes of the value as PostgREST would write it in JSON."""
+
+    if isinstance(value, str):
+        text = value.strip()
+        # CSV exports write NULL as an empty field and booleans as t/f
+        if not text:
+            return _NULL_BYTES
+        if text in ("t", "f", "true", "false"):
+            return 4 if text[0] == "t" else 5
+        if _NUMERIC_RE.match(text):
+            return len(text)
+        if text[0] in "{[":
+            try:
+                value = json.loads(text)
+            except ValueError:
+                pass
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+def fit_sizes(samples: Sequence[str]) -> ColumnSizes:
+    """Fit a ColumnSizes from exported rows; each sample is `[TABLE=]PATH`, the table defaulting to the file's stem."""
+
+    totals: Dict[str, List[int]] = {}
+    rows = 0
+    for sample in samples:
+        table, equals, path = sample.partition("=")
+        if not equals:
+            table, path = os.path.basename(sample).split(".")[0], sample
+        for record in read_records(path):
+            rows += 1
+            for column, value in record.items():
+                total = totals.setdefault(f"{table}.{column}", [0, 0])
+                total[0] += _value_length(value)
+                total[1] += 1
+    return ColumnSizes({key: size / count for key, (size, count) in totals.items()}, rows)
+
+@dataclass
+class RowType:
+    """The columns a lib/types interface declares for a table's rows."""
+
+    name: str
+    # Field -> TypeScript type, in declaration order
+    fields: Dict[str, str] = field(default_factory=dict)
+    # Fields under a `// Joined ...`/`// Computed ...` comment or typed as an object literal or a list of rows
+    derived: Set[str] = field(default_factory=set)
+    # `name?:` fields: columns only where the migrations do not say otherwise
+    optional: Set[str] = field(default_factory=set)
+
+    @property
+    def columns(self) -> List[str]:
+        return [name for name in self.fields if name not in self.derived]
+
+def row_types(text: str) -> Dict[str, RowType]:
+    """Interface name -> RowType for every `export interface` in a types file, `extends` folded in."""
+
+    aliases = type_aliases(text)
+    types, parents = {}, {}
+    for match in _INTERFACE_RE.finditer(text):
+        row = RowType(match.group(1))
+        depth, derived = 0, False
+        for line in text[match.end():].split("\n"):
+            stripped = line.strip()
+            if depth == 0:
+                if stripped.startswith("}"):
+                    break
+                if _DERIVED_SECTION_RE.match(line):
+                    derived = True
+                elif not stripped:
+                    derived = False
+                found = _FIELD_RE.match(line) if not stripped.startswith("//") else None
+                if found:
+                    name, type_text = found.group(1), found.group(3).strip()
+                    row.fields[name] = type_text
+                    if found.group(2):
+                        row.optional.add(name)
+                    element = type_text.split("|")[0].strip()
+                    rows = element.endswith("[]") and element[0].isupper() and element[:-2] not in aliases
+                    if derived or rows or element.startswith("{"):
+                        row.derived.add(name)
+            depth += line.count("{") - line.count("}")
+            if depth < 0:
+                break
+        types[row.name] = row
+        if match.group(2):
+            parents[row.name] = [parent.split("<")[0].strip() for parent in match.group(2).split(",")]
+    for name, names in parents.items():
+        for parent in names:
+            inherited = types.get(parent)
+            if inherited is not None:
+                types[name].fields = {**inherited.fields, **types[name].fields}
+                types[name].derived |= inherited.derived
+                types[name].optional |= inherited.optional
+    return types
+
+def type_aliases(text: str) -> Set[str]:
+    """Names of the `export type X = ...` aliases: unions of literals, to the size model."""
+    return {match.group(1) for match in _TYPE_ALIAS_RE.finditer(text)}
+
+def _data_type(type_text: str, aliases: Set[str], interfaces: Set[str]) -> Optional[str]:
+    """A column type for a TypeScript field type: the size model's view of `boolean`, `PostType`, `string[]`..."""
+
+    element = type_text.split("|")[0].strip()
+    if element == "boolean":
+        return "boolean"
+    if element == "number":
+        return "number"
+    if element.endswith("[]"):
+        return "array"
+    if element in aliases or element.startswith(("'", '"')):
+        return "enum"
+    if element in interfaces or element.startswith("Record<"):
+        return "jsonb"
+    return None
+
+class TableColumns:
+    """Column -> type for each table: the migrations' columns, then the ones the row interfaces add."""
+
+    def __init__(self, schema: Schema, types: Dict[str, RowType], aliases: Set[str]):
+        self.schema = schema
+        self.types = types
+        self.aliases = aliases
+        self._cache: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def row_type(self, table: str) -> Optional[RowType]:
+        # notifications -> Notification, community_members -> CommunityMember
+        return self.types.get("".join(part.capitalize() for part in singular(table).split("_")))
+
+    def columns(self, table: str) -> Dict[str, Optional[str]]:
+        if table not in self._cache:
+            columns: Dict[str, Optional[str]] = {}
+            known = self.schema.tables.get(table)
+            for column in (known.columns.values() if known else ()):
+                columns[column.name] = column.data_type
+            row = self.row_type(table)
+            for name in (row.columns if row else ()):
+                if known and name in row.optional and name not in columns:
+                    continue
+                columns.setdefault(name, _data_type(row.fields[name], self.aliases, set(self.types)))
+            self._cache[table] = columns
+        return self._cache[table]
+
+    def lists(self, table: str) -> Set[str]:
+        """Fields the row interface types as a list: to-many embeds."""
+
+        row = self.row_type(table)
+        return {name for name, type_text in row.fields.items() if type_text.split("|")[0].strip().endswith("[]")} if row else set()
+
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+
+def load_table_columns(root: str, schema: Schema) -> TableColumns:
+    """TableColumns from the schema and TYPES_SOURCE (when the tree has one)."""
+
+    text = ""
+    path = os.path.join(root, TYPES_SOURCE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as handle:
+            # JSDoc blocks go; the line comments that head `// Joined data` sections stay
+            text = _BLOCK_COMMENT_RE.sub(lambda match: re.sub(r"[^\n]", " ", match.group(0)), handle.read())
+    return TableColumns(schema, row_types(text), type_aliases(text))
+
+@dataclass
+class Selection:
+    """One level of a projection: a table's columns and the relations embedded in it."""
+
+    table: str
+    columns: List[str]
+    # Columns `*` stands for; empty when the table's columns are unknown
+    star: List[str] = field(default_factory=list)
+    embeds: List["Selection"] = field(default_factory=list)
+    # For an embed: its key in the parent's JSON, and whether it is a list of rows
+    alias: Optional[str] = None
+    many: bool = False
+
+    @property
+    def resolved(self) -> List[str]:
+        """Own columns with `*` expanded, in projection order."""
+
+        names = []
+        for column in self.columns:
+            for name in (self.star if column == "*" else [column]):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    @property
+    def unresolved(self) -> List[str]:
+        """Tables (this one or embedded) whose `*` could not be expanded."""
+
+        tables = [self.table] if "*" in self.columns and not self.star else []
+        for embed in self.embeds:
+            tables.extend(table for table in embed.unresolved if table not in tables)
+        return tables
+
+    def aliases(self) -> Set[str]:
+        names = set()
+        for embed in self.embeds:
+            names.add(embed.alias)
+            names |= embed.aliases()
+        return names
+
+def parse_selection(projection: Optional[str], table: str, tables: TableColumns) -> Selection:
+    """Parse a select() projection into a Selection tree, `*` expanded and embeds sized one or many."""
+
+    columns, embeds = parse_embeds(projection, table)
+    known = tables.columns(table)
+    selection = Selection(table, columns, list(known) if "*" in columns else [])
+    own = set(known) | set(columns)
+    lists = tables.lists(table)
+    for embed in embeds:
+        child = parse_selection(embed.projection, embed.table, tables)
+        child.alias = embed.alias
+        # A foreign key on this row points at one row; otherwise the embed is the other side of one
+        back_reference = f"{singular(table)}_id" in tables.columns(embed.table)
+        child.many = embed.column not in own and (embed.alias in lists or back_reference)
+        selection.embeds.append(child)
+    return selection
+
+def selection_bytes(selection: Selection, sizes: ColumnSizes, tables: TableColumns) -> float:
+    """Estimated JSON bytes of one row of the selection, embeds included."""
+
+    known = tables.columns(selection.table)
+    total = 2.0
+    for column in selection.resolved:
+        total += sizes.field_bytes(selection.table, column, known.get(column))
+    for embed in selection.embeds:
+        inner = selection_bytes(embed, sizes, tables)
+        total += len(embed.alias) + 4 + (CHILD_ROWS * (inner + 1) + 2 if embed.many else inner)
+    return total
+
+def _rows(query: QueryShape) -> Tuple[int, bool]:
+    """Rows one call returns and whether that is bounded by the query."""
+
+    if query.limit is not None:
+        return query.limit, True
+    # insert(...).select() returns the written row
+    if query.values:
+        return 1, True
+    return UNBOUNDED_ROWS, False
+
+@dataclass
+class Reads:
+    """Properties code reads off the rows, as (parent, name): parent "" for the rows' own columns, else the embed alias."""
+
+    full: Set[Tuple[str, str]] = field(default_factory=set)
+    # Reads of only the first N characters, `.substring(0, N)`: (parent, name) -> the longest N
+    excerpts: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # Embeds spread into the row (`{ ...relay.post }`): their columns are read off the row itself
+    flattened: Set[str] = field(default_factory=set)
+
+    def update(self, other: "Reads"):
+        self.full |= other.full
+        self.flattened |= other.flattened
+        for key, length in other.excerpts.items():
+            self.excerpts[key] = max(length, self.excerpts.get(key, 0))
+
+    def parents(self) -> Set[str]:
+        return {parent for parent, _ in self.full} | {parent for parent, _ in self.excerpts}
+
+def property_reads(masked: str, roots: Dict[str, str]) -> Reads:
+    """`row.post?.title` reads in masked source, plus destructured ones, for chains starting at one of roots.
+
+    roots maps a variable to what it holds of the rows ("" for rows, else an embed alias).
+    """
+
+    reads = Reads()
+    for match in _CHAIN_RE.finditer(masked):
+        parts = _CHAIN_SPLIT_RE.split(match.group(0))
+        if parts[0] not in roots:
+            continue
+        parts[0] = roots[parts[0]]
+        excerpt = _EXCERPT_RE.match(masked, match.end()) if parts[-1] in _EXCERPT_METHODS and len(parts) > 2 else None
+        if excerpt:
+            key = (parts[-3], parts[-2])
+            reads.excerpts[key] = max(int(excerpt.group(1)), reads.excerpts.get(key, 0))
+            parts = parts[:-2]
+        reads.full.update(zip(parts, parts[1:]))
+    for match in _SPREAD_RE.finditer(masked):
+        held = _held(match.group(1), roots)
+        if held:
+            reads.flattened.add(held)
+    for match in _DESTRUCTURE_RE.finditer(masked):
+        chain = _CHAIN_SPLIT_RE.split(match.group(2))
+        if chain[0] not in roots:
+            continue
+        parent = chain[-1] if len(chain) > 1 else roots[chain[0]]
+        reads.full.update((parent, key) for key, _ in _pattern_pairs(match.group(1)) if key)
+    return reads
+
+def _pattern_pairs(pattern: str) -> List[Tuple[Optional[str], str]]:
+    """(property, local) for each name a binding pattern binds: `{ a, b: c }` -> (a, a), (b, c); property is
+    None for plain names, array elements and `...rest`."""
+
+    pattern = pattern.strip()
+    keyed = pattern.startswith("{")
+    pairs = []
+    for entry in pattern.strip("{}[] ").split(","):
+        key, _, local = entry.split("=")[0].partition(":")
+        rest = key.strip().startswith("...")
+        key, local = key.strip().lstrip("."), (local or key).strip().lstrip(".")
+        if _IDENTIFIER_RE.match(local):
+            pairs.append((key if keyed and not rest and _IDENTIFIER_RE.match(key) else None, local))
+    return pairs
+
+def _bind(bound: Dict[str, str], pattern: str, held: str) -> Dict[str, str]:
+    """bound plus the names pattern binds from a value holding `held`."""
+
+    return {**{local: held if key is None or key in _RESULT_KEYS else key for key, local in _pattern_pairs(pattern)}, **bound}
+
+def _held(text: str, bound: Dict[str, str]) -> Optional[str]:
+    """What an expression hands on of the rows: `n.post` -> "post", `rows.filter(...)` -> whatever rows holds."""
+
+    for match in _REFERENCE_RE.finditer(text):
+        parts = _CHAIN_SPLIT_RE.split(match.group(0))
+        if parts[0] not in bound:
+            continue
+        # `rows.filter(...)` is still the rows
+        if len(parts) > 1 and _CALL_AFTER_RE.match(text, match.end()):
+            parts = parts[:-1]
+        return parts[-1] if len(parts) > 1 else bound[parts[0]]
+    return None
+
+def _receiver(text: str, end: int) -> str:
+    """The expression a `.method(` call at end is called on: `(post.media || [])` in `(post.media || []).sort(`."""
+
+    i = end
+    while i > 0:
+        ch = text[i - 1]
+        if ch.isspace() or _WORD_OR_DOT_RE.match(ch) or ch in "?!":
+            i -= 1
+        elif ch in ")]":
+            depth = 0
+            while i > 0:
+                i -= 1
+                depth += {")": 1, "]": 1, "(": -1, "[": -1}.get(text[i], 0)
+                if depth == 0:
+                    break
+        else:
+            break
+    return text[i:end]
+
+class _Body:
+    """A definition's masked source with what the reads follow: declarations, callbacks, elements and calls."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.declarations = []
+        for match in _DECLARATION_RE.finditer(text):
+            value = text[match.end():body_extent(text, match.end())]
+            self.declarations.append((match.group(1), set(_WORD_RE.findall(value)), value))
+        self.callbacks = []
+        for match in _CALLBACK_RE.finditer(text):
+            receiver = _receiver(text, match.start())
+            self.callbacks.append((match.group(1), set(_WORD_RE.findall(receiver)), receiver))
+        self._elements: Optional[List[Tuple[str, List[Tuple[str, str]]]]] = None
+        self._calls: Optional[List[Tuple[str, List[str]]]] = None
+
+    def derived(self, seeds: Dict[str, str]) -> Dict[str, str]:
+        """seeds plus every variable computed from them: declarations whose value uses one, and the
+        parameters of `.map()`/`.filter()`... callbacks over them."""
+
+        bound = dict(seeds)
+        while True:
+            before = len(bound)
+            for pattern, words, value in self.declarations:
+                held = _held(value, bound) if words & bound.keys() else None
+                if held is not None:
+                    bound = _bind(bound, pattern, held)
+            for parameter, words, receiver in self.callbacks:
+                held = _held(receiver, bound) if words & bound.keys() else None
+                if held is not None:
+                    bound.setdefault(parameter, held)
+            if len(bound) == before:
+                return bound
+
+    @property
+    def elements(self) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        """JSX elements as (component, [(prop, value)]); spreads are prop "..."."""
+
+        if self._elements is None:
+            self._elements = []
+            text = self.text
+            for match in _ELEMENT_RE.finditer(text):
+                props, position = [], match.end()
+                while True:
+                    attribute = _ATTRIBUTE_RE.match(text, position)
+                    if not attribute:
+                        break
+                    start = position
+                    position = attribute.end()
+                    if text.startswith("{", position):
+                        end = body_extent(text, position)
+                        props.append((attribute.group(1) or "...", text[position + 1:end - 1]))
+                        position = end
+                    elif text.startswith(("'", '"'), position):
+                        position = text.find(text[position], position + 1) + 1
+                    if position <= start:
+                        break
+                self._elements.append((match.group(1), props))
+        return self._elements
+
+    @property
+    def calls(self) -> List[Tuple[str, List[str]]]:
+        """Plain function calls as (callee, arguments)."""
+
+        if self._calls is None:
+            self._calls = []
+            for match in _CALL_RE.finditer(self.text):
+                start = match.start()
+                if start and _WORD_OR_DOT_RE.match(self.text, start - 1) or match.group(1) in _NOT_CALLS:
+                    continue
+                self._calls.append((match.group(1), split_arguments(self.text, match.end() - 1)[0]))
+        return self._calls
+
+@dataclass
+class Unread:
+    """A projected column the consumers never read, or read only an excerpt of."""
+
+    # alias.column for embedded columns
+    name: str
+    row_bytes: float
+    # Characters read when only an excerpt is, e.g. `.substring(0, 60)`
+    excerpt: Optional[int] = None
+
+def unread_columns(selection: Selection, reads: Reads, sizes: ColumnSizes, tables: TableColumns,
+                   prefix: str = "") -> List[Unread]:
+    """Columns of the selection nobody reads, with the JSON bytes per row they cost (to-many embeds multiplied)."""
+
+    parent = selection.alias or ""
+    known = tables.columns(selection.table)
+    parents = reads.parents()
+    found = []
+    for column in selection.resolved:
+        keys = [(parent, column), ("", column)] if parent in reads.flattened else [(parent, column)]
+        if any(key in reads.full for key in keys):
+            continue
+        excerpt = max((reads.excerpts[key] for key in keys if key in reads.excerpts), default=None)
+        if excerpt is not None:
+            over = sizes.value_bytes(selection.table, column, known.get(column)) - excerpt - 2
+            if over > 0:
+                found.append(Unread(prefix + column, over, excerpt))
+        else:
+            found.append(Unread(prefix + column, sizes.field_bytes(selection.table, column, known.get(column))))
+    for embed in selection.embeds:
+        scale = CHILD_ROWS if embed.many else 1
+        if (parent, embed.alias) not in reads.full and embed.alias not in parents:
+            found.append(Unread(prefix + embed.alias, scale * selection_bytes(embed, sizes, tables)))
+            continue
+        for item in unread_columns(embed, reads, sizes, tables, f"{prefix}{embed.alias}."):
+            item.row_bytes *= scale
+            found.append(item)
+    return found
+
+@dataclass
+class PayloadEstimate:
+    query: QueryShape
+    # Outermost definition around the query: the hook or component callers use
+    hook: Optional[str]
+    selection: Selection
+    rows: int
+    bounded: bool
+    row_bytes: float
+    # Components that call the hook, as path:name
+    consumers: List[str] = field(default_factory=list)
+    unread: List[Unread] = field(default_factory=list)
+
+    @property
+    def call_bytes(self) -> float:
+        return 2 + self.rows * (self.row_bytes + 1)
+
+    @property
+    def unread_bytes(self) -> float:
+        """Bytes per call the unread columns and excerpts account for."""
+        return self.rows * sum(item.row_bytes for item in self.unread)
+
+@dataclass
+class RefetchLoad:
+    """What one realtime event costs a client: the selects the subscription's callback reruns."""
+
+    subscription: Subscription
+    estimates: List[PayloadEstimate]
+    event_rate: float
+
+    @property
+    def event_bytes(self) -> float:
+        return sum(estimate.call_bytes for estimate in self.estimates)
+
+    @property
+    def minute_bytes(self) -> float:
+        return self.event_bytes * self.event_rate
+
+@dataclass
+class PayloadReport:
+    estimates: List[PayloadEstimate]
+    refetches: List[RefetchLoad]
+    sizes: ColumnSizes
+    event_rate: float
+
+def _selects(queries: Sequence[QueryShape]) -> List[QueryShape]:
+    return [query for query in queries if query.operation == "select" and not query.head]
+
+class _Sources:
+    """Masked text, top-level definitions and data flow of the files the estimator reads, each worked out once."""
+
+    def __init__(self, root: str, graph: ChannelGraph):
+        self.root = root
+        self.graph = graph
+        self._files: Dict[str, Tuple[str, List[Tuple[int, int, str]]]] = {}
+        self._bodies: Dict[Tuple[str, str], _Body] = {}
+        self._reads: Dict[Tuple[str, str, FrozenSet[Tuple[str, str]], int], Reads] = {}
+
+    def get(self, path: str) -> Tuple[str, List[Tuple[int, int, str]]]:
+        if path not in self._files:
+            with open(os.path.join(self.root, path), "rb") as handle:
+                masked = mask_comments(handle.read().decode("utf-8", errors="replace"))
+            spans, end = [], -1
+            for start, stop, name in DefinitionIndex(masked).spans():
+                if start >= end:
+                    spans.append((start, stop, name))
+                    end = stop
+            self._files[path] = (masked, spans)
+        return self._files[path]
+
+    def body(self, path: str, name: str) -> _Body:
+        if (path, name) not in self._bodies:
+            masked, spans = self.get(path)
+            span = next((span for span in spans if span[2] == name), None)
+            self._bodies[(path, name)] = _Body(masked[span[0]:span[1]] if span else masked)
+        return self._bodies[(path, name)]
+
+    def parameters(self, path: str, name: str) -> List[str]:
+        """The binding pattern of each of a function's parameters, types dropped."""
+
+        text = self.body(path, name).text
+        open_paren = text.find("(", text.find(name) + len(name))
+        if open_paren == -1:
+            return []
+        patterns = []
+        for argument in split_arguments(text, open_paren)[0]:
+            argument = argument.strip()
+            patterns.append(argument[:body_extent(argument, 0)] if argument.startswith(("{", "[")) else argument.split(":")[0])
+        return patterns
+
+    def reads(self, path: str, name: str, seeds: Dict[str, str], depth: int = 0) -> Reads:
+        """Reads of the rows held in seeds inside definition `name`, following them into the
+        components they're rendered with and the functions they're passed to."""
+
+        key = (path, name, frozenset(seeds.items()), depth)
+        if key in self._reads:
+            return self._reads[key]
+        # Recursion reads nothing more
+        self._reads[key] = Reads()
+        body = self.body(path, name)
+        bound = body.derived(seeds)
+        reads = property_reads(body.text, bound)
+        if depth < _MAX_HOPS:
+            for component, props in body.elements:
+                passed = {}
+                for prop, value in props:
+                    held = _held(value, bound) if prop != "..." else None
+                    if held is not None:
+                        passed[prop] = held
+                target = self.graph.resolve(path, component) if passed else None
+                if target is not None:
+                    reads.update(self.reads(target.path, target.name, passed, depth + 1))
+            for callee, arguments in body.calls:
+                held = [_held(argument, bound) for argument in arguments]
+                target = self.graph.resolve(path, callee) if any(item is not None for item in held) else None
+                if target is None or target.name == name:
+                    continue
+                passed = {}
+                for pattern, item in zip(self.parameters(target.path, target.name), held):
+                    if item is not None:
+                        passed = _bind(passed, pattern, item)
+                if passed:
+                    reads.update(self.reads(target.path, target.name, passed, depth + 1))
+        self._reads[key] = reads
+        return reads
+
+def _consumers(graph: ChannelGraph) -> Dict[Tuple[str, str], List[Tuple[str, str, str]]]:
+    """(path, hook) -> the (path, definition, name it's called by) that call it from other files."""
+
+    callers: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = {}
+    for module in graph.modules.values():
+        for definition in module.definitions.values():
+            for edge in definition.edges:
+                if edge.kind != HOOK:
+                    continue
+                target = graph.resolve(module.path, edge.target)
+                if target is not None and target.path != module.path:
+                    callers.setdefault((target.path, target.name), []).append((module.path, definition.name, edge.target))
+    return callers
+
+def _results(pattern: "re.Pattern", masked: str, start: int = 0, end: Optional[int] = None) -> Dict[str, str]:
+    """The variables a statement binds the rows to: `const { data } = await supabase...`, `const { notifications } = useNotifications(...)`."""
+
+    found = pattern.search(masked, start, len(masked) if end is None else end)
+    return {local: "" for _, local in _pattern_pairs(found.group(1))} if found else {}
+
+def estimate_payloads(
+    root: str,
+    schema: Schema,
+    graph: ChannelGraph,
+    sizes: Optional[ColumnSizes] = None,
+    event_rate: float = DEFAULT_EVENT_RATE,
+) -> PayloadReport:
+    """Size every select() in the data hooks and the components' realtime refetches."""
+
+    sizes = sizes or ColumnSizes()
+    tables = load_table_columns(root, schema)
+    subscriptions = scan_subscription_files(root)
+    queries = [query for shapes in scan_query_files(root).values() for query in _selects(shapes)]
+    seen = {query.location for query in queries}
+    for subscription in subscriptions:
+        for query in _selects(subscription.queries):
+            if query.location not in seen:
+                seen.add(query.location)
+                queries.append(query)
+
+    sources = _Sources(root, graph)
+    callers = _consumers(graph)
+    estimates, by_location = [], {}
+    for query in queries:
+        masked, spans = sources.get(query.path)
+        span = outermost(spans, query.offset)
+        hook = span[2] if span else None
+        selection = parse_selection(query.projection, query.table, tables)
+        rows, bounded = _rows(query)
+        estimate = PayloadEstimate(query, hook, selection, rows, bounded, selection_bytes(selection, sizes, tables))
+        consumers = callers.get((query.path, hook), []) if hook else []
+        # A component that queries for itself is its own consumer
+        if hook and hook[0].isupper() and query.path.endswith(".tsx"):
+            estimate.consumers.append(f"{query.path}:{hook}")
+        if consumers or estimate.consumers:
+            for path, name, _ in consumers:
+                if f"{path}:{name}" not in estimate.consumers:
+                    estimate.consumers.append(f"{path}:{name}")
+            # What the hook does with the rows, then what its callers do with what it returns
+            results = _results(_QUERY_BINDING_RE, masked, max(0, query.offset - _RECEIVER_WINDOW), query.offset)
+            reads = Reads()
+            reads.update(sources.reads(query.path, hook, results))
+            for path, name, local in consumers:
+                call = re.compile(_BINDING_TEXT + re.escape(local) + r"\s*(?:<[^<>()]*>)?\s*\(")
+                reads.update(sources.reads(path, name, _results(call, sources.body(path, name).text)))
+            estimate.unread = sorted(unread_columns(selection, reads, sizes, tables), key=lambda item: -item.row_bytes)
+        estimates.append(estimate)
+        by_location[query.location] = estimate
+
+    refetches = []
+    for subscription in subscriptions:
+        reran = [by_location[query.location] for query in _selects(subscription.queries) if query.location in by_location]
+        if reran:
+            refetches.append(RefetchLoad(subscription, reran, event_rate))
+    return PayloadReport(estimates, refetches, sizes, event_rate)
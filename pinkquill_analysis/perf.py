@@ -0,0 +1,219 @@
+"""
+Benchmarks of the analyzer itself.
+
+generate_tree() writes a synthetic Pinkquill-shaped tree at a multiple of
+this one's source size: the lib/, components/ and app/ files plus scale - 1
+replicas of each, so createNotification() and .channel() density is the
+real tree's. Replicas sit beside their original (useNotifications.r001.ts,
+so lib/hooks/*.ts globs still find them) except under app/, where they go in
+a replica-NNN/ folder to add routes rather than stray files. Migrations are
+copied once: the schema doesn't grow with the code.
+
+run_suite() times, at each scale, a cold run of the default report (no
+.pinkquill-analysis/ index), a warm run that reuses the index, and the parse
+phase of each stage on its own. Runs are separate processes, so peak memory
+is each one's maximum resident set. compare() checks a result against a
+stored baseline.
+"""
+
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .channels import build_graph
+from .coverage import classify_notification_types
+from .index import INDEX_DIRECTORY
+from .model import REQUIRED_NOTIFICATION_TYPES
+from .queries import scan_query_files
+from .realtime import scan_subscription_files
+from .scanner import NOTIFY_FUNCTION, SOURCE_DIRECTORIES, discover_source_files, scan_files
+from .schema import load_schema
+
+RESULT_VERSION = 1
+
+PERF_SCALES = (1, 10, 100)
+# A metric regresses when it grows by more than this share of the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and by more than this much, so timer noise on tiny stages doesn't count
+NOISE_SECONDS = 0.05
+NOISE_KB = 4096
+
+# Copied once into every generated tree
+SHARED_DIRECTORIES = ("supabase", "migrations")
+
+_NOTIFY_RE = re.compile(r"(?<![\w$.])" + NOTIFY_FUNCTION + r"\s*\(")
+_CHANNEL_RE = re.compile(r"\.\s*channel\s*\(")
+
+@dataclass
+class TreeStats:
+    files: int
+    bytes: int
+    lines: int
+    notify_calls: int
+    channels: int
+
+def _replica_path(path: str, index: int) -> str:
+    if path.startswith("app/"):
+        return f"app/replica-{index:03d}/{path[4:]}"
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.r{index:03d}{extension}"
+
+def generate_tree(root: str, destination: str, scale: int) -> TreeStats:
+    """Write a copy of root's sources at `scale` times their size under destination."""
+
+    if scale < 1:
+        raise ValueError(f"scale must be at least 1, not {scale}")
+    for directory in SOURCE_DIRECTORIES + SHARED_DIRECTORIES:
+        if os.path.isdir(os.path.join(root, directory)):
+            shutil.copytree(os.path.join(root, directory), os.path.join(destination, directory),
+                            ignore=shutil.ignore_patterns("node_modules", ".next"))
+    paths = discover_source_files(root)
+    stats = TreeStats(0, 0, 0, 0, 0)
+    for path in paths:
+        with open(os.path.join(root, path), "rb") as handle:
+            data = handle.read()
+        text = data.decode("utf-8", errors="replace")
+        stats.files += scale
+        stats.bytes += len(data) * scale
+        stats.lines += text.count("\n") * scale
+        stats.notify_calls += len(_NOTIFY_RE.findall(text)) * scale
+        stats.channels += len(_CHANNEL_RE.findall(text)) * scale
+        for index in range(1, scale):
+            target = os.path.join(destination, _replica_path(path, index))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as handle:
+                handle.write(data)
+    return stats
+
+def _measure_run(command: Sequence[str]) -> Dict:
+    """Wall and CPU seconds and peak resident KB of one analyzer process."""
+
+    with tempfile.TemporaryFile() as errors:
+        started = time.perf_counter()
+        process = subprocess.Popen(list(command), stdout=subprocess.DEVNULL, stderr=errors)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - started
+        # wait4 reaped it; keep Popen from waiting again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            errors.seek(0)
+            raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}: "
+                               f"{errors.read().decode(errors='replace').strip()[-500:]}")
+    return {"seconds": round(wall, 3), "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3), "peak_kb": usage.ru_maxrss}
+
+def _time_phases(root: str) -> Dict[str, float]:
+    """Seconds for the parse phase of each stage, one process, nothing cached."""
+
+    phases = {}
+
+    def timed(name: str, function: Callable):
+        started = time.perf_counter()
+        value = function()
+        phases[name] = round(time.perf_counter() - started, 3)
+        return value
+
+    paths = timed("discover", lambda: discover_source_files(root))
+    scans = timed("scan", lambda: scan_files(root, paths, workers=1))
+    timed("classify", lambda: classify_notification_types(scans, REQUIRED_NOTIFICATION_TYPES))
+    timed("schema", lambda: load_schema(root, use_cache=False))
+    timed("queries", lambda: scan_query_files(root))
+    timed("subscriptions", lambda: scan_subscription_files(root))
+    timed("channels", lambda: build_graph(root))
+    return phases
+
+def run_suite(
+    root: str,
+    command: Sequence[str],
+    scales: Sequence[int] = PERF_SCALES,
+    runs: int = 1,
+    directory: Optional[str] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """Generate each scale's tree, time the analyzer on it and return the JSON-ready result.
+
+    command runs the analyzer's default report; `--root <tree>` is appended.
+    Each measurement is the fastest of `runs`.
+    """
+
+    results = []
+    # A fresh interpreter, so one scale's imports and caches don't carry into the next
+    context = multiprocessing.get_context("spawn")
+    for scale in scales:
+        with tempfile.TemporaryDirectory(dir=directory) as scratch:
+            tree = os.path.join(scratch, "tree")
+            if progress:
+                progress(f"generating the {scale}x tree")
+            stats = generate_tree(root, tree, scale)
+            full = list(command) + ["--root", tree]
+            cold, warm, phases = [], [], []
+            for run in range(runs):
+                shutil.rmtree(os.path.join(tree, INDEX_DIRECTORY), ignore_errors=True)
+                if progress:
+                    progress(f"{scale}x: {stats.files:,} files, run {run + 1} of {runs}")
+                cold.append(_measure_run(full))
+                warm.append(_measure_run(full))
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    phases.append(pool.submit(_time_phases, tree).result())
+            results.append({
+                "scale": scale,
+                "tree": vars(stats),
+                "cold": min(cold, key=lambda item: item["seconds"]),
+                "warm": min(warm, key=lambda item: item["seconds"]),
+                "phases": {name: min(item[name] for item in phases) for name in phases[0]},
+            })
+
+    return {
+        "version": RESULT_VERSION,
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "runs": runs,
+        "scales": list(scales),
+        "results": results,
+    }
+
+def _metrics(entry: Dict) -> Dict[str, float]:
+    metrics = {}
+    for run in ("cold", "warm"):
+        metrics[f"{run} seconds"] = entry[run]["seconds"]
+        metrics[f"{run} peak KB"] = entry[run]["peak_kb"]
+    for name, seconds in entry["phases"].items():
+        metrics[f"{name} phase seconds"] = seconds
+    return metrics
+
+@dataclass
+class Regression:
+    scale: int
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else float("inf")
+
+def compare(result: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Regression]:
+    """The metrics, at scales both results measured, that grew past the threshold."""
+
+    if baseline.get("version") != result["version"]:
+        raise ValueError(f"baseline is result version {baseline.get('version')}, this suite writes {result['version']}")
+    previous = {entry["scale"]: _metrics(entry) for entry in baseline["results"]}
+    regressions = []
+    for entry in result["results"]:
+        if entry["scale"] not in previous:
+            continue
+        for metric, value in _metrics(entry).items():
+            before = previous[entry["scale"]].get(metric)
+            if before is None:
+                continue
+            noise = NOISE_KB if metric.endswith("KB") else NOISE_SECONDS
+            if value - before > max(threshold * before, noise):
+                regressions.append(Regression(entry["scale"], metric, before, value))
+    return regressions
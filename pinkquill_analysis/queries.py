@@ -0,0 +1,290 @@
+"""
+Supabase query-shape extraction.
+
+Finds every `supabase.from(table)` builder chain in the data hooks and
+records its shape: the operation, filters, ordering, limit and projection.
+Chains built up conditionally (`let query = supabase.from(...)` followed by
+`query = query.eq(...)`) have the later calls folded in and marked as
+conditional.
+"""
+
+import glob
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .source import DefinitionIndex, LineIndex, mask_comments, split_arguments, string_literals
+
+QUERY_SOURCES = ("lib/hooks/*.ts", "lib/hooks.legacy.ts")
+
+# PostgREST builder methods; a chain ends at the first call that isn't one of these
+OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+EQUALITY_FILTERS = {"eq", "is", "in", "match"}
+RANGE_FILTERS = {"gt", "gte", "lt", "lte"}
+OTHER_FILTERS = {
+    "neq", "like", "ilike", "not", "or", "contains", "containedBy", "overlaps",
+    "textSearch", "filter", "likeAnyOf", "ilikeAnyOf",
+}
+MODIFIERS = {"order", "limit", "range", "single", "maybeSingle", "csv", "returns", "abortSignal", "throwOnError"}
+BUILDER_METHODS = OPERATIONS | EQUALITY_FILTERS | RANGE_FILTERS | OTHER_FILTERS | MODIFIERS
+
+_FROM_RE = re.compile(r"\.\s*from\s*\(")
+_LINK_RE = re.compile(r"\s*\.\s*([A-Za-z_$][\w$]*)\s*(?:<[^<>()]*>)?\s*\(")
+_ASSIGNMENT_RE = re.compile(r"(?:\b(?:let|var|const)\s+)?([A-Za-z_$][\w$]*)\s*=\s*(?:await\s+)?[\w$.]*\s*$")
+_ASCENDING_FALSE_RE = re.compile(r"\bascending\s*:\s*false\b")
+_REFERENCED_TABLE_RE = re.compile(r"\b(?:foreignTable|referencedTable)\s*:")
+_COUNT_RE = re.compile(r"\bcount\s*:\s*['\"](\w+)['\"]")
+_HEAD_TRUE_RE = re.compile(r"\bhead\s*:\s*true\b")
+_INTEGER_RE = re.compile(r"^\d+$")
+_MATCH_KEY_RE = re.compile(r"([A-Za-z_][\w]*)\s*:")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_$][\w$]*$")
+
+@dataclass
+class Filter:
+    column: str
+    operator: str
+    # Literal value when it is a constant (true/false/null/number/string)
+    value: Optional[str] = None
+    # Added by a later `query = query.eq(...)` rather than the chain itself
+    conditional: bool = False
+
+    @property
+    def kind(self) -> str:
+        if self.operator in EQUALITY_FILTERS:
+            return "equality"
+        if self.operator in RANGE_FILTERS:
+            return "range"
+        return "other"
+
+@dataclass
+class QueryShape:
+    path: str
+    line: int
+    handler: Optional[str]
+    table: str
+    operation: str
+    filters: List[Filter] = field(default_factory=list)
+    # (column, descending) in ORDER BY order, this table's columns only
+    order: List[Tuple[str, bool]] = field(default_factory=list)
+    limit: Optional[int] = None
+    projection: Optional[str] = None
+    count: Optional[str] = None
+    head: bool = False
+    # Offset of the `.from(` in the file, for callers that relate queries to other code
+    offset: int = 0
+    # Keys of an insert/update object literal, with their literal values (None when computed)
+    values: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.line}"
+
+    @property
+    def reads(self) -> bool:
+        """True when the statement has to find rows (anything but a plain insert)."""
+        return self.operation not in ("insert", "upsert")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QueryShape":
+        return cls(**{
+            **data,
+            "filters": [Filter(**item) for item in data["filters"]],
+            "order": [tuple(item) for item in data["order"]],
+        })
+
+    def columns(self, kind: str) -> List[str]:
+        seen = []
+        for item in self.filters:
+            if item.kind == kind and item.column not in seen:
+                seen.append(item.column)
+        return seen
+
+    def describe(self) -> str:
+        """Compact SQL-ish rendering, e.g. `select notifications where user_id = ? order by created_at desc limit 50`."""
+
+        verb = "count" if self.head and self.count else self.operation
+        parts = [f"{verb} {self.table}"]
+        if self.filters:
+            conditions = []
+            for item in self.filters:
+                value = item.value if item.value is not None else "?"
+                text = f"{item.column} {_OPERATOR_TEXT.get(item.operator, item.operator)} {value}"
+                conditions.append(f"[{text}]" if item.conditional else text)
+            parts.append("where " + " and ".join(conditions))
+        if self.order:
+            parts.append("order by " + ", ".join(f"{column}{' desc' if descending else ''}" for column, descending in self.order))
+        if self.limit is not None:
+            parts.append(f"limit {self.limit}")
+        return " ".join(parts)
+
+_OPERATOR_TEXT = {"eq": "=", "is": "is", "in": "in", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "neq": "<>"}
+
+def _literal_value(argument: str) -> Optional[str]:
+    argument = argument.strip()
+    if argument in ("true", "false", "null") or _INTEGER_RE.match(argument):
+        return argument
+    literals = string_literals(argument)
+    if len(literals) == 1 and argument[0] in "'\"" and len(argument) == len(literals[0]) + 2:
+        return f"'{literals[0]}'"
+    return None
+
+def _column_name(argument: str) -> Optional[str]:
+    literals = string_literals(argument)
+    if len(literals) != 1 or len(argument.strip()) != len(literals[0]) + 2:
+        return None
+    # "post.author_id" filters an embedded resource, not this table
+    return literals[0] if "." not in literals[0] else None
+
+def _object_values(argument: str) -> Dict[str, Optional[str]]:
+    """Top-level keys of an object literal argument, e.g. `{ read: true, user_id: userId }`."""
+
+    argument = argument.strip()
+    if not argument.startswith("{") or not argument.endswith("}"):
+        return {}
+    values = {}
+    entries, _ = split_arguments("(" + argument[1:-1] + ")", 0)
+    for entry in entries:
+        key, colon, value = entry.partition(":")
+        key = key.strip().strip("'\"")
+        if _IDENTIFIER_RE.match(key):
+            values[key] = _literal_value(value) if colon else None
+    return values
+
+def _apply_link(query: QueryShape, method: str, arguments: List[str], conditional: bool = False):
+    if method in OPERATIONS:
+        query.operation = method
+        if method in ("insert", "update", "upsert") and arguments:
+            query.values = _object_values(arguments[0])
+        if method == "select":
+            query.projection = (string_literals(arguments[0]) or [arguments[0]])[0].strip() if arguments else "*"
+            options = arguments[1] if len(arguments) > 1 else ""
+            count = _COUNT_RE.search(options)
+            query.count = count.group(1) if count else None
+            query.head = bool(_HEAD_TRUE_RE.search(options))
+        return
+
+    if method == "match" and arguments:
+        for key in _MATCH_KEY_RE.findall(arguments[0]):
+            query.filters.append(Filter(key, "eq", conditional=conditional))
+        return
+
+    if method in EQUALITY_FILTERS | RANGE_FILTERS | OTHER_FILTERS:
+        column = _column_name(arguments[0]) if arguments else None
+        if column is None:
+            if method in ("or", "not") or not arguments:
+                query.filters.append(Filter("*", method, conditional=conditional))
+            return
+        operator = method
+        value = _literal_value(arguments[1]) if len(arguments) > 1 else None
+        if method == "filter" and len(arguments) > 1:
+            operator = (string_literals(arguments[1]) or ["filter"])[0]
+            value = _literal_value(arguments[2]) if len(arguments) > 2 else None
+        elif method == "not":
+            value = None
+        query.filters.append(Filter(column, operator, value, conditional))
+        return
+
+    if method == "order" and arguments:
+        column = _column_name(arguments[0])
+        options = arguments[1] if len(arguments) > 1 else ""
+        if column is not None and not _REFERENCED_TABLE_RE.search(options):
+            query.order.append((column, bool(_ASCENDING_FALSE_RE.search(options))))
+    elif method == "limit" and arguments and not _REFERENCED_TABLE_RE.search(" ".join(arguments[1:])):
+        if _INTEGER_RE.match(arguments[0]):
+            query.limit = int(arguments[0])
+    elif method == "range" and len(arguments) >= 2:
+        if _INTEGER_RE.match(arguments[0]) and _INTEGER_RE.match(arguments[1]):
+            query.limit = int(arguments[1]) - int(arguments[0]) + 1
+    elif method in ("single", "maybeSingle"):
+        query.limit = 1
+
+def _follow_chain(masked: str, position: int, query: QueryShape, conditional: bool = False) -> int:
+    """Apply builder calls starting at position; return the offset after the last one."""
+
+    while True:
+        link = _LINK_RE.match(masked, position)
+        if not link or link.group(1) not in BUILDER_METHODS:
+            return position
+        arguments, position = split_arguments(masked, link.end() - 1)
+        _apply_link(query, link.group(1), arguments, conditional)
+
+def _enclosing_span(spans: Sequence[Tuple[int, int, str]], offset: int) -> Tuple[int, int]:
+    best = (0, -1)
+    for start, end, _ in spans:
+        if start > offset:
+            break
+        if offset < end:
+            best = (start, end)
+    return best
+
+def scan_queries(path: str, text: str) -> List[QueryShape]:
+    """Extract every supabase.from() chain in one file."""
+
+    if ".from(" not in text and ".from (" not in text:
+        return []
+
+    masked = mask_comments(text)
+    return scan_masked_queries(path, masked, LineIndex(text), DefinitionIndex(masked))
+
+def scan_masked_queries(path: str, masked: str, lines: LineIndex, definitions: DefinitionIndex) -> List[QueryShape]:
+    """scan_queries() for a file whose comments are already masked."""
+
+    spans = definitions.spans()
+    queries = []
+
+    for match in _FROM_RE.finditer(masked):
+        # Array.from(), supabase.storage.from(bucket) and friends are not table queries
+        receiver = masked[max(0, match.start() - 40):match.start()].rstrip()
+        if receiver.endswith(("storage", "Array")):
+            continue
+        arguments, end = split_arguments(masked, match.end() - 1)
+        table = _column_name(arguments[0]) if len(arguments) == 1 else None
+        if table is None:
+            continue
+
+        query = QueryShape(
+            path=path,
+            line=lines.line_of(match.start()),
+            handler=definitions.enclosing(match.start()),
+            table=table,
+            operation="select",
+            offset=match.start(),
+        )
+        end = _follow_chain(masked, end, query)
+
+        # `let query = supabase.from(...)...; if (x) query = query.eq(...)`
+        statement_start = max(masked.rfind(";", 0, match.start()), masked.rfind("{", 0, match.start()), masked.rfind("}", 0, match.start())) + 1
+        assignment = _ASSIGNMENT_RE.search(masked, statement_start, match.start())
+        if assignment:
+            variable = re.escape(assignment.group(1))
+            _, scope_end = _enclosing_span(spans, match.start())
+            scope_end = scope_end if scope_end > end else len(masked)
+            for later in re.finditer(r"\b" + variable + r"\s*=\s*" + variable + r"\b", masked[:scope_end]):
+                if later.start() > end:
+                    _follow_chain(masked, later.end(), query, conditional=True)
+
+        queries.append(query)
+
+    return queries
+
+def discover_query_files(root: str, sources: Sequence[str] = QUERY_SOURCES) -> List[str]:
+    """Return repo-relative paths of the files whose queries are analysed, sorted."""
+
+    paths = set()
+    for pattern in sources:
+        for match in glob.glob(os.path.join(root, pattern)):
+            paths.add(os.path.relpath(match, root).replace(os.sep, "/"))
+    return sorted(paths)
+
+def scan_query_files(root: str, paths: Optional[Sequence[str]] = None) -> Dict[str, List[QueryShape]]:
+    """Scan the query files; returns path -> queries in file order."""
+
+    results = {}
+    for path in discover_query_files(root) if paths is None else paths:
+        with open(os.path.join(root, path), "rb") as handle:
+            results[path] = scan_queries(path, handle.read().decode("utf-8", errors="replace"))
+    return results
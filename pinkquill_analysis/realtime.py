@@ -0,0 +1,326 @@
+"""
+Realtime subscription amplification.
+
+Reads every `.channel(...).on("postgres_changes", ...)` subscription and
+works out what its callback does when an event arrives: which functions
+in the same component or hook it calls, and which queries those run.
+simulate() replays a synthetic stream of INSERTs on one table through that
+model and measures the read amplification: for each insert, how many
+channels wake up, how many queries they re-run and how many rows those
+queries read.
+"""
+
+import bisect
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .advisor import INDEX_ONLY, SEQ_SCAN, QueryPlan, plan_query
+from .queries import QueryShape, scan_masked_queries
+from .schema import Schema
+from .scanner import discover_source_files
+from .source import DefinitionIndex, LineIndex, body_extent, mask_comments, split_arguments, string_literals
+
+# Who a subscription hears an event from
+OWNER = "owner"          # filter on the subscriber's own id (user_id=eq.${userId}): the row's owner
+ENTITY = "entity"        # filter on a post/conversation id: clients that have it open
+BROADCAST = "broadcast"  # no filter: every client with the subscription
+
+# Simulation defaults
+DEFAULT_USERS = 1000
+DEFAULT_EVENTS = 10000
+DEFAULT_ROWS_PER_USER = 200
+# Share of a user's rows that match a boolean flag filter such as read = false
+DEFAULT_FLAG_FRACTION = 0.2
+# Inserts per user per hour when turning per-insert costs into load
+DEFAULT_INSERT_RATE = 10.0
+# Recipient popularity follows a Zipf law with this exponent
+DEFAULT_SKEW = 1.1
+
+_CHANNEL_RE = re.compile(r"\.\s*channel\s*\(")
+_LINK_RE = re.compile(r"\s*\.\s*([A-Za-z_$][\w$]*)\s*\(")
+_OPTION_RE = re.compile(r"\b(event|table|filter)\s*:\s*(['\"`])(.*?)\2")
+_FILTER_RE = re.compile(r"^(\w+)=(\w+)\.(.*)$")
+_CALLED_RE = re.compile(r"(?<![\w$.])([A-Za-z_$][\w$]*)(?:Ref\.current)?\s*(?:\?\.)?\s*\(")
+_IDENTIFIER_RE = re.compile(r"^\s*([A-Za-z_$][\w$]*)\s*$")
+_EMBED_RE = re.compile(r"(?:[A-Za-z_]\w*\s*:\s*)?[A-Za-z_]\w*(?:!\w+)?\s*\(")
+_TEMPLATE_VARIABLE_RE = re.compile(r"\$\{([^}]*)\}")
+_USER_VARIABLE_RE = re.compile(r"user", re.IGNORECASE)
+
+@dataclass
+class Subscription:
+    path: str
+    line: int
+    # Outermost definition around the subscription: the hook or component
+    owner: Optional[str]
+    # Channel name as written, e.g. notifications-realtime-${userId}
+    channel: str
+    table: str
+    event: str = "*"
+    filter: Optional[str] = None
+    # Functions the callback ends up calling, in the order they were found
+    handlers: List[str] = field(default_factory=list)
+    queries: List[QueryShape] = field(default_factory=list)
+    # The callback goes through setTimeout, so bursts collapse into one refetch
+    debounced: bool = False
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.line}"
+
+    @property
+    def audience(self) -> str:
+        if not self.filter:
+            return BROADCAST
+        match = _FILTER_RE.match(self.filter)
+        variables = _TEMPLATE_VARIABLE_RE.findall(match.group(3)) if match else []
+        return OWNER if any(_USER_VARIABLE_RE.search(variable) for variable in variables) else ENTITY
+
+    @property
+    def filter_column(self) -> Optional[str]:
+        match = _FILTER_RE.match(self.filter or "")
+        return match.group(1) if match else None
+
+    def hears(self, table: str, event: str) -> bool:
+        return self.table == table and self.event in ("*", event)
+
+def outermost(spans: Sequence[Tuple[int, int, str]], offset: int) -> Optional[Tuple[int, int, str]]:
+    """The top-level definition (start, end, name) containing offset, if any."""
+
+    for span in spans:
+        if span[0] > offset:
+            break
+        if offset < span[1]:
+            return span
+    return None
+
+def channel_name(masked: str, argument: str, scope: Tuple[int, int]) -> str:
+    """The .channel() name as written, following a `const channelName = ...` in scope."""
+
+    argument = argument.strip()
+    # `const channelName = \`...\`; supabase.channel(channelName)`
+    identifier = _IDENTIFIER_RE.match(argument)
+    if identifier:
+        declaration = re.compile(r"(?:const|let|var)\s+" + re.escape(identifier.group(1)) + r"\s*=\s*")
+        match = declaration.search(masked, *scope)
+        if match:
+            argument = masked[match.end():body_extent(masked, match.end())].strip()
+    if argument[:1] in ("`", "'", '"') and argument[-1:] == argument[:1]:
+        return argument[1:-1]
+    return argument
+
+def _reach(masked: str, spans: Sequence[Tuple[int, int, str]], scope: Tuple[int, int], callback: str):
+    """Follow calls from a callback through functions defined in scope; return (names, spans, debounced)."""
+
+    names = list(_CALLED_RE.findall(callback))
+    bare = _IDENTIFIER_RE.match(callback)
+    if bare:
+        names.append(bare.group(1))
+    debounced = "setTimeout" in callback
+
+    reached = []
+    visited = set()
+    queue = list(dict.fromkeys(names))
+    handlers = []
+    while queue:
+        name = queue.pop(0)
+        for start, end, defined in spans:
+            if defined != name or not scope[0] <= start < scope[1] or (start, end) in visited or (start, end) == scope:
+                continue
+            visited.add((start, end))
+            reached.append((start, end))
+            if name not in handlers:
+                handlers.append(name)
+            body = masked[start:end]
+            debounced = debounced or "setTimeout" in body
+            for called in _CALLED_RE.findall(body):
+                if called not in queue and called not in handlers:
+                    queue.append(called)
+    return handlers, reached, debounced
+
+def scan_subscriptions(path: str, text: str) -> List[Subscription]:
+    """Extract the postgres_changes subscriptions in one file."""
+
+    if "postgres_changes" not in text:
+        return []
+
+    masked = mask_comments(text)
+    lines = LineIndex(text)
+    definitions = DefinitionIndex(masked)
+    spans = definitions.spans()
+    queries = scan_masked_queries(path, masked, lines, definitions)
+    subscriptions = []
+
+    for match in _CHANNEL_RE.finditer(masked):
+        arguments, position = split_arguments(masked, match.end() - 1)
+        outer = outermost(spans, match.start())
+        scope = (outer[0], outer[1]) if outer else (0, len(masked))
+        channel = channel_name(masked, arguments[0] if arguments else "", scope)
+
+        while True:
+            link = _LINK_RE.match(masked, position)
+            if not link:
+                break
+            link_arguments, position = split_arguments(masked, link.end() - 1)
+            if link.group(1) != "on" or len(link_arguments) < 3 or string_literals(link_arguments[0]) != ["postgres_changes"]:
+                continue
+            options = {key: value for key, _, value in _OPTION_RE.findall(link_arguments[1])}
+            if "table" not in options:
+                continue
+
+            handlers, reached, debounced = _reach(masked, spans, scope, link_arguments[2])
+            subscriptions.append(Subscription(
+                path=path,
+                line=lines.line_of(link.start(1)),
+                owner=outer[2] if outer else None,
+                channel=channel,
+                table=options["table"],
+                event=options.get("event", "*").upper(),
+                filter=options.get("filter"),
+                handlers=handlers,
+                queries=[query for query in queries if any(start <= query.offset < end for start, end in reached)],
+                debounced=debounced,
+            ))
+
+    return subscriptions
+
+def scan_subscription_files(root: str, paths: Optional[Sequence[str]] = None) -> List[Subscription]:
+    """Scan every source file (or the given ones) for subscriptions."""
+
+    subscriptions = []
+    for path in discover_source_files(root) if paths is None else paths:
+        with open(os.path.join(root, path), "rb") as handle:
+            subscriptions.extend(scan_subscriptions(path, handle.read().decode("utf-8", errors="replace")))
+    return subscriptions
+
+def embedded_resources(projection: Optional[str]) -> int:
+    """Embedded relations in a select() projection (`actor:profiles!fk (...)`); each costs a lookup per row."""
+
+    return len(_EMBED_RE.findall(projection or ""))
+
+@dataclass
+class SubscriptionLoad:
+    subscription: Subscription
+    plans: List[QueryPlan]
+    deliveries: int = 0
+    queries: int = 0
+    rows_examined: int = 0
+    rows_returned: int = 0
+    # Rows looked up for embedded relations of the returned rows
+    rows_embedded: int = 0
+
+@dataclass
+class Amplification:
+    table: str
+    users: int
+    sessions: int
+    events: int
+    rows_per_user: int
+    loads: List[SubscriptionLoad] = field(default_factory=list)
+    # Rows examined per insert, over all woken channels, in event order
+    examined_per_event: List[int] = field(default_factory=list)
+
+    def per_insert(self, attribute: str) -> float:
+        return sum(getattr(load, attribute) for load in self.loads) / self.events if self.events else 0.0
+
+    def percentile(self, fraction: float) -> int:
+        ordered = sorted(self.examined_per_event)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0
+
+def _rows(plan: QueryPlan, owned: float, flagged: float, table_rows: float, flag_fraction: float) -> Tuple[float, float]:
+    """(rows examined, rows returned) for one run of a planned query."""
+
+    query = plan.query
+    bound = [item for item in query.filters if item.kind == "equality" and item.value is None]
+    flags = [item for item in query.filters if item.kind == "equality" and item.value in ("true", "false")]
+    if not bound:
+        matched = table_rows * flag_fraction ** len(flags)
+    elif flags:
+        matched = flagged * flag_fraction ** (len(flags) - 1)
+    else:
+        matched = owned
+
+    if plan.access == SEQ_SCAN:
+        examined = table_rows
+    elif plan.access == INDEX_ONLY and not plan.needs_sort:
+        examined = min(query.limit, matched) if query.limit else matched
+    else:
+        # The index narrows to the bound rows; the rest is filtered or sorted row by row
+        examined = owned if bound else matched
+
+    if query.head:
+        returned = 0.0
+    else:
+        returned = min(query.limit, matched) if query.limit else matched
+    return examined, returned
+
+def simulate(
+    subscriptions: Sequence[Subscription],
+    schema: Schema,
+    table: str = "notifications",
+    users: int = DEFAULT_USERS,
+    events: int = DEFAULT_EVENTS,
+    sessions: int = 1,
+    rows_per_user: int = DEFAULT_ROWS_PER_USER,
+    flag_fraction: float = DEFAULT_FLAG_FRACTION,
+    skew: float = DEFAULT_SKEW,
+    seed: int = 0,
+) -> Amplification:
+    """Replay `events` INSERTs on table through the subscriptions that hear them.
+
+    Every user is online with `sessions` clients, each mounting every
+    subscription once. Recipients are drawn with Zipf(skew) popularity and
+    start with rows_per_user rows, flag_fraction of them unread; queries on
+    other tables assume the same per-user row count. Broadcast subscriptions
+    wake every client, entity subscriptions one viewer's clients.
+    """
+
+    rng = random.Random(seed)
+    result = Amplification(table=table, users=users, sessions=sessions, events=events, rows_per_user=rows_per_user)
+    for subscription in subscriptions:
+        if subscription.hears(table, "INSERT"):
+            plans = [plan_query(query, schema) for query in subscription.queries if query.reads]
+            result.loads.append(SubscriptionLoad(subscription, plans))
+
+    weights = []
+    total = 0.0
+    for rank in range(1, users + 1):
+        total += 1.0 / rank ** skew
+        weights.append(total)
+    owned = [float(rows_per_user)] * users
+    flagged = [rows_per_user * flag_fraction] * users
+    table_rows = float(users * rows_per_user)
+    flagged_rows = users * rows_per_user * flag_fraction
+    other_rows = float(users * rows_per_user)
+
+    for _ in range(events):
+        recipient = bisect.bisect_left(weights, rng.random() * total)
+        owned[recipient] += 1
+        flagged[recipient] += 1
+        table_rows += 1
+        flagged_rows += 1
+        average_owned = table_rows / users
+        average_flagged = flagged_rows / users
+
+        examined_now = 0.0
+        for load in result.loads:
+            audience = load.subscription.audience
+            clients = users * sessions if audience == BROADCAST else sessions
+            load.deliveries += clients
+            for plan in load.plans:
+                if plan.query.table != table:
+                    examined, returned = _rows(plan, rows_per_user, rows_per_user * flag_fraction, other_rows, flag_fraction)
+                elif audience == OWNER:
+                    examined, returned = _rows(plan, owned[recipient], flagged[recipient], table_rows, flag_fraction)
+                else:
+                    examined, returned = _rows(plan, average_owned, average_flagged, table_rows, flag_fraction)
+                load.queries += clients
+                load.rows_examined += int(examined * clients)
+                load.rows_returned += int(returned * clients)
+                load.rows_embedded += int(returned * clients * embedded_resources(plan.query.projection))
+                examined_now += examined * clients
+        result.examined_per_event.append(int(examined_now))
+
+    return result
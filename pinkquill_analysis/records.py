@@ -0,0 +1,173 @@
+"""
+Machine-readable report output.
+
+The report as a stream of records, each a dict with a "type": "feature"
+for every notification feature, "issue" for every prioritised issue,
+"summary" last, and "commit" for each commit of a --history run. Writers
+encode records as they arrive, so a consumer sees the first features
+before the schema and query analysis finish and can stop reading at any
+point; nothing is buffered beyond the record being written.
+
+  jsonl  one object per line, a "header" first, flushed per record
+  json   {"schema", "version", "records": [...]}, written incrementally
+  sarif  SARIF 2.1.0 with one run: notification types that aren't
+         IMPLEMENTED and issues become results, for CI annotations
+
+SCHEMA_VERSION goes up when a field is removed or changes meaning; new
+fields don't change it.
+"""
+
+import json
+import re
+from typing import Dict, IO, Optional
+
+from .model import ANALYZER_VERSION, REQUIRED_NOTIFICATION_TYPES, NotificationFeature, Status
+
+SCHEMA = "pinkquill-notification-analysis"
+SCHEMA_VERSION = 1
+
+FORMATS = ("text", "json", "jsonl", "sarif")
+
+# Issue rules: SARIF rule ids, and the "rule" of issue records
+RULES = {
+    "notification-type-missing": "A required notification type has no createNotification() call site",
+    "notification-type-partial": "A required notification type is only reachable through a variable type argument",
+    "notification-per-recipient": "createNotification() is called once per recipient inside a loop",
+    "realtime-query-unindexed": "A query re-run on every realtime event has no matching index",
+    "type-constraint": "The notifications type CHECK constraint rejects required types",
+    "type-constraint-unverified": "The notifications type CHECK constraint is missing or its allowed values can't be read",
+    "realtime-publication": "A table the app subscribes to is not in the realtime publication",
+    "navigation": "A notification doesn't take the user to what it is about",
+}
+
+# Feature records of required notification types; hand-listed UI features have no SARIF result
+FEATURE_RULES = {Status.MISSING: "notification-type-missing", Status.PARTIAL: "notification-type-partial"}
+
+_SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+_SARIF_LEVELS = {"HIGH": "error", "MEDIUM": "warning", "LOW": "note"}
+# `lib/hooks/useNotifications.ts:11 (handler)`, `supabase/migrations/`
+_LOCATION_RE = re.compile(r"^([\w@./\[\]()-]+?\.\w+|[\w@./-]+/)(?::(\d+))?(?:\s|$)")
+
+def split_location(location: Optional[str]) -> Dict:
+    """`path:line (handler)` -> {"path": ..., "line": ...}; empty when there is no file."""
+
+    match = _LOCATION_RE.match(location or "")
+    if not match:
+        return {}
+    parts = {"path": match.group(1)}
+    if match.group(2):
+        parts["line"] = int(match.group(2))
+    return parts
+
+def feature_record(category: str, feature: NotificationFeature, failures: Optional[int] = None) -> Dict:
+    record = {
+        "type": "feature",
+        "category": category,
+        "name": feature.name,
+        "status": feature.status.name.lower(),
+        "description": feature.description,
+        "notes": feature.notes,
+        "location": feature.location,
+        **split_location(feature.location),
+    }
+    if failures is not None:
+        record["logged_failures"] = failures
+    return record
+
+def issue_record(issue: Dict[str, str]) -> Dict:
+    return {"type": "issue", **issue, **split_location(issue["location"])}
+
+class RecordWriter:
+    """Encodes records to a text stream as they are written."""
+
+    def __init__(self, handle: IO[str]):
+        self.handle = handle
+        self.count = 0
+
+    def write(self, record: Dict):
+        self.count += 1
+
+    def close(self):
+        self.handle.flush()
+
+class JsonLinesWriter(RecordWriter):
+    def __init__(self, handle: IO[str]):
+        super().__init__(handle)
+        self._line({"type": "header", "schema": SCHEMA, "version": SCHEMA_VERSION, "analyzer": ANALYZER_VERSION})
+
+    def _line(self, record: Dict):
+        self.handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.handle.flush()
+
+    def write(self, record: Dict):
+        super().write(record)
+        self._line(record)
+
+class JsonWriter(RecordWriter):
+    def __init__(self, handle: IO[str]):
+        super().__init__(handle)
+        handle.write(f'{{"schema": "{SCHEMA}", "version": {SCHEMA_VERSION}, "analyzer": "{ANALYZER_VERSION}", "records": [')
+
+    def write(self, record: Dict):
+        self.handle.write(("," if self.count else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+        self.handle.flush()
+        super().write(record)
+
+    def close(self):
+        self.handle.write("\n]}\n")
+        super().close()
+
+class SarifWriter(RecordWriter):
+    """SARIF 2.1.0. Summary and commit records, and features that aren't notification types, are skipped."""
+
+    def __init__(self, handle: IO[str]):
+        super().__init__(handle)
+        driver = {
+            "name": SCHEMA,
+            "version": ANALYZER_VERSION,
+            "rules": [{"id": rule, "shortDescription": {"text": text}} for rule, text in RULES.items()],
+        }
+        header = json.dumps({"tool": {"driver": driver}, "properties": {"schemaVersion": SCHEMA_VERSION}})
+        handle.write(f'{{"version": "2.1.0", "$schema": "{_SARIF_SCHEMA}", "runs": [{header[:-1]}, "results": [')
+
+    def _result(self, record: Dict) -> Optional[Dict]:
+        if record["type"] == "feature":
+            status = Status[record["status"].upper()]
+            if status not in FEATURE_RULES or record["name"] not in REQUIRED_NOTIFICATION_TYPES:
+                return None
+            rule, level = FEATURE_RULES[status], "warning" if status == Status.MISSING else "note"
+            text = f"{record['name']} notification {record['status']}: {record['notes']}"
+        elif record["type"] == "issue":
+            # Missing and partial types already came through as features
+            if record.get("rule") in FEATURE_RULES.values():
+                return None
+            rule, level = record.get("rule"), _SARIF_LEVELS[record["priority"]]
+            text = f"{record['issue']}. {record['detail']}. Fix: {record['fix']}"
+        else:
+            return None
+        result = {"ruleId": rule, "level": level, "message": {"text": text}}
+        if "path" in record:
+            region = {"region": {"startLine": record["line"]}} if "line" in record else {}
+            result["locations"] = [{"physicalLocation": {"artifactLocation": {"uri": record["path"]}, **region}}]
+        return result
+
+    def write(self, record: Dict):
+        result = self._result(record)
+        if result is None:
+            return
+        self.handle.write(("," if self.count else "") + "\n  " + json.dumps(result, ensure_ascii=False))
+        self.handle.flush()
+        super().write(record)
+
+    def close(self):
+        self.handle.write("\n]}]}\n")
+        super().close()
+
+_WRITERS = {"json": JsonWriter, "jsonl": JsonLinesWriter, "sarif": SarifWriter}
+
+def open_writer(output_format: str, handle: IO[str]) -> RecordWriter:
+    """A writer for one of FORMATS other than text."""
+
+    if output_format not in _WRITERS:
+        raise ValueError(f"no record writer for format {output_format!r}; use one of {', '.join(_WRITERS)}")
+    return _WRITERS[output_format](handle)
@@ -0,0 +1,446 @@
+"""
+Notifications table growth and retention planner.
+
+Nothing deletes from notifications. The panel shows the newest 50 rows, but
+useUnreadCount's `select("*", { count: "exact", head: true })` counts over
+the user's whole history, and it runs again on every change to the user's
+notifications. plan_retention() takes the insert rate and type mix of a
+notification stream (the synthetic workload or an export of the table). It
+sizes an on-disk row from the notifications columns the migrations and
+lib/types declare, with the optional columns (post_id, content,
+community_id, comment_id) filled in the way each type's createNotification()
+call sites fill them. From that it projects the table, its indexes and the
+pages one exact unread count reads, month by month, under each retention
+strategy:
+
+  keep       every row stays (today)
+  ttl        a daily DELETE of rows older than the TTL
+  archive    read rows older than a cutoff move to notifications_archive
+  partition  monthly partitions on created_at, each dropped whole after the TTL
+  counter    every row stays; the badge reads a trigger-maintained per-user count
+
+The count is costed with the access path the index advisor finds for the
+real query, and again with the index it suggests.
+"""
+
+import math
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .advisor import INDEX_FILTER, INDEX_ONLY, INDEX_SORT, QueryPlan, plan_query, table_indexes
+from .coalesce import EventStream
+from .payload import TableColumns
+from .queries import QueryShape, discover_query_files, scan_queries
+from .scanner import NOTIFY_FUNCTION, TYPE_ARGUMENT_INDEX, FileScan
+from .schema import Index, Schema
+from .typeflow import TypeResolver
+from .workload import NOTIFICATION_TYPES, WorkloadProfile
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - workload.py reports the missing dependency
+    np = None
+
+TABLE = "notifications"
+
+DEFAULT_MONTHS = (12, 24, 36)
+DEFAULT_TTL = 90 * 86400.0
+DEFAULT_ARCHIVE_AFTER = 30 * 86400.0
+DAYS_PER_MONTH = 30.44
+
+STRATEGIES = {
+    "keep": "every row stays (today: nothing deletes)",
+    "ttl": "daily DELETE of rows older than the TTL",
+    "archive": "read rows older than the cutoff move to notifications_archive",
+    "partition": "monthly partitions on created_at, each dropped whole after the TTL",
+    "counter": "every row stays; the badge reads a trigger-maintained per-user count",
+}
+
+# createNotification(userId, actorId, type, postId, content, communityId, commentId): the column each argument fills
+ARGUMENT_COLUMNS = ("user_id", "actor_id", "type", "post_id", "content", "community_id", "comment_id")
+# Characters of content assumed where a call site passes a computed string
+DEFAULT_CONTENT_CHARS = 80
+
+# Postgres storage: 8 KB pages with a 24-byte header, a 4-byte line pointer per tuple,
+# 23-byte heap tuple headers and 8-byte index tuple headers, everything 8-byte aligned
+PAGE_BYTES = 8192
+_PAGE_HEADER = 24
+_LINE_POINTER = 4
+_TUPLE_HEADER = 23
+_INDEX_TUPLE_HEADER = 8
+_ALIGN = 8
+# B-tree leaves are filled to 90%, and an inner page points at about this many children
+_LEAF_FILL = 0.9
+_FANOUT = 256
+# Varlena values up to this size take a 1-byte header, longer ones 4
+_SHORT_VARLENA = 126
+# user_id uuid and an integer count
+_COUNTER_ROW_BYTES = 16 + 4
+
+_FIXED_BYTES = (
+    (re.compile(r"^uuid$", re.IGNORECASE), 16),
+    (re.compile(r"^(timestamp|timestamptz)", re.IGNORECASE), 8),
+    (re.compile(r"^date$", re.IGNORECASE), 4),
+    (re.compile(r"^bool", re.IGNORECASE), 1),
+    (re.compile(r"^(bigint|int8|bigserial)$", re.IGNORECASE), 8),
+    (re.compile(r"^(smallint|int2)$", re.IGNORECASE), 2),
+    (re.compile(r"^(int|integer|int4|serial|real|float4)$", re.IGNORECASE), 4),
+    (re.compile(r"^(double precision|float8)$", re.IGNORECASE), 8),
+)
+# Columns lib/types declares as `string`: ids are uuids and `*_at` are timestamps
+_NAME_BYTES = ((re.compile(r"(^|_)id$"), 16), (re.compile(r"_at$"), 8), (re.compile(r"^(read|is_\w+)$"), 1))
+_EXCERPT_RE = re.compile(r"\.\s*(?:substring|slice|substr)\s*\(\s*0\s*,\s*(\d+)\s*\)")
+_SUBSTITUTION_RE = re.compile(r"\$\{[^}]*\}")
+_EMPTY_ARGUMENTS = {"", "undefined", "null", "''", '""', "``"}
+_UNREAD_WHERE_RE = re.compile(r"\bread\s*=\s*false\b|\bnot\s+read\b", re.IGNORECASE)
+
+def _aligned(size: float) -> float:
+    return math.ceil(size / _ALIGN) * _ALIGN
+
+def _varlena(size: float) -> float:
+    return size + (1 if size <= _SHORT_VARLENA else 4)
+
+def _depth(rows: float) -> int:
+    """B-tree levels above the leaves."""
+    return max(1, math.ceil(math.log(max(rows, 2.0), _FANOUT)))
+
+@dataclass
+class Growth:
+    """How fast notifications arrive and how often they are read."""
+
+    source: str
+    users: int
+    rows_per_day: float
+    # Share of rows by notification type
+    types: Dict[str, float] = field(default_factory=dict)
+    # Chance a user opens the panel, marking everything read, on a given day
+    read_probability: float = WorkloadProfile.daily_read_probability
+
+    @property
+    def rows_per_user_day(self) -> float:
+        return self.rows_per_day / self.users if self.users else 0.0
+
+    def unread(self, older_than: float = 0.0) -> float:
+        """Unread rows per user, counting only those older than `older_than` days.
+
+        A row stays unread until the user's next visit, so the chance it is
+        still unread after k days is (1 - p)^k for a daily visit probability p.
+        """
+
+        keep = 1.0 - self.read_probability
+        if keep <= 0.0:
+            return 0.0
+        if keep >= 1.0:
+            return math.inf
+        return self.rows_per_user_day * keep ** older_than / -math.log(keep)
+
+def growth_from_stream(stream: EventStream, users: Optional[int] = None,
+                       read_probability: float = WorkloadProfile.daily_read_probability) -> Growth:
+    """Insert rate and type mix of a notification stream; users defaults to the people in it."""
+
+    if stream.days <= 0:
+        raise ValueError(f"{stream.source} spans no time: can't measure an insert rate")
+    columns = stream.columns
+    if users is None:
+        users = len(np.unique(np.concatenate([columns["recipient"], columns["actor"]])))
+    counts = np.bincount(columns["type"].astype(np.int64), minlength=len(NOTIFICATION_TYPES))
+    types = {name: int(count) / stream.rows for name, count in zip(NOTIFICATION_TYPES, counts) if count}
+    return Growth(stream.source, users, stream.rows / stream.days, types, read_probability)
+
+@dataclass
+class ColumnWidth:
+    name: str
+    data_type: Optional[str]
+    # Share of rows with a value, and the bytes a value takes on disk
+    filled: float
+    bytes: float
+    # Written by createNotification(), or filled in by a default
+    source: str = "default"
+
+@dataclass
+class RowModel:
+    """The on-disk size of a notifications row."""
+
+    columns: List[ColumnWidth]
+
+    def column(self, name: str) -> Optional[ColumnWidth]:
+        return next((column for column in self.columns if column.name == name), None)
+
+    @property
+    def data_bytes(self) -> float:
+        return sum(column.filled * column.bytes for column in self.columns)
+
+    @property
+    def tuple_bytes(self) -> float:
+        """Header, null bitmap when some column can be NULL, and data; line pointer included."""
+
+        bitmap = math.ceil(len(self.columns) / 8) if any(column.filled < 1 for column in self.columns) else 0
+        return _aligned(_TUPLE_HEADER + bitmap) + _aligned(self.data_bytes) + _LINE_POINTER
+
+    @property
+    def rows_per_page(self) -> int:
+        return max(1, int((PAGE_BYTES - _PAGE_HEADER) // self.tuple_bytes))
+
+    def heap_bytes(self, rows: float) -> float:
+        return math.ceil(rows / self.rows_per_page) * PAGE_BYTES
+
+    def index_entry_bytes(self, columns: Sequence[str]) -> float:
+        """A leaf entry for an index on the columns, averaged over keys with and without a NULL."""
+
+        key, always, present = 0.0, 0.0, 1.0
+        for name in columns:
+            column = self.column(name)
+            size, filled = (column.bytes, column.filled) if column is not None else (float(_ALIGN), 1.0)
+            key += size
+            always += size if filled >= 1 else 0.0
+            present *= filled
+        # A key with a NULL carries a null bitmap, which takes the header to 16 bytes, and only its other values
+        return (present * _aligned(_INDEX_TUPLE_HEADER + key)
+                + (1 - present) * _aligned(_INDEX_TUPLE_HEADER + _ALIGN + always) + _LINE_POINTER)
+
+    def entries_per_leaf(self, columns: Sequence[str]) -> int:
+        return max(1, int((PAGE_BYTES - _PAGE_HEADER) * _LEAF_FILL // self.index_entry_bytes(columns)))
+
+    def index_bytes(self, columns: Sequence[str], rows: float) -> float:
+        leaves = math.ceil(rows / self.entries_per_leaf(columns))
+        # The metapage, then the inner levels
+        return (1 + leaves + math.ceil(leaves / _FANOUT) * _depth(rows)) * PAGE_BYTES
+
+def _written_types(scans: Sequence[FileScan]) -> Dict[str, List[List[str]]]:
+    """Notification type -> the argument lists of the call sites that can send it."""
+
+    resolver = TypeResolver({scan.path: scan.types for scan in scans if scan.types})
+    sites: Dict[str, List[List[str]]] = defaultdict(list)
+    for scan in scans:
+        for site in scan.call_sites:
+            types = site.type_literals
+            if not types and site.type_set is not None:
+                types = sorted(resolver.resolve(scan.path, site.type_set)[0])
+            for name in types:
+                sites[name].append(site.arguments)
+    return sites
+
+def _content_chars(argument: str) -> float:
+    excerpt = _EXCERPT_RE.search(argument)
+    if excerpt:
+        return float(excerpt.group(1))
+    text = argument.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"`":
+        # Each ${...} stands in for a word or so
+        return float(len(_SUBSTITUTION_RE.sub("x" * 8, text[1:-1])))
+    return float(DEFAULT_CONTENT_CHARS)
+
+def _column_bytes(name: str, data_type: Optional[str]) -> Optional[float]:
+    """Bytes of a fixed-width column's value; None for text."""
+
+    for pattern, size in _FIXED_BYTES:
+        if data_type and pattern.search(data_type):
+            return float(size)
+    if data_type in (None, "boolean", "number"):
+        for pattern, size in _NAME_BYTES:
+            if pattern.search(name):
+                return float(size)
+        if data_type == "boolean":
+            return 1.0
+        if data_type == "number":
+            return 4.0
+    return None
+
+def row_model(tables: TableColumns, insert: Optional[QueryShape], scans: Sequence[FileScan], growth: Growth) -> RowModel:
+    """Size a notifications row from its columns, createNotification()'s insert and the type mix."""
+
+    written = set(insert.values) if insert is not None else set(ARGUMENT_COLUMNS)
+    sites = _written_types(scans)
+    known = tables.schema.tables.get(TABLE)
+    row = tables.row_type(TABLE)
+    columns = []
+    for name, data_type in tables.columns(TABLE).items():
+        fixed = _column_bytes(name, data_type)
+        if name == "type":
+            size = sum(share * _varlena(len(type_name)) for type_name, share in growth.types.items())
+            columns.append(ColumnWidth(name, data_type, 1.0, size, NOTIFY_FUNCTION))
+            continue
+        if name in written and name in ARGUMENT_COLUMNS and ARGUMENT_COLUMNS.index(name) > TYPE_ARGUMENT_INDEX:
+            position = ARGUMENT_COLUMNS.index(name)
+            filled = total = 0.0
+            for type_name, share in growth.types.items():
+                arguments = [arguments[position].strip() if len(arguments) > position else ""
+                             for arguments in sites.get(type_name, [])]
+                values = [argument for argument in arguments if argument not in _EMPTY_ARGUMENTS]
+                if not arguments or not values:
+                    continue
+                weight = share * len(values) / len(arguments)
+                filled += weight
+                total += weight * (fixed if fixed is not None else _varlena(sum(_content_chars(value) for value in values) / len(values)))
+            columns.append(ColumnWidth(name, data_type, filled, total / filled if filled else 0.0, NOTIFY_FUNCTION))
+            continue
+        size = fixed if fixed is not None else _varlena(DEFAULT_CONTENT_CHARS)
+        if name in written:
+            columns.append(ColumnWidth(name, data_type, 1.0, size, NOTIFY_FUNCTION))
+            continue
+        # Not inserted: a migration-added nullable column with no default stays NULL; the rest have defaults
+        definition = known.columns.get(name) if known else None
+        nullable_type = row is not None and "null" in row.fields.get(name, "")
+        if definition is not None and definition.nullable and definition.default is None or definition is None and nullable_type:
+            columns.append(ColumnWidth(name, data_type, 0.0, size, "never set"))
+        else:
+            columns.append(ColumnWidth(name, data_type, 1.0, size))
+    return RowModel(columns)
+
+@dataclass
+class CountPlan:
+    """useUnreadCount's exact count, planned against the migrated indexes and with the advisor's suggestion."""
+
+    query: QueryShape
+    plan: QueryPlan
+    # Leading columns of the index the migrated plan uses, if any
+    columns: List[str] = field(default_factory=list)
+
+    @property
+    def access(self) -> str:
+        return self.plan.access
+
+def unread_count_query(root: str) -> Optional[QueryShape]:
+    for path in discover_query_files(root):
+        with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+            text = handle.read()
+        for query in scan_queries(path, text):
+            if query.table == TABLE and query.count == "exact" and "read" in query.columns("equality"):
+                return query
+    return None
+
+def notify_insert(root: str) -> Optional[QueryShape]:
+    """The insert createNotification() runs."""
+
+    for path in discover_query_files(root):
+        with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+            text = handle.read()
+        for query in scan_queries(path, text):
+            if query.table == TABLE and query.operation == "insert" and query.handler == NOTIFY_FUNCTION:
+                return query
+    return None
+
+@dataclass
+class Projection:
+    strategy: str
+    months: int
+    # Rows in the table the app queries, and in notifications_archive
+    rows: float
+    heap_bytes: float
+    index_bytes: float
+    # Pages one exact unread count reads, as migrated and with the suggested index
+    count_pages: float
+    indexed_count_pages: float
+    archived_rows: float = 0.0
+    archive_bytes: float = 0.0
+    # Rows deleted or moved per day at this point, and extra row writes per insert
+    churn_per_day: float = 0.0
+    extra_bytes: float = 0.0
+
+@dataclass
+class RetentionPlan:
+    growth: Growth
+    row: RowModel
+    count: Optional[CountPlan]
+    indexes: List[Index]
+    months: List[int]
+    ttl: float
+    archive_after: float
+    projections: List[Projection] = field(default_factory=list)
+
+    def strategy(self, name: str) -> List[Projection]:
+        return [projection for projection in self.projections if projection.strategy == name]
+
+def _index_rows(index: Index, rows: float, unread: float) -> float:
+    return unread if index.where and _UNREAD_WHERE_RE.search(index.where) else rows
+
+def _count_pages(plan: RetentionPlan, rows: float, partitions: int = 1, access: Optional[str] = None,
+                 columns: Sequence[str] = ("user_id",)) -> float:
+    """Pages one user's exact unread count reads from a table of `rows` rows split into partitions."""
+
+    growth, row = plan.growth, plan.row
+    access = access or (plan.count.access if plan.count else INDEX_ONLY)
+    if access not in (INDEX_ONLY, INDEX_FILTER, INDEX_SORT):
+        return float(row.heap_bytes(rows) / PAGE_BYTES)
+    share = rows / partitions
+    days = rows / growth.rows_per_day if growth.rows_per_day else 0.0
+    unread = min(growth.unread(), growth.rows_per_user_day * days)
+    per_leaf = row.entries_per_leaf(columns)
+    if access == INDEX_ONLY:
+        # Each partition's index is searched; the user's unread entries sit together on its leaves
+        return partitions * _depth(share) + math.ceil(unread / per_leaf)
+    user_rows = growth.rows_per_user_day * days
+    # The user's rows are spread over the heap: one page each, up to the whole table
+    return partitions * _depth(share) + math.ceil(user_rows / per_leaf) + min(user_rows, row.heap_bytes(rows) / PAGE_BYTES)
+
+def _projection(plan: RetentionPlan, strategy: str, months: int) -> Projection:
+    growth, row = plan.growth, plan.row
+    days = months * DAYS_PER_MONTH
+    total = growth.rows_per_day * days
+    ttl_days, cutoff_days = plan.ttl / 86400, plan.archive_after / 86400
+    partitions = 1
+    rows, churn = total, 0.0
+    if strategy == "ttl":
+        rows = growth.rows_per_day * min(days, ttl_days)
+        churn = growth.rows_per_day if days > ttl_days else 0.0
+    elif strategy == "archive":
+        older = max(0.0, days - cutoff_days)
+        # Unread rows past the cutoff stay behind
+        stay = min(growth.users * growth.unread(cutoff_days), growth.rows_per_day * older)
+        rows = growth.rows_per_day * min(days, cutoff_days) + stay
+        churn = growth.rows_per_day if older else 0.0
+    elif strategy == "partition":
+        # Just before the oldest is dropped, the partitions hold the TTL plus the month being filled
+        partitions = min(math.ceil(days / DAYS_PER_MONTH), math.ceil(ttl_days / DAYS_PER_MONTH) + 1)
+        rows = growth.rows_per_day * min(days, partitions * DAYS_PER_MONTH)
+
+    unread_rows = min(growth.users * growth.unread(), rows)
+    # Each partition has its own copy of every index
+    index_bytes = sum(partitions * row.index_bytes(index.column_names, _index_rows(index, rows, unread_rows) / partitions)
+                      for index in plan.indexes)
+    projection = Projection(
+        strategy=strategy,
+        months=months,
+        rows=rows,
+        heap_bytes=row.heap_bytes(rows),
+        index_bytes=index_bytes,
+        count_pages=_count_pages(plan, rows, partitions, columns=plan.count.columns if plan.count else ("user_id",)),
+        indexed_count_pages=_count_pages(plan, rows, partitions, INDEX_ONLY),
+        churn_per_day=churn,
+    )
+    if strategy == "archive":
+        projection.archived_rows = total - rows
+        projection.archive_bytes = row.heap_bytes(total - rows)
+    if strategy == "counter":
+        counter_rows = (PAGE_BYTES - _PAGE_HEADER) // (_aligned(_TUPLE_HEADER) + _aligned(_COUNTER_ROW_BYTES) + _LINE_POINTER)
+        # One lookup in the counter table's primary key, then its heap page
+        projection.count_pages = projection.indexed_count_pages = _depth(growth.users) + 2
+        projection.extra_bytes = math.ceil(growth.users / counter_rows) * PAGE_BYTES
+    return projection
+
+def plan_retention(
+    root: str,
+    schema: Schema,
+    tables: TableColumns,
+    scans: Sequence[FileScan],
+    growth: Growth,
+    months: Sequence[int] = DEFAULT_MONTHS,
+    ttl: float = DEFAULT_TTL,
+    archive_after: float = DEFAULT_ARCHIVE_AFTER,
+) -> RetentionPlan:
+    """Project the notifications table under each retention strategy at each horizon (months)."""
+
+    query = unread_count_query(root)
+    count = None
+    if query is not None:
+        migrated = plan_query(query, schema)
+        index = next((index for index in table_indexes(schema, TABLE) if index.name == migrated.index), None)
+        count = CountPlan(query, migrated, index.column_names if index else [])
+    plan = RetentionPlan(growth, row_model(tables, notify_insert(root), scans, growth), count,
+                         table_indexes(schema, TABLE), sorted(months), ttl, archive_after)
+    for strategy in STRATEGIES:
+        plan.projections.extend(_projection(plan, strategy, count_months) for count_months in plan.months)
+    return plan
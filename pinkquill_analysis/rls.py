@@ -0,0 +1,567 @@
+"""
+RLS policy cost model.
+
+Replays the CREATE/DROP POLICY and CREATE FUNCTION statements of the setup
+scripts, the lib/*-fix.sql scripts run by hand after them, and the
+migrations. For every policy it then finds the EXISTS / IN subqueries it
+runs, directly or inside the helper functions it calls, the index each
+subquery's equality predicates can seek on, and the index tuples that
+costs per row checked as communities grow. Postgres ORs the permissive
+policies of a command, so a read may pay for every one of them on every
+row it returns; plpgsql and SECURITY DEFINER helpers are never inlined, so
+each call is a function invocation per row on top of its lookup.
+"""
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .bench import parse_embeds
+from .queries import discover_query_files, scan_queries
+from .schema import MIGRATION_SOURCES, Schema, discover_migrations, migration_order_key
+from .sql import matching_paren, normalize_identifier, split_statements, split_top_level
+
+# Setup scripts, the lib/*-fix.sql scripts that patch them, then the migrations
+POLICY_SOURCES = ("lib/*-setup.sql", "lib/*-fix.sql") + MIGRATION_SOURCES[1:]
+
+# Members per community the costs are worked out at
+MEMBER_SCALES = (10, 100, 1_000, 10_000)
+DEFAULT_COMMUNITIES = 500
+
+# Commands whose USING clause filters what a select returns
+READ_COMMANDS = ("all", "select")
+
+# Table sizes: rows per member of a community, per community, or per user
+_ROWS_PER_MEMBER = {"community_members": 1.0, "community_join_requests": 0.1, "community_invitations": 0.1}
+_ROWS_PER_COMMUNITY = {"communities": 1, "community_tags": 5, "community_rules": 8,
+                       "community_views": 500, "community_member_history": 90}
+_ROWS_PER_USER = {"profiles": 1, "posts": 20, "takes": 5, "follows": 50, "blocks": 1, "notifications": 300,
+                  "reactions": 200, "post_collaborators": 2, "post_views": 400, "take_views": 200}
+_DEFAULT_ROWS_PER_USER = 10
+
+# Keys per B-tree page: a seek reads one page per level
+_FANOUT = 256
+
+_NAME = r'(?:"[^"]+"|[\w.]+)'
+_CREATE_POLICY_RE = re.compile(r"^CREATE\s+POLICY\s+(" + _NAME + r")\s+ON\s+(" + _NAME + r")(.*)$", re.IGNORECASE | re.DOTALL)
+_DROP_POLICY_RE = re.compile(r"^DROP\s+POLICY\s+(?:IF\s+EXISTS\s+)?(" + _NAME + r")\s+ON\s+(" + _NAME + r")", re.IGNORECASE)
+_CREATE_FUNCTION_RE = re.compile(r"^CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+(" + _NAME + r")\s*\(", re.IGNORECASE)
+_DROP_FUNCTION_RE = re.compile(r"^DROP\s+FUNCTION\s+(?:IF\s+EXISTS\s+)?(" + _NAME + r")", re.IGNORECASE)
+_PERMISSIVE_RE = re.compile(r"^\s*AS\s+(PERMISSIVE|RESTRICTIVE)\b", re.IGNORECASE)
+_COMMAND_RE = re.compile(r"\bFOR\s+(ALL|SELECT|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_USING_RE = re.compile(r"\bUSING\s*\(", re.IGNORECASE)
+_CHECK_RE = re.compile(r"\bWITH\s+CHECK\s*\(", re.IGNORECASE)
+_BODY_RE = re.compile(r"\bAS\s+(\$\w*\$)(.*?)\1", re.IGNORECASE | re.DOTALL)
+_LANGUAGE_RE = re.compile(r"\bLANGUAGE\s+'?(\w+)", re.IGNORECASE)
+_VOLATILITY_RE = re.compile(r"\b(IMMUTABLE|STABLE|VOLATILE)\b", re.IGNORECASE)
+_DEFINER_RE = re.compile(r"\bSECURITY\s+DEFINER\b", re.IGNORECASE)
+
+# `EXISTS (SELECT ...)`, `NOT EXISTS (...)` and `col IN (SELECT ...)`
+_SUBQUERY_RE = re.compile(r"(\bNOT\s+)?\bEXISTS\s*(\()|\bIN\s*(\()\s*(?=SELECT\b)", re.IGNORECASE)
+_SELECT_RE = re.compile(
+    r"^\s*SELECT\b.*?\bFROM\s+(" + _NAME + r")(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|INNER|LEFT|GROUP|ORDER|LIMIT)\b)(\w+))?(.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_WHERE_RE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_CALL_RE = re.compile(r"([A-Za-z_][\w.]*)\s*\(")
+_UID_RE = re.compile(r"\bauth\.uid\s*\(\s*\)", re.IGNORECASE)
+# `(select auth.uid())`: an InitPlan, evaluated once per statement
+_CACHED_UID_RE = re.compile(r"\(\s*SELECT\s+auth\.uid\s*\(\s*\)\s*\)", re.IGNORECASE)
+_EQUALITY_RE = re.compile(r"^(.+?)\s*((?<![<>!])=\s*ANY\b|(?<![<>!])=|\bIN\b)\s*(.+)$", re.IGNORECASE | re.DOTALL)
+_COLUMN_RE = re.compile(r'^(?:("?)(\w+)\1\s*\.\s*)?"?(\w+)"?$')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IDENTIFIER_RE = re.compile(r"([A-Za-z_][\w.]*)(\s*\()?")
+_SQL_WORDS = {"and", "or", "not", "null", "true", "false", "is", "in", "any", "all", "array", "select", "from",
+              "where", "exists", "current_date", "current_timestamp", "interval", "uuid", "text", "int", "integer"}
+
+# How a value relates to the row being checked
+CONSTANT = "constant"
+OUTER = "outer"
+INNER = "inner"
+
+# Helper calls followed into helper calls
+_MAX_DEPTH = 3
+
+@dataclass
+class SqlFunction:
+    name: str
+    parameters: List[str]
+    language: str
+    body: str
+    security_definer: bool = False
+    volatility: str = "volatile"
+    source: Optional[str] = None
+
+    @property
+    def inlined(self) -> bool:
+        """Postgres inlines plain SQL functions only: not plpgsql, not SECURITY DEFINER, not volatile."""
+        return self.language == "sql" and not self.security_definer and self.volatility != "volatile"
+
+@dataclass
+class RowPolicy:
+    name: str
+    table: str
+    command: str = "all"
+    using: Optional[str] = None
+    check: Optional[str] = None
+    permissive: bool = True
+    source: Optional[str] = None
+
+    @property
+    def reads(self) -> bool:
+        return self.command in READ_COMMANDS and self.using is not None
+
+@dataclass
+class PolicySet:
+    # (table, policy name) -> the policy as last created
+    policies: Dict[Tuple[str, str], RowPolicy] = field(default_factory=dict)
+    functions: Dict[str, SqlFunction] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+
+    def apply(self, path: str, line: int, statement: str):
+        match = _CREATE_POLICY_RE.match(statement)
+        if match:
+            policy = _create_policy(match, f"{path}:{line}")
+            self.policies[(policy.table, policy.name)] = policy
+            return
+        match = _DROP_POLICY_RE.match(statement)
+        if match:
+            self.policies.pop((normalize_identifier(match.group(2)), match.group(1).strip('"')), None)
+            return
+        match = _CREATE_FUNCTION_RE.match(statement)
+        if match:
+            function = _create_function(match, statement, f"{path}:{line}")
+            self.functions[function.name] = function
+            return
+        match = _DROP_FUNCTION_RE.match(statement)
+        if match:
+            self.functions.pop(normalize_identifier(match.group(1)), None)
+
+def discover_policy_files(root: str) -> List[str]:
+    """Setup scripts, then the fix scripts, then the migrations in replay order."""
+
+    paths = discover_migrations(root, POLICY_SOURCES)
+    return sorted(paths, key=lambda path: (migration_order_key(path)[0], path.endswith("-fix.sql")))
+
+def load_policies(root: str) -> PolicySet:
+    """Replay every policy and function definition, later files replacing earlier ones."""
+
+    policies = PolicySet(files=discover_policy_files(root))
+    for path in policies.files:
+        with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+            text = handle.read()
+        for line, statement in split_statements(text):
+            policies.apply(path, line, statement)
+    return policies
+
+def _clause(text: str, pattern: "re.Pattern", start: int = 0) -> Tuple[Optional[str], int]:
+    match = pattern.search(text, start)
+    if not match:
+        return None, start
+    close = matching_paren(text, match.end() - 1)
+    return text[match.end():close].strip(), close + 1
+
+def _create_policy(match: "re.Match", source: str) -> RowPolicy:
+    rest = match.group(3)
+    command = _COMMAND_RE.search(rest)
+    using, end = _clause(rest, _USING_RE)
+    check, _ = _clause(rest, _CHECK_RE, end)
+    permissive = _PERMISSIVE_RE.match(rest)
+    return RowPolicy(
+        name=match.group(1).strip('"'),
+        table=normalize_identifier(match.group(2)),
+        command=command.group(1).lower() if command else "all",
+        using=using,
+        check=check,
+        permissive=not permissive or permissive.group(1).upper() == "PERMISSIVE",
+        source=source,
+    )
+
+def _create_function(match: "re.Match", statement: str, source: str) -> SqlFunction:
+    close = matching_paren(statement, match.end() - 1)
+    parameters = []
+    for position, parameter in enumerate(split_top_level(statement[match.end():close])):
+        words = [word for word in parameter.split() if word.upper() not in ("IN", "OUT", "INOUT", "VARIADIC")]
+        parameters.append(words[0].lower() if len(words) > 1 else f"${position + 1}")
+    rest = statement[close + 1:]
+    body = _BODY_RE.search(rest)
+    attributes = rest[:body.start()] + rest[body.end():] if body else rest
+    language = _LANGUAGE_RE.search(attributes)
+    volatility = _VOLATILITY_RE.search(attributes)
+    return SqlFunction(
+        name=normalize_identifier(match.group(1)),
+        parameters=parameters,
+        language=language.group(1).lower() if language else "sql",
+        body=body.group(2).strip() if body else "",
+        security_definer=bool(_DEFINER_RE.search(attributes)),
+        volatility=volatility.group(1).lower() if volatility else "volatile",
+        source=source,
+    )
+
+@dataclass
+class RlsScale:
+    """Sizes the costs are worked out at."""
+
+    members: int = 100
+    communities: int = DEFAULT_COMMUNITIES
+    users: int = 100_000
+
+    def rows(self, table: str) -> float:
+        if table in _ROWS_PER_MEMBER:
+            return self.communities * self.members * _ROWS_PER_MEMBER[table]
+        if table in _ROWS_PER_COMMUNITY:
+            return self.communities * _ROWS_PER_COMMUNITY[table]
+        return max(self.users, self.members) * _ROWS_PER_USER.get(table, _DEFAULT_ROWS_PER_USER)
+
+    def read_rows(self, table: str) -> float:
+        """Rows one read checks: a community's rows, or a user's for tables that aren't per community."""
+
+        if table in _ROWS_PER_MEMBER or table in _ROWS_PER_COMMUNITY:
+            return self.rows(table) / self.communities
+        return self.rows(table) / max(self.users, self.members)
+
+@dataclass
+class Probe:
+    """One subquery lookup a policy runs."""
+
+    table: str
+    # Columns the subquery compares by equality, and those matched against the checked row
+    columns: List[str] = field(default_factory=list)
+    correlated: List[Tuple[str, str]] = field(default_factory=list)
+    # Conjuncts on constants, as written (helper parameters replaced by their arguments)
+    filters: List[str] = field(default_factory=list)
+    # (index, columns it seeks on, unique on exactly those) for each usable index
+    indexes: List[Tuple[str, List[str], bool]] = field(default_factory=list)
+    via: Optional[str] = None
+    negated: bool = False
+    # Uncorrelated and outside any helper: an InitPlan / hashed SubPlan, run once per statement
+    once: bool = False
+    nested: List["Probe"] = field(default_factory=list)
+    # Index the lookup seeks on at the largest scale (None: scans the table), and the rows it matches
+    index: Optional[str] = None
+    matched: float = 0.0
+
+@dataclass
+class PolicyCost:
+    policy: RowPolicy
+    probes: List[Probe] = field(default_factory=list)
+    # Helper functions invoked per row checked, nested calls included
+    helpers: List[str] = field(default_factory=list)
+    # auth.uid() calls per row (not wrapped in a select)
+    uid_calls: int = 0
+    # Index tuples per row checked, per statement, and per read; one entry per scale
+    per_row: List[float] = field(default_factory=list)
+    once: List[float] = field(default_factory=list)
+    per_read: List[float] = field(default_factory=list)
+    suggestions: List[str] = field(default_factory=list)
+
+@dataclass
+class RlsReport:
+    scales: List[RlsScale]
+    costs: List[PolicyCost]
+    functions: Dict[str, SqlFunction]
+    files: List[str]
+    # table -> (select locations, locations embedding it)
+    reads: Dict[str, Tuple[List[str], List[str]]] = field(default_factory=dict)
+
+    @property
+    def ranked(self) -> List[PolicyCost]:
+        """Read policies, costliest read at the largest scale first."""
+
+        reads = [cost for cost in self.costs if cost.policy.reads]
+        return sorted(reads, key=lambda cost: (-cost.per_read[-1], -len(cost.helpers), -cost.uid_calls))
+
+def _split_top(text: str, keyword: str) -> List[str]:
+    """Split on a keyword outside parentheses and strings."""
+
+    parts, depth, start = [], 0, 0
+    for match in re.finditer(r"'(?:[^']|'')*'|\(|\)|\b" + keyword + r"\b", text, re.IGNORECASE):
+        token = match.group(0)
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif token[0] != "'" and depth == 0:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+def _unwrap(text: str) -> str:
+    text = text.strip()
+    while text.startswith("(") and matching_paren(text, 0) == len(text) - 1:
+        text = text[1:-1].strip()
+    return text
+
+def _conjuncts(text: str) -> List[str]:
+    conjuncts = []
+    for part in _split_top(_unwrap(text), "AND"):
+        inner = _unwrap(part)
+        if inner != part and len(_split_top(inner, "OR")) == 1:
+            conjuncts.extend(_conjuncts(inner))
+        else:
+            conjuncts.append(part)
+    return conjuncts
+
+def _subqueries(text: str) -> List[Tuple[int, int, bool]]:
+    """(open paren, close paren, negated) of each outermost subquery."""
+
+    spans, position = [], 0
+    for match in _SUBQUERY_RE.finditer(text):
+        if match.start() < position:
+            continue
+        start = match.start(2) if match.group(2) else match.start(3)
+        close = matching_paren(text, start)
+        spans.append((start, close, bool(match.group(1))))
+        position = close
+    return spans
+
+def _without(text: str, spans: List[Tuple[int, int, bool]]) -> str:
+    for start, close, _ in reversed(spans):
+        text = text[:start] + "(TRUE)" + text[close + 1:]
+    return text
+
+def _substitute(text: str, bindings: Dict[str, Tuple[str, str]]) -> str:
+    for name, (_, value) in bindings.items():
+        text = re.sub(r"(?<![\w.])" + re.escape(name) + r"\b", value, text)
+    return text
+
+def _depth(rows: float) -> int:
+    return max(1, math.ceil(math.log(max(rows, 2.0), _FANOUT)))
+
+class _Analyzer:
+    def __init__(self, schema: Schema, functions: Dict[str, SqlFunction]):
+        self.schema = schema
+        self.functions = functions
+
+    def policy(self, policy: RowPolicy) -> PolicyCost:
+        cost = PolicyCost(policy)
+        expression = policy.using if policy.reads else (policy.using or policy.check or "")
+        cost.probes = self.expression(expression, policy.table, {}, None, cost.helpers, 0)
+        outside = _without(expression, _subqueries(expression))
+        cost.uid_calls = len(_UID_RE.findall(outside)) - len(_CACHED_UID_RE.findall(outside))
+        return cost
+
+    def expression(self, text: str, table: Optional[str], bindings: Dict[str, Tuple[str, str]], via: Optional[str],
+                   helpers: List[str], depth: int) -> List[Probe]:
+        """Probes of the subqueries in text, and of the helpers it calls, checking rows of table."""
+
+        spans = _subqueries(text)
+        probes = []
+        for start, close, negated in spans:
+            probes.extend(self.subquery(text[start + 1:close], table, bindings, via, negated))
+        if depth >= _MAX_DEPTH:
+            return probes
+        outside = _without(text, spans)
+        for match in _CALL_RE.finditer(outside):
+            function = self.functions.get(normalize_identifier(match.group(1)))
+            if function is None:
+                continue
+            close = matching_paren(outside, match.end() - 1)
+            arguments = split_top_level(outside[match.end():close])
+            # Arguments come from the checked row unless they are constants
+            inner = {parameter: (self.kind(argument, None, (), bindings), _substitute(argument, bindings))
+                     for parameter, argument in zip(function.parameters, arguments)}
+            if not function.inlined:
+                helpers.append(function.name)
+            probes.extend(self.expression(function.body, None, inner, via if function.inlined else function.name,
+                                          helpers, depth + 1))
+        return probes
+
+    def subquery(self, text: str, outer: Optional[str], bindings: Dict[str, Tuple[str, str]], via: Optional[str],
+                 negated: bool) -> List[Probe]:
+        match = _SELECT_RE.match(text)
+        if not match:
+            return []
+        table = normalize_identifier(match.group(1))
+        names = {table, table.split(".")[-1], (match.group(2) or table).lower()}
+        where = _WHERE_RE.search(match.group(3))
+        where = where.group(1) if where else ""
+        spans = _subqueries(where)
+        nested = [probe for start, close, inner_negated in spans
+                  for probe in self.subquery(where[start + 1:close], table, bindings, via, inner_negated)]
+        probes = []
+        for branch in _split_top(_unwrap(_without(where, spans)), "OR") or [""]:
+            probe = Probe(table, via=via, negated=negated)
+            for conjunct in _conjuncts(branch):
+                self.predicate(probe, conjunct, table, names, bindings)
+            probe.indexes = self.indexes(table, probe.columns)
+            probe.once = via is None and outer is not None and not probe.correlated
+            probes.append(probe)
+        probes[0].nested = nested
+        for probe in nested:
+            probe.once = False
+        return probes
+
+    def predicate(self, probe: Probe, conjunct: str, table: str, names, bindings: Dict[str, Tuple[str, str]]):
+        # Nested subqueries are probes of their own
+        if "(TRUE)" in conjunct or _unwrap(conjunct).upper() == "TRUE":
+            return
+        match = _EQUALITY_RE.match(conjunct)
+        if match:
+            sides = [(match.group(1), match.group(3)), (match.group(3), match.group(1))]
+            for column_side, value_side in sides:
+                kind, column = self.operand(column_side, table, names, bindings)
+                if kind != INNER:
+                    continue
+                value = self.kind(value_side, table, names, bindings)
+                if value == INNER:
+                    continue
+                if column not in probe.columns:
+                    probe.columns.append(column)
+                if value == OUTER:
+                    probe.correlated.append((column, _substitute(value_side.strip(), bindings)))
+                else:
+                    probe.filters.append(_substitute(conjunct.strip(), bindings))
+                return
+        if self.kind(conjunct, table, names, bindings) != OUTER:
+            probe.filters.append(_substitute(conjunct.strip(), bindings))
+
+    def operand(self, text: str, table: Optional[str], names, bindings: Dict[str, Tuple[str, str]]) -> Tuple[str, Optional[str]]:
+        text = _unwrap(text)
+        match = _COLUMN_RE.match(text)
+        if not match or match.group(3).lower() in _SQL_WORDS:
+            return self.kind(text, table, names, bindings), None
+        qualifier, column = (match.group(2) or "").lower(), match.group(3).lower()
+        if not qualifier and column in bindings:
+            return bindings[column][0], None
+        if qualifier:
+            return (INNER, column) if qualifier in names else (OUTER, None)
+        known = self.schema.tables.get(table) if table else None
+        if table is None or known and known.columns and column not in known.columns:
+            return OUTER, None
+        return INNER, column
+
+    def kind(self, text: str, table: Optional[str], names, bindings: Dict[str, Tuple[str, str]]) -> str:
+        """CONSTANT, OUTER or INNER: what a value expression depends on."""
+
+        text = _unwrap(text)
+        if _COLUMN_RE.match(text) and _COLUMN_RE.match(text).group(3).lower() not in _SQL_WORDS:
+            return self.operand(text, table, names, bindings)[0]
+        kinds = set()
+        for match in _IDENTIFIER_RE.finditer(_STRING_RE.sub("''", text)):
+            word = match.group(1)
+            if match.group(2) or word.lower() in _SQL_WORDS or word[0].isdigit():
+                continue
+            kinds.add(self.operand(word, table, names, bindings)[0] if names else bindings.get(word.lower(), (OUTER,))[0])
+        return OUTER if OUTER in kinds else INNER if INNER in kinds else CONSTANT
+
+    def indexes(self, table: str, columns: List[str]) -> List[Tuple[str, List[str], bool]]:
+        indexes = [(index.name, [column["name"] if not column["expression"] else "" for column in index.columns], index.unique)
+                   for index in self.schema.indexes_on(table) if index.method == "btree" and not index.where]
+        known = self.schema.tables.get(table)
+        # Tables created outside the migrations still have their `id` primary key
+        if (known is None or known.created_in is None) and not any(names == ["id"] for _, names, _ in indexes):
+            indexes.append((f"{table}_pkey", ["id"], True))
+        usable = []
+        for name, names, unique in indexes:
+            prefix = []
+            for column in names:
+                if column not in columns:
+                    break
+                prefix.append(column)
+            if prefix:
+                usable.append((name, prefix, unique and len(prefix) == len(names)))
+        return usable
+
+    def distinct(self, scale: RlsScale, table: str, column: str) -> float:
+        rows = scale.rows(table)
+        known = self.schema.tables.get(table)
+        definition = known.columns.get(column) if known else None
+        if column == "id" or definition is not None and (definition.primary_key or definition.unique):
+            return rows
+        if any(index.unique and index.column_names == [column] for index in self.schema.indexes_on(table)):
+            return rows
+        if definition is not None and definition.references:
+            return min(rows, scale.rows(normalize_identifier(definition.references)))
+        for check in (known.checks.values() if known else ()):
+            if check.column == column and check.allowed_values:
+                return float(len(check.allowed_values))
+        if definition is not None and definition.data_type.lower() in ("boolean", "bool"):
+            return 2.0
+        if column.endswith("_id"):
+            return min(rows, float(max(scale.users, scale.members)))
+        return rows
+
+    def lookup(self, probe: Probe, scale: RlsScale) -> Tuple[Optional[Tuple[str, List[str], bool]], float, float]:
+        """(index used, index tuples read, rows it matches) for one execution of the probe."""
+
+        rows = scale.rows(probe.table)
+        best, tuples, matched = None, rows, rows
+        for index in probe.indexes:
+            _, prefix, unique = index
+            found = 1.0 if unique else max(1.0, rows / math.prod(self.distinct(scale, probe.table, column) for column in prefix))
+            if _depth(rows) + found < tuples:
+                best, tuples, matched = index, _depth(rows) + found, found
+        return best, tuples, matched
+
+    def tuples(self, probe: Probe, scale: RlsScale) -> float:
+        _, tuples, matched = self.lookup(probe, scale)
+        return tuples + matched * sum(self.tuples(nested, scale) for nested in probe.nested)
+
+def _suggestions(cost: PolicyCost, analyzer: _Analyzer, scale: RlsScale) -> List[str]:
+    suggestions = []
+    if cost.uid_calls:
+        suggestions.append("write auth.uid() as (select auth.uid()): evaluated once per statement, not on every row")
+    for probe in cost.probes:
+        index, _, matched = analyzer.lookup(probe, scale)
+        # A lookup keyed by the checked row and the caller: fetch the caller's keys once instead
+        if len(probe.correlated) == 1 and not probe.negated and any(_UID_RE.search(item) for item in probe.filters):
+            inner, outer = probe.correlated[0]
+            filters = " AND ".join(_CACHED_UID_RE.sub("(select auth.uid())", _UID_RE.sub("(select auth.uid())", item))
+                                   for item in probe.filters)
+            instead = f"{probe.via}()" if probe.via else "the correlated EXISTS"
+            suggestions.append(f"{outer} IN (SELECT {inner} FROM {probe.table} WHERE {filters}) instead of {instead}: "
+                               "one lookup per statement, then a hash probe per row")
+        if index is None and probe.columns:
+            suggestions.append(f"index {probe.table} ({', '.join(probe.columns)}): the lookup scans the table")
+        elif index is not None and not index[2] and matched > 10 and len(index[1]) < len(probe.columns):
+            columns = [inner for inner, _ in probe.correlated] + [column for column in probe.columns
+                                                                  if column not in dict(probe.correlated)]
+            suggestions.append(f"index {probe.table} ({', '.join(columns)}): {index[0]} leaves ~{matched:,.0f} rows to filter")
+    return list(dict.fromkeys(suggestions))
+
+def read_sites(root: str) -> Dict[str, Tuple[List[str], List[str]]]:
+    """table -> (locations selecting from it, locations embedding it in another table's select)."""
+
+    sites: Dict[str, Tuple[List[str], List[str]]] = {}
+    for path in discover_query_files(root):
+        with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+            text = handle.read()
+        for query in scan_queries(path, text):
+            if query.operation != "select":
+                continue
+            sites.setdefault(query.table, ([], []))[0].append(query.location)
+            pending = [(query.table, query.projection)]
+            while pending:
+                table, projection = pending.pop()
+                for embed in parse_embeds(projection, table)[1]:
+                    sites.setdefault(embed.table, ([], []))[1].append(f"{query.location} ({query.table})")
+                    pending.append((embed.table, embed.projection or None))
+    return sites
+
+def analyze_policies(root: str, schema: Schema, scales: Sequence[RlsScale]) -> RlsReport:
+    """Cost every policy at each scale, with the rewrites and indexes that would cut it."""
+
+    policies = load_policies(root)
+    analyzer = _Analyzer(schema, policies.functions)
+    costs = []
+    for policy in policies.policies.values():
+        cost = analyzer.policy(policy)
+        for scale in scales:
+            per_row = sum(analyzer.tuples(probe, scale) for probe in cost.probes if not probe.once)
+            once = sum(analyzer.tuples(probe, scale) for probe in cost.probes if probe.once)
+            cost.per_row.append(per_row)
+            cost.once.append(once)
+            cost.per_read.append(scale.read_rows(policy.table) * per_row + once)
+        pending = list(cost.probes)
+        while pending:
+            probe = pending.pop()
+            index, _, probe.matched = analyzer.lookup(probe, scales[-1])
+            probe.index = index[0] if index else None
+            pending.extend(probe.nested)
+        cost.suggestions = _suggestions(cost, analyzer, scales[-1])
+        costs.append(cost)
+    return RlsReport(list(scales), costs, policies.functions, policies.files, read_sites(root))
@@ -0,0 +1,441 @@
+"""
+Database round-trip accounting.
+
+Every supabase.from() chain, .rpc() call and createNotification() call is
+one HTTP round-trip. The scanner records each of them with the loops it
+sits in, along with calls that may lead to more: functions defined in the
+same file, functions imported from other modules, and functions handed out
+by hooks (`const { toggle: toggleAdmire } = useToggleAdmire()`). This
+module resolves those across the tree and rolls everything up per handler
+as a function of the fan-out N:
+
+- requests: how many round-trips the handler sends (N per enclosing loop)
+- serial: how many of those the user waits for one after another; callback
+  loops (map/forEach) and Promise.all() run concurrently, for/while loops
+  with an await don't.
+
+Arms of an if/else chain count as alternatives (the most expensive arm
+wins), and branches taken only on an error (`if (error) ...`) are left out.
+
+Handlers are named by their nesting (`useToggleAdmire.toggle`), and code
+inside a JSX event attribute is its own handler (`PostCard.onClick@120`).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .queries import scan_masked_queries
+from .source import DefinitionIndex, LineIndex, body_extent, split_arguments
+
+# Loop kinds that run their body once per item
+SEQUENTIAL_LOOPS = ("for", "while")
+CALLBACK_LOOPS = ("map", "forEach", "flatMap", "filter", "reduce")
+
+# Fan-out assumed when ranking: "a post that mentions 50 people"
+DEFAULT_FAN_OUT = 50
+
+# Kinds of DatabaseCall
+QUERY = "query"    # supabase.from(table) chain
+RPC = "rpc"        # supabase.rpc(name)
+NOTIFY = "notify"  # createNotification()
+LOCAL = "call"     # function defined in the same file
+HOOK = "hook"      # function returned by a hook, target "useHook.member"
+IMPORT = "import"  # function imported from another module
+
+# No leading \b on these: it stops the regex engine skipping ahead; boundaries are checked in code
+_LOOP_KEYWORD_RE = re.compile(r"(for|while)\s*(?:await\s*)?\(")
+_IF_RE = re.compile(r"if\s*\(")
+_ELSE_RE = re.compile(r"\s*else\b\s*")
+# `if (error ...)` / `if (insertError.code === ...)`, but not `if (!error)`
+_ERROR_CONDITION_RE = re.compile(r"\s*(?:error|err|[\w$]+Error)\b")
+_CALLBACK_LOOP_RE = re.compile(r"\.\s*(" + "|".join(CALLBACK_LOOPS) + r")\s*\(")
+_PROMISE_ALL_RE = re.compile(r"Promise\s*\.\s*(?:all|allSettled)\s*\(")
+_RPC_RE = re.compile(r"\.\s*rpc\s*\(")
+_IDENTIFIER_CALL_RE = re.compile(r"(?<![\w$.])([A-Za-z_$][\w$]*)\s*\(")
+_EVENT_ATTRIBUTE_RE = re.compile(r"\s(on[A-Z]\w*)\s*=\s*\{")
+_IMPORT_RE = re.compile(r"import\s+(?:type\s+)?\{([^}]*)\}\s*from\s*['\"]")
+_HOOK_BINDING_RE = re.compile(r"(?:const|let|var)\s*\{([^{}]*)\}\s*=\s*(use[A-Z][\w$]*)\s*\(")
+_BINDING_RE = re.compile(r"^\s*(?:type\s+)?([A-Za-z_$][\w$]*)(?:\s*(?:as|:)\s*([A-Za-z_$][\w$]*))?")
+_WORD_CHARACTER_RE = re.compile(r"[\w$]")
+# Calling a hook only sets it up; the round-trips happen in what it returns
+_HOOK_NAME_RE = re.compile(r"use[A-Z]")
+
+@dataclass
+class DatabaseCall:
+    line: int
+    handler: str
+    # QUERY, RPC, NOTIFY, LOCAL, HOOK or IMPORT
+    kind: str
+    # Table, RPC name or callee
+    target: str
+    operation: str = ""
+    # Enclosing loop kinds inside the handler, outermost first
+    loops: List[str] = field(default_factory=list)
+    # Offset of the Promise.all() the call runs inside, if any (calls sharing one run concurrently)
+    group: Optional[int] = None
+    # [if-chain offset, arm index] for each enclosing if/else, outermost first
+    branches: List[List[int]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatabaseCall":
+        return cls(**data)
+
+    @property
+    def sequential_depth(self) -> int:
+        return sum(1 for loop in self.loops if loop in SEQUENTIAL_LOOPS)
+
+def _loop_spans(masked: str) -> List[Tuple[int, int, str]]:
+    spans = []
+    for match in _LOOP_KEYWORD_RE.finditer(masked):
+        if match.start() and _WORD_CHARACTER_RE.match(masked, match.start() - 1):
+            continue
+        _, header_end = split_arguments(masked, match.end() - 1)
+        spans.append((match.start(), body_extent(masked, header_end), match.group(1)))
+    for match in _CALLBACK_LOOP_RE.finditer(masked):
+        _, end = split_arguments(masked, match.end() - 1)
+        spans.append((match.start(), end, match.group(1)))
+    spans.sort()
+    return spans
+
+def _group_spans(masked: str) -> List[Tuple[int, int]]:
+    spans = []
+    for match in _PROMISE_ALL_RE.finditer(masked):
+        _, end = split_arguments(masked, match.end() - 1)
+        spans.append((match.start(), end))
+    return spans
+
+def _branch_spans(masked: str) -> List[Tuple[int, int, int, int, bool]]:
+    """(start, end, chain, arm, error path) for every arm of every if/else chain."""
+
+    spans = []
+    continuations: Dict[int, Tuple[int, int]] = {}
+    for match in _IF_RE.finditer(masked):
+        start = match.start()
+        if start and _WORD_CHARACTER_RE.match(masked, start - 1):
+            continue
+        chain, arm = continuations.pop(start, (start, 0))
+        arguments, condition_end = split_arguments(masked, match.end() - 1)
+        end = body_extent(masked, condition_end)
+        if end < len(masked) and masked[end] == ";":
+            end += 1
+        error_path = bool(arguments) and bool(_ERROR_CONDITION_RE.match(arguments[0]))
+        spans.append((start, end, chain, arm, error_path))
+
+        following = _ELSE_RE.match(masked, end)
+        if following:
+            if _IF_RE.match(masked, following.end()):
+                continuations[following.end()] = (chain, arm + 1)
+            else:
+                else_end = body_extent(masked, following.end())
+                spans.append((following.start(), else_end, chain, arm + 1, False))
+    return spans
+
+def _event_spans(masked: str) -> List[Tuple[int, int, str]]:
+    """JSX event attributes (onClick={...}): their bodies run on the event, not during render."""
+
+    spans = []
+    for match in _EVENT_ATTRIBUTE_RE.finditer(masked):
+        _, end = split_arguments(masked, match.end() - 1)
+        spans.append((match.start(1), end, match.group(1)))
+    return spans
+
+def _bindings(text: str) -> List[Tuple[str, str]]:
+    """(original, local) pairs from `{ a, b as c }` or `{ a, b: c = 1 }`."""
+
+    pairs = []
+    for entry in text.split(","):
+        match = _BINDING_RE.match(entry)
+        if match:
+            pairs.append((match.group(1), match.group(2) or match.group(1)))
+    return pairs
+
+class _Scopes:
+    """Qualified names for nested definitions, and which one a name refers to at an offset."""
+
+    def __init__(self, spans: Sequence[Tuple[int, int, str]]):
+        self.spans = list(spans)
+        self.qualified: List[str] = []
+        self.parents: List[Optional[int]] = []
+        self.by_name: Dict[str, List[int]] = {}
+        for index, (start, _, name) in enumerate(self.spans):
+            parent = self.innermost(start, limit=index)
+            self.parents.append(parent)
+            self.qualified.append(name if parent is None else f"{self.qualified[parent]}.{name}")
+            self.by_name.setdefault(name, []).append(index)
+
+    def innermost(self, offset: int, limit: Optional[int] = None) -> Optional[int]:
+        """Index of the innermost span containing offset, among the first `limit` spans."""
+
+        best = None
+        for index, (start, end, _) in enumerate(self.spans[:limit]):
+            if start > offset:
+                break
+            if offset < end:
+                best = index
+        return best
+
+    def resolve(self, name: str, offset: int) -> Optional[str]:
+        """Qualified name of the definition `name` refers to when called at offset."""
+
+        best = None
+        best_depth = -1
+        for index in self.by_name.get(name, ()):
+            parent = self.parents[index]
+            if parent is None:
+                depth = 0
+            elif self.spans[parent][0] <= offset < self.spans[parent][1]:
+                depth = self.qualified[parent].count(".") + 1
+            else:
+                continue
+            if depth > best_depth:
+                best, best_depth = index, depth
+        return None if best is None else self.qualified[best]
+
+def scan_database_calls(
+    path: str,
+    masked: str,
+    lines: LineIndex,
+    definitions: DefinitionIndex,
+    notify_function: str,
+) -> List[DatabaseCall]:
+    """Record the round-trips in one (comment-masked) file, calls that may lead to more, and the loops around them."""
+
+    sites: List[Tuple[int, str, str, str]] = []
+    for query in scan_masked_queries(path, masked, lines, definitions):
+        sites.append((query.offset, QUERY, query.table, query.operation))
+    for match in _RPC_RE.finditer(masked):
+        arguments, _ = split_arguments(masked, match.end() - 1)
+        name = arguments[0].strip("'\"`") if arguments else "?"
+        sites.append((match.start(), RPC, name, "rpc"))
+
+    scopes = _Scopes(definitions.spans())
+    imports = {
+        local: original
+        for body in _IMPORT_RE.findall(masked)
+        for original, local in _bindings(body)
+        if not _HOOK_NAME_RE.match(original)
+    }
+    hooks = {}
+    for match in _HOOK_BINDING_RE.finditer(masked):
+        for member, local in _bindings(match.group(1)):
+            hooks[local] = f"{match.group(2)}.{member}"
+
+    for match in _IDENTIFIER_CALL_RE.finditer(masked):
+        name = match.group(1)
+        if name not in scopes.by_name and name not in hooks and name not in imports:
+            continue
+        if re.search(r"\bfunction\s*$", masked[max(0, match.start() - 16):match.start()]):
+            continue
+        _, end = split_arguments(masked, match.end() - 1)
+        following = masked[end:end + 64].lstrip()
+        # `name(args) {` or `name(args): Type {` is a method definition, not a call
+        if following.startswith("{") or (following.startswith(":") and name in scopes.by_name):
+            continue
+
+        local = scopes.resolve(name, match.start()) if name in scopes.by_name else None
+        if local is not None:
+            sites.append((match.start(), LOCAL, local, ""))
+        elif name == notify_function or imports.get(name) == notify_function:
+            sites.append((match.start(), NOTIFY, notify_function, "insert"))
+        elif name in hooks:
+            sites.append((match.start(), HOOK, hooks[name], ""))
+        elif name in imports:
+            sites.append((match.start(), IMPORT, imports[name], ""))
+
+    if not sites:
+        return []
+
+    loops = _loop_spans(masked)
+    groups = _group_spans(masked)
+    events = _event_spans(masked)
+    branches = _branch_spans(masked)
+    calls = []
+    for offset, kind, target, operation in sorted(sites):
+        index = scopes.innermost(offset)
+        if index is None:
+            continue
+        handler = scopes.qualified[index]
+        start = scopes.spans[index][0]
+        if kind == LOCAL and target == handler:
+            continue
+        # Calls inside onClick={...} belong to that event, not to the render
+        for event_start, event_end, event in events:
+            if start <= event_start < offset < event_end:
+                handler, start = f"{handler}.{event}@{lines.line_of(event_start)}", event_start
+        arms = [(chain, arm, error_path) for arm_start, arm_end, chain, arm, error_path in branches
+                if start <= arm_start < offset < arm_end]
+        if any(error_path for _, _, error_path in arms):
+            continue
+        calls.append(DatabaseCall(
+            line=lines.line_of(offset),
+            handler=handler,
+            kind=kind,
+            target=target,
+            operation=operation,
+            loops=[loop for loop_start, loop_end, loop in loops if start <= loop_start < offset < loop_end],
+            group=next((g for g, g_end in reversed(groups) if start <= g < offset < g_end), None),
+            branches=[[chain, arm] for chain, arm, _ in arms],
+        ))
+
+    # Keep calls to local functions only when the callee can reach the database
+    reaching = {call.handler for call in calls if call.kind != LOCAL}
+    while True:
+        grown = reaching | {call.handler for call in calls if call.kind == LOCAL and call.target in reaching}
+        if grown == reaching:
+            break
+        reaching = grown
+    return [call for call in calls if call.kind != LOCAL or call.target in reaching]
+
+@dataclass
+class HandlerCost:
+    path: str
+    handler: str
+    requests: int
+    serial: int
+    emits_notifications: bool
+    calls: List[DatabaseCall] = field(default_factory=list)
+
+    @property
+    def location(self) -> str:
+        return f"{self.path} ({self.handler})"
+
+@dataclass
+class BatchCandidate:
+    path: str
+    call: DatabaseCall
+    # Round-trips this one call site sends at the given fan-out
+    requests: int
+    suggestion: str
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.call.line}"
+
+class RoundTripModel:
+    """Per-handler round-trip costs over a set of scanned files."""
+
+    def __init__(self, files: Iterable[Tuple[str, Sequence[DatabaseCall]]], notify_function: str, fan_out: int = DEFAULT_FAN_OUT):
+        self.fan_out = fan_out
+        self.notify_function = notify_function
+        self.handlers: Dict[Tuple[str, str], List[DatabaseCall]] = {}
+        for path, calls in files:
+            for call in calls:
+                self.handlers.setdefault((path, call.handler), []).append(call)
+
+        # Cross-file targets resolve only when exactly one file defines the name
+        defined_in: Dict[str, List[str]] = {}
+        for path, handler in self.handlers:
+            defined_in.setdefault(handler, []).append(path)
+        self._global = {name: (paths[0], name) for name, paths in defined_in.items() if len(paths) == 1}
+        self._memo: Dict[Tuple[str, str], Tuple[int, int, bool]] = {}
+
+    def _target(self, path: str, call: DatabaseCall) -> Optional[Tuple[str, str]]:
+        if call.kind == LOCAL:
+            return (path, call.target) if (path, call.target) in self.handlers else None
+        if call.kind in (HOOK, IMPORT, NOTIFY):
+            return self._global.get(call.target)
+        return None
+
+    def _callee(self, path: str, call: DatabaseCall, active: Optional[Set[Tuple[str, str]]] = None) -> Tuple[int, int, bool]:
+        """(requests, serial, emits) for one call, before loop multiplication."""
+
+        if call.kind in (QUERY, RPC):
+            return 1, 1, False
+        target = self._target(path, call)
+        requests, serial, emits = self.cost(*target, _active=active) if target else (0, 0, False)
+        if call.kind == NOTIFY:
+            # Unresolved, createNotification is still one insert
+            return max(requests, 1), max(serial, 1), True
+        return requests, serial, emits
+
+    def cost(self, path: str, handler: str, _active: Optional[Set[Tuple[str, str]]] = None) -> Tuple[int, int, bool]:
+        """Return (requests, serial round-trips, emits notifications) for a handler."""
+
+        key = (path, handler)
+        if key in self._memo:
+            return self._memo[key]
+        active = _active if _active is not None else set()
+        if key in active:
+            return 0, 0, False
+        active.add(key)
+
+        result = self._sum(path, self.handlers.get(key, []), 0, active)
+
+        active.discard(key)
+        self._memo[key] = result
+        return result
+
+    def _sum(self, path: str, calls: Sequence[DatabaseCall], depth: int, active: Set[Tuple[str, str]]) -> Tuple[int, int, bool]:
+        """Cost of calls sharing the first `depth` if/else arms; nested chains cost their dearest arm."""
+
+        requests = serial = 0
+        emits = False
+        grouped: Dict[int, int] = {}
+        chains: Dict[int, Dict[int, List[DatabaseCall]]] = {}
+        for call in calls:
+            if len(call.branches) > depth:
+                chain, arm = call.branches[depth]
+                chains.setdefault(chain, {}).setdefault(arm, []).append(call)
+                continue
+            sub_requests, sub_serial, sub_emits = self._callee(path, call, active)
+            if not sub_requests:
+                continue
+            emits = emits or sub_emits
+            requests += sub_requests * self.fan_out ** len(call.loops)
+            step = sub_serial * self.fan_out ** call.sequential_depth
+            if call.group is not None and not call.sequential_depth:
+                grouped[call.group] = max(grouped.get(call.group, 0), step)
+            else:
+                serial += step
+        serial += sum(grouped.values())
+
+        for arms in chains.values():
+            costs = [self._sum(path, arm_calls, depth + 1, active) for arm_calls in arms.values()]
+            dearest = max(costs, key=lambda cost: cost[:2])
+            requests += dearest[0]
+            serial += dearest[1]
+            emits = emits or any(cost[2] for cost in costs)
+        return requests, serial, emits
+
+    def handler_costs(self) -> List[HandlerCost]:
+        """Every handler with at least one round-trip, most requests first."""
+
+        costs = []
+        for path, handler in self.handlers:
+            requests, serial, emits = self.cost(path, handler)
+            if requests:
+                costs.append(HandlerCost(path, handler, requests, serial, emits, self.handlers[(path, handler)]))
+        costs.sort(key=lambda cost: (-cost.requests, -cost.serial, cost.path, cost.handler))
+        return costs
+
+    def batch_candidates(self) -> List[BatchCandidate]:
+        """Round-trips issued once per loop item, ranked by requests at the fan-out."""
+
+        candidates = []
+        for (path, _), calls in self.handlers.items():
+            for call in calls:
+                if not call.loops:
+                    continue
+                per_item, _, _ = self._callee(path, call)
+                if not per_item:
+                    continue
+                requests = per_item * self.fan_out ** len(call.loops)
+                candidates.append(BatchCandidate(path, call, requests, _batch_suggestion(call, per_item)))
+        candidates.sort(key=lambda c: (-c.requests, c.path, c.call.line))
+        return candidates
+
+def _batch_suggestion(call: DatabaseCall, per_item: int) -> str:
+    if call.loops[-1] == "while":
+        return "one round-trip per retry/poll iteration; bound the loop or resolve it in one query or RPC"
+    if call.kind == NOTIFY:
+        return "build the rows first and send one supabase.from(\"notifications\").insert([...])"
+    if call.kind == RPC:
+        return f"pass the whole array to one {call.target}() call"
+    if call.kind != QUERY:
+        return f"{call.target}() costs {per_item} round-trip(s) per item; give it the array and batch inside"
+    if call.operation in ("insert", "upsert"):
+        return f"collect the rows and send one .{call.operation}([...]) to {call.target}"
+    if call.operation == "update":
+        return f"send the changed rows as one .upsert([...]) to {call.target}, or move the loop into an RPC"
+    return f"replace the per-item filter with one .in(column, ids) query on {call.target}"
@@ -0,0 +1,243 @@
+"""
+Source scanner for createNotification() call sites.
+
+Walks the TypeScript tree (lib/, components/, app/) and records every call
+to createNotification() together with its arguments and the handler it
+lives in, plus every database round-trip (see roundtrips.py). Files are
+scanned in parallel across a process pool; each worker reads and parses
+its own files so the parent only collects results.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .instrument import Profiler, phase
+from .roundtrips import DatabaseCall, scan_database_calls
+from .source import DefinitionIndex, LineIndex, mask_comments, split_arguments, string_literals
+from .typeflow import ModuleFlow, ModuleTypes, TypeSet, module_types, tokenize
+
+SOURCE_DIRECTORIES = ("lib", "components", "app")
+SOURCE_EXTENSIONS = (".ts", ".tsx")
+SKIPPED_DIRECTORIES = {"node_modules", ".next", "__tests__", "__mocks__", ".git"}
+
+NOTIFY_FUNCTION = "createNotification"
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 32
+
+# Position of the `type` parameter in createNotification(userId, actorId, type, ...)
+TYPE_ARGUMENT_INDEX = 2
+
+_CALL_RE = re.compile(r"(?<![\w$.])" + NOTIFY_FUNCTION + r"\s*\(")
+_DECLARATION_RE = re.compile(r"\bfunction\s*$")
+_IDENTIFIER_LITERAL_RE = re.compile(r"^[a-z][a-z0-9_]*$")
+# Files that may reach the database: queries, RPCs, or functions handed out by hooks
+_DATABASE_HINT_RE = re.compile(r"\.\s*(?:from|rpc)\s*\(|=\s*use[A-Z]")
+# Files other modules may take a type name from: exported string-union aliases and re-exports
+_TYPES_HINT_RE = re.compile(
+    r"(?m)^\s*export\s+type\s+[A-Za-z_$][\w$]*\s*=\s*(?:\|\s*)?(?:[\"'`]|[A-Z][\w$]*\s*\|)"
+    r"|\bexport\s+(?:type\s+)?(?:\{[^}]*\}|\*)\s*from\b"
+)
+
+@dataclass
+class CallSite:
+    path: str
+    line: int
+    handler: Optional[str]
+    arguments: List[str]
+    type_expression: Optional[str]
+    type_literals: List[str]
+    # What a non-literal type argument can hold, as far as typeflow can tell
+    type_set: Optional[TypeSet] = None
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.line}"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CallSite":
+        type_set = data.get("type_set")
+        return cls(**{**data, "type_set": TypeSet.from_dict(type_set) if type_set else None})
+
+    @property
+    def is_dynamic(self) -> bool:
+        """True when the type argument is not a string literal we can read."""
+        return not self.type_literals
+
+@dataclass
+class FileScan:
+    path: str
+    line_count: int
+    call_sites: List[CallSite] = field(default_factory=list)
+    # Identifier-like string literals, kept only when a call site is dynamic
+    literals: List[str] = field(default_factory=list)
+    database_calls: List[DatabaseCall] = field(default_factory=list)
+    # Type aliases, imports and re-exports, for resolving call sites' type names
+    types: Optional[ModuleTypes] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileScan":
+        return cls(
+            path=data["path"],
+            line_count=data["line_count"],
+            call_sites=[CallSite.from_dict(site) for site in data["call_sites"]],
+            literals=data["literals"],
+            database_calls=[DatabaseCall.from_dict(call) for call in data["database_calls"]],
+            types=ModuleTypes.from_dict(data["types"]) if data.get("types") else None,
+        )
+
+def is_source_file(path: str) -> bool:
+    """True for TypeScript sources the scanner reads (not tests or typings)."""
+
+    filename = path.rsplit("/", 1)[-1]
+    if not filename.endswith(SOURCE_EXTENSIONS) or filename.endswith(".d.ts"):
+        return False
+    if ".test." in filename or ".spec." in filename:
+        return False
+    return not any(part in SKIPPED_DIRECTORIES or part.startswith(".") for part in path.split("/")[:-1])
+
+def discover_source_files(root: str, directories: Sequence[str] = SOURCE_DIRECTORIES) -> List[str]:
+    """Return repo-relative, "/"-separated paths of every scannable TypeScript file, sorted."""
+
+    paths = []
+    for directory in directories:
+        top = os.path.join(root, directory)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRECTORIES and not d.startswith(".")]
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+                if is_source_file(path):
+                    paths.append(path)
+
+    paths.sort()
+    return paths
+
+def _flow(masked: str, timings: Optional[Dict[str, float]]) -> ModuleFlow:
+    if timings is None:
+        return ModuleFlow(tokenize(masked))
+    started = time.perf_counter()
+    tokens = tokenize(masked)
+    timings["tokenize"] = timings.get("tokenize", 0.0) + time.perf_counter() - started
+    return ModuleFlow(tokens)
+
+def scan_source(path: str, text: str, timings: Optional[Dict[str, float]] = None) -> FileScan:
+    """Scan one file's text for createNotification() call sites and database round-trips.
+
+    Seconds spent tokenizing are added to timings["tokenize"] when given.
+    """
+
+    scan = FileScan(path=path, line_count=text.count("\n") + 1)
+    notifies = NOTIFY_FUNCTION in text
+    queries = notifies or _DATABASE_HINT_RE.search(text) is not None
+    exports_types = _TYPES_HINT_RE.search(text) is not None
+    if not queries and not exports_types:
+        return scan
+
+    lines = LineIndex(text)
+    masked = mask_comments(text)
+    definitions = DefinitionIndex(masked)
+    if queries:
+        scan.database_calls = scan_database_calls(path, masked, lines, definitions, NOTIFY_FUNCTION)
+    flow = None
+    if exports_types:
+        flow = _flow(masked, timings)
+        scan.types = module_types(flow.tokens)
+    if not notifies:
+        return scan
+
+    offsets = []
+    for match in _CALL_RE.finditer(masked):
+        if _DECLARATION_RE.search(masked, max(0, match.start() - 16), match.start()):
+            continue
+
+        arguments, _ = split_arguments(masked, match.end() - 1)
+        type_expression = arguments[TYPE_ARGUMENT_INDEX] if len(arguments) > TYPE_ARGUMENT_INDEX else None
+
+        scan.call_sites.append(CallSite(
+            path=path,
+            line=lines.line_of(match.start()),
+            handler=definitions.enclosing(match.start()),
+            arguments=arguments,
+            type_expression=type_expression,
+            type_literals=string_literals(type_expression) if type_expression else [],
+        ))
+        offsets.append(match.end() - 1)
+
+    dynamic = [(site, offset) for site, offset in zip(scan.call_sites, offsets) if site.is_dynamic]
+    if dynamic:
+        # Tokenizing is the expensive part, so only files with variable type arguments pay for it
+        if flow is None:
+            flow = _flow(masked, timings)
+            scan.types = module_types(flow.tokens)
+        for site, offset in dynamic:
+            site.type_set = flow.argument(offset, TYPE_ARGUMENT_INDEX)
+        scan.literals = sorted({
+            literal for literal in string_literals(masked) if _IDENTIFIER_LITERAL_RE.match(literal)
+        })
+
+    return scan
+
+def scan_file(path: str, root: str) -> FileScan:
+    """Read and scan a single repo-relative file."""
+
+    with open(os.path.join(root, path), "rb") as handle:
+        data = handle.read()
+    return scan_source(path, data.decode("utf-8", errors="replace"))
+
+def _timed_scan_file(path: str, root: str) -> Tuple[FileScan, float, float, int, int, float]:
+    """scan_file(), with when it started, how long it took, the file's size, the process that ran it
+    and how much of the time went on tokenizing."""
+
+    started, clock = time.time(), time.perf_counter()
+    timings: Dict[str, float] = {}
+    with open(os.path.join(root, path), "rb") as handle:
+        data = handle.read()
+    scan = scan_source(path, data.decode("utf-8", errors="replace"), timings)
+    return scan, started, time.perf_counter() - clock, len(data), os.getpid(), timings.get("tokenize", 0.0)
+
+def scan_files(root: str, paths: Iterable[str], workers: Optional[int] = None,
+               profiler: Optional[Profiler] = None) -> List[FileScan]:
+    """Scan the given files, in a process pool when there are enough of them."""
+
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    scan = scan_file if profiler is None else _timed_scan_file
+
+    with phase(profiler, "scan") as item:
+        if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+            results = [scan(path, root) for path in paths]
+        else:
+            # Several chunks per worker keeps the pool busy when file sizes are uneven
+            chunksize = max(1, len(paths) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(partial(scan, root=root), paths, chunksize=chunksize))
+        if profiler is None:
+            return results
+        for result, started, seconds, size, pid, _ in results:
+            profiler.file("scan", result.path, seconds, size, started, pid)
+            item.bytes += size
+        item.files += len(results)
+    # Tokenizing runs inside each file's scan, so it gets the share of the scan the workers spent on it
+    tokenized = [result for result in results if result[5]]
+    if tokenized:
+        tokenize = profiler.split("scan", "tokenize", sum(result[5] for result in tokenized) / sum(result[2] for result in results))
+        tokenize.files += len(tokenized)
+        tokenize.bytes += sum(result[3] for result in tokenized)
+    return [result[0] for result in results]
+
+def scan_tree(root: str, workers: Optional[int] = None, profiler: Optional[Profiler] = None) -> List[FileScan]:
+    """Discover and scan every source file under root."""
+
+    with phase(profiler, "discovery") as item:
+        paths = discover_source_files(root)
+        item.files += len(paths)
+    return scan_files(root, paths, workers=workers, profiler=profiler)
@@ -0,0 +1,365 @@
+"""
+Migration replay engine.
+
+Replays the repository's SQL migrations, in order, into an in-memory model
+of tables, columns, CHECK constraints, indexes and publications. Parsed
+operations are cached per file, and the schema after the last replayed file
+is kept as a snapshot: when the only change is a new migration at the end,
+just that file is parsed and applied on top of the snapshot.
+"""
+
+import fnmatch
+import glob
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .model import REQUIRED_NOTIFICATION_TYPES
+from .index import CHANGED, HASH_MATCH, INDEX_DIRECTORY, check_file, refresh_entry, signature_entry
+from .sql import PARSER_VERSION, parse_migration
+
+# Replay order: setup scripts first, then numbered migrations, then timestamped ones
+MIGRATION_SOURCES = ("lib/*-setup.sql", "migrations/*.sql", "supabase/migrations/*.sql")
+
+SNAPSHOT_FILENAME = "migrations.json"
+
+# Bump when Schema.apply or the model's fields change; snapshots from other versions are
+# replayed from scratch (cached parses are kept, PARSER_VERSION covers those)
+SNAPSHOT_VERSION = "1"
+
+REALTIME_PUBLICATION = "supabase_realtime"
+
+_TIMESTAMP_RE = re.compile(r"^(\d{8,14})_")
+_NUMBERED_RE = re.compile(r"^(\d{1,7})_")
+
+@dataclass
+class Column:
+    name: str
+    data_type: str
+    nullable: bool = True
+    primary_key: bool = False
+    unique: bool = False
+    default: Optional[str] = None
+    references: Optional[str] = None
+
+@dataclass
+class CheckConstraint:
+    name: str
+    table: str
+    expression: str
+    column: Optional[str] = None
+    allowed_values: Optional[List[str]] = None
+    source: Optional[str] = None
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: List[Dict]
+    unique: bool = False
+    method: str = "btree"
+    where: Optional[str] = None
+    # Created by a PRIMARY KEY / UNIQUE constraint rather than CREATE INDEX
+    implicit: bool = False
+    source: Optional[str] = None
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column["name"] for column in self.columns]
+
+@dataclass
+class Table:
+    name: str
+    columns: Dict[str, Column] = field(default_factory=dict)
+    checks: Dict[str, CheckConstraint] = field(default_factory=dict)
+    rls_enabled: bool = False
+    # Where CREATE TABLE ran; None for tables that migrations only ALTER
+    created_in: Optional[str] = None
+
+@dataclass
+class Schema:
+    tables: Dict[str, Table] = field(default_factory=dict)
+    indexes: Dict[str, Index] = field(default_factory=dict)
+    publications: Dict[str, List[str]] = field(default_factory=dict)
+    # "publication.table" -> where the table was added
+    publication_sources: Dict[str, str] = field(default_factory=dict)
+    views: Dict[str, str] = field(default_factory=dict)
+
+    def table(self, name: str) -> Table:
+        """Return a table, creating an implicit one for ALTERs of unknown tables."""
+
+        if name not in self.tables:
+            self.tables[name] = Table(name=name)
+        return self.tables[name]
+
+    def indexes_on(self, table: str) -> List[Index]:
+        return [index for index in self.indexes.values() if index.table == table]
+
+    def check(self, table: str, name: str) -> Optional[CheckConstraint]:
+        return self.tables[table].checks.get(name) if table in self.tables else None
+
+    def apply(self, operation: Dict):
+        """Apply one parsed operation (see sql.py) to the model."""
+
+        op = operation["op"]
+        source = operation.get("source")
+
+        if op == "create_table":
+            table = self.table(operation["table"])
+            if table.created_in is None:
+                table.created_in = source
+        elif op == "drop_table":
+            self.tables.pop(operation["table"], None)
+            for name in [name for name, index in self.indexes.items() if index.table == operation["table"]]:
+                del self.indexes[name]
+        elif op == "add_column":
+            table = self.table(operation["table"])
+            if operation["column"]["name"] not in table.columns:
+                table.columns[operation["column"]["name"]] = Column(**operation["column"])
+        elif op == "drop_column":
+            self.table(operation["table"]).columns.pop(operation["column"], None)
+        elif op == "alter_column":
+            column = self.table(operation["table"]).columns.get(operation["column"])
+            if column is not None:
+                for attribute in ("nullable", "default", "data_type"):
+                    if attribute in operation:
+                        setattr(column, attribute, operation[attribute])
+        elif op == "rename_column":
+            table = self.table(operation["table"])
+            column = table.columns.pop(operation["column"], None)
+            if column is not None:
+                column.name = operation["to"]
+                table.columns[column.name] = column
+        elif op == "add_check":
+            table = self.table(operation["table"])
+            table.checks[operation["name"]] = CheckConstraint(
+                name=operation["name"],
+                table=operation["table"],
+                expression=operation["expression"],
+                column=operation["column"],
+                allowed_values=operation["allowed_values"],
+                source=source,
+            )
+        elif op == "add_unique":
+            self.table(operation["table"])
+            self.indexes[operation["name"]] = Index(
+                name=operation["name"],
+                table=operation["table"],
+                columns=[{"name": name, "expression": False, "descending": False} for name in operation["columns"]],
+                unique=True,
+                implicit=True,
+                source=source,
+            )
+        elif op == "drop_constraint":
+            self.table(operation["table"]).checks.pop(operation["name"], None)
+            index = self.indexes.get(operation["name"])
+            if index is not None and index.implicit:
+                del self.indexes[operation["name"]]
+        elif op == "set_rls":
+            self.table(operation["table"]).rls_enabled = operation["enabled"]
+        elif op == "create_index":
+            self.table(operation["table"])
+            if operation["name"] not in self.indexes:
+                self.indexes[operation["name"]] = Index(
+                    name=operation["name"],
+                    table=operation["table"],
+                    columns=operation["columns"],
+                    unique=operation["unique"],
+                    method=operation["method"],
+                    where=operation["where"],
+                    source=source,
+                )
+        elif op == "drop_index":
+            self.indexes.pop(operation["name"], None)
+        elif op in ("publication_add", "publication_set"):
+            tables = self.publications.setdefault(operation["publication"], [])
+            if op == "publication_set":
+                tables.clear()
+            for table in operation["tables"]:
+                if table not in tables:
+                    tables.append(table)
+                    self.publication_sources[f"{operation['publication']}.{table}"] = source
+        elif op == "publication_drop":
+            tables = self.publications.get(operation["publication"], [])
+            for table in operation["tables"]:
+                if table in tables:
+                    tables.remove(table)
+        elif op == "create_view":
+            self.views[operation["name"]] = source
+        elif op == "drop_view":
+            self.views.pop(operation["name"], None)
+
+    def published(self, table: str, publication: str = REALTIME_PUBLICATION) -> bool:
+        return table in self.publications.get(publication, [])
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Schema":
+        return cls(
+            tables={
+                name: Table(
+                    name=table["name"],
+                    columns={column_name: Column(**column) for column_name, column in table["columns"].items()},
+                    checks={check_name: CheckConstraint(**check) for check_name, check in table["checks"].items()},
+                    rls_enabled=table["rls_enabled"],
+                    created_in=table["created_in"],
+                )
+                for name, table in data["tables"].items()
+            },
+            indexes={name: Index(**index) for name, index in data["indexes"].items()},
+            publications=data["publications"],
+            publication_sources=data["publication_sources"],
+            views=data["views"],
+        )
+
+@dataclass
+class ReplayStats:
+    files: int = 0
+    parsed: int = 0
+    replayed: int = 0
+    from_snapshot: int = 0
+    operations: int = 0
+
+def migration_order_key(path: str) -> Tuple:
+    """Untimestamped setup scripts, then numbered migrations, then timestamped ones."""
+
+    name = os.path.basename(path)
+    match = _TIMESTAMP_RE.match(name)
+    if match:
+        return (2, match.group(1).ljust(14, "0"), name)
+    match = _NUMBERED_RE.match(name)
+    if match:
+        return (1, match.group(1).zfill(14), name)
+    return (0, "", path)
+
+def discover_migrations(root: str, sources: Tuple[str, ...] = MIGRATION_SOURCES) -> List[str]:
+    """Return repo-relative migration paths in replay order."""
+
+    paths = set()
+    for pattern in sources:
+        for match in glob.glob(os.path.join(root, pattern)):
+            paths.add(os.path.relpath(match, root).replace(os.sep, "/"))
+    return sorted(paths, key=migration_order_key)
+
+def is_migration_file(path: str, sources: Tuple[str, ...] = MIGRATION_SOURCES) -> bool:
+    """True for a repo-relative path discover_migrations() would return."""
+
+    return any(path.count("/") == pattern.count("/") and fnmatch.fnmatchcase(path, pattern) for pattern in sources)
+
+def replay_migrations(root: str, paths: Optional[List[str]] = None) -> Schema:
+    """Parse and replay migrations without any caching."""
+
+    schema = Schema()
+    for path in discover_migrations(root) if paths is None else paths:
+        with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+            for operation in parse_migration(path, handle.read()):
+                schema.apply(operation)
+    return schema
+
+def load_schema(root: str, use_cache: bool = True, directory: Optional[str] = None) -> Tuple[Schema, ReplayStats]:
+    """Build the schema, reusing cached parses and the last snapshot where valid."""
+
+    paths = discover_migrations(root)
+    stats = ReplayStats(files=len(paths))
+
+    if not use_cache:
+        stats.parsed = stats.replayed = len(paths)
+        return replay_migrations(root, paths), stats
+
+    cache_path = os.path.join(directory or os.path.join(root, INDEX_DIRECTORY), SNAPSHOT_FILENAME)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as handle:
+            cache = json.load(handle)
+        if cache.get("version") != PARSER_VERSION:
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+
+    entries: Dict[str, Dict] = cache.get("files", {})
+    dirty = set(entries) != set(paths)
+    operations: Dict[str, List[Dict]] = {}
+    applied: List[List[str]] = []
+
+    for path in paths:
+        entry = entries.get(path)
+        state, signature = check_file(os.path.join(root, path), entry)
+        if state == CHANGED:
+            with open(os.path.join(root, path), "r", encoding="utf-8") as handle:
+                entry = signature_entry(signature, operations=parse_migration(path, handle.read()))
+            stats.parsed += 1
+            dirty = True
+        elif state == HASH_MATCH:
+            refresh_entry(entry, signature)
+            dirty = True
+        entries[path] = entry
+        operations[path] = entry["operations"]
+        applied.append([path, signature[2]])
+
+    # Resume from the snapshot if it covers an unchanged prefix of the migration list
+    snapshot = cache.get("snapshot")
+    start = 0
+    schema = Schema()
+    if snapshot and snapshot.get("version") == SNAPSHOT_VERSION and snapshot["applied"] == applied[:len(snapshot["applied"])]:
+        try:
+            schema = Schema.from_dict(snapshot["schema"])
+            start = len(snapshot["applied"])
+        except (KeyError, TypeError):
+            # A snapshot that doesn't fit the model is a miss, not an error
+            schema = Schema()
+        stats.from_snapshot = start
+
+    for path in paths[start:]:
+        for operation in operations[path]:
+            schema.apply(operation)
+        stats.replayed += 1
+    stats.operations = sum(len(ops) for ops in operations.values())
+
+    if dirty or start != len(paths):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump({
+                "version": PARSER_VERSION,
+                "files": {path: entries[path] for path in paths},
+                "snapshot": {"version": SNAPSHOT_VERSION, "applied": applied, "schema": schema.to_dict()},
+            }, handle, separators=(",", ":"))
+        os.replace(temporary, cache_path)
+
+    return schema, stats
+
+@dataclass
+class ConstraintCheck:
+    table: str
+    name: str
+    constraint: Optional[CheckConstraint]
+    # Required types the constraint rejects (inserts of these fail)
+    missing: List[str] = field(default_factory=list)
+    # Types the constraint allows that the specification doesn't list
+    unexpected: List[str] = field(default_factory=list)
+
+    @property
+    def verified(self) -> bool:
+        """False when there is no constraint or its allowed values couldn't be read; missing is empty then."""
+        return self.constraint is not None and self.constraint.allowed_values is not None
+
+def verify_type_constraint(
+    schema: Schema,
+    required: Mapping[str, str] = REQUIRED_NOTIFICATION_TYPES,
+    table: str = "notifications",
+    name: str = "notifications_type_check",
+) -> ConstraintCheck:
+    """Compare the replayed type CHECK constraint with the required types."""
+
+    constraint = schema.check(table, name)
+    result = ConstraintCheck(table=table, name=name, constraint=constraint)
+    if not result.verified:
+        return result
+
+    allowed = set(constraint.allowed_values)
+    result.missing = [t for t in required if t not in allowed]
+    result.unexpected = [t for t in constraint.allowed_values if t not in required]
+    return result
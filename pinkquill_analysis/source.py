@@ -0,0 +1,341 @@
+"""
+Text helpers shared by the TypeScript scanners.
+
+These work on raw source text rather than a full AST: comments are blanked
+out (keeping offsets and line numbers intact) and call arguments are split
+at top-level commas while respecting strings, template literals and
+brackets.
+"""
+
+import bisect
+import re
+from typing import List, Optional, Tuple
+
+# Characters after which a "/" starts a regex literal rather than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%~^")
+
+_MASK_STOP_RE = re.compile(r"[/'\"`]")
+
+def mask_comments(text: str) -> str:
+    """Return text with every comment replaced by spaces, newlines preserved."""
+
+    pieces = []
+    copied = 0
+    n = len(text)
+    i = 0
+
+    while True:
+        match = _MASK_STOP_RE.search(text, i)
+        if not match:
+            break
+        i = match.start()
+        ch = text[i]
+        nxt = text[i + 1] if i + 1 < n else ""
+
+        if ch == "/" and nxt in "/*":
+            if nxt == "/":
+                end = text.find("\n", i)
+                end = n if end == -1 else end
+            else:
+                end = text.find("*/", i + 2)
+                end = n if end == -1 else end + 2
+            pieces.append(text[copied:i])
+            pieces.append(re.sub(r"[^\n]", " ", text[i:end]))
+            copied = i = end
+        elif ch == "/":
+            j = i - 1
+            while j >= 0 and text[j].isspace():
+                j -= 1
+            i = _skip_regex(text, i) if j < 0 or text[j] in _REGEX_PRECEDERS else i + 1
+        else:
+            i = _skip_string(text, i)
+
+    pieces.append(text[copied:])
+    return "".join(pieces)
+
+_STRING_STOP_RE = {
+    "'": re.compile(r"[\\'\n]"),
+    '"': re.compile(r'[\\"\n]'),
+    "`": re.compile(r"[\\`$}'\"]"),
+}
+
+def _skip_string(text: str, start: int) -> int:
+    """Return the index just past the string literal opening at start."""
+
+    quote = text[start]
+    stop = _STRING_STOP_RE[quote]
+    i = start + 1
+    n = len(text)
+    depth = 0
+
+    while True:
+        match = stop.search(text, i)
+        if not match:
+            return n
+        i = match.start()
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if quote != "`":
+            # Closing quote, or an unterminated string ending at the newline
+            return i + 1
+        if ch == "`" and depth == 0:
+            return i + 1
+        if ch == "$":
+            if i + 1 < n and text[i + 1] == "{":
+                depth += 1
+                i += 2
+                continue
+        elif ch == "}":
+            if depth:
+                depth -= 1
+        elif depth:
+            # A string nested inside ${...}
+            i = _skip_string(text, i)
+            continue
+        i += 1
+
+def _skip_regex(text: str, start: int) -> int:
+    """Return the index just past the regex literal opening at start."""
+
+    i = start + 1
+    n = len(text)
+    in_class = False
+
+    while i < n:
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "\n":
+            # Not a regex after all (division at end of line); resume scanning
+            return start + 1
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            return i + 1
+        i += 1
+
+    return n
+
+_ARGUMENT_STOP_RE = re.compile(r"[()\[\]{},'\"`]")
+
+def split_arguments(text: str, open_paren: int) -> Tuple[List[str], int]:
+    """Split the call arguments starting at text[open_paren] == "(".
+
+    Returns the stripped top-level arguments and the index just past the
+    matching ")". Expects comments to be masked already.
+    """
+
+    args: List[str] = []
+    depth = 0
+    i = open_paren + 1
+    n = len(text)
+    arg_start = i
+
+    while True:
+        match = _ARGUMENT_STOP_RE.search(text, i)
+        if not match:
+            return args, n
+        i = match.start()
+        ch = text[i]
+        if ch in "'\"`":
+            i = _skip_string(text, i)
+            continue
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            if depth == 0:
+                last = text[arg_start:i].strip()
+                if last:
+                    args.append(last)
+                return args, i + 1
+            depth -= 1
+        elif depth == 0:
+            args.append(text[arg_start:i].strip())
+            arg_start = i + 1
+        i += 1
+
+def string_literals(expression: str) -> List[str]:
+    """Return the plain (non-interpolated) string literals in an expression."""
+
+    literals = []
+    i = 0
+    n = len(expression)
+
+    while i < n:
+        ch = expression[i]
+        if ch not in "'\"`":
+            i += 1
+            continue
+        end = _skip_string(expression, i)
+        body = expression[i + 1:end - 1]
+        if ch != "`" or "${" not in body:
+            literals.append(body)
+        i = end
+
+    return literals
+
+class LineIndex:
+    """Map character offsets to 1-based line numbers."""
+
+    def __init__(self, text: str):
+        self._starts = [0]
+        self._starts.extend(match.end() for match in re.finditer("\n", text))
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self._starts, offset)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._starts)
+
+# Definitions that name the handler a call site belongs to. Kept as separate
+# patterns so each can use its literal prefix to skip ahead; the word
+# boundary before "function"/"const" is checked by hand for the same reason.
+DEFINITION_RES = (
+    re.compile(r"function\s*\*?\s*(?P<fn>[A-Za-z_$][\w$]*)\s*[(<]"),
+    re.compile(
+        r"(?:const|let|var)\s+(?P<var>[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*"
+        r"(?:useCallback\s*\(\s*|useMemo\s*\(\s*)?(?:async\s+)?(?:function\b|\([^()]*(?:\([^()]*\)[^()]*)*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)"
+    ),
+    re.compile(r"^[ \t]*(?:async\s+)?(?P<method>[A-Za-z_$][\w$]*)\s*\([^()]*\)\s*(?::[^{;]+)?\{", re.MULTILINE),
+)
+
+_WORD_CHARACTER_RE = re.compile(r"\w")
+
+def definition_matches(masked: str) -> List["re.Match"]:
+    """Non-overlapping definition matches in text order, as one combined pattern would find them."""
+
+    candidates = []
+    for order, pattern in enumerate(DEFINITION_RES):
+        for match in pattern.finditer(masked):
+            start = match.start()
+            if order < 2 and start and _WORD_CHARACTER_RE.match(masked, start - 1):
+                continue
+            candidates.append((start, order, match))
+    candidates.sort(key=lambda candidate: candidate[:2])
+
+    matches = []
+    end = 0
+    for start, _, match in candidates:
+        if start >= end:
+            matches.append(match)
+            end = max(match.end(), start + 1)
+    return matches
+
+_NOT_METHODS = {"if", "for", "while", "switch", "catch", "return", "function", "with"}
+
+_BODY_STOP_RE = re.compile(r"[()\[\]{};'\"`]")
+
+def body_extent(text: str, start: int) -> int:
+    """Return the end offset of a function body beginning at or after start.
+
+    Brace bodies end at their matching "}"; expression bodies (arrow
+    functions without braces) end at a top-level ";" or at the bracket that
+    closes the surrounding call.
+    """
+
+    i = start
+    n = len(text)
+    while i < n and text[i].isspace():
+        i += 1
+    brace_body = i < n and text[i] == "{"
+    depth = 0
+
+    while True:
+        match = _BODY_STOP_RE.search(text, i)
+        if not match:
+            return n
+        i = match.start()
+        ch = text[i]
+        if ch in "'\"`":
+            i = _skip_string(text, i)
+            continue
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            if depth < 0:
+                return i
+            if depth == 0 and brace_body:
+                return i + 1
+        elif depth == 0 and not brace_body:
+            return i
+        i += 1
+
+def _block_after_parameters(text: str, open_paren: int) -> int:
+    """Return the offset of the "{" opening the body after a parameter list.
+
+    Skips a return type annotation, including object types such as
+    `Promise<{ success: boolean }>`.
+    """
+
+    _, i = split_arguments(text, open_paren)
+    n = len(text)
+    angle = 0
+    previous = ")"
+
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+            continue
+        if ch in "'\"`":
+            i = _skip_string(text, i)
+            previous = ch
+            continue
+        if ch == "<":
+            angle += 1
+        elif ch == ">":
+            angle -= 1
+        elif ch in "([{" and (angle or previous in ":|&<,(" or ch != "{"):
+            # Part of the type annotation: skip the balanced group
+            i = body_extent(text, i) if ch == "{" else split_arguments(text, i)[1]
+            previous = "}"
+            continue
+        elif ch == "{":
+            return i
+        elif ch in ";=":
+            break
+        previous = ch
+        i += 1
+
+    return n
+
+class DefinitionIndex:
+    """Locate the innermost enclosing named function for an offset."""
+
+    def __init__(self, masked: str):
+        self._spans: List[Tuple[int, int, str]] = []
+        for match in definition_matches(masked):
+            groups = match.groupdict()
+            name = groups.get("fn") or groups.get("var") or groups.get("method")
+            if not name or name in _NOT_METHODS:
+                continue
+
+            if groups.get("method"):
+                body = match.end() - 1
+            elif masked.endswith("function", 0, match.end()) or groups.get("fn"):
+                paren = masked.find("(", match.end() - 1)
+                body = _block_after_parameters(masked, paren) if paren != -1 else match.end()
+            else:
+                body = match.end()
+
+            self._spans.append((match.start(), body_extent(masked, body), name))
+
+    def enclosing(self, offset: int) -> Optional[str]:
+        best = None
+        for start, end, name in self._spans:
+            if start > offset:
+                break
+            if offset < end:
+                best = name
+        return best
+
+    def spans(self) -> List[Tuple[int, int, str]]:
+        """Return (start, end, name) for every definition, ordered by start."""
+        return list(self._spans)
@@ -0,0 +1,443 @@
+"""
+SQL migration parser.
+
+Splits migration files into statements (respecting strings, quoted
+identifiers, dollar-quoted bodies and comments) and turns the DDL we care
+about into plain, JSON-serialisable operations that schema.py replays:
+
+    create_table, drop_table, add_column, drop_column, alter_column,
+    rename_column, add_check, add_unique, drop_constraint, set_rls,
+    create_index, drop_index, publication_add, publication_drop,
+    publication_set, create_view, drop_view
+
+Anything else (grants, triggers, comments, data changes) is skipped.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Bump when the emitted operations change shape; cached parses are discarded
+PARSER_VERSION = "1"
+
+_DOLLAR_TAG_RE = re.compile(r"\$([A-Za-z_]\w*)?\$")
+_LINE_COMMENT_RE = re.compile(r"--[^\n]*")
+
+def split_statements(text: str) -> List[Tuple[int, str]]:
+    """Split SQL text into (starting line, statement) pairs with comments removed."""
+
+    statements = []
+    pieces: List[str] = []
+    start_line = 0
+    line = 1
+    i = 0
+    n = len(text)
+    piece_start = 0
+
+    def finish():
+        statement = " ".join("".join(pieces).split())
+        if statement:
+            statements.append((start_line, statement))
+
+    while i < n:
+        ch = text[i]
+
+        if ch == "-" and text.startswith("--", i) or ch == "/" and text.startswith("/*", i):
+            pieces.append(text[piece_start:i])
+            if ch == "-":
+                end = text.find("\n", i)
+                end = n if end == -1 else end
+            else:
+                end = text.find("*/", i + 2)
+                end = n if end == -1 else end + 2
+                line += text.count("\n", i, end)
+            pieces.append(" ")
+            i = piece_start = end
+            continue
+
+        if not start_line and not ch.isspace():
+            start_line = line
+
+        if ch in "'\"":
+            end = i + 1
+            while True:
+                end = text.find(ch, end)
+                if end == -1:
+                    end = n
+                    break
+                if text.startswith(ch * 2, end):
+                    end += 2
+                    continue
+                end += 1
+                break
+            line += text.count("\n", i, end)
+            i = end
+            continue
+
+        if ch == "$":
+            match = _DOLLAR_TAG_RE.match(text, i)
+            if match:
+                close = text.find(match.group(0), match.end())
+                end = n if close == -1 else close + len(match.group(0))
+                line += text.count("\n", i, end)
+                # Line comments inside function/DO bodies would swallow code once whitespace is collapsed
+                pieces.append(text[piece_start:i])
+                pieces.append(_LINE_COMMENT_RE.sub("", text[i:end]))
+                i = piece_start = end
+                continue
+
+        if ch == "\n":
+            line += 1
+        elif ch == ";":
+            pieces.append(text[piece_start:i])
+            finish()
+            pieces = []
+            piece_start = i + 1
+            start_line = 0
+        i += 1
+
+    pieces.append(text[piece_start:n])
+    finish()
+    return statements
+
+def split_top_level(text: str, separator: str = ",") -> List[str]:
+    """Split on separator outside parentheses, strings and quoted identifiers."""
+
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+        if ch in "'\"":
+            end = text.find(ch, i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if ch == "$":
+            match = _DOLLAR_TAG_RE.match(text, i)
+            if match:
+                close = text.find(match.group(0), match.end())
+                i = n if close == -1 else close + len(match.group(0))
+                continue
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+
+    tail = text[start:].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+def matching_paren(text: str, open_index: int) -> int:
+    """Return the index of the ")" matching text[open_index] == "("."""
+
+    depth = 0
+    i = open_index
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "'\"":
+            end = text.find(ch, i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return n
+
+def normalize_identifier(name: str) -> str:
+    """Drop quotes and the public schema; lower-case unquoted names."""
+
+    name = name.strip()
+    if name.lower().startswith("public."):
+        name = name[7:]
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1]
+    return name.lower()
+
+def allowed_values(expression: str) -> Optional[Tuple[str, List[str]]]:
+    """Read `col IN ('a', 'b')` / `col = ANY (ARRAY['a', 'b'])` into (col, values)."""
+
+    match = re.match(
+        r"^\(*\s*\"?(\w+)\"?\s*(?:::\s*\w+\s*)?(?:IN\s*\(|=\s*ANY\s*\(\s*\(?\s*ARRAY\s*\[)(.*?)[\])]\s*(?:::\s*\w+(?:\[\])?\s*)?\)*\s*$",
+        expression,
+        re.IGNORECASE | re.DOTALL,
+    )
+    if not match:
+        return None
+    values = [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", match.group(2))]
+    return match.group(1).lower(), values
+
+_IDENT = r'(?:"[^"]+"|[\w.]+)'
+
+_CREATE_TABLE_RE = re.compile(
+    r"^CREATE\s+(?:UNLOGGED\s+|TEMP(?:ORARY)?\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(" + _IDENT + r")\s*\(",
+    re.IGNORECASE,
+)
+_ALTER_TABLE_RE = re.compile(r"^ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(" + _IDENT + r")\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_DROP_TABLE_RE = re.compile(r"^DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(.*?)(?:\s+CASCADE|\s+RESTRICT)?$", re.IGNORECASE)
+_CREATE_INDEX_RE = re.compile(
+    r"^CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(" + _IDENT + r")?\s*ON\s+(?:ONLY\s+)?("
+    + _IDENT + r")\s*(?:USING\s+(\w+)\s*)?\(",
+    re.IGNORECASE,
+)
+_DROP_INDEX_RE = re.compile(r"^DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(.*?)(?:\s+CASCADE|\s+RESTRICT)?$", re.IGNORECASE)
+_PUBLICATION_RE = re.compile(r"^ALTER\s+PUBLICATION\s+(" + _IDENT + r")\s+(ADD|DROP|SET)\s+TABLE\s+(.*)$", re.IGNORECASE)
+_CREATE_PUBLICATION_RE = re.compile(r"^CREATE\s+PUBLICATION\s+(" + _IDENT + r")(?:\s+FOR\s+(ALL\s+TABLES|TABLE\s+(.*)))?$", re.IGNORECASE)
+_CREATE_VIEW_RE = re.compile(r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(" + _IDENT + r")", re.IGNORECASE)
+_DROP_VIEW_RE = re.compile(r"^DROP\s+(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+EXISTS\s+)?(.*?)(?:\s+CASCADE|\s+RESTRICT)?$", re.IGNORECASE)
+_DO_BLOCK_RE = re.compile(r"^DO\s+(?:LANGUAGE\s+\w+\s+)?(\$\w*\$)(.*)\1", re.IGNORECASE | re.DOTALL)
+_EMBEDDED_RE = re.compile(r"\b(?:ALTER\s+PUBLICATION|ALTER\s+TABLE|CREATE\s+(?:UNIQUE\s+)?INDEX|DROP\s+INDEX)\b", re.IGNORECASE)
+
+_COLUMN_RE = re.compile(
+    r"^(" + _IDENT + r")\s+(.+?)(?=\s+(?:NOT\s+NULL|NULL|PRIMARY\s+KEY|UNIQUE|DEFAULT|REFERENCES|CHECK|CONSTRAINT|GENERATED|COLLATE)\b|$)(.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_CONSTRAINT_RE = re.compile(r"^(?:CONSTRAINT\s+(" + _IDENT + r")\s+)?(PRIMARY\s+KEY|UNIQUE|CHECK|FOREIGN\s+KEY|EXCLUDE)\b", re.IGNORECASE)
+
+def parse_statement(statement: str, source: str) -> List[Dict]:
+    """Turn one statement into zero or more schema operations."""
+
+    match = _CREATE_TABLE_RE.match(statement)
+    if match:
+        open_index = match.end() - 1
+        body = statement[open_index + 1:matching_paren(statement, open_index)]
+        return _create_table(normalize_identifier(match.group(1)), body, source)
+
+    match = _PUBLICATION_RE.match(statement)
+    if match:
+        action = {"ADD": "publication_add", "DROP": "publication_drop", "SET": "publication_set"}[match.group(2).upper()]
+        tables = [normalize_identifier(t.split("(")[0]) for t in split_top_level(match.group(3))]
+        return [{"op": action, "publication": normalize_identifier(match.group(1)), "tables": tables, "source": source}]
+
+    match = _CREATE_PUBLICATION_RE.match(statement)
+    if match:
+        tables = [normalize_identifier(t) for t in split_top_level(match.group(3))] if match.group(3) else []
+        return [{"op": "publication_set", "publication": normalize_identifier(match.group(1)), "tables": tables,
+                 "all_tables": bool(match.group(2) and not match.group(3)), "source": source}]
+
+    match = _ALTER_TABLE_RE.match(statement)
+    if match:
+        return _alter_table(normalize_identifier(match.group(1)), match.group(2), source)
+
+    match = _CREATE_INDEX_RE.match(statement)
+    if match:
+        return [_create_index(match, statement, source)]
+
+    match = _DROP_INDEX_RE.match(statement)
+    if match:
+        return [{"op": "drop_index", "name": normalize_identifier(name), "source": source} for name in split_top_level(match.group(1))]
+
+    match = _DROP_TABLE_RE.match(statement)
+    if match:
+        return [{"op": "drop_table", "table": normalize_identifier(name), "source": source} for name in split_top_level(match.group(1))]
+
+    match = _CREATE_VIEW_RE.match(statement)
+    if match:
+        return [{"op": "create_view", "name": normalize_identifier(match.group(1)), "source": source}]
+
+    match = _DROP_VIEW_RE.match(statement)
+    if match:
+        return [{"op": "drop_view", "name": normalize_identifier(name), "source": source} for name in split_top_level(match.group(1))]
+
+    match = _DO_BLOCK_RE.match(statement)
+    if match:
+        return _do_block(match.group(2), source)
+
+    return []
+
+def _column_definition(table: str, definition: str, source: str) -> List[Dict]:
+    match = _COLUMN_RE.match(definition)
+    if not match:
+        return []
+
+    name = normalize_identifier(match.group(1))
+    data_type = " ".join(match.group(2).split()).upper()
+    rest = match.group(3)
+    upper = rest.upper()
+
+    column = {
+        "name": name,
+        "data_type": data_type,
+        "nullable": "NOT NULL" not in upper and "PRIMARY KEY" not in upper,
+        "primary_key": "PRIMARY KEY" in upper,
+        "unique": bool(re.search(r"\bUNIQUE\b", upper)),
+        "default": None,
+        "references": None,
+    }
+
+    default = re.search(r"\bDEFAULT\s+(.+?)(?=\s+(?:NOT\s+NULL|NULL|PRIMARY|UNIQUE|REFERENCES|CHECK|CONSTRAINT)\b|$)", rest, re.IGNORECASE)
+    if default:
+        column["default"] = default.group(1).strip()
+    references = re.search(r"\bREFERENCES\s+(" + _IDENT + r")", rest, re.IGNORECASE)
+    if references:
+        column["references"] = normalize_identifier(references.group(1))
+
+    operations = [{"op": "add_column", "table": table, "column": column, "source": source}]
+
+    for check in re.finditer(r"(?:CONSTRAINT\s+(" + _IDENT + r")\s+)?CHECK\s*\(", rest, re.IGNORECASE):
+        open_index = check.end() - 1
+        expression = rest[open_index + 1:matching_paren(rest, open_index)].strip()
+        constraint = normalize_identifier(check.group(1)) if check.group(1) else f"{table}_{name}_check"
+        operations.append(_check_operation(table, constraint, expression, source))
+
+    if column["primary_key"]:
+        operations.append({"op": "add_unique", "table": table, "name": f"{table}_pkey", "columns": [name], "primary": True, "source": source})
+    elif column["unique"]:
+        operations.append({"op": "add_unique", "table": table, "name": f"{table}_{name}_key", "columns": [name], "primary": False, "source": source})
+
+    return operations
+
+def _check_operation(table: str, name: str, expression: str, source: str) -> Dict:
+    parsed = allowed_values(expression)
+    return {
+        "op": "add_check",
+        "table": table,
+        "name": name,
+        "expression": expression,
+        "column": parsed[0] if parsed else None,
+        "allowed_values": parsed[1] if parsed else None,
+        "source": source,
+    }
+
+def _table_constraint(table: str, definition: str, source: str) -> List[Dict]:
+    match = _TABLE_CONSTRAINT_RE.match(definition)
+    if not match:
+        return []
+
+    kind = " ".join(match.group(2).upper().split())
+    explicit_name = normalize_identifier(match.group(1)) if match.group(1) else None
+    rest = definition[match.end():]
+    open_index = rest.find("(")
+    inner = rest[open_index + 1:matching_paren(rest, open_index)] if open_index != -1 else ""
+
+    if kind == "CHECK":
+        return [_check_operation(table, explicit_name or f"{table}_check", inner.strip(), source)]
+    if kind in ("PRIMARY KEY", "UNIQUE"):
+        columns = [normalize_identifier(c) for c in split_top_level(inner)]
+        primary = kind == "PRIMARY KEY"
+        name = explicit_name or (f"{table}_pkey" if primary else f"{table}_{'_'.join(columns)}_key")
+        return [{"op": "add_unique", "table": table, "name": name, "columns": columns, "primary": primary, "source": source}]
+    return []
+
+def _create_table(table: str, body: str, source: str) -> List[Dict]:
+    operations: List[Dict] = [{"op": "create_table", "table": table, "source": source}]
+    for definition in split_top_level(body):
+        if _TABLE_CONSTRAINT_RE.match(definition):
+            operations.extend(_table_constraint(table, definition, source))
+        elif not re.match(r"^(?:LIKE|FOREIGN)\b", definition, re.IGNORECASE):
+            operations.extend(_column_definition(table, definition, source))
+    return operations
+
+def _alter_table(table: str, actions: str, source: str) -> List[Dict]:
+    operations: List[Dict] = []
+
+    for action in split_top_level(actions):
+        match = re.match(r"^ADD\s+(?=CONSTRAINT\b|PRIMARY\s+KEY|UNIQUE|CHECK|FOREIGN\s+KEY|EXCLUDE)(.*)$", action, re.IGNORECASE | re.DOTALL)
+        if match:
+            operations.extend(_table_constraint(table, match.group(1), source))
+            continue
+
+        match = re.match(r"^ADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(.*)$", action, re.IGNORECASE | re.DOTALL)
+        if match:
+            operations.extend(_column_definition(table, match.group(1), source))
+            continue
+
+        match = re.match(r"^DROP\s+CONSTRAINT\s+(?:IF\s+EXISTS\s+)?(" + _IDENT + r")", action, re.IGNORECASE)
+        if match:
+            operations.append({"op": "drop_constraint", "table": table, "name": normalize_identifier(match.group(1)), "source": source})
+            continue
+
+        match = re.match(r"^DROP\s+(?:COLUMN\s+)?(?:IF\s+EXISTS\s+)?(" + _IDENT + r")", action, re.IGNORECASE)
+        if match:
+            operations.append({"op": "drop_column", "table": table, "column": normalize_identifier(match.group(1)), "source": source})
+            continue
+
+        match = re.match(r"^ALTER\s+(?:COLUMN\s+)?(" + _IDENT + r")\s+(.*)$", action, re.IGNORECASE | re.DOTALL)
+        if match:
+            change = match.group(2).upper()
+            operation = {"op": "alter_column", "table": table, "column": normalize_identifier(match.group(1)), "source": source}
+            if change.startswith("SET NOT NULL"):
+                operation["nullable"] = False
+            elif change.startswith("DROP NOT NULL"):
+                operation["nullable"] = True
+            elif change.startswith("SET DEFAULT"):
+                operation["default"] = match.group(2)[len("SET DEFAULT"):].strip()
+            elif change.startswith("DROP DEFAULT"):
+                operation["default"] = None
+            elif change.startswith(("TYPE", "SET DATA TYPE")):
+                operation["data_type"] = re.sub(r"^(?:SET\s+DATA\s+)?TYPE\s+", "", match.group(2), flags=re.IGNORECASE).split(" USING ")[0].strip().upper()
+            operations.append(operation)
+            continue
+
+        match = re.match(r"^RENAME\s+(?:COLUMN\s+)?(" + _IDENT + r")\s+TO\s+(" + _IDENT + r")$", action, re.IGNORECASE)
+        if match:
+            operations.append({"op": "rename_column", "table": table, "column": normalize_identifier(match.group(1)),
+                               "to": normalize_identifier(match.group(2)), "source": source})
+            continue
+
+        match = re.match(r"^(ENABLE|DISABLE)\s+ROW\s+LEVEL\s+SECURITY$", action, re.IGNORECASE)
+        if match:
+            operations.append({"op": "set_rls", "table": table, "enabled": match.group(1).upper() == "ENABLE", "source": source})
+
+    return operations
+
+def _create_index(match: "re.Match", statement: str, source: str) -> Dict:
+    table = normalize_identifier(match.group(3))
+    open_index = match.end() - 1
+    close_index = matching_paren(statement, open_index)
+
+    columns = []
+    for element in split_top_level(statement[open_index + 1:close_index]):
+        descending = bool(re.search(r"\bDESC\b", element, re.IGNORECASE))
+        expression = re.sub(r"\s+(?:ASC|DESC|NULLS\s+(?:FIRST|LAST)|\w+_ops)\b", "", element, flags=re.IGNORECASE).strip()
+        is_column = re.fullmatch(_IDENT, expression) is not None
+        columns.append({
+            "name": normalize_identifier(expression) if is_column else expression,
+            "expression": not is_column,
+            "descending": descending,
+        })
+
+    where = re.search(r"\bWHERE\s+(.*)$", statement[close_index + 1:], re.IGNORECASE)
+    name = normalize_identifier(match.group(2)) if match.group(2) else f"{table}_{'_'.join(c['name'] for c in columns if not c['expression'])}_idx"
+    return {
+        "op": "create_index",
+        "name": name,
+        "table": table,
+        "unique": bool(match.group(1)),
+        "method": (match.group(4) or "btree").lower(),
+        "columns": columns,
+        "where": where.group(1).strip() if where else None,
+        "source": source,
+    }
+
+def _do_block(body: str, source: str) -> List[Dict]:
+    """Pick DDL out of an anonymous plpgsql block (e.g. guarded publication adds)."""
+
+    operations = []
+    for chunk in split_top_level(body, ";"):
+        match = _EMBEDDED_RE.search(chunk)
+        if not match:
+            continue
+        for operation in parse_statement(chunk[match.start():].strip(), source):
+            operation["conditional"] = True
+            operations.append(operation)
+    return operations
+
+def parse_migration(path: str, text: str) -> List[Dict]:
+    """Parse a whole migration file into schema operations, in order."""
+
+    operations = []
+    for line, statement in split_statements(text):
+        operations.extend(parse_statement(statement, f"{path}:{line}"))
+    return operations
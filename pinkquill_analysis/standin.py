@@ -0,0 +1,562 @@
+"""
+Local realtime stand-in for load-testing notification fan-out.
+
+StandIn is an asyncio server speaking enough of the Supabase realtime
+protocol (Phoenix channel messages over WebSocket text frames) for the
+hooks' postgres_changes subscriptions: a client joins `realtime:<channel>`
+with the config the hook passes to .on(), and each row the driver inserts
+is pushed to every joined channel whose table, event and `column=eq.value`
+filter match it. It also answers the selects each hook reruns on every
+event, as PostgREST would, with bodies sized by the payload model, so the
+refetch traffic shares the stand-in's loop. Nothing talks to Supabase.
+
+run_load() starts the stand-in and spreads the simulated users over client
+processes. Each user is one socket per session with a channel per hook, the
+way supabase-js multiplexes them, and reruns the hook's selects when an
+event arrives. The driver pushes bursts of inserts with Zipf-distributed
+recipients and the run measures broadcast latency (insert to receipt),
+refetch round-trips, messages per client and the stand-in's CPU time.
+Clocks are compared across processes, so this wants one Linux box.
+"""
+
+import asyncio
+import base64
+import bisect
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .payload import ColumnSizes, TableColumns, parse_selection, selection_bytes
+from .queries import QueryShape
+from .realtime import DEFAULT_FLAG_FRACTION, DEFAULT_ROWS_PER_USER, DEFAULT_SKEW, OWNER, Subscription
+
+# The hooks that subscribe to a signed-in user's own rows
+DEFAULT_HOOKS = ("useNotifications", "useUnreadCount", "useFollowRequests")
+
+# Driver defaults: inserts per burst and seconds between burst starts
+DEFAULT_BURST = 250
+DEFAULT_INTERVAL = 0.25
+
+HOST = "127.0.0.1"
+REALTIME_PATH = "/realtime/v1/websocket?vsn=1.0.0"
+# Clients opening sockets at once, per client process
+CONNECT_CONCURRENCY = 256
+# Seconds to wait for every channel to join, and for refetches after the last burst
+JOIN_TIMEOUT = 120.0
+SETTLE_TIMEOUT = 60.0
+
+# Topic the stand-in answers selects on (PostgREST, in the real thing)
+REST_TOPIC = "rest"
+# Stands for the user's id in the join templates client processes are sent
+USER_PLACEHOLDER = "{user}"
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_TEXT, _CLOSE, _PING, _PONG = 0x1, 0x8, 0x9, 0xA
+_KEY_RE = re.compile(rb"(?im)^sec-websocket-key:\s*(\S+)\s*$")
+# `${userId}` in channel names and filters
+_VARIABLE_RE = re.compile(r"\$\{[^}]*\}")
+
+def _unmask(key: bytes, data: bytes) -> bytes:
+    """XOR data with a 4-byte WebSocket mask; masking and unmasking are the same."""
+
+    if not data:
+        return data
+    repeated = (key * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(data), "big")
+
+def _frame(opcode: int, data: bytes, mask: bool = False) -> bytes:
+    """One unfragmented frame; clients must mask theirs (RFC 6455 5.3)."""
+
+    length = len(data)
+    bit = 0x80 if mask else 0
+    if length < 126:
+        head = bytes((0x80 | opcode, bit | length))
+    elif length < 65536:
+        head = bytes((0x80 | opcode, bit | 126)) + length.to_bytes(2, "big")
+    else:
+        head = bytes((0x80 | opcode, bit | 127)) + length.to_bytes(8, "big")
+    if not mask:
+        return head + data
+    key = random.getrandbits(32).to_bytes(4, "big")
+    return head + key + _unmask(key, data)
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    first, second = await reader.readexactly(2)
+    if not first & 0x80:
+        raise ValueError("fragmented WebSocket frames are not supported")
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    data = await reader.readexactly(length)
+    return first & 0x0F, _unmask(key, data) if key else data
+
+def _encode(message: Dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode()
+
+def _raise_file_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft >= needed:
+        return
+    if hard != resource.RLIM_INFINITY and hard < needed:
+        raise RuntimeError(f"{needed:,} sockets need more open files than this box allows ({hard:,}); "
+                           "use fewer --users or --sessions")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+
+@dataclass
+class Refetch:
+    """A select a hook reruns on every event, and the rows and bytes PostgREST returns for it."""
+
+    query: QueryShape
+    # JSON bytes of one returned row, embeds included
+    row_bytes: float
+
+    @property
+    def literals(self) -> int:
+        """Equality filters on a literal (read = false, status = 'pending'); each narrows the bound rows."""
+        return sum(1 for item in self.query.filters if item.kind == "equality" and item.value is not None)
+
+@dataclass
+class Hook:
+    """One realtime channel a hook opens, with its postgres_changes subscriptions and the selects they rerun."""
+
+    owner: str
+    channel: str
+    subscriptions: List[Subscription]
+    refetches: List[Refetch] = field(default_factory=list)
+
+    def config(self, user: str) -> List[Dict]:
+        """The postgres_changes config the hook joins with, for one user."""
+
+        changes = []
+        for subscription in self.subscriptions:
+            change = {"event": subscription.event, "schema": "public", "table": subscription.table}
+            if subscription.filter:
+                change["filter"] = _VARIABLE_RE.sub(user, subscription.filter)
+            changes.append(change)
+        return changes
+
+    def topic(self, user: str) -> str:
+        return "realtime:" + _VARIABLE_RE.sub(user, self.channel)
+
+def load_hooks(subscriptions: Sequence[Subscription], tables: TableColumns, names: Sequence[str] = DEFAULT_HOOKS,
+               sizes: Optional[ColumnSizes] = None) -> List[Hook]:
+    """The channels the named hooks open on their user's own rows, in source order."""
+
+    sizes = sizes or ColumnSizes()
+    hooks: Dict[Tuple[str, str, str], Hook] = {}
+    for subscription in subscriptions:
+        if subscription.owner not in names or subscription.audience != OWNER:
+            continue
+        key = (subscription.path, subscription.owner, subscription.channel)
+        hook = hooks.setdefault(key, Hook(subscription.owner, subscription.channel, []))
+        hook.subscriptions.append(subscription)
+        for query in subscription.queries:
+            if query.reads and all(refetch.query is not query for refetch in hook.refetches):
+                selection = parse_selection(query.projection, query.table, tables)
+                hook.refetches.append(Refetch(query, selection_bytes(selection, sizes, tables)))
+    missing = [name for name in names if all(hook.owner != name for hook in hooks.values())]
+    if missing:
+        raise RuntimeError(f"no postgres_changes subscription on the user's own rows in {', '.join(missing)}")
+    return list(hooks.values())
+
+def _sample_row(table: str, tables: TableColumns, sizes: ColumnSizes) -> Dict:
+    """A row of table with typically sized values; the driver fills in ids, recipient and time."""
+
+    row = {}
+    for column, data_type in tables.columns(table).items():
+        data_type = data_type or ""
+        if data_type == "boolean":
+            row[column] = False
+        elif "int" in data_type or data_type in ("numeric", "real", "double precision"):
+            row[column] = 0
+        else:
+            # Less the two quotes
+            row[column] = "x" * max(0, int(sizes.value_bytes(table, column, data_type)) - 2)
+    return row
+
+class StandIn:
+    """The realtime server: routes inserted rows to matching channels and answers refetch selects."""
+
+    def __init__(self, refetches: Sequence[Refetch], expected_joins: int,
+                 rows_per_user: int = DEFAULT_ROWS_PER_USER, flag_fraction: float = DEFAULT_FLAG_FRACTION):
+        self.refetches = list(refetches)
+        self.rows_per_user = rows_per_user
+        self.flag_fraction = flag_fraction
+        self.expected_joins = expected_joins
+        self.joins = 0
+        self.joined = asyncio.Event()
+        # (table, filter column, value) -> [(writer, topic, subscription ids, event)]
+        self._routes: Dict[Tuple[str, str, str], List[Tuple[asyncio.StreamWriter, str, List[int], str]]] = {}
+        self._filtered: Dict[str, Set[str]] = {}
+        # (table, user) -> rows the user's bound selects see, and the ones matching literal filters
+        self._owned: Dict[Tuple[str, str], float] = {}
+        self._flagged: Dict[Tuple[str, str], float] = {}
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._touched: Set[asyncio.StreamWriter] = set()
+        self._next_id = 0
+        self.deliveries = 0
+        self.selects = 0
+        self.expected_selects = 0
+        self.bytes_sent = 0
+        self._settled = asyncio.Event()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._connection, HOST, port, backlog=4096)
+        return self._server.sockets[0].getsockname()[1]
+
+    def _send(self, writer: asyncio.StreamWriter, data: bytes):
+        frame = _frame(_TEXT, data)
+        self.bytes_sent += len(frame)
+        writer.write(frame)
+        self._touched.add(writer)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        routes = []
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            key = _KEY_RE.search(request)
+            if not key:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+                return
+            accept = base64.b64encode(hashlib.sha1(key.group(1) + _GUID).digest())
+            writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                         b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+            self._connections.add(writer)
+            while True:
+                opcode, data = await _read_frame(reader)
+                if opcode == _CLOSE:
+                    break
+                if opcode == _PING:
+                    writer.write(_frame(_PONG, data))
+                elif opcode == _TEXT:
+                    self._message(writer, json.loads(data), routes)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            for key, entry in routes:
+                self._routes[key].remove(entry)
+            self._connections.discard(writer)
+            self._touched.discard(writer)
+            writer.close()
+
+    def _message(self, writer: asyncio.StreamWriter, message: Dict, routes: List):
+        topic, event, payload, ref = message.get("topic"), message.get("event"), message.get("payload") or {}, message.get("ref")
+        if topic == REST_TOPIC and event == "select":
+            self._send(writer, self._select(payload, ref))
+            return
+        if event != "phx_join":
+            return
+        changes = []
+        for change in (payload.get("config") or {}).get("postgres_changes") or []:
+            self._next_id += 1
+            changes.append({**change, "id": self._next_id})
+            # Unfiltered changes route on (table, "", "")
+            column, _, value = (change.get("filter") or "").partition("=eq.")
+            key = (change.get("table"), column, value)
+            entry = (writer, topic, [self._next_id], (change.get("event") or "*").upper())
+            self._routes.setdefault(key, []).append(entry)
+            self._filtered.setdefault(key[0], set()).add(column)
+            routes.append((key, entry))
+        self._send(writer, _encode({"topic": topic, "event": "phx_reply", "ref": ref,
+                                    "payload": {"status": "ok", "response": {"postgres_changes": changes}}}))
+        self.joins += 1
+        if self.joins >= self.expected_joins:
+            self.joined.set()
+
+    def _select(self, payload: Dict, ref) -> bytes:
+        refetch = self.refetches[payload["query"]]
+        query, key = refetch.query, (refetch.query.table, payload["user"])
+        owned = self._owned.get(key, float(self.rows_per_user))
+        flagged = self._flagged.get(key, self.rows_per_user * self.flag_fraction)
+        matched = flagged * self.flag_fraction ** (refetch.literals - 1) if refetch.literals else owned
+        rows = 0 if query.head else int(min(query.limit, matched) if query.limit else matched)
+        response = {"count": int(matched) if query.count else None, "rows": rows,
+                    "body": "x" * int(2 + rows * (refetch.row_bytes + 1)) if rows else "[]"}
+        self.selects += 1
+        if self.selects >= self.expected_selects:
+            self._settled.set()
+        return _encode({"topic": REST_TOPIC, "event": "phx_reply", "ref": ref,
+                        "payload": {"status": "ok", "response": response}})
+
+    def insert(self, table: str, record: Dict, columns: List[Dict]):
+        """Commit one row: push it to every channel listening for it, stamped with the insert time."""
+
+        now = time.time()
+        data = json.dumps({"schema": "public", "table": table, "type": "INSERT", "columns": columns, "record": record,
+                           "commit_timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f"{now % 1:.6f}"[1:] + "Z",
+                           "errors": None, "sent_at": now}, separators=(",", ":"))
+        for column in self._filtered.get(table, ()):
+            value = str(record.get(column, "")) if column else ""
+            key = (table, column, value)
+            if column:
+                self._owned[(table, value)] = self._owned.get((table, value), float(self.rows_per_user)) + 1
+                self._flagged[(table, value)] = self._flagged.get((table, value), self.rows_per_user * self.flag_fraction) + 1
+            for writer, topic, ids, event in self._routes.get(key, ()):
+                if event not in ("*", "INSERT"):
+                    continue
+                self._send(writer, f'{{"topic":{json.dumps(topic)},"event":"postgres_changes","ref":null,'
+                                   f'"payload":{{"ids":{ids},"data":{data}}}}}'.encode())
+                self.deliveries += 1
+
+    def expect(self, selects: int):
+        """Count selects the clients will send for deliveries so far."""
+
+        self.expected_selects += selects
+        if self.selects >= self.expected_selects:
+            self._settled.set()
+        else:
+            self._settled.clear()
+
+    async def flush(self):
+        touched, self._touched = self._touched, set()
+        await asyncio.gather(*(writer.drain() for writer in touched), return_exceptions=True)
+
+    async def settle(self, timeout: float = SETTLE_TIMEOUT) -> bool:
+        """Wait for every expected refetch to be answered; False on timeout."""
+
+        await self.flush()
+        try:
+            await asyncio.wait_for(self._settled.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        await self.flush()
+        return True
+
+    async def close(self):
+        for writer in list(self._connections):
+            writer.write(_frame(_CLOSE, b""))
+        await asyncio.gather(*(writer.drain() for writer in list(self._connections)), return_exceptions=True)
+        self._server.close()
+        await self._server.wait_closed()
+
+@dataclass
+class ClientBatch:
+    """What one client process saw."""
+
+    sockets: int = 0
+    # Seconds from insert to receipt, one per delivered change
+    latencies: List[float] = field(default_factory=list)
+    # Seconds from sending a select to its answer
+    round_trips: List[float] = field(default_factory=list)
+    # Changes and select answers received, per socket
+    messages: List[int] = field(default_factory=list)
+    cpu: float = 0.0
+
+async def _client(port: int, user: str, joins: List[Tuple[str, List[Dict], List[int]]], batch: ClientBatch,
+                  gate: asyncio.Semaphore):
+    async with gate:
+        reader, writer = await asyncio.open_connection(HOST, port)
+        key = base64.b64encode(os.urandom(16))
+        writer.write(b"GET " + REALTIME_PATH.encode() + b" HTTP/1.1\r\nHost: " + HOST.encode() + b"\r\n"
+                     b"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: " + key + b"\r\n"
+                     b"Sec-WebSocket-Version: 13\r\n\r\n")
+        response = await reader.readuntil(b"\r\n\r\n")
+        if not response.startswith(b"HTTP/1.1 101"):
+            raise ConnectionError(f"stand-in refused the WebSocket upgrade: {response.splitlines()[0]!r}")
+        refetches = {}
+        for ref, (topic, changes, queries) in enumerate(joins, 1):
+            topic = topic.replace(USER_PLACEHOLDER, user)
+            changes = [{**change, "filter": change["filter"].replace(USER_PLACEHOLDER, user)} if "filter" in change else change
+                       for change in changes]
+            writer.write(_frame(_TEXT, _encode({"topic": topic, "event": "phx_join", "ref": str(ref), "join_ref": str(ref),
+                                                "payload": {"config": {"postgres_changes": changes}}}), mask=True))
+            refetches[topic] = queries
+
+    batch.sockets += 1
+    pending: Dict[str, float] = {}
+    received = 0
+    next_ref = len(joins)
+    try:
+        while True:
+            opcode, data = await _read_frame(reader)
+            now = time.time()
+            if opcode == _CLOSE:
+                break
+            message = json.loads(data)
+            if message["event"] == "postgres_changes":
+                received += 1
+                batch.latencies.append(now - message["payload"]["data"]["sent_at"])
+                # The hook's callback: rerun its selects
+                for query in refetches[message["topic"]]:
+                    next_ref += 1
+                    pending[str(next_ref)] = time.time()
+                    writer.write(_frame(_TEXT, _encode({"topic": REST_TOPIC, "event": "select", "ref": str(next_ref),
+                                                        "payload": {"query": query, "user": user}}), mask=True))
+            elif message["topic"] == REST_TOPIC:
+                received += 1
+                batch.round_trips.append(now - pending.pop(message["ref"]))
+            elif message["payload"].get("status") != "ok":
+                raise ConnectionError(f"stand-in refused to join {message['topic']}")
+    finally:
+        batch.messages.append(received)
+        writer.close()
+
+async def _clients(port: int, users: Sequence[str], sessions: int, joins: List[Tuple[str, List[Dict], List[int]]]) -> ClientBatch:
+    batch = ClientBatch()
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    await asyncio.gather(*(_client(port, user, joins, batch, gate) for user in users for _ in range(sessions)))
+    return batch
+
+def _run_clients(port: int, users: Sequence[str], sessions: int, joins: List[Tuple[str, List[Dict], List[int]]]) -> ClientBatch:
+    _raise_file_limit(len(users) * sessions + 64)
+    batch = asyncio.run(_clients(port, users, sessions, joins))
+    batch.cpu = time.process_time()
+    return batch
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+@dataclass
+class LoadResult:
+    hooks: List[Hook]
+    table: str
+    users: int
+    sessions: int
+    processes: int
+    events: int
+    burst: int
+    interval: float
+    skew: float
+    sockets: int
+    # postgres_changes subscriptions joined
+    subscriptions: int
+    deliveries: int
+    selects: int
+    bytes_sent: int
+    # Seconds from the first burst until the last refetch was answered
+    wall: float
+    # Stand-in (and driver) CPU seconds over wall, and the client processes' whole runs
+    server_cpu: float
+    client_cpu: float
+    latencies: List[float]
+    round_trips: List[float]
+    messages: List[int]
+    settled: bool
+
+    @property
+    def cpu_per_thousand(self) -> float:
+        """Stand-in CPU seconds per second of load, per 1,000 subscriptions."""
+
+        return self.server_cpu / self.wall / (self.subscriptions / 1000) if self.wall and self.subscriptions else 0.0
+
+    def client_rates(self) -> List[float]:
+        """Messages per second each client socket received during the run."""
+
+        return [count / self.wall for count in self.messages] if self.wall else []
+
+async def _drive(hooks: List[Hook], record: Dict, columns: List[Dict], table: str, users: int, sessions: int,
+                 events: int, burst: int, interval: float, skew: float, seed: int, processes: int,
+                 rows_per_user: int, flag_fraction: float) -> LoadResult:
+    refetches = [refetch for hook in hooks for refetch in hook.refetches]
+    joins, per_event = [], {}
+    for hook in hooks:
+        queries = [refetches.index(refetch) for refetch in hook.refetches]
+        joins.append((hook.topic(USER_PLACEHOLDER), hook.config(USER_PLACEHOLDER), queries))
+    ids = [str(uuid.UUID(int=index + 1)) for index in range(users)]
+    server = StandIn(refetches, users * sessions * len(hooks), rows_per_user, flag_fraction)
+    _raise_file_limit(users * sessions + 64)
+    port = await server.start()
+
+    loop = asyncio.get_running_loop()
+    bounds = [users * index // processes for index in range(processes + 1)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        clients = [loop.run_in_executor(pool, _run_clients, port, ids[low:high], sessions, joins)
+                   for low, high in zip(bounds, bounds[1:]) if high > low]
+        joined = asyncio.ensure_future(server.joined.wait())
+        done, _ = await asyncio.wait([joined, *clients], timeout=JOIN_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+        if joined not in done:
+            joined.cancel()
+            for future in done:
+                future.result()
+            raise RuntimeError(f"only {server.joins:,} of {server.expected_joins:,} channels joined in {JOIN_TIMEOUT:g}s")
+
+        # Selects each delivery to a user's channels triggers
+        for hook in hooks:
+            for subscription in hook.subscriptions:
+                if subscription.hears(table, "INSERT"):
+                    per_event[subscription.filter_column] = per_event.get(subscription.filter_column, 0) + len(hook.refetches) * sessions
+
+        rng = random.Random(seed)
+        weights = []
+        total = 0.0
+        for rank in range(1, users + 1):
+            total += 1.0 / rank ** skew
+            weights.append(total)
+        started, cpu = time.time(), time.process_time()
+        sent = 0
+        while sent < events:
+            await asyncio.sleep(max(0.0, started + sent // burst * interval - time.time()))
+            for _ in range(min(burst, events - sent)):
+                recipient = ids[bisect.bisect_left(weights, rng.random() * total)]
+                row = dict(record, id=str(uuid.UUID(int=rng.getrandbits(128))),
+                           created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+                for column in per_event:
+                    row[column] = recipient
+                server.insert(table, row, columns)
+                server.expect(sum(per_event.values()))
+                sent += 1
+            await server.flush()
+        settled = await server.settle()
+        wall, server_cpu = time.time() - started, time.process_time() - cpu
+        await server.close()
+        batches = await asyncio.gather(*clients)
+
+    return LoadResult(
+        hooks=hooks, table=table, users=users, sessions=sessions, processes=len(clients), events=events, burst=burst,
+        interval=interval, skew=skew, sockets=sum(batch.sockets for batch in batches),
+        subscriptions=users * sessions * sum(len(hook.subscriptions) for hook in hooks),
+        deliveries=server.deliveries, selects=server.selects, bytes_sent=server.bytes_sent, wall=wall,
+        server_cpu=server_cpu, client_cpu=sum(batch.cpu for batch in batches),
+        latencies=[value for batch in batches for value in batch.latencies],
+        round_trips=[value for batch in batches for value in batch.round_trips],
+        messages=[value for batch in batches for value in batch.messages],
+        settled=settled,
+    )
+
+def run_load(
+    hooks: List[Hook],
+    tables: TableColumns,
+    table: str = "notifications",
+    users: int = 1000,
+    sessions: int = 1,
+    events: int = 10000,
+    burst: int = DEFAULT_BURST,
+    interval: float = DEFAULT_INTERVAL,
+    skew: float = DEFAULT_SKEW,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    rows_per_user: int = DEFAULT_ROWS_PER_USER,
+    flag_fraction: float = DEFAULT_FLAG_FRACTION,
+    sizes: Optional[ColumnSizes] = None,
+) -> LoadResult:
+    """Connect users x sessions simulated clients to a local stand-in and push `events` inserts on table through it.
+
+    Bursts of `burst` inserts start every `interval` seconds. The stand-in
+    runs in this process and the clients in `workers` processes (default:
+    one per CPU but one, at least one).
+    """
+
+    if users < 1 or sessions < 1 or burst < 1 or events < 1:
+        raise ValueError("users, sessions, events and burst must be at least 1")
+    if not any(subscription.hears(table, "INSERT") for hook in hooks for subscription in hook.subscriptions):
+        raise ValueError(f"none of the hooks hears inserts on {table}")
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) - 1)
+    sizes = sizes or ColumnSizes()
+    record = _sample_row(table, tables, sizes)
+    columns = [{"name": column, "type": data_type or "text"} for column, data_type in tables.columns(table).items()]
+    return asyncio.run(_drive(hooks, record, columns, table, users, sessions, events, burst, interval, skew, seed,
+                              max(1, min(workers, users)), rows_per_user, flag_fraction))
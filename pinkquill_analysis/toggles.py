@@ -0,0 +1,319 @@
+"""
+Duplicate notifications from toggle handlers.
+
+Admire, reaction, save and relay buttons toggle: a handler calls
+toggleX() and then createNotification() on the "on" side of the toggle.
+Nothing remembers that the post's author was already told, so every
+off/on round trip inserts another row, and each row wakes the recipient's
+realtime subscriptions.
+
+find_toggle_emitters() picks out the createNotification() calls that sit in
+such handlers, reads which transitions of the toggle pass the `if` around
+the call (on, off, or switching one reaction for another), and looks for a
+dedupe guard: a lookup of earlier notifications, an upsert/onConflict, a
+"notified" ref, a debounce, in the handler or in createNotification itself,
+or a unique index on notifications. replay_toggles() then runs synthetic
+toggle traces through each handler and counts rows written against the rows
+a server-side dedupe on (recipient, actor, type, post) would keep.
+"""
+
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .realtime import OWNER, Subscription
+from .scanner import NOTIFY_FUNCTION, discover_source_files
+from .schema import Schema
+from .source import DefinitionIndex, LineIndex, body_extent, mask_comments, split_arguments, string_literals
+from .workload import REACTION_TYPES, WorkloadProfile
+
+# Toggle transitions a guard can let through
+ON = "on"          # off -> on
+OFF = "off"        # on -> off (choosing the same reaction again)
+SWITCH = "switch"  # one reaction -> another
+TRANSITIONS = (ON, OFF, SWITCH)
+
+DEFAULT_INTERACTIONS = 100_000
+# Chance a user toggles again after each toggle (mis-taps, second thoughts), per action
+REPEAT_PROBABILITY = {"admire": 0.3, "reaction": 0.3, "save": 0.15, "relay": 0.1}
+DEFAULT_REPEAT_PROBABILITY = 0.2
+# Share of repeat taps on a reacted post that pick a different reaction rather than removing it
+SWITCH_SHARE = 0.4
+
+# Relative volume of each action, from the workload generator's per-follower rates
+_PROFILE = WorkloadProfile()
+ACTION_RATES = {
+    "admire": _PROFILE.reactions * _PROFILE.reaction_weights[0],
+    "reaction": _PROFILE.reactions * (1 - _PROFILE.reaction_weights[0]),
+    "save": _PROFILE.saves,
+    "relay": _PROFILE.relays,
+}
+
+# Columns createNotification() writes that a dedupe key would use
+DEDUPE_COLUMNS = ("user_id", "actor_id", "type", "post_id")
+
+_NOTIFY_CALL_RE = re.compile(r"(?<![\w$.])" + NOTIFY_FUNCTION + r"\s*\(")
+_TOGGLE_CALL_RE = re.compile(r"(?<![\w$.])toggle([A-Z]\w*)\s*\(")
+_NOTIFY_DEFINITION_RE = re.compile(r"\bfunction\s+" + NOTIFY_FUNCTION + r"\s*\(")
+_IF_RE = re.compile(r"(?<![\w$.])if\s*\(")
+_DECLARATION_RE = re.compile(r"(?:const|let)\s+([A-Za-z_$][\w$]*)\s*=\s*([^;\n]+)")
+# `const newIsSaved = !isSaved`
+_NEGATION_RE = re.compile(r"^!\s*[A-Za-z_$][\w$.]*$")
+# `const wasReacted = userReaction !== null`
+_PRESENCE_RE = re.compile(r"^(?:!!\s*[\w$.]+|Boolean\s*\(.*\)|[\w$.]+\s*!==?\s*(?:null|undefined))$")
+# `const isSameReaction = userReaction === reactionType`
+_SAME_RE = re.compile(r"^[\w$.]+\s*===?\s*[\w$.]+$")
+_ATOM_RE = re.compile(r"(!*)\s*([A-Za-z_$][\w$]*)$")
+_GUARD_RE = re.compile(
+    r"\b(?:already\w*|\w*[Nn]otified\w*|dedupe\w*|idempoten\w*|debounce\w*|throttle\w*)\b|\bonConflict\b|\bignoreDuplicates\b"
+    r"|\.\s*upsert\s*\(|\.\s*from\s*\(\s*['\"`]notifications['\"`]\s*\)\s*\.\s*select\s*\("
+)
+
+# Guard atoms: what a local tells about the transition
+_NEW_ON = "new_on"
+_WAS_ON = "was_on"
+_SAME = "same"
+_ATOM_VALUES = {
+    ON: {_NEW_ON: True, _WAS_ON: False, _SAME: False},
+    OFF: {_NEW_ON: False, _WAS_ON: True, _SAME: True},
+    SWITCH: {_NEW_ON: True, _WAS_ON: True, _SAME: False},
+}
+
+@dataclass
+class ToggleEmitter:
+    """A createNotification() call in a toggle handler."""
+
+    path: str
+    line: int
+    handler: str
+    # From the toggle function: toggleAdmire -> "admire"
+    action: str
+    # Literal notification type, None when it is the chosen reaction
+    notification_type: Optional[str]
+    condition: str
+    # Transitions that reach the call
+    emits: List[str] = field(default_factory=list)
+    # The state holds one of several values (a reaction), not on/off
+    multiple: bool = False
+    guards: List[str] = field(default_factory=list)
+
+    @property
+    def location(self) -> str:
+        return f"{self.path}:{self.line}"
+
+@dataclass
+class ToggleReplay:
+    emitter: ToggleEmitter
+    interactions: int
+    repeat: float
+    toggles: int = 0
+    # Rows inserted, and rows a dedupe on (recipient, actor, type, post) would have kept
+    written: int = 0
+    kept: int = 0
+    # Most rows one actor wrote for one post
+    worst: int = 0
+
+    @property
+    def amplification(self) -> float:
+        return self.written / self.kept if self.kept else 0.0
+
+    @property
+    def duplicates(self) -> int:
+        return self.written - self.kept
+
+@dataclass
+class ToggleReport:
+    emitters: List[ToggleEmitter]
+    replays: List[ToggleReplay]
+    # Guards that apply to every call: createNotification's own, or a unique index
+    shared_guards: List[str]
+    # Subscriptions woken in the recipient's clients per inserted row, and the queries they rerun
+    subscriptions: List[Subscription]
+
+    @property
+    def refetches_per_row(self) -> int:
+        return sum(len([query for query in subscription.queries if query.reads]) for subscription in self.subscriptions)
+
+    def actions(self) -> List[Tuple[str, List[ToggleReplay], float]]:
+        """(action, its unguarded replays, share of all duplicate rows) by share, largest first."""
+
+        grouped: Dict[str, List[ToggleReplay]] = {}
+        for replay in self.replays:
+            if not replay.emitter.guards and not self.shared_guards:
+                grouped.setdefault(replay.emitter.action, []).append(replay)
+        weights = {action: ACTION_RATES.get(action, min(ACTION_RATES.values()))
+                   * sum(replay.duplicates / replay.interactions for replay in replays) / len(replays)
+                   for action, replays in grouped.items()}
+        total = sum(weights.values())
+        return sorted(((action, grouped[action], weight / total if total else 0.0) for action, weight in weights.items()),
+                      key=lambda item: -item[2])
+
+def _enclosing(spans: Sequence[Tuple[int, int, str]], offset: int) -> List[Tuple[int, int, str]]:
+    return [span for span in spans if span[0] <= offset < span[1]]
+
+def _conditions(masked: str, start: int, offset: int) -> List[str]:
+    """Conditions of the `if` blocks between start and offset that contain offset."""
+
+    conditions = []
+    for match in _IF_RE.finditer(masked, start, offset):
+        arguments, position = split_arguments(masked, match.end() - 1)
+        if body_extent(masked, position) > offset and arguments:
+            conditions.append(arguments[0])
+    return conditions
+
+def _atoms(body: str) -> Dict[str, str]:
+    """Locals that describe the toggle's transition, mapped to what they tell."""
+
+    atoms = {}
+    for name, value in _DECLARATION_RE.findall(body):
+        value = value.strip()
+        if _NEGATION_RE.match(value):
+            atoms[name] = _NEW_ON
+        elif _PRESENCE_RE.match(value):
+            atoms[name] = _WAS_ON
+        elif _SAME_RE.match(value):
+            atoms[name] = _SAME
+    return atoms
+
+def _passes(condition: str, atoms: Dict[str, str], transition: str) -> bool:
+    """Whether condition holds on a transition; terms that aren't about the toggle count as true."""
+
+    expression = []
+    for token in re.split(r"(&&|\|\||[()])", condition):
+        token = token.strip()
+        if token in ("&&", "||"):
+            expression.append("and" if token == "&&" else "or")
+        elif token in ("(", ")"):
+            expression.append(token)
+        elif token:
+            match = _ATOM_RE.match(token)
+            if match and match.group(2) in atoms:
+                value = _ATOM_VALUES[transition][atoms[match.group(2)]]
+                value = value if len(match.group(1)) % 2 == 0 else not value
+            else:
+                # A leading "!" before an unknown term still leaves it unknown
+                value = True
+            expression.append(str(value))
+    # Only True/False/and/or/parentheses reach eval
+    return bool(eval(" ".join(expression) or "True", {"__builtins__": {}}))
+
+def scan_toggle_emitters(path: str, text: str) -> List[ToggleEmitter]:
+    """createNotification() calls inside handlers that call a toggleX() function, in one file."""
+
+    if NOTIFY_FUNCTION not in text:
+        return []
+    masked = mask_comments(text)
+    lines = LineIndex(text)
+    spans = DefinitionIndex(masked).spans()
+    emitters = []
+    for match in _NOTIFY_CALL_RE.finditer(masked):
+        enclosing = _enclosing(spans, match.start())
+        if not enclosing:
+            continue
+        start, end, _ = enclosing[-1]
+        body = masked[start:end]
+        toggle = _TOGGLE_CALL_RE.search(body)
+        if not toggle:
+            continue
+        arguments, _ = split_arguments(masked, match.end() - 1)
+        literals = string_literals(arguments[2]) if len(arguments) > 2 else []
+        conditions = _conditions(masked, start, match.start())
+        condition = " && ".join(f"({item})" for item in conditions)
+        atoms = _atoms(masked[start:match.start()])
+        multiple = _SAME in atoms.values()
+        emitters.append(ToggleEmitter(
+            path=path,
+            line=lines.line_of(match.start()),
+            handler=".".join(name for _, _, name in enclosing),
+            action=toggle.group(1)[0].lower() + toggle.group(1)[1:],
+            notification_type=literals[0] if literals else None,
+            condition=" && ".join(conditions) or "(always)",
+            emits=[transition for transition in TRANSITIONS
+                   if (multiple or transition != SWITCH) and _passes(condition, atoms, transition)],
+            multiple=multiple,
+            guards=list(dict.fromkeys(guard.group(0) for guard in _GUARD_RE.finditer(masked, start, match.start()))),
+        ))
+    return emitters
+
+def _unique_guard(schema: Schema) -> Optional[str]:
+    for index in schema.indexes_on("notifications"):
+        if index.unique and not index.where and set(index.column_names) <= set(DEDUPE_COLUMNS):
+            return f"unique index {index.name} ({', '.join(index.column_names)})"
+    return None
+
+def find_toggle_emitters(root: str, schema: Schema) -> Tuple[List[ToggleEmitter], List[str]]:
+    """Toggle emitters across the tree, and the guards every createNotification() call gets."""
+
+    emitters, shared = [], []
+    for path in discover_source_files(root):
+        with open(os.path.join(root, path), "rb") as handle:
+            text = handle.read().decode("utf-8", errors="replace")
+        emitters.extend(scan_toggle_emitters(path, text))
+        definition = _NOTIFY_DEFINITION_RE.search(text)
+        if definition:
+            masked = mask_comments(text)
+            paren = masked.find("(", definition.end() - 1)
+            _, position = split_arguments(masked, paren)
+            body = masked[position:body_extent(masked, masked.find("{", position))]
+            shared.extend(f"{NOTIFY_FUNCTION}: {guard.group(0)}" for guard in _GUARD_RE.finditer(body))
+    unique = _unique_guard(schema)
+    if unique:
+        shared.append(unique)
+    return emitters, list(dict.fromkeys(shared))
+
+def replay_toggles(
+    emitter: ToggleEmitter,
+    interactions: int = DEFAULT_INTERACTIONS,
+    repeat: Optional[float] = None,
+    switch_share: float = SWITCH_SHARE,
+    seed: int = 0,
+) -> ToggleReplay:
+    """Run `interactions` synthetic toggle traces (one actor, one post each) through a handler.
+
+    Every trace starts with a tap that turns the toggle on; after each tap
+    the user taps again with probability `repeat`. A repeat tap on a
+    reacted post picks another reaction with probability switch_share and
+    removes the reaction otherwise; on/off toggles just flip.
+    """
+
+    repeat = REPEAT_PROBABILITY.get(emitter.action, DEFAULT_REPEAT_PROBABILITY) if repeat is None else repeat
+    rng = random.Random(seed)
+    result = ToggleReplay(emitter, interactions, repeat)
+    emits = set(emitter.emits)
+    for _ in range(interactions):
+        value: Optional[int] = None
+        rows = 0
+        keys: Set[object] = set()
+        while True:
+            if value is None:
+                transition, value = ON, rng.randrange(len(REACTION_TYPES))
+            elif emitter.multiple and rng.random() < switch_share:
+                transition, value = SWITCH, (value + 1 + rng.randrange(len(REACTION_TYPES) - 1)) % len(REACTION_TYPES)
+            else:
+                transition, value = OFF, None
+            result.toggles += 1
+            if transition in emits:
+                rows += 1
+                # A literal type dedupes on the post alone; the chosen reaction is part of the key otherwise
+                keys.add(emitter.notification_type if emitter.notification_type is not None else value)
+            if rng.random() >= repeat:
+                break
+        result.written += rows
+        result.kept += len(keys)
+        result.worst = max(result.worst, rows)
+    return result
+
+def analyze_toggles(
+    root: str,
+    schema: Schema,
+    subscriptions: Sequence[Subscription],
+    interactions: int = DEFAULT_INTERACTIONS,
+    seed: int = 0,
+) -> ToggleReport:
+    emitters, shared = find_toggle_emitters(root, schema)
+    replays = [replay_toggles(emitter, interactions, seed=seed + index) for index, emitter in enumerate(emitters)]
+    woken = [subscription for subscription in subscriptions
+             if subscription.hears("notifications", "INSERT") and subscription.audience == OWNER]
+    return ToggleReport(emitters, replays, shared, woken)
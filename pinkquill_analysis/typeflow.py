@@ -0,0 +1,615 @@
+"""
+Literal sets for non-literal createNotification() type arguments.
+
+Many call sites pass a variable: a handler parameter typed `ReactionType`,
+a `const notificationType = isPrivate ? "follow_request" : "follow"`, a
+ternary that may be `undefined`. tokenize() splits a file into tokens in
+one pass. A small constant-propagation pass then works out what such an
+argument can hold: string literals, ternaries and `||`/`??`/`&&`
+alternatives, `as` casts, const/let declarations and reassignments in
+scope, and parameter annotations. The result is a TypeSet of literals plus
+the names of type aliases still to be resolved.
+
+Per file, the scanner keeps the TypeSet of each dynamic call site and the
+module's ModuleTypes: its string-union type aliases, imports and
+re-exports. Both are cached with the scan. TypeResolver then follows the
+alias names across modules (`import { ReactionType } from "@/lib/hooks"`,
+which re-exports it from lib/types), memoizing each (module, name) it
+resolves.
+"""
+
+import posixpath
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
+# Token kinds
+IDENTIFIER = "id"
+STRING = "str"
+TEMPLATE = "tpl"
+NUMBER = "num"
+PUNCTUATOR = "punct"
+REGEX = "regex"
+
+# Expressions and declarations are followed this many names deep
+MAX_DEPTH = 8
+
+_TOKEN_RE = re.compile(
+    r"(?P<space>\s+)"
+    r"|(?P<id>[A-Za-z_$][\w$]*)"
+    r"|(?P<num>\d[\w.]*|\.\d[\w]*)"
+    r"|(?P<str>'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\")"
+    r"|(?P<punct>\.\.\.|===|!==|\?\?=|\|\|=|&&=|=>|==|!=|<=|>=|&&|\|\||\?\?|\?\.(?!\d)|\+\+|--|[-+*/%&|^]=|[^\s\w$])"
+)
+# Rest of a template literal: up to the closing backtick or the next `${`
+_TEMPLATE_RE = re.compile(r"(?:\\.|\$(?!\{)|[^`\\$])*(?:`|\$\{|$)", re.DOTALL)
+_REGEX_LITERAL_RE = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+# Tokens after which "/" is division, not a regex
+_OPERAND_END = {")", "]", "}"}
+_KEYWORDS_BEFORE_EXPRESSION = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_DECLARATIONS = {"const", "let", "var"}
+_STATEMENT_STARTS = {"export", "type", "interface", "const", "let", "var", "function", "import", "class", "enum", "declare", "async"}
+_EMPTY_VALUES = {"undefined", "null"}
+_CONTROL_KEYWORDS = {"if", "while", "for", "switch", "with"}
+# Words that carry an expression on past a line break
+_INFIX_WORDS = {"as", "satisfies", "in", "instanceof", "of"}
+
+@dataclass
+class Token:
+    kind: str
+    text: str
+    start: int
+    # A line break separates it from the previous token
+    newline: bool = False
+
+@dataclass
+class Tokens:
+    items: List[Token]
+    # Index of the matching bracket for every bracket token, and of the enclosing open bracket for every token
+    pair: Dict[int, int]
+    parent: List[int]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def text(self, index: int) -> str:
+        return self.items[index].text if 0 <= index < len(self.items) else ""
+
+    def kind(self, index: int) -> str:
+        return self.items[index].kind if 0 <= index < len(self.items) else ""
+
+    def index_at(self, offset: int) -> int:
+        """First token starting at or after offset."""
+
+        low, high = 0, len(self.items)
+        while low < high:
+            middle = (low + high) // 2
+            if self.items[middle].start < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+def tokenize(text: str) -> Tokens:
+    """Split comment-masked TypeScript into tokens, in one left-to-right pass.
+
+    String and template literals become single tokens (a template with
+    substitutions is split around them), JSX text is tokenized like code,
+    which is harmless for what is read here.
+    """
+
+    items: List[Token] = []
+    pair: Dict[int, int] = {}
+    parent: List[int] = []
+    stack: List[int] = []
+    # Open braces that are template substitutions
+    templates: Set[int] = set()
+    newline = False
+    position = 0
+    length = len(text)
+
+    def template(start: int) -> int:
+        """Add the template literal piece from start (just past "`" or "}"); return where scanning resumes."""
+
+        match = _TEMPLATE_RE.match(text, start)
+        items.append(Token(TEMPLATE, text[start - 1:match.end()], start - 1, newline))
+        parent.append(stack[-1] if stack else -1)
+        if match.group().endswith("${"):
+            # The substitution's "{" is a bracket like any other, marked so its "}" resumes the template
+            templates.add(len(items))
+            items.append(Token(PUNCTUATOR, "{", match.end() - 1))
+            parent.append(stack[-1] if stack else -1)
+            stack.append(len(items) - 1)
+        return match.end()
+
+    while position < length:
+        character = text[position]
+        if character == "`":
+            position = template(position + 1)
+            newline = False
+            continue
+        if character == "/" and text[position + 1:position + 2] not in ("/", "*"):
+            previous = items[-1] if items else None
+            if previous is None or (previous.kind == PUNCTUATOR and previous.text not in _OPERAND_END) \
+                    or (previous.kind == IDENTIFIER and previous.text in _KEYWORDS_BEFORE_EXPRESSION):
+                match = _REGEX_LITERAL_RE.match(text, position)
+                if match:
+                    items.append(Token(REGEX, match.group(), position, newline))
+                    parent.append(stack[-1] if stack else -1)
+                    position, newline = match.end(), False
+                    continue
+        match = _TOKEN_RE.match(text, position)
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "space":
+            newline = newline or "\n" in value
+            position = match.end()
+            continue
+        index = len(items)
+        if kind == PUNCTUATOR and value in ("}", ")", "]") and stack:
+            opener = stack.pop()
+            pair[opener], pair[index] = index, opener
+            if opener in templates:
+                # The substitution closes; the template literal goes on
+                items.append(Token(PUNCTUATOR, value, position, newline))
+                parent.append(stack[-1] if stack else -1)
+                position = template(position + 1)
+                newline = False
+                continue
+        items.append(Token(kind, value, position, newline))
+        parent.append(stack[-1] if stack else -1)
+        if kind == PUNCTUATOR and value in _OPENERS:
+            stack.append(index)
+        position, newline = match.end(), False
+    return Tokens(items, pair, parent)
+
+@dataclass
+class TypeSet:
+    """What an expression or type can be: literals, plus type names resolved per module later."""
+
+    literals: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    # Some alternative couldn't be followed (a call, a property, an unannotated parameter)
+    unknown: bool = False
+
+    def union(self, other: "TypeSet") -> "TypeSet":
+        return TypeSet(sorted(set(self.literals) | set(other.literals)), sorted(set(self.names) | set(other.names)),
+                       self.unknown or other.unknown)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TypeSet":
+        return cls(**data)
+
+_UNKNOWN = TypeSet(unknown=True)
+
+@dataclass
+class ModuleTypes:
+    """A module's string-union type aliases and where its other names come from."""
+
+    aliases: Dict[str, TypeSet] = field(default_factory=dict)
+    # Local name -> [specifier, exported name]
+    imports: Dict[str, List[str]] = field(default_factory=dict)
+    # [specifier, exported names or None for `export *`], each name [exported, local]
+    reexports: List[Tuple[str, Optional[List[List[str]]]]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModuleTypes":
+        return cls(
+            aliases={name: TypeSet.from_dict(value) for name, value in data["aliases"].items()},
+            imports=data["imports"],
+            reexports=[(specifier, names) for specifier, names in data["reexports"]],
+        )
+
+def _string(token: Token) -> Optional[str]:
+    if token.kind == STRING:
+        return token.text[1:-1]
+    if token.kind == TEMPLATE and token.text.endswith("`") and token.text.startswith("`") and "${" not in token.text:
+        return token.text[1:-1]
+    return None
+
+def _split(tokens: Tokens, start: int, end: int, separators: Set[str]) -> List[Tuple[int, int]]:
+    """Ranges of [start, end) between top-level separator tokens."""
+
+    parts = []
+    position = low = start
+    while position < end:
+        token = tokens.items[position]
+        if token.kind == PUNCTUATOR and token.text in _OPENERS and position in tokens.pair:
+            position = tokens.pair[position] + 1
+            continue
+        if token.kind in (PUNCTUATOR, IDENTIFIER) and token.text in separators:
+            parts.append((low, position))
+            low = position + 1
+        position += 1
+    parts.append((low, end))
+    return parts
+
+def _starts_statement(tokens: Tokens, index: int) -> bool:
+    """True when the line break before tokens[index] ends the statement: a declaration keyword, or an
+    operand right after a complete one, where JavaScript would insert the missing semicolon."""
+
+    token = tokens.items[index]
+    if not token.newline or token.kind not in (IDENTIFIER, STRING, NUMBER):
+        return False
+    if token.text in _STATEMENT_STARTS:
+        return True
+    if token.text in _INFIX_WORDS:
+        return False
+    previous = tokens.items[index - 1]
+    if previous.kind == PUNCTUATOR:
+        return previous.text in _OPERAND_END
+    if previous.kind == IDENTIFIER:
+        return previous.text not in _KEYWORDS_BEFORE_EXPRESSION and previous.text not in _INFIX_WORDS
+    return previous.kind != TEMPLATE or previous.text.endswith("`")
+
+def _unwrap(tokens: Tokens, start: int, end: int) -> Tuple[int, int]:
+    while end - start >= 2 and tokens.text(start) == "(" and tokens.pair.get(start) == end - 1:
+        start, end = start + 1, end - 1
+    return start, end
+
+def type_set(tokens: Tokens, start: int, end: int) -> TypeSet:
+    """The literals a type expression tokens[start:end] allows: `"a" | "b" | Alias | null`."""
+
+    result = TypeSet()
+    for low, high in _split(tokens, start, end, {"|"}):
+        low, high = _unwrap(tokens, low, high)
+        if low == high:
+            # The `|` before the first member
+            continue
+        literal = _string(tokens.items[low]) if high - low == 1 else None
+        if literal is not None:
+            result = result.union(TypeSet([literal]))
+        elif high - low == 1 and tokens.text(low) in _EMPTY_VALUES:
+            continue
+        elif high - low == 1 and tokens.items[low].kind == IDENTIFIER:
+            result = result.union(TypeSet(names=[tokens.text(low)]))
+        else:
+            return result.union(_UNKNOWN)
+    return result
+
+class ModuleFlow:
+    """Constant propagation over one module's tokens."""
+
+    def __init__(self, tokens: Tokens):
+        self.tokens = tokens
+        self._declarations: Optional[Dict[str, List[Tuple[int, int, int]]]] = None
+
+    def _scope_end(self, index: int) -> int:
+        opener = self.tokens.parent[index]
+        return self.tokens.pair.get(opener, len(self.tokens)) if opener >= 0 else len(self.tokens)
+
+    def _expression_end(self, start: int) -> int:
+        """End of the expression starting at start: a top-level `,`, `;`, closing bracket or new line statement."""
+
+        tokens = self.tokens
+        position = start
+        while position < len(tokens):
+            token = tokens.items[position]
+            if token.kind == PUNCTUATOR:
+                if token.text in _OPENERS and position in tokens.pair:
+                    position = tokens.pair[position] + 1
+                    continue
+                if token.text in (",", ";", ")", "]", "}"):
+                    break
+            elif position > start and _starts_statement(tokens, position):
+                break
+            position += 1
+        return position
+
+    def _parameter_scope(self, index: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of the function body if tokens[index] names a parameter."""
+
+        tokens = self.tokens
+        opener = tokens.parent[index]
+        if opener < 0 or tokens.text(opener) != "(" or tokens.text(index - 1) not in ("(", ","):
+            return None
+        if tokens.text(opener - 1) in _CONTROL_KEYWORDS:
+            # `if (x) {` has a body too, but no parameters
+            return None
+        closer = tokens.pair.get(opener)
+        if closer is None:
+            return None
+        position = closer + 1
+        if tokens.text(position) == ":":
+            # Return type annotation
+            position = self._expression_end(position + 1)
+            while tokens.text(position) not in ("{", "=>", ""):
+                position += 1
+        if tokens.text(position) == "=>":
+            position += 1
+        if tokens.text(position) == "{" and position in tokens.pair:
+            return position, tokens.pair[position]
+        if tokens.text(closer + 1) == "=>":
+            return position, self._expression_end(position)
+        return None
+
+    def declarations(self) -> Dict[str, List[Tuple[int, int, int]]]:
+        """Name -> (declaring token, scope start, scope end) for declared variables and parameters."""
+
+        if self._declarations is None:
+            self._declarations = {}
+            tokens = self.tokens
+            for index, token in enumerate(tokens.items):
+                if token.kind != IDENTIFIER:
+                    continue
+                if tokens.text(index - 1) in _DECLARATIONS and tokens.text(index + 1) in ("=", ":"):
+                    opener = tokens.parent[index]
+                    self._declarations.setdefault(token.text, []).append((index, opener, self._scope_end(index)))
+                elif tokens.text(index + 1) in (":", "?:", "?", "=", ",", ")"):
+                    if tokens.text(index + 1) == "?" and tokens.text(index + 2) != ":":
+                        continue
+                    scope = self._parameter_scope(index)
+                    if scope:
+                        self._declarations.setdefault(token.text, []).append((index, scope[0], scope[1]))
+        return self._declarations
+
+    def _binding(self, name: str, at: int) -> Optional[Tuple[int, int, int]]:
+        """The innermost declaration of name whose scope contains token index at."""
+
+        best = None
+        for declaration in self.declarations().get(name, []):
+            index, start, end = declaration
+            if start <= at <= end and (index < at or start > index) and (best is None or start > best[1]):
+                best = declaration
+        return best
+
+    def _annotation(self, index: int) -> Optional[Tuple[int, int]]:
+        tokens = self.tokens
+        position = index + 1
+        if tokens.text(position) == "?":
+            position += 1
+        if tokens.text(position) != ":":
+            return None
+        end = position + 1
+        while end < len(tokens) and tokens.text(end) not in ("=", ",", ";", ")") and not (
+                tokens.items[end].newline and tokens.items[end].kind == IDENTIFIER and tokens.text(end) in _STATEMENT_STARTS):
+            if tokens.text(end) in _OPENERS and end in tokens.pair:
+                end = tokens.pair[end]
+            end += 1
+        return position + 1, end
+
+    def identifier(self, name: str, at: int, depth: int = 0) -> TypeSet:
+        if name in _EMPTY_VALUES:
+            return TypeSet()
+        binding = self._binding(name, at)
+        if binding is None or depth > MAX_DEPTH:
+            return _UNKNOWN
+        index, start, end = binding
+        tokens = self.tokens
+        annotation = self._annotation(index)
+        if annotation and tokens.text(index - 1) not in _DECLARATIONS:
+            # A typed parameter: its annotation is what callers may pass
+            return type_set(tokens, *annotation)
+
+        values: Optional[TypeSet] = None
+        after = annotation[1] if annotation else index + 1
+        if tokens.text(after) == "=":
+            values = self.expression(after + 1, self._expression_end(after + 1), depth + 1)
+        # Later assignments in the same scope
+        for position in range(start + 1, end):
+            if tokens.text(position) == name and position != index and tokens.text(position + 1) == "=" \
+                    and tokens.text(position - 1) not in (".", "?.") and tokens.items[position].kind == IDENTIFIER:
+                assigned = self.expression(position + 2, self._expression_end(position + 2), depth + 1)
+                values = assigned if values is None else values.union(assigned)
+        if values is not None and not values.unknown:
+            return values
+        if annotation:
+            return type_set(tokens, *annotation)
+        return values if values is not None else _UNKNOWN
+
+    def expression(self, start: int, end: int, depth: int = 0) -> TypeSet:
+        """The literal values tokens[start:end] can take."""
+
+        tokens = self.tokens
+        start, end = _unwrap(tokens, start, end)
+        if start >= end or depth > MAX_DEPTH:
+            return _UNKNOWN
+
+        # cond ? a : b (the outermost ternary)
+        question = next((low for low, _ in _split(tokens, start, end, {"?"})[1:]), None)
+        if question is not None:
+            colon = None
+            nested = 0
+            position = question
+            while position < end:
+                text = tokens.text(position)
+                if text in _OPENERS and position in tokens.pair:
+                    position = tokens.pair[position] + 1
+                    continue
+                if text == "?":
+                    nested += 1
+                elif text == ":":
+                    if nested == 0:
+                        colon = position
+                        break
+                    nested -= 1
+                position += 1
+            if colon is not None:
+                return self.expression(question, colon, depth + 1).union(self.expression(colon + 1, end, depth + 1))
+
+        for separators in ({"||", "??"}, {"&&"}):
+            parts = _split(tokens, start, end, separators)
+            if len(parts) > 1:
+                if separators == {"&&"}:
+                    # a && b is b, or something falsy that isn't a type
+                    return self.expression(*parts[-1], depth + 1)
+                result = TypeSet()
+                for low, high in parts:
+                    result = result.union(self.expression(low, high, depth + 1))
+                return result
+
+        parts = _split(tokens, start, end, {"as", "satisfies"})
+        if len(parts) > 1:
+            low, high = parts[-1]
+            if high - low == 1 and tokens.text(low) == "const":
+                return self.expression(*parts[0], depth + 1)
+            return type_set(tokens, low, high) if tokens.text(low - 1) == "as" else self.expression(*parts[0], depth + 1)
+
+        if end - start == 1:
+            token = tokens.items[start]
+            literal = _string(token)
+            if literal is not None:
+                return TypeSet([literal])
+            if token.kind == IDENTIFIER:
+                return self.identifier(token.text, start, depth + 1)
+        return _UNKNOWN
+
+    def argument(self, open_paren: int, position: int) -> TypeSet:
+        """The values of argument number `position` of the call whose "(" is at source offset open_paren."""
+
+        opener = self.tokens.index_at(open_paren)
+        closer = self.tokens.pair.get(opener)
+        if closer is None:
+            return _UNKNOWN
+        arguments = _split(self.tokens, opener + 1, closer, {","})
+        if position >= len(arguments):
+            return _UNKNOWN
+        return self.expression(*arguments[position])
+
+def _name_pairs(tokens: Tokens, start: int, end: int) -> List[List[str]]:
+    """`{ A, B as C, type D }` -> [[A, A], [B, C], [D, D]] as [exported, local]."""
+
+    pairs = []
+    for low, high in _split(tokens, start, end, {","}):
+        names = [tokens.text(index) for index in range(low, high) if tokens.items[index].kind == IDENTIFIER]
+        if names and names[0] == "type" and len(names) > 1:
+            names = names[1:]
+        if not names:
+            continue
+        pairs.append([names[0], names[-1]] if "as" in names else [names[0], names[0]])
+    return pairs
+
+def _type_alias(tokens: Tokens, index: int) -> Optional[Tuple[str, TypeSet]]:
+    """`type Name<T> = ...` starting at the `type` token, if it is one."""
+
+    position = index + 1
+    if tokens.kind(position) != IDENTIFIER:
+        return None
+    name = tokens.text(position)
+    position += 1
+    if tokens.text(position) == "<":
+        while position < len(tokens) and tokens.text(position) != ">":
+            position += 1
+        position += 1
+    if tokens.text(position) != "=":
+        return None
+    end = position + 1
+    while end < len(tokens) and tokens.text(end) != ";" and not (
+            end > position + 1 and tokens.items[end].newline and tokens.text(end) in _STATEMENT_STARTS):
+        if tokens.text(end) in _OPENERS and end in tokens.pair:
+            end = tokens.pair[end]
+        end += 1
+    return name, type_set(tokens, position + 1, end)
+
+def _module_clause(tokens: Tokens, index: int) -> Optional[Tuple[str, Optional[str], Optional[List[List[str]]]]]:
+    """(specifier, default import, names or None for `export *`) of an import/export ... from."""
+
+    keyword = tokens.text(index)
+    position = index + 1
+    if tokens.text(position) == "type":
+        position += 1
+    default = None
+    if keyword == "import" and tokens.kind(position) == IDENTIFIER and tokens.text(position) != "from":
+        default = tokens.text(position)
+        position += 1
+        if tokens.text(position) == ",":
+            position += 1
+    names: Optional[List[List[str]]] = []
+    if tokens.text(position) == "{" and position in tokens.pair:
+        names = _name_pairs(tokens, position + 1, tokens.pair[position])
+        position = tokens.pair[position] + 1
+    elif keyword == "export" and tokens.text(position) == "*":
+        names = None
+        position += 1
+    if tokens.text(position) != "from" or tokens.kind(position + 1) != STRING:
+        return None
+    return _string(tokens.items[position + 1]), default, names
+
+def module_types(tokens: Tokens) -> Optional[ModuleTypes]:
+    """String-union type aliases, imports and re-exports of a module; None when it has none."""
+
+    types = ModuleTypes()
+    for index, token in enumerate(tokens.items):
+        if token.kind != IDENTIFIER or tokens.parent[index] != -1:
+            continue
+        statement = token.newline or index == 0 or tokens.text(index - 1) in (";", "}", "export", "declare")
+        if token.text == "type" and statement:
+            alias = _type_alias(tokens, index)
+            if alias and (alias[1].literals or alias[1].names):
+                types.aliases[alias[0]] = alias[1]
+        elif token.text in ("import", "export") and statement:
+            clause = _module_clause(tokens, index)
+            if clause is None:
+                continue
+            specifier, default, names = clause
+            if token.text == "export":
+                types.reexports.append((specifier, names))
+                continue
+            if default:
+                types.imports[default] = [specifier, "default"]
+            for exported, local in names or []:
+                types.imports[local] = [specifier, exported]
+    if types.aliases or types.imports or types.reexports:
+        return types
+    return None
+
+class TypeResolver:
+    """Resolve TypeSet names across modules, memoized per (module, name)."""
+
+    def __init__(self, modules: Mapping[str, ModuleTypes]):
+        self.modules = modules
+        self._memo: Dict[Tuple[str, str], Tuple[FrozenSet[str], bool]] = {}
+
+    def _module_path(self, importer: str, specifier: str) -> Optional[str]:
+        if specifier.startswith("@/"):
+            base = specifier[2:]
+        elif specifier.startswith("."):
+            base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+        else:
+            return None
+        for candidate in (base, base + ".ts", base + ".tsx", base + "/index.ts", base + "/index.tsx"):
+            if candidate in self.modules:
+                return candidate
+        return None
+
+    def name(self, path: str, name: str, depth: int = 0) -> Tuple[FrozenSet[str], bool]:
+        """(literals, complete) for a type name as seen from module path."""
+
+        key = (path, name)
+        if key in self._memo:
+            return self._memo[key]
+        module = self.modules.get(path)
+        result: Tuple[FrozenSet[str], bool] = (frozenset(), False)
+        if module is not None and depth <= MAX_DEPTH:
+            # Guards against alias cycles while this name is being resolved
+            self._memo[key] = result
+            if name in module.aliases:
+                result = self.resolve(path, module.aliases[name], depth + 1)
+            elif name in module.imports:
+                specifier, exported = module.imports[name]
+                target = self._module_path(path, specifier)
+                if target is not None:
+                    result = self.name(target, exported, depth + 1)
+            else:
+                for specifier, pairs in module.reexports:
+                    local = name if pairs is None else next((pair[0] for pair in pairs if pair[1] == name), None)
+                    target = self._module_path(path, specifier) if local else None
+                    if target is not None:
+                        found = self.name(target, local, depth + 1)
+                        if found[0] or found[1]:
+                            result = found
+                            break
+        self._memo[key] = result
+        return result
+
+    def resolve(self, path: str, types: TypeSet, depth: int = 0) -> Tuple[FrozenSet[str], bool]:
+        """(literals, complete) of a TypeSet found in module path."""
+
+        literals = set(types.literals)
+        complete = not types.unknown
+        for name in types.names:
+            found, found_complete = self.name(path, name, depth)
+            literals |= found
+            complete = complete and found_complete
+        return frozenset(literals), complete
@@ -0,0 +1,242 @@
+"""
+File watching for --watch mode.
+
+The tree's scan results stay in memory between edits; a watcher reports
+which source files and migrations changed and only those are re-parsed
+(migrations by reloading the schema). Re-parsed files go through the scan
+index, so it is current for the next run. inotify is used on Linux (through
+libc, no extra dependency) with a stat-polling fallback everywhere else.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .index import ScanIndex
+from .scanner import FileScan, SKIPPED_DIRECTORIES, SOURCE_DIRECTORIES, discover_source_files, is_source_file, scan_files
+from .schema import MIGRATION_SOURCES, discover_migrations, is_migration_file
+
+# Editors often write a file in several steps; wait this long for the burst to settle
+DEBOUNCE_SECONDS = 0.02
+
+# Sentinel path meaning "events were lost, rescan everything"
+RESCAN_ALL = "*"
+
+# The source directories and the ones migrations live in
+WATCHED_DIRECTORIES = tuple(dict.fromkeys(SOURCE_DIRECTORIES + tuple(pattern.split("/")[0] for pattern in MIGRATION_SOURCES)))
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+def is_watched_file(path: str) -> bool:
+    return is_source_file(path) or is_migration_file(path)
+
+def discover_watched_files(root: str, directories: Iterable[str] = WATCHED_DIRECTORIES) -> List[str]:
+    directories = list(directories)
+    migrations = [path for path in discover_migrations(root) if path.split("/")[0] in directories]
+    return discover_source_files(root, directories) + migrations
+
+class InotifyWatcher:
+    """Recursive inotify watch over the source and migration directories."""
+
+    def __init__(self, root: str, directories: Iterable[str] = WATCHED_DIRECTORIES):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.root = root
+        self._directories: Dict[int, str] = {}
+        for directory in directories:
+            self._watch_tree(directory)
+
+    def _watch_tree(self, relative: str):
+        top = os.path.join(self.root, relative)
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRECTORIES and not d.startswith(".")]
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue
+            self._directories[wd] = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Block until something changes; return changed repo-relative paths."""
+
+        changed: Set[str] = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        while readable:
+            self._drain(changed)
+            readable, _, _ = select.select([self.fd], [], [], DEBOUNCE_SECONDS)
+        return changed
+
+    def _drain(self, changed: Set[str]):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                changed.add(RESCAN_ALL)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._directories[wd]
+                continue
+
+            path = f"{directory}/{name}" if name else directory
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and name not in SKIPPED_DIRECTORIES and not name.startswith("."):
+                    # New directory: watch it and pick up anything already inside
+                    self._watch_tree(path)
+                    changed.update(discover_watched_files(self.root, [path]))
+                elif mask & _IN_MOVED_FROM:
+                    changed.add(RESCAN_ALL)
+                continue
+            if is_watched_file(path):
+                changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback watcher that compares stat signatures on an interval."""
+
+    def __init__(self, root: str, interval: float = 0.5, directories: Iterable[str] = WATCHED_DIRECTORIES):
+        self.root = root
+        self.interval = interval
+        self.directories = list(directories)
+        self._signatures = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        for path in discover_watched_files(self.root, self.directories):
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            changed = {path for path in current.keys() | self._signatures.keys()
+                       if current.get(path) != self._signatures.get(path)}
+            self._signatures = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+def create_watcher(root: str, poll_interval: float = 0.5, force_polling: bool = False):
+    """Return an inotify watcher where available, else a polling one."""
+
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval=poll_interval)
+
+class TreeState:
+    """In-memory scan results for the whole tree, updated file by file."""
+
+    def __init__(self, root: str, scans: Iterable[FileScan], index: Optional[ScanIndex] = None):
+        self.root = root
+        self.scans: Dict[str, FileScan] = {scan.path: scan for scan in scans}
+        self.index = index
+
+    def ordered(self) -> List[FileScan]:
+        return [self.scans[path] for path in sorted(self.scans)]
+
+    def apply(self, changed: Set[str]) -> List[str]:
+        """Re-scan changed source files; return those whose edit can change the report.
+
+        That is any edit that changes what the report reads from a file: its
+        createNotification() calls, its database round-trips or the types it
+        exports. Other paths in changed (migrations) are left to the caller.
+        With an index, files whose content is unchanged come from it, and
+        re-parsed and removed files are written back to it.
+        """
+
+        if RESCAN_ALL in changed:
+            changed = (set(discover_source_files(self.root)) | set(self.scans)) - {RESCAN_ALL}
+
+        relevant = []
+        existing = []
+        for path in sorted(path for path in changed if is_source_file(path)):
+            if os.path.isfile(os.path.join(self.root, path)):
+                existing.append(path)
+            elif self.scans.pop(path, None) is not None:
+                relevant.append(path)
+
+        scans = []
+        pending: Dict[str, Optional[Tuple[int, int, str]]] = {}
+        for path in existing:
+            if self.index is None:
+                pending[path] = None
+                continue
+            cached, signature, _ = self.index.lookup(path)
+            if cached is None:
+                pending[path] = signature
+            else:
+                scans.append(cached)
+        # Single-file edits are the common case; a process pool would only add latency
+        for scan in scan_files(self.root, list(pending), workers=1):
+            scans.append(scan)
+            if self.index is not None:
+                self.index.store(scan, pending[scan.path])
+
+        for scan in scans:
+            previous = self.scans.get(scan.path)
+            self.scans[scan.path] = scan
+            if _reported(scan) != (_reported(previous) if previous is not None else ([], [], None)):
+                relevant.append(scan.path)
+
+        if self.index is not None:
+            self.index.retain(sorted(self.scans))
+            self.index.save()
+        return sorted(relevant)
+
+def _reported(scan: FileScan) -> Tuple:
+    """The parts of a file's scan the report is built from."""
+    return scan.call_sites, scan.database_calls, scan.types
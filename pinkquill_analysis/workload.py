@@ -0,0 +1,356 @@
+"""
+Synthetic notification workload.
+
+Generates a stream of notification rows the way the app would produce
+them, a day at a time and fully vectorized with NumPy: a power-law
+follower graph, posts whose reactions, comments, relays and saves scale
+with the author's reach and arrive in bursts after publishing, reply
+threads, follow requests, collaborations and community moderation. Every
+event maps to a type in REQUIRED_NOTIFICATION_TYPES, and createNotification's
+rules are applied per batch: no notifying yourself, and post, community and
+comment ids only where the type carries them.
+
+Each batch is folded into running totals (rows per type, per-second
+arrival counts, unread rows per user) and dropped, so memory stays flat
+however many events are generated.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .model import REQUIRED_NOTIFICATION_TYPES
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the generator is the only NumPy user
+    np = None
+
+# Type codes are positions in REQUIRED_NOTIFICATION_TYPES
+NOTIFICATION_TYPES = tuple(REQUIRED_NOTIFICATION_TYPES)
+REACTION_TYPES = ("admire", "snap", "ovation", "support", "inspired", "applaud")
+
+# Missing post/community/comment ids; stored as NULL
+NO_ID = -1
+
+# Heap bytes per row: tuple header + id, user_id, actor_id (uuid) + read + created_at,
+# plus 16 per non-null optional uuid and the type text
+_ROW_BASE_BYTES = 24 + 3 * 16 + 1 + 8
+_UUID_BYTES = 16
+
+SECONDS_PER_DAY = 86400
+
+@dataclass
+class WorkloadProfile:
+    """Traffic assumptions; rates are per user per day unless noted."""
+
+    users: int = 100_000
+    days: int = 7
+    seed: int = 0
+    # Follower counts are Pareto(follower_alpha) scaled by min_followers
+    follower_alpha: float = 2.1
+    min_followers: int = 5
+    posts: float = 0.3
+    # Per follower of the author, per post
+    reactions: float = 0.05
+    comments: float = 0.01
+    relays: float = 0.004
+    saves: float = 0.006
+    # Per post
+    mentions: float = 0.2
+    collaboration_invites: float = 0.05
+    # Share of comments that reply to an earlier comment on the post (a post's first never does)
+    reply_share: float = 0.3
+    # Likes per comment
+    comment_likes: float = 0.4
+    follows: float = 0.5
+    private_share: float = 0.15
+    request_accept_share: float = 0.7
+    collaboration_accept_share: float = 0.6
+    collaboration_decline_share: float = 0.25
+    # Community events
+    users_per_community: int = 200
+    join_requests: float = 0.01
+    join_approve_share: float = 0.8
+    community_invites: float = 0.005
+    role_changes: float = 0.0005
+    mutes: float = 0.0003
+    bans: float = 0.0001
+    # Reaction type mix, in REACTION_TYPES order
+    reaction_weights: tuple = (0.55, 0.12, 0.08, 0.1, 0.1, 0.05)
+    # Minutes over which a post's engagement decays (exponential)
+    burst_minutes: float = 90.0
+    # Chance a user opens the panel (and marks all read) on a given day
+    daily_read_probability: float = 0.6
+
+@dataclass
+class WorkloadStats:
+    profile: WorkloadProfile
+    events: int = 0
+    rows: int = 0
+    self_notifications: int = 0
+    by_type: Dict[str, int] = field(default_factory=dict)
+    bytes: int = 0
+    peak_rows_per_second: int = 0
+    # Unread rows per user at the end of the run: percentile -> rows
+    unread_percentiles: Dict[float, int] = field(default_factory=dict)
+    users_with_unread: int = 0
+    max_unread: int = 0
+    rows_per_day: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def seconds(self) -> int:
+        return self.profile.days * SECONDS_PER_DAY
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_day(self) -> float:
+        return self.bytes / self.profile.days if self.profile.days else 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        """Generator throughput."""
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("the workload generator needs NumPy (pip install numpy)")
+
+class _Batch:
+    """Columns of one day's events before the notification rules run."""
+
+    def __init__(self):
+        self.columns = {"recipient": [], "actor": [], "type": [], "post": [], "community": [], "comment": [], "time": []}
+
+    def add(self, type_name, recipient, actor, times, post=None, community=None, comment=None):
+        count = len(recipient)
+        if not count:
+            return
+        missing = np.full(count, NO_ID, dtype=np.int64)
+        if isinstance(type_name, str):
+            codes = np.full(count, NOTIFICATION_TYPES.index(type_name), dtype=np.int8)
+        else:
+            codes = type_name.astype(np.int8)
+        for name, values in (("recipient", recipient), ("actor", actor), ("type", codes), ("time", times),
+                             ("post", missing if post is None else post),
+                             ("community", missing if community is None else community),
+                             ("comment", missing if comment is None else comment)):
+            self.columns[name].append(np.asarray(values))
+
+    def arrays(self) -> Dict[str, "np.ndarray"]:
+        return {name: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64) for name, parts in self.columns.items()}
+
+def _diurnal_times(rng, count: int, day: int):
+    """Seconds since the start of the run, busier in the evening."""
+
+    hours = np.arange(24)
+    weights = 1.0 + 0.8 * np.cos((hours - 20) / 24 * 2 * np.pi)
+    hour = rng.choice(24, size=count, p=weights / weights.sum())
+    return day * SECONDS_PER_DAY + hour * 3600 + rng.random(count) * 3600
+
+def _pick(rng, cumulative, count: int):
+    """Draw user ids with probability proportional to the weights behind `cumulative`."""
+
+    draws = rng.random(count) * cumulative[-1]
+    # Searching in sorted order keeps the binary search in cache; ~3x faster on millions of users
+    order = np.argsort(draws)
+    picked = np.empty(count, dtype=np.int64)
+    picked[order] = np.searchsorted(cumulative, draws[order], side="right")
+    return picked
+
+def _generate_day(rng, profile: WorkloadProfile, day: int, followers, activity, reach, owners, next_ids) -> _Batch:
+    users = profile.users
+    batch = _Batch()
+
+    def burst(start_times, counts):
+        return np.repeat(start_times, counts) + rng.exponential(profile.burst_minutes * 60, int(counts.sum()))
+
+    # Posts, and the engagement each one draws from the author's followers
+    post_count = rng.poisson(users * profile.posts)
+    authors = _pick(rng, activity, post_count)
+    post_ids = next_ids["post"] + np.arange(post_count)
+    next_ids["post"] += post_count
+    published = _diurnal_times(rng, post_count, day)
+    audience = followers[authors]
+
+    counts = rng.poisson(audience * profile.reactions)
+    types = np.array([NOTIFICATION_TYPES.index(name) for name in REACTION_TYPES])[
+        rng.choice(len(REACTION_TYPES), size=int(counts.sum()), p=np.array(profile.reaction_weights) / sum(profile.reaction_weights))]
+    batch.add(types, np.repeat(authors, counts), _pick(rng, activity, int(counts.sum())), burst(published, counts),
+              post=np.repeat(post_ids, counts))
+
+    for type_name, rate in (("relay", profile.relays), ("save", profile.saves)):
+        counts = rng.poisson(audience * rate)
+        batch.add(type_name, np.repeat(authors, counts), _pick(rng, activity, int(counts.sum())), burst(published, counts),
+                  post=np.repeat(post_ids, counts))
+
+    counts = rng.poisson(profile.mentions, post_count)
+    batch.add("mention", _pick(rng, reach, int(counts.sum())), np.repeat(authors, counts), np.repeat(published, counts),
+              post=np.repeat(post_ids, counts))
+
+    # Comments: replies go to the author of an earlier comment on the same post
+    counts = rng.poisson(audience * profile.comments)
+    total = int(counts.sum())
+    commenters = _pick(rng, activity, total)
+    comment_ids = next_ids["comment"] + np.arange(total)
+    next_ids["comment"] += total
+    comment_times = burst(published, counts)
+    # In time order within each post, so a comment's position counts the comments before it
+    comment_times = comment_times[np.lexsort((comment_times, np.repeat(np.arange(post_count), counts)))]
+    comment_posts = np.repeat(post_ids, counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.arange(total) - starts
+    parents = starts + np.floor(rng.random(total) * positions).astype(np.int64)
+    # A post's first comment has nothing to reply to
+    replies = (rng.random(total) < profile.reply_share) & (positions > 0)
+    top = ~replies
+    post_authors = np.repeat(authors, counts)
+    batch.add("comment", post_authors[top], commenters[top], comment_times[top], post=comment_posts[top], comment=comment_ids[top])
+    batch.add("reply", commenters[parents[replies]], commenters[replies], comment_times[replies],
+              post=comment_posts[replies], comment=comment_ids[replies])
+
+    likes = rng.poisson(profile.comment_likes, total)
+    batch.add("comment_like", np.repeat(commenters, likes), _pick(rng, activity, int(likes.sum())),
+              np.repeat(comment_times, likes) + rng.exponential(profile.burst_minutes * 60, int(likes.sum())),
+              post=np.repeat(comment_posts, likes), comment=np.repeat(comment_ids, likes))
+
+    # Collaborations: invites from the author, answers back to the author
+    counts = rng.poisson(profile.collaboration_invites, post_count)
+    invitees = _pick(rng, activity, int(counts.sum()))
+    inviters = np.repeat(authors, counts)
+    invite_posts = np.repeat(post_ids, counts)
+    invite_times = np.repeat(published, counts)
+    batch.add("collaboration_invite", invitees, inviters, invite_times, post=invite_posts)
+    answer = rng.random(len(invitees))
+    answered = invite_times + rng.exponential(6 * 3600, len(invitees))
+    accepted = answer < profile.collaboration_accept_share
+    declined = (answer >= profile.collaboration_accept_share) & (answer < profile.collaboration_accept_share + profile.collaboration_decline_share)
+    batch.add("collaboration_accepted", inviters[accepted], invitees[accepted], answered[accepted], post=invite_posts[accepted])
+    batch.add("collaboration_declined", inviters[declined], invitees[declined], answered[declined], post=invite_posts[declined])
+
+    # Follows: preferential attachment; private accounts get a request first
+    count = rng.poisson(users * profile.follows)
+    targets = _pick(rng, reach, count)
+    followers_of = _pick(rng, activity, count)
+    times = _diurnal_times(rng, count, day)
+    private = rng.random(count) < profile.private_share
+    batch.add("follow", targets[~private], followers_of[~private], times[~private])
+    batch.add("follow_request", targets[private], followers_of[private], times[private])
+    accept = private & (rng.random(count) < profile.request_accept_share)
+    batch.add("follow_request_accepted", followers_of[accept], targets[accept],
+              times[accept] + rng.exponential(3 * 3600, int(accept.sum())))
+
+    # Communities: requests go to the owner; decisions and moderation come from the owner
+    communities = len(owners)
+    count = rng.poisson(users * profile.join_requests)
+    joined = rng.integers(0, communities, count)
+    requesters = _pick(rng, activity, count)
+    times = _diurnal_times(rng, count, day)
+    batch.add("community_join_request", owners[joined], requesters, times, community=joined)
+    approve = rng.random(count) < profile.join_approve_share
+    batch.add("community_join_approved", requesters[approve], owners[joined[approve]],
+              times[approve] + rng.exponential(12 * 3600, int(approve.sum())), community=joined[approve])
+    for type_name, rate in (("community_invite", profile.community_invites), ("community_role_change", profile.role_changes),
+                            ("community_muted", profile.mutes), ("community_banned", profile.bans)):
+        count = rng.poisson(users * rate)
+        where = rng.integers(0, communities, count)
+        batch.add(type_name, _pick(rng, activity, count), owners[where], _diurnal_times(rng, count, day), community=where)
+
+    return batch
+
+def apply_notification_rules(columns: Dict[str, "np.ndarray"]):
+    """createNotification() for a whole batch: drop self-notifications; return (kept columns, dropped)."""
+
+    keep = columns["recipient"] != columns["actor"]
+    return {name: values[keep] for name, values in columns.items()}, int(len(keep) - keep.sum())
+
+def row_bytes(columns: Dict[str, "np.ndarray"]) -> "np.ndarray":
+    """Estimated heap bytes for each row."""
+
+    type_bytes = np.array([len(name) + 1 for name in NOTIFICATION_TYPES])
+    optional = sum((columns[name] != NO_ID).astype(np.int64) for name in ("post", "community", "comment"))
+    return _ROW_BASE_BYTES + optional * _UUID_BYTES + type_bytes[columns["type"]]
+
+def _population(rng, profile: WorkloadProfile):
+    """Follower graph, activity weights, community owners and each user's last visit to the panel."""
+
+    users = profile.users
+    followers = np.minimum((rng.pareto(profile.follower_alpha - 1, users) + 1) * profile.min_followers, users - 1)
+    # Who acts (reacts, comments, follows) and who gets followed/mentioned
+    activity = np.cumsum(rng.pareto(2.0, users) + 1)
+    reach = np.cumsum(followers + 1)
+    owners = _pick(rng, reach, max(1, users // profile.users_per_community))
+
+    # Each user's last visit to the panel; everything after it is still unread. Counting back
+    # from the last day, the days until a visit are geometric, so one draw per user does it
+    if profile.daily_read_probability > 0:
+        last_day = profile.days - rng.geometric(min(profile.daily_read_probability, 1.0), users)
+    else:
+        last_day = np.full(users, -1)
+    last_read = np.where(last_day >= 0, last_day * SECONDS_PER_DAY + rng.random(users) * SECONDS_PER_DAY, -1.0)
+    return followers, activity, reach, owners, last_read
+
+def _days(rng, profile: WorkloadProfile, followers, activity, reach, owners) -> Iterator[Tuple[Dict[str, "np.ndarray"], int, int]]:
+    """Yield (rows, events, self-notifications dropped) for each generated day."""
+
+    next_ids = {"post": 0, "comment": 0}
+    horizon = profile.days * SECONDS_PER_DAY
+    for day in range(profile.days):
+        columns = _generate_day(rng, profile, day, followers, activity, reach, owners, next_ids).arrays()
+        # Engagement that lands after the last day is outside the run
+        inside = columns["time"] < horizon
+        columns = {name: values[inside] for name, values in columns.items()}
+        rows, dropped = apply_notification_rules(columns)
+        yield rows, len(columns["recipient"]), dropped
+
+def generate_rows(profile: Optional[WorkloadProfile] = None) -> Iterator[Dict[str, "np.ndarray"]]:
+    """Yield each day's notification rows as columns; same rows as generate_workload() for the same profile."""
+
+    _require_numpy()
+    profile = profile or WorkloadProfile()
+    rng = np.random.default_rng(profile.seed)
+    followers, activity, reach, owners, _ = _population(rng, profile)
+    for rows, _, _ in _days(rng, profile, followers, activity, reach, owners):
+        yield rows
+
+def generate_workload(profile: Optional[WorkloadProfile] = None) -> WorkloadStats:
+    """Generate profile.days of notifications for profile.users users and summarise them."""
+
+    _require_numpy()
+    profile = profile or WorkloadProfile()
+    started = time.perf_counter()
+    rng = np.random.default_rng(profile.seed)
+    users = profile.users
+    stats = WorkloadStats(profile=profile, by_type={name: 0 for name in NOTIFICATION_TYPES})
+    followers, activity, reach, owners, last_read = _population(rng, profile)
+
+    per_second = np.zeros(profile.days * SECONDS_PER_DAY, dtype=np.int32)
+    unread = np.zeros(users, dtype=np.int64)
+    by_type = np.zeros(len(NOTIFICATION_TYPES), dtype=np.int64)
+    per_day = np.zeros(profile.days, dtype=np.int64)
+
+    for columns, events, dropped in _days(rng, profile, followers, activity, reach, owners):
+        stats.events += events
+        stats.self_notifications += dropped
+        stats.rows += len(columns["recipient"])
+
+        seconds = columns["time"].astype(np.int64)
+        per_second += np.bincount(seconds, minlength=len(per_second)).astype(np.int32)
+        per_day += np.bincount(seconds // SECONDS_PER_DAY, minlength=profile.days)
+        by_type += np.bincount(columns["type"].astype(np.int64), minlength=len(NOTIFICATION_TYPES))
+        late = columns["time"] > last_read[columns["recipient"]]
+        unread += np.bincount(columns["recipient"][late], minlength=users)
+        stats.bytes += int(row_bytes(columns).sum())
+
+    stats.by_type = {name: int(count) for name, count in zip(NOTIFICATION_TYPES, by_type)}
+    stats.peak_rows_per_second = int(per_second.max()) if len(per_second) else 0
+    stats.rows_per_day = [int(count) for count in per_day]
+    stats.unread_percentiles = {p: int(np.percentile(unread, p)) for p in (50, 90, 99, 99.9)}
+    stats.users_with_unread = int((unread > 0).sum())
+    stats.max_unread = int(unread.max()) if users else 0
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,23 @@
+import os
+from typing import Callable, Dict
+
+import pytest
+
+@pytest.fixture
+def write_tree(tmp_path) -> Callable[[Dict[str, str]], str]:
+    """Write {repo-relative path: text} under tmp_path and return the root."""
+
+    def write(files: Dict[str, str]) -> str:
+        for path, text in files.items():
+            target = tmp_path / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text, encoding="utf-8")
+        return str(tmp_path)
+
+    return write
+
+def touch(path: str, offset_ns: int = 1_000_000_000):
+    """Move a file's mtime without changing its content."""
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset_ns))
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+
+import pytest
+
+from pinkquill_analysis.bench import (
+    ADVISED_INDEXES,
+    BENCH_SOURCE,
+    MIGRATION_INDEXES,
+    NO_INDEXES,
+    _load,
+    _time,
+    benchmark_queries,
+    parse_embeds,
+    run_benchmark,
+    singular,
+    table_columns,
+    write_result,
+)
+from pinkquill_analysis.schema import replay_migrations
+
+FILES = {
+    BENCH_SOURCE: """export function useNotifications(userId: string) {
+  const fetchNotifications = async () => {
+    const { data } = await supabase
+      .from('notifications')
+      .select('id, type, read, created_at, actor:profiles!notifications_actor_id_fkey (username, avatar_url), post:posts (title)')
+      .eq('user_id', userId)
+      .order('created_at', { ascending: false })
+      .limit(50)
+    return data
+  }
+
+  useEffect(() => {
+    const channel = supabase.channel(`notifications:${userId}`)
+      .on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'notifications' }, () => fetchNotifications())
+      .subscribe()
+    return () => { supabase.removeChannel(channel) }
+  }, [userId])
+}
+
+export function useUnreadCount(userId: string) {
+  const fetchCount = async () => {
+    const { count } = await supabase.from('notifications').select('*', { count: 'exact', head: true }).eq('user_id', userId).eq('read', false)
+    return count
+  }
+}
+
+export function useMarkAsRead() {
+  const markAsRead = async (id: string) => {
+    await supabase.from('notifications').update({ read: true }).eq('id', id)
+  }
+}
+
+export async function createNotification(userId: string, actorId: string, type: string, postId?: string) {
+  await supabase.from('notifications').insert({ user_id: userId, actor_id: actorId, type, post_id: postId })
+}
+""",
+    "supabase/migrations/20240101_init.sql": """create table notifications (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null,
+  actor_id uuid,
+  post_id uuid,
+  type text not null,
+  read boolean default false,
+  created_at timestamptz default now()
+);
+create index idx_notifications_created on notifications (created_at desc);
+""",
+}
+
+@pytest.mark.parametrize("table, expected", [("posts", "post"), ("communities", "community"), ("news", "new"), ("staff", "staff")])
+def test_singular(table, expected):
+    assert singular(table) == expected
+
+def test_parse_embeds():
+    columns, embeds = parse_embeds("id, actor:profiles!notifications_actor_id_fkey (username, avatar_url), posts (title)", "notifications")
+    assert columns == ["id"]
+    assert [(embed.alias, embed.table, embed.column, embed.columns) for embed in embeds] == [
+        ("actor", "profiles", "actor_id", ["username", "avatar_url"]),
+        ("posts", "posts", "post_id", ["title"]),
+    ]
+    assert parse_embeds(None, "notifications") == (["*"], [])
+
+def test_query_translation(write_tree):
+    queries = benchmark_queries(write_tree(FILES))
+    assert [(query.name, query.hook, query.parameters) for query in queries] == [
+        ("fetchNotifications", "useNotifications", ["user_id"]),
+        ("fetchCount", "useUnreadCount", ["user_id"]),
+        ("markAsRead", "useMarkAsRead", ["id"]),
+        ("createNotification", "createNotification", ["user_id", "actor_id", "type", "post_id"]),
+    ]
+    fetch, count, mark, create = (query.sql for query in queries)
+    assert "LEFT JOIN profiles AS actor ON actor.id = notifications.actor_id" in fetch
+    assert fetch.endswith("WHERE notifications.user_id = ? ORDER BY notifications.created_at DESC LIMIT 50")
+    # Spelled as the advisor's partial index spells it, or SQLite won't use the index
+    assert count == "SELECT count(*) FROM notifications WHERE user_id = ? AND read = false"
+    assert mark == "UPDATE notifications SET read = true WHERE id = ?"
+    assert create == "INSERT INTO notifications (user_id, actor_id, type, post_id) VALUES (?, ?, ?, ?)"
+
+def test_writes_are_rolled_back(write_tree):
+    root = write_tree(FILES)
+    queries = benchmark_queries(root)
+    connection = sqlite3.connect(":memory:", isolation_level=None)
+    counts = _load(connection, table_columns(replay_migrations(root), queries), 200)
+
+    state = "SELECT count(*), sum(read) FROM notifications"
+    before = connection.execute(state).fetchone()
+    for query in queries:
+        _time(connection, query, 3, counts)
+    assert connection.execute(state).fetchone() == before
+    assert before[0] == 200 and 0 < before[1] < 200
+
+def test_run_benchmark(write_tree, tmp_path):
+    root = write_tree(FILES)
+    result = run_benchmark(root, replay_migrations(root), sizes=(500,), runs=3)
+
+    assert result["advised_indexes"] == [
+        "CREATE INDEX idx_notifications_user_id_created_at ON notifications (user_id, created_at DESC);",
+        "CREATE INDEX idx_notifications_user_id_read_false ON notifications (user_id) WHERE read = false;",
+    ]
+    assert result["advised_index_misses"] == []
+    assert list(result["queries"]) == ["fetchNotifications", "fetchCount", "markAsRead", "createNotification"]
+    plans = {(item["indexes"], item["query"]): item["plan"] for item in result["results"]}
+    assert len(result["results"]) == len(plans) == 12
+    assert plans[NO_INDEXES, "fetchCount"] == "SCAN notifications"
+    assert "USING INDEX idx_notifications_created" in plans[MIGRATION_INDEXES, "fetchNotifications"]
+    assert "USING INDEX idx_notifications_user_id_created_at" in plans[ADVISED_INDEXES, "fetchNotifications"]
+    assert "USING INDEX idx_notifications_user_id_read_false" in plans[ADVISED_INDEXES, "fetchCount"]
+
+    path = str(tmp_path / "out" / "bench.json")
+    write_result(result, path)
+    with open(path, "r", encoding="utf-8") as handle:
+        assert json.load(handle) == result
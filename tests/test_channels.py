@@ -0,0 +1,136 @@
+from pinkquill_analysis.channels import build_graph
+
+NOTIFICATIONS = "lib/hooks/useNotifications.ts"
+REACTIONS = "lib/hooks/useReactions.ts"
+PRESENCE = "components/Presence.tsx"
+
+FILES = {
+    NOTIFICATIONS: """export function useNotifications(userId: string) {
+  useEffect(() => {
+    const channel = supabase.channel(`notifications:${userId}`).on('postgres_changes', {}, () => {}).subscribe()
+    return () => { supabase.removeChannel(channel) }
+  }, [userId])
+}
+""",
+    REACTIONS: """export function useReactions(postId: string) {
+  const channelRef = useRef(null)
+  useEffect(() => {
+    channelRef.current = supabase.channel(`reactions:${postId}`).subscribe()
+  }, [postId])
+}
+""",
+    "lib/hooks/index.ts": "export * from './useNotifications'\nexport { useReactions } from './useReactions'\n",
+    "components/PostCard.tsx": """import { useReactions } from '@/lib/hooks'
+
+export default function PostCard({ post }) {
+  useReactions(post.id)
+  return <div>{post.title}</div>
+}
+""",
+    PRESENCE: """export function Presence() {
+  useEffect(() => {
+    const room = supabase.channel('online').subscribe()
+    return () => { room.unsubscribe() }
+  }, [])
+  return null
+}
+""",
+    "app/layout.tsx": """import { useNotifications } from '@/lib/hooks'
+
+export default function RootLayout({ children, user }) {
+  useNotifications(user.id)
+  return <body>{children}</body>
+}
+""",
+    "app/(feed)/page.tsx": """import PostCard from '@/components/PostCard'
+import { Presence } from '@/components/Presence'
+
+export default function Feed({ posts, showPresence }) {
+  return (
+    <main>
+      {showPresence && <Presence />}
+      {posts.map((post) => <PostCard key={post.id} post={post} />)}
+    </main>
+  )
+}
+""",
+    "app/post/[id]/page.tsx": """import PostCard from '../../../components/PostCard'
+
+export default function PostPage({ post }) {
+  return <PostCard post={post} />
+}
+""",
+}
+
+def _names(counter):
+    return {channel.name: count for channel, count in counter.items()}
+
+def test_channels_and_cleanup(write_tree):
+    graph = build_graph(write_tree(FILES))
+    assert [(channel.location, channel.owner, channel.name, channel.variable, channel.cleaned) for channel in graph.channels] == [
+        (f"{PRESENCE}:3", "Presence", "online", "room", True),
+        (f"{NOTIFICATIONS}:3", "useNotifications", "notifications:${userId}", "channel", True),
+        (f"{REACTIONS}:4", "useReactions", "reactions:${postId}", "channelRef.current", False),
+    ]
+
+def test_routes_count_layouts_lists_and_conditional_renders(write_tree):
+    feed, post = build_graph(write_tree(FILES)).routes()
+
+    # Route groups drop out of the URL; the root layout wraps both pages
+    assert (feed.route, feed.files) == ("/", ["app/layout.tsx", "app/(feed)/page.tsx"])
+    assert (post.route, post.files) == ("/post/[id]", ["app/layout.tsx", "app/post/[id]/page.tsx"])
+
+    assert _names(feed.fixed) == {"notifications:${userId}": 1, "online": 1}
+    assert _names(feed.per_item) == {"reactions:${postId}": 1}
+    # Presence renders behind showPresence &&
+    assert _names(feed.mounted_fixed) == {"notifications:${userId}": 1}
+    assert (feed.open(20), feed.open(20, mounted=False)) == (21, 22)
+    assert feed.topics(20, mounted=False) == 22
+
+    # The same card outside a list opens its channel once
+    assert _names(post.fixed) == {"notifications:${userId}": 1, "reactions:${postId}": 1}
+    assert not post.per_item and post.open(20) == 2
+
+def test_alternative_returns_count_the_widest(write_tree):
+    files = {
+        PRESENCE: FILES[PRESENCE],
+        REACTIONS: FILES[REACTIONS],
+        "app/page.tsx": """import { Presence } from '../components/Presence'
+import { useReactions } from '../lib/hooks/useReactions'
+
+function Card({ post }) {
+  useReactions(post.id)
+  return null
+}
+
+export default function Home({ loading, posts }) {
+  if (loading) {
+    return <Presence />
+  }
+  return <ul>{posts.map((post) => <Card post={post} />)}</ul>
+}
+""",
+    }
+    (home,) = build_graph(write_tree(files)).routes()
+    assert not home.fixed and _names(home.per_item) == {"reactions:${postId}": 1}
+    assert home.open(5) == 5
+
+def test_untemplated_channels_in_a_list_share_one_topic(write_tree):
+    files = {
+        "components/Row.tsx": """export function Row() {
+  useEffect(() => {
+    const channel = supabase.channel('feed').subscribe()
+    return () => supabase.removeChannel(channel)
+  }, [])
+  return null
+}
+""",
+        "app/page.tsx": """import { Row } from '../components/Row'
+
+export default function Home({ posts }) {
+  return <ul>{posts.map((post) => <Row key={post.id} />)}</ul>
+}
+""",
+    }
+    (home,) = build_graph(write_tree(files)).routes()
+    assert (home.open(20), home.topics(20)) == (20, 1)
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from notification_analysis import main
+from pinkquill_analysis.bench import BENCH_SIZES, DEFAULT_RUNS
+from pinkquill_analysis.channels import DEFAULT_POSTS
+from pinkquill_analysis.coalesce import DEFAULT_POLICIES
+from pinkquill_analysis.payload import DEFAULT_EVENT_RATE
+from pinkquill_analysis.perf import DEFAULT_THRESHOLD, PERF_SCALES
+from pinkquill_analysis.retention import DEFAULT_ARCHIVE_AFTER, DEFAULT_MONTHS, DEFAULT_TTL
+from pinkquill_analysis.rls import DEFAULT_COMMUNITIES, MEMBER_SCALES
+from pinkquill_analysis.standin import DEFAULT_BURST, DEFAULT_HOOKS, DEFAULT_INTERVAL
+from pinkquill_analysis.toggles import DEFAULT_INTERACTIONS
+from pinkquill_analysis.workload import WorkloadProfile
+
+def _joined(values) -> str:
+    return ",".join(str(value) for value in values)
+
+def test_help_defaults_match_the_modes(capsys):
+    with pytest.raises(SystemExit):
+        main(["--help"])
+    text = " ".join(capsys.readouterr().out.split())
+
+    # The mode modules are imported only when their mode runs, so the help spells their defaults out
+    for default in [
+        f"{WorkloadProfile.users} for --workload", f"(default: {WorkloadProfile.days})",
+        f"(default: {', '.join(DEFAULT_POLICIES)})", f"(default: {DEFAULT_POSTS}, useFeed's page size)",
+        f"(default: {_joined(BENCH_SIZES)})", f"runs per query (default: {DEFAULT_RUNS})",
+        f"--payload (default: {DEFAULT_EVENT_RATE:g})", f"(default: {_joined(MEMBER_SCALES)})",
+        f"(default: {DEFAULT_COMMUNITIES})", f"(default: {DEFAULT_INTERACTIONS:,})", f"(default: {_joined(DEFAULT_MONTHS)})",
+        f"(default: {DEFAULT_TTL / 86400:g}d)", f"(default: {DEFAULT_ARCHIVE_AFTER / 86400:g}d)",
+        f"(default: {_joined(DEFAULT_HOOKS)})", f"(default: {DEFAULT_BURST})", f"(default: {DEFAULT_INTERVAL:g})",
+        f"(default: {_joined(PERF_SCALES)})", f"(default: {DEFAULT_THRESHOLD})",
+    ]:
+        assert default in text
+
+def test_report_does_not_import_the_mode_engines():
+    code = ("import sys, notification_analysis; "
+            "print(sorted(name for name in ('numpy', 'sqlite3', 'asyncio') if name in sys.modules))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+@pytest.mark.parametrize("argv, message", [
+    (["--bench", "--workload"], "--bench, --workload are separate modes"),
+    (["--watch", "--channels", "--rls"], "--rls, --channels, --watch are separate modes"),
+    (["--coalesce", "--retention"], "--retention, --coalesce are separate modes"),
+    (["--watch", "--format", "json"], "--format json is for the report and --history; --watch only prints text"),
+    (["--perf", "--format", "sarif"], "--format sarif is for the report and --history; --perf only prints text"),
+    (["--watch", "--logs", "app.log"], "--logs feeds the report; --watch doesn't read it"),
+    (["--history", "--logs", "app.log"], "--logs feeds the report; --history doesn't read it"),
+])
+def test_conflicting_modes_are_rejected(capsys, argv, message):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
@@ -0,0 +1,48 @@
+import pytest
+
+from pinkquill_analysis.coalesce import (
+    COALESCABLE_TYPES,
+    DEFAULT_POLICIES,
+    DIGEST,
+    UPDATE,
+    CoalescingPolicy,
+    parse_duration,
+    parse_policy,
+)
+
+@pytest.mark.parametrize("text, seconds", [
+    ("45", 45.0), ("30s", 30.0), ("15m", 900.0), ("1.5h", 5400.0), ("1d", 86400.0), (" 2m ", 120.0),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+@pytest.mark.parametrize("text", ["", "m", "15 m", "1w", "-5m", "1h30m"])
+def test_parse_duration_rejects(text):
+    with pytest.raises(ValueError, match="bad duration"):
+        parse_duration(text)
+
+def test_parse_policy():
+    assert parse_policy("post+type/15m") == CoalescingPolicy("post+type/15m", ("post", "type"), 900.0, UPDATE, COALESCABLE_TYPES)
+    assert parse_policy("post+kind/1h/digest") == CoalescingPolicy("post+kind/1h/digest", ("post", "kind"), 3600.0, DIGEST)
+    # The recipient is always part of the key
+    assert parse_policy("recipient+actor/30s").key == ("actor",)
+    assert parse_policy("type/1d/update").delivery == UPDATE
+
+def test_parse_policy_baseline():
+    policy = parse_policy(" none ")
+    assert policy == CoalescingPolicy("none")
+    assert policy.window == 0.0 and policy.key == ()
+
+def test_default_policies_parse():
+    assert [parse_policy(spec).name for spec in DEFAULT_POLICIES] == list(DEFAULT_POLICIES)
+
+@pytest.mark.parametrize("spec, message", [
+    ("post+type", "expected KEY/WINDOW"),
+    ("post/15m/digest/extra", "expected KEY/WINDOW"),
+    ("post+author/15m", "unknown key column"),
+    ("post/15m/batch", "delivery is update or digest"),
+    ("post/soon", "bad duration"),
+])
+def test_parse_policy_rejects(spec, message):
+    with pytest.raises(ValueError, match=message):
+        parse_policy(spec)
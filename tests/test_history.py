@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from pinkquill_analysis import history
+from pinkquill_analysis.history import GitObjects, analyze_history, list_commits, write_history
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+ACTIONS = "lib/actions.ts"
+HOOK = "lib/hooks/useNotifications.ts"
+
+ADMIRE = """import { createNotification } from './notifications'
+
+export async function admire(userId: string, actorId: string) {
+  await createNotification(userId, actorId, 'admire')
+}
+"""
+
+FOLLOW = """export async function follow(userIds: string[], actorId: string) {
+  for (const userId of userIds) {
+    await createNotification(userId, actorId, 'follow')
+  }
+}
+"""
+
+CHANNEL = """export function useNotifications(userId: string) {
+  useEffect(() => {
+    supabase.channel(`notifications:${userId}`).subscribe()
+  }, [userId])
+}
+"""
+
+def _git(root, *args):
+    # A fixed identity and clock so hashes and dates don't depend on the machine
+    environment = {**os.environ, "GIT_AUTHOR_NAME": "dev", "GIT_AUTHOR_EMAIL": "dev@example.com",
+                   "GIT_COMMITTER_NAME": "dev", "GIT_COMMITTER_EMAIL": "dev@example.com",
+                   "GIT_AUTHOR_DATE": "2024-01-01T00:00:00Z", "GIT_COMMITTER_DATE": "2024-01-01T00:00:00Z"}
+    subprocess.run(["git", "-C", root, *args], env=environment, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(write_tree):
+    """Three commits: a notification, a looped one plus a channel, then an edit outside the source tree."""
+
+    root = write_tree({ACTIONS: ADMIRE})
+    _git(root, "init", "-q")
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "Add admire")
+    write_tree({ACTIONS: ADMIRE + FOLLOW, HOOK: CHANNEL})
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "Add follow and the notifications channel")
+    write_tree({"README.md": "# app\n"})
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "Add a readme")
+    return root
+
+def test_metrics_per_commit(repo):
+    first, second, third = analyze_history(repo, workers=1, fan_out=10)
+
+    assert [item.subject for item in (first, second, third)] == [
+        "Add admire", "Add follow and the notifications channel", "Add a readme"]
+    assert first.date == "2024-01-01T00:00:00Z"
+    assert (first.files, first.call_sites, first.channels) == (1, 1, 0)
+    assert (first.notifying_handlers, first.notify_requests, first.per_item_calls) == (1, 1, 0)
+
+    assert (second.files, second.call_sites, second.notifying_handlers) == (2, 2, 2)
+    # follow() inserts once per user
+    assert (second.notify_requests, second.notify_serial, second.per_item_calls) == (11, 10, 1)
+    assert (second.channels, second.unremoved_channels) == (1, 1)
+    assert second.types_implemented == first.types_implemented + 1
+
+    # Unchanged blobs are reused, not parsed again
+    assert (first.parsed, second.parsed, third.parsed) == (1, 2, 0)
+    assert {key: value for key, value in vars(third).items() if key not in ("commit", "subject", "parsed")} == \
+           {key: value for key, value in vars(second).items() if key not in ("commit", "subject", "parsed")}
+
+def test_ranges_and_counts(repo):
+    assert [commit.subject for commit in list_commits(repo, "HEAD~1..HEAD")] == ["Add a readme"]
+    assert [commit.subject for commit in list_commits(repo, "HEAD", max_count=2)] == [
+        "Add follow and the notifications channel", "Add a readme"]
+    with pytest.raises(RuntimeError):
+        list_commits(repo, "no-such-branch")
+    with GitObjects(repo) as objects, pytest.raises(RuntimeError, match="no object"):
+        objects.read("no-such-branch")
+
+def test_workers_split_the_range_in_order(repo, monkeypatch):
+    monkeypatch.setattr(history, "PARALLEL_MIN_COMMITS", 1)
+    serial = analyze_history(repo, workers=1)
+    parallel = analyze_history(repo, workers=2)
+
+    assert [item.commit for item in parallel] == [item.commit for item in serial]
+    # Each worker keeps its own caches, so its first commit parses everything
+    assert [item.parsed for item in parallel] == [1, 2, 0]
+    assert [vars(item) for item in parallel] == [vars(item) for item in serial]
+
+def test_write_history(repo):
+    metrics = analyze_history(repo, workers=1)
+
+    handle = io.StringIO()
+    assert write_history(metrics, handle) == (3, 3, 5)
+    rows = handle.getvalue().splitlines()
+    assert rows[0].startswith("commit,date,subject,files,") and len(rows) == 4
+
+    handle = io.StringIO()
+    write_history(metrics, handle, "jsonl")
+    records = [json.loads(line) for line in handle.getvalue().splitlines()]
+    assert [record["type"] for record in records] == ["header", "commit", "commit", "commit"]
+    assert records[-1]["subject"] == "Add a readme"
+
+    with pytest.raises(ValueError):
+        write_history(metrics, io.StringIO(), "sarif")
@@ -0,0 +1,112 @@
+import os
+
+from pinkquill_analysis import index as index_module
+from pinkquill_analysis.advisor import advise_tree
+from pinkquill_analysis.index import INDEX_DIRECTORY, ScanIndex, incremental_scan
+from pinkquill_analysis.instrument import Profiler
+from pinkquill_analysis.schema import Schema
+
+from .conftest import touch
+
+REQUIRED = {"admire": "User admired your post", "follow": "User followed you"}
+
+FILES = {
+    "lib/actions.ts": "export async function admire(u: string, a: string) {\n"
+                      "  await createNotification(u, a, 'admire')\n}\n",
+    "components/Follow.tsx": "export async function follow(u: string, a: string) {\n"
+                             "  await createNotification(u, a, 'follow')\n}\n",
+    "lib/hooks/useNotifications.ts": "export function useNotifications(userId: string) {\n"
+                                     "  const fetchAll = async () => {\n"
+                                     "    return supabase.from('notifications').select('*').eq('user_id', userId).limit(50)\n"
+                                     "  }\n}\n",
+}
+
+def _scan(root):
+    scans, stats = incremental_scan(root, workers=1, required=REQUIRED)
+    return {scan.path: scan for scan in scans}, stats
+
+def test_warm_run_serves_every_file_from_the_index(write_tree):
+    root = write_tree(FILES)
+    cold, stats = _scan(root)
+    assert (stats.files, stats.rescanned, stats.stat_hits) == (3, 3, 0)
+    assert os.path.exists(os.path.join(root, INDEX_DIRECTORY, "scan-index.json"))
+
+    warm, stats = _scan(root)
+    assert (stats.rescanned, stats.stat_hits, stats.hash_hits) == (0, 3, 0)
+    assert stats.hit_rate == 1.0
+    assert warm == cold
+
+def test_touched_file_is_validated_by_hash(write_tree):
+    root = write_tree(FILES)
+    _scan(root)
+    touch(os.path.join(root, "lib/actions.ts"))
+
+    _, stats = _scan(root)
+    assert (stats.rescanned, stats.stat_hits, stats.hash_hits) == (0, 2, 1)
+    # The refreshed signature is saved, so the next run trusts the stat again
+    _, stats = _scan(root)
+    assert (stats.stat_hits, stats.hash_hits) == (3, 0)
+
+def test_edited_added_and_removed_files(write_tree):
+    root = write_tree(FILES)
+    _scan(root)
+    write_tree({
+        "lib/actions.ts": FILES["lib/actions.ts"].replace("'admire'", "'snap'"),
+        "app/page.tsx": "export default function Page() { return null }\n",
+    })
+    os.remove(os.path.join(root, "components/Follow.tsx"))
+
+    scans, stats = _scan(root)
+    assert (stats.files, stats.rescanned, stats.removed) == (3, 2, 1)
+    assert scans["lib/actions.ts"].call_sites[0].type_literals == ["snap"]
+    assert "components/Follow.tsx" not in scans
+
+def test_fingerprint_change_discards_the_index(write_tree, monkeypatch):
+    root = write_tree(FILES)
+    _scan(root)
+
+    _, stats = incremental_scan(root, workers=1, required={**REQUIRED, "snap": "User snapped for your post"})
+    assert stats.rescanned == 3
+
+    monkeypatch.setattr(index_module, "ANALYZER_VERSION", "test")
+    _, stats = incremental_scan(root, workers=1, required={**REQUIRED, "snap": "User snapped for your post"})
+    assert stats.rescanned == 3
+
+def test_corrupt_index_is_rebuilt(write_tree):
+    root = write_tree(FILES)
+    _scan(root)
+    with open(os.path.join(root, INDEX_DIRECTORY, "scan-index.json"), "w") as handle:
+        handle.write("{not json")
+
+    _, stats = _scan(root)
+    assert stats.rescanned == 3
+    _, stats = _scan(root)
+    assert stats.stat_hits == 3
+
+def _advise(root):
+    profiler = Profiler()
+    plans = advise_tree(root, Schema(), index=ScanIndex(root, REQUIRED), profiler=profiler)
+    return plans, profiler.phases["query advisor"]
+
+def test_query_shapes_are_cached_with_the_scan(write_tree):
+    root = write_tree(FILES)
+    _scan(root)
+
+    cold, phase = _advise(root)
+    assert (phase.lookups, phase.hits) == (1, 0)
+    warm, phase = _advise(root)
+    assert (phase.lookups, phase.hits) == (1, 1)
+    assert warm == cold == advise_tree(root, Schema())
+    # Storing the queries keeps the file's scan
+    _, stats = _scan(root)
+    assert stats.stat_hits == 3
+
+    write_tree({"lib/hooks/useNotifications.ts": FILES["lib/hooks/useNotifications.ts"].replace("limit(50)", "limit(20)")})
+    # Same size: make sure the stat check can't pass on a coarse-mtime filesystem
+    touch(os.path.join(root, "lib/hooks/useNotifications.ts"))
+    edited, phase = _advise(root)
+    assert phase.hits == 0
+    assert [plan.query.limit for plan in edited] == [20]
+    # The query-only entry written for the edited file doesn't pass for a scan
+    _, stats = _scan(root)
+    assert stats.rescanned == 1
@@ -0,0 +1,86 @@
+import gzip
+import json
+
+import pytest
+
+from pinkquill_analysis import logs
+from pinkquill_analysis.logs import UNKNOWN_TYPE, analyze_logs, normalize_error
+
+FOREIGN_KEY = 'insert or update on table "notifications" violates foreign key constraint'
+
+def _lines(count: int):
+    for i in range(count):
+        yield (f"2024-05-01T12:{i % 60:02d}:00.000Z [createNotification] Failed to create notification: "
+               f"{{ type: 'admire', userId: 'user-{i}', actorId: 'actor', error: '{FOREIGN_KEY}' }}")
+        yield f"2024-05-01T13:00:{i % 60:02d}Z GET /api/feed 200 {i}ms"
+        if i % 3 == 0:
+            message = f"[createNotification] Failed to create notification: {{ type: 'follow', error: 'timeout after {i}ms' }}"
+            yield json.dumps({"timestamp": "2024-05-01T14:00:00Z", "message": message})
+        if i % 10 == 0:
+            yield "[createNotification] Unexpected error: fetch failed"
+
+@pytest.fixture
+def log_text() -> str:
+    return "\n".join(_lines(300)) + "\n"
+
+def _counts(log):
+    return log.failed, log.unexpected, log.by_type, log.by_error, log.by_bucket, log.undated
+
+def test_counts_by_type_error_and_bucket(tmp_path, log_text):
+    path = tmp_path / "app.log"
+    path.write_text(log_text)
+    log = analyze_logs([str(path)], workers=1)
+
+    assert (log.failed, log.unexpected, log.total) == (400, 30, 430)
+    assert log.by_type == {"admire": 300, "follow": 100, UNKNOWN_TYPE: 30}
+    assert log.by_error == {FOREIGN_KEY: 300, "timeout after Nms": 100, "fetch failed": 30}
+    # 12:xx and 14:00 in hourly buckets; "Unexpected error" lines here carry no timestamp
+    assert log.by_bucket == {1714564800: 300, 1714572000: 100}
+    assert log.undated == 30
+    assert log.top_error("follow") == "timeout after Nms"
+    assert log.bytes == len(log_text)
+
+@pytest.mark.parametrize("shards", [2, 3, 7])
+def test_sharded_file_counts_match(tmp_path, monkeypatch, log_text, shards):
+    path = tmp_path / "app.log"
+    path.write_text(log_text)
+    whole = analyze_logs([str(path)], workers=1)
+
+    monkeypatch.setattr(logs, "SHARD_MIN_BYTES", 0)
+    assert len(logs._tasks([str(path)], shards, logs.DEFAULT_BUCKET)) == shards
+    sharded = analyze_logs([str(path)], workers=shards)
+
+    assert _counts(sharded) == _counts(whole)
+    assert sharded.bytes == whole.bytes and sharded.files == [str(path)]
+
+@pytest.mark.parametrize("block", [64, 1000, 1 << 20])
+def test_gzip_counts_match_plain(tmp_path, monkeypatch, log_text, block):
+    plain, packed = tmp_path / "app.log", tmp_path / "app.log.gz"
+    plain.write_text(log_text)
+    with gzip.open(packed, "wt") as handle:
+        handle.write(log_text)
+
+    # Small blocks cut records and markers across reads
+    monkeypatch.setattr(logs, "READ_BLOCK", block)
+    expected = analyze_logs([str(plain)], workers=1)
+    compressed = analyze_logs([str(packed)], workers=1)
+
+    assert _counts(compressed) == _counts(expected)
+    assert compressed.bytes == len(log_text)
+
+def test_files_merge(tmp_path, log_text):
+    first, second = tmp_path / "a.log", tmp_path / "b.log.gz"
+    first.write_text(log_text)
+    with gzip.open(second, "wt") as handle:
+        handle.write(log_text)
+    log = analyze_logs([str(first), str(second)], workers=2)
+
+    assert log.total == 860
+    assert log.by_type["admire"] == 600
+    assert sorted(log.files) == sorted([str(first), str(second)])
+
+def test_normalize_error():
+    assert normalize_error("Key (post_id)=(8f14e45f-ceea-467f-a0f6-1c2b3d4e5f6a) is not present in table 42") == \
+        "Key (post_id)=(…) is not present in table N"
+    assert normalize_error("user 8F14E45F-CEEA-467F-A0F6-1C2B3D4E5F6A  not   found") == "user <uuid> not found"
+    assert normalize_error("  ") == "(no message)"
@@ -0,0 +1,115 @@
+import io
+import json
+
+import pytest
+
+from pinkquill_analysis.model import ANALYZER_VERSION, NotificationFeature, Status
+from pinkquill_analysis.records import (
+    RULES,
+    SCHEMA,
+    SCHEMA_VERSION,
+    feature_record,
+    issue_record,
+    open_writer,
+    split_location,
+)
+
+FEATURES = [
+    NotificationFeature("admire", "User admired your post", Status.IMPLEMENTED,
+                        "createNotification(..., 'admire', ...)", "lib/actions.ts:12 (admirePost)"),
+    NotificationFeature("follow", "User followed you", Status.PARTIAL, "Only reachable through a variable", "components/Follow.tsx:40"),
+    NotificationFeature("snap", "User snapped for your post", Status.MISSING, "No createNotification call found", None),
+    NotificationFeature("Post page accept/decline", "Accept/decline on the post page", Status.PARTIAL,
+                        "Needs verification", "components/notifications/NotificationPanel.tsx:606"),
+]
+
+ISSUE = {
+    "priority": "HIGH",
+    "rule": "type-constraint",
+    "issue": "notifications_type_check rejects 2 types",
+    "detail": "Inserts of snap, follow fail",
+    "fix": "Add them to the constraint",
+    "location": "supabase/migrations/20240101_types.sql:7",
+}
+
+def _records():
+    records = [feature_record("Post Reactions", feature) for feature in FEATURES]
+    records.append(issue_record(ISSUE))
+    records.append(issue_record({**ISSUE, "priority": "LOW", "rule": "type-constraint-unverified", "location": "supabase/migrations/"}))
+    records.append({"type": "summary", "features": 4, "issues": {"HIGH": 1, "MEDIUM": 0, "LOW": 1}})
+    return records
+
+def _write(output_format: str) -> str:
+    handle = io.StringIO()
+    writer = open_writer(output_format, handle)
+    for record in _records():
+        writer.write(record)
+    writer.close()
+    return handle.getvalue()
+
+def test_split_location():
+    assert split_location("lib/hooks/useNotifications.ts:11 (fetchAll)") == {"path": "lib/hooks/useNotifications.ts", "line": 11}
+    assert split_location("app/post/[id]/page.tsx") == {"path": "app/post/[id]/page.tsx"}
+    assert split_location("supabase/migrations/") == {"path": "supabase/migrations/"}
+    assert split_location(None) == {}
+    assert split_location("(assumed)") == {}
+
+def test_feature_record():
+    record = feature_record("Post Reactions", FEATURES[0], failures=3)
+    assert record["type"] == "feature" and record["status"] == "implemented"
+    assert (record["path"], record["line"], record["logged_failures"]) == ("lib/actions.ts", 12, 3)
+    assert "path" not in feature_record("Post Reactions", FEATURES[2])
+
+def test_jsonl():
+    lines = [json.loads(line) for line in _write("jsonl").splitlines()]
+    assert lines[0] == {"type": "header", "schema": SCHEMA, "version": SCHEMA_VERSION, "analyzer": ANALYZER_VERSION}
+    assert lines[1:] == _records()
+
+def test_json():
+    document = json.loads(_write("json"))
+    assert (document["schema"], document["version"], document["analyzer"]) == (SCHEMA, SCHEMA_VERSION, ANALYZER_VERSION)
+    assert document["records"] == _records()
+
+def test_json_without_records():
+    handle = io.StringIO()
+    open_writer("json", handle).close()
+    assert json.loads(handle.getvalue())["records"] == []
+
+def test_sarif():
+    document = json.loads(_write("sarif"))
+    assert document["version"] == "2.1.0"
+    (run,) = document["runs"]
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == list(RULES)
+
+    # Implemented features, UI features that aren't notification types and the summary have no result
+    results = run["results"]
+    assert [(result["ruleId"], result["level"]) for result in results] == [
+        ("notification-type-partial", "note"),
+        ("notification-type-missing", "warning"),
+        ("type-constraint", "error"),
+        ("type-constraint-unverified", "note"),
+    ]
+    assert results[0]["locations"][0]["physicalLocation"] == {
+        "artifactLocation": {"uri": "components/Follow.tsx"}, "region": {"startLine": 40},
+    }
+    assert "locations" not in results[1]
+    assert results[3]["locations"][0]["physicalLocation"] == {"artifactLocation": {"uri": "supabase/migrations/"}}
+
+def test_sarif_skips_issues_already_reported_as_features():
+    handle = io.StringIO()
+    writer = open_writer("sarif", handle)
+    writer.write(issue_record({**ISSUE, "rule": "notification-type-missing"}))
+    writer.close()
+    assert json.loads(handle.getvalue())["runs"][0]["results"] == []
+
+def test_writers_stream_each_record():
+    handle = io.StringIO()
+    writer = open_writer("jsonl", handle)
+    writer.write(_records()[0])
+    # Visible before the writer is closed
+    assert json.loads(handle.getvalue().splitlines()[1])["name"] == "admire"
+    assert writer.count == 1
+
+def test_open_writer_rejects_text():
+    with pytest.raises(ValueError, match="no record writer for format 'text'"):
+        open_writer("text", io.StringIO())
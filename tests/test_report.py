@@ -0,0 +1,47 @@
+import pytest
+
+from notification_analysis import NOTIFICATION_PANEL, POST_PAGE, _FeatureLocator, build_issues
+from pinkquill_analysis.model import Status
+
+PANEL = """export default function NotificationPanel() {
+  const getNotificationLink = (notification) => {
+    if (notification.type === 'reply' && notification.comment_id) {
+      return `/post/${notification.post_id}?comment=${notification.comment_id}`;
+    }
+    return `/post/${notification.post_id}`;
+  };
+}
+"""
+
+PAGE = """export default function PostPage() {
+  const commentIdFromUrl = searchParams.get('comment');
+  useEffect(() => {
+    document.getElementById(`comment-${commentIdFromUrl}`)?.scrollIntoView({ block: 'center' });
+  }, [commentIdFromUrl]);
+}
+"""
+
+def _comment_link(root):
+    return _FeatureLocator(root).comment_link("Comment reply → Specific comment", "Scrolls to the comment")
+
+def test_comment_link_implemented(write_tree):
+    feature = _comment_link(write_tree({NOTIFICATION_PANEL: PANEL, POST_PAGE: PAGE}))
+    assert feature.status == Status.IMPLEMENTED
+    assert feature.location == f"{POST_PAGE}:4"
+    assert build_issues({"Navigation/Linking": [feature]}) == []
+
+@pytest.mark.parametrize("files, notes, location", [
+    ({NOTIFICATION_PANEL: PANEL.replace("?comment=${notification.comment_id}", "")},
+     "without the comment id", f"{NOTIFICATION_PANEL}:2-7"),
+    ({NOTIFICATION_PANEL: PANEL, POST_PAGE: PAGE.replace(".scrollIntoView", ".focus")},
+     "doesn't scroll to the comment", f"{NOTIFICATION_PANEL}:4"),
+    ({NOTIFICATION_PANEL: PANEL}, "doesn't read it", f"{NOTIFICATION_PANEL}:4"),
+])
+def test_comment_link_partial_is_a_navigation_issue(write_tree, files, notes, location):
+    feature = _comment_link(write_tree(files))
+    assert feature.status == Status.PARTIAL
+    assert notes in feature.notes
+    assert feature.location == location
+
+    (issue,) = build_issues({"Navigation/Linking": [feature]})
+    assert (issue["rule"], issue["priority"], issue["location"]) == ("navigation", "LOW", location)
@@ -0,0 +1,100 @@
+import math
+
+import pytest
+
+from pinkquill_analysis import scan_tree
+from pinkquill_analysis.advisor import INDEX_FILTER
+from pinkquill_analysis.payload import load_table_columns
+from pinkquill_analysis.retention import DAYS_PER_MONTH, STRATEGIES, Growth, plan_retention
+from pinkquill_analysis.schema import replay_migrations
+
+FILES = {
+    "supabase/migrations/20240101_init.sql": """create table notifications (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null,
+  actor_id uuid not null,
+  type text not null,
+  post_id uuid,
+  content text,
+  community_id uuid,
+  read boolean default false,
+  created_at timestamptz default now()
+);
+create index idx_notifications_unread on notifications (user_id) where read = false;
+""",
+    "lib/hooks/useNotifications.ts": """export async function createNotification(userId: string, actorId: string, type: string, postId?: string, content?: string) {
+  await supabase.from('notifications').insert({ user_id: userId, actor_id: actorId, type, post_id: postId, content })
+}
+""",
+    "lib/hooks/useUnreadCount.ts": """export function useUnreadCount(userId: string) {
+  const fetchCount = async () => {
+    const { count } = await supabase.from('notifications').select('*', { count: 'exact', head: true }).eq('user_id', userId).eq('read', false)
+    return count
+  }
+}
+""",
+    "lib/actions.ts": """import { createNotification } from './hooks/useNotifications'
+
+export async function admire(userId: string, actorId: string, postId: string, title: string) {
+  await createNotification(userId, actorId, 'admire', postId, title.substring(0, 40))
+}
+
+export async function follow(userId: string, actorId: string) {
+  await createNotification(userId, actorId, 'follow')
+}
+""",
+}
+
+GROWTH = Growth("test", users=1000, rows_per_day=2000.0, types={"admire": 0.5, "follow": 0.5}, read_probability=0.5)
+
+def _plan(root, **options):
+    schema = replay_migrations(root)
+    return plan_retention(root, schema, load_table_columns(root, schema), scan_tree(root, workers=1), GROWTH, **options)
+
+def test_unread_rows_per_user():
+    # Unread after k days with probability (1 - p)^k, summed over every day's rows
+    assert GROWTH.unread() == pytest.approx(2 / math.log(2))
+    assert GROWTH.unread(1) == pytest.approx(1 / math.log(2))
+    assert Growth("test", 10, 10.0, read_probability=1.0).unread() == 0.0
+    assert Growth("test", 10, 10.0, read_probability=0.0).unread() == math.inf
+
+def test_row_model_follows_the_call_sites(write_tree):
+    row = _plan(write_tree(FILES), months=(1,)).row
+    widths = {column.name: (column.filled, column.bytes, column.source) for column in row.columns}
+
+    assert widths["user_id"] == (1.0, 16.0, "createNotification")
+    # Half the rows are admires, which pass a post and a 40-character excerpt
+    assert widths["post_id"] == (0.5, 16.0, "createNotification")
+    assert widths["content"] == (0.5, 41.0, "createNotification")
+    assert widths["type"] == (1.0, 7.0, "createNotification")
+    # Not inserted and no default
+    assert widths["community_id"][0::2] == (0.0, "never set")
+    assert widths["read"] == (1.0, 1.0, "default")
+    # 23-byte header and a 2-byte null bitmap, 92.5 bytes of data, each 8-byte aligned, plus the line pointer
+    assert row.data_bytes == 92.5
+    assert row.tuple_bytes == 32 + 96 + 4 and row.rows_per_page == 61
+
+def test_projections(write_tree):
+    plan = _plan(write_tree(FILES), months=(12, 1), ttl=90 * 86400.0, archive_after=30 * 86400.0)
+    assert plan.months == [1, 12]
+    assert [projection.strategy for projection in plan.projections] == [name for name in STRATEGIES for _ in plan.months]
+    assert plan.count.access == INDEX_FILTER and plan.count.columns == ["user_id"]
+
+    (_, keep), (_, ttl), (_, archive) = plan.strategy("keep"), plan.strategy("ttl"), plan.strategy("archive")
+    assert keep.rows == pytest.approx(2000 * 12 * DAYS_PER_MONTH)
+    assert (ttl.rows, ttl.churn_per_day) == (2000 * 90, 2000)
+    # Read rows past the cutoff move out; the few still unread stay
+    assert archive.rows == pytest.approx(2000 * 30, rel=1e-6)
+    assert archive.rows + archive.archived_rows == pytest.approx(keep.rows)
+    assert ttl.count_pages < keep.count_pages
+
+    first, last = plan.strategy("partition")
+    # Three months of TTL plus the one being filled, each with its own index
+    assert last.rows == pytest.approx(2000 * 4 * DAYS_PER_MONTH)
+    assert first.rows == pytest.approx(plan.strategy("keep")[0].rows)
+
+    for counter in plan.strategy("counter"):
+        assert counter.count_pages == counter.indexed_count_pages == 4
+        assert counter.extra_bytes > 0
+    # The partial index holds only unread rows, so its lookups stay flat as the table grows
+    assert [projection.indexed_count_pages for projection in plan.strategy("keep")] == [3, 4]
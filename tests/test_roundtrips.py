@@ -0,0 +1,112 @@
+from notification_analysis import build_issues
+from pinkquill_analysis import scan_tree
+from pinkquill_analysis.roundtrips import NOTIFY, RoundTripModel
+from pinkquill_analysis.scanner import NOTIFY_FUNCTION
+
+ACTIONS = "lib/actions.ts"
+COMPOSER = "components/Composer.tsx"
+
+FILES = {
+    "lib/notifications.ts": """export async function createNotification(userId: string, actorId: string, type: string) {
+  const { error } = await supabase.from('notifications').insert({ user_id: userId, actor_id: actorId, type })
+  if (error) {
+    await supabase.from('error_log').insert({ message: error.message })
+  }
+}
+""",
+    ACTIONS: """import { createNotification } from './notifications'
+
+export async function notifyMentions(postId: string, userIds: string[], actorId: string) {
+  for (const userId of userIds) {
+    await createNotification(userId, actorId, 'mention')
+  }
+}
+
+export async function loadProfiles(ids: string[]) {
+  return Promise.all(ids.map((id) => supabase.from('profiles').select('*').eq('id', id).single()))
+}
+
+export async function savePost(postId: string, draft: boolean) {
+  if (draft) {
+    await supabase.from('drafts').upsert({ id: postId })
+  } else {
+    await supabase.from('posts').update({ published: true }).eq('id', postId)
+    await supabase.rpc('refresh_feed', { post_id: postId })
+  }
+}
+
+export async function inviteAll(groups: string[][]) {
+  for (const group of groups) {
+    for (const userId of group) {
+      await supabase.from('invites').insert({ user_id: userId })
+    }
+  }
+}
+
+export async function retry(postId: string) {
+  await supabase.from('posts').select('id').eq('id', postId)
+  await retry(postId)
+}
+""",
+    COMPOSER: """import { notifyMentions } from '../lib/actions'
+
+export default function Composer({ post, mentions, actor }) {
+  const publish = async () => {
+    await supabase.from('posts').insert({ id: post.id })
+    await notifyMentions(post.id, mentions, actor)
+  }
+  return <button onClick={() => notifyMentions(post.id, mentions, actor)}>Publish</button>
+}
+""",
+}
+
+def _model(root, fan_out=10):
+    scans = scan_tree(root, workers=1)
+    return RoundTripModel([(scan.path, scan.database_calls) for scan in scans], NOTIFY_FUNCTION, fan_out)
+
+def _costs(model):
+    return {cost.handler: (cost.requests, cost.serial, cost.emits_notifications) for cost in model.handler_costs()}
+
+def test_handler_costs(write_tree):
+    model = _model(write_tree(FILES))
+    assert _costs(model) == {
+        "inviteAll": (100, 100, False),
+        # Imported across files, on top of the component's own insert
+        "Composer.publish": (11, 11, True),
+        "Composer.onClick@8": (10, 10, True),
+        "notifyMentions": (10, 10, True),
+        # Promise.all sends the batch concurrently
+        "loadProfiles": (10, 1, False),
+        # The dearer arm of the if/else
+        "savePost": (2, 2, False),
+        # Recursion is counted once
+        "retry": (1, 1, False),
+        # The error branch isn't the request path
+        "createNotification": (1, 1, False),
+    }
+    assert [cost.handler for cost in model.handler_costs()][:2] == ["inviteAll", "Composer.publish"]
+
+def test_costs_scale_with_the_fan_out(write_tree):
+    costs = _costs(_model(write_tree(FILES), fan_out=3))
+    assert costs["inviteAll"] == (9, 9, False)
+    assert costs["Composer.publish"] == (4, 4, True)
+    assert costs["loadProfiles"] == (3, 1, False)
+
+def test_batch_candidates(write_tree):
+    candidates = _model(write_tree(FILES)).batch_candidates()
+    assert [(candidate.location, candidate.requests) for candidate in candidates] == [
+        (f"{ACTIONS}:25", 100), (f"{ACTIONS}:5", 10), (f"{ACTIONS}:10", 10),
+    ]
+    assert [candidate.suggestion for candidate in candidates] == [
+        "collect the rows and send one .insert([...]) to invites",
+        'build the rows first and send one supabase.from("notifications").insert([...])',
+        "replace the per-item filter with one .in(column, ids) query on profiles",
+    ]
+
+def test_per_recipient_notifications_are_an_issue(write_tree):
+    model = _model(write_tree(FILES))
+    assert [candidate.call.kind for candidate in model.batch_candidates()].count(NOTIFY) == 1
+
+    (issue,) = [issue for issue in build_issues({}, roundtrips=model) if issue["rule"] == "notification-per-recipient"]
+    assert issue["location"] == f"{ACTIONS}:5 (notifyMentions)"
+    assert issue["detail"] == "10 inserts for 10 recipients (inside for)"
@@ -0,0 +1,83 @@
+from pinkquill_analysis.coverage import classify_notification_types
+from pinkquill_analysis.model import Status
+from pinkquill_analysis.scanner import discover_source_files, scan_files, scan_source
+
+ACTIONS = """import { createNotification } from '@/lib/notifications'
+import type { ReactionType } from './types'
+
+export async function admirePost(userId: string, actorId: string) {
+  // createNotification(userId, actorId, 'snap')
+  await createNotification(userId, actorId, 'admire', { postId: '1' })
+}
+
+export async function react(userId: string, actorId: string, kind: ReactionType) {
+  await createNotification(userId, actorId, kind)
+}
+
+export async function other(userId: string, actorId: string, kind: string) {
+  const labels = ['follow']
+  await createNotification(userId, actorId, kind)
+}
+"""
+
+TYPES = "export type ReactionType = 'ovation' | 'support'\n"
+
+REQUIRED = {name: f"{name} notification" for name in ("admire", "snap", "ovation", "support", "follow")}
+CATEGORIES = {"Test": list(REQUIRED)}
+
+def _classified(scans):
+    return {feature.name: feature for feature in classify_notification_types(scans, REQUIRED, CATEGORIES)["Test"]}
+
+def test_discovery_skips_tests_typings_and_dependencies(write_tree):
+    root = write_tree({
+        "lib/actions.ts": "",
+        "components/Panel.tsx": "",
+        "app/page.tsx": "",
+        "lib/actions.test.ts": "",
+        "lib/env.d.ts": "",
+        "lib/__tests__/helpers.ts": "",
+        "components/node_modules/dep/index.ts": "",
+        "app/.next/server.ts": "",
+        "lib/readme.md": "",
+        "scripts/seed.ts": "",
+    })
+    assert discover_source_files(root) == ["app/page.tsx", "components/Panel.tsx", "lib/actions.ts"]
+
+def test_call_sites_record_handler_line_and_type():
+    scan = scan_source("lib/actions.ts", ACTIONS)
+
+    # The commented-out call is not a call site
+    assert [(site.line, site.handler, site.type_expression) for site in scan.call_sites] == [
+        (6, "admirePost", "'admire'"),
+        (10, "react", "kind"),
+        (15, "other", "kind"),
+    ]
+    assert scan.call_sites[0].type_literals == ["admire"]
+    assert scan.call_sites[1].is_dynamic
+    assert "follow" in scan.literals
+
+def test_files_without_calls_are_not_parsed():
+    scan = scan_source("lib/format.ts", "export const pad = (value: string) => value.padStart(2, '0')\n")
+    assert scan.call_sites == [] and scan.database_calls == [] and scan.types is None
+
+def test_classification(write_tree):
+    root = write_tree({"lib/actions.ts": ACTIONS, "lib/types.ts": TYPES})
+    features = _classified(scan_files(root, discover_source_files(root), workers=1))
+
+    assert features["admire"].status == Status.IMPLEMENTED
+    assert features["admire"].location == "lib/actions.ts:6"
+    # Resolved through the alias imported from lib/types.ts
+    assert features["ovation"].status == features["support"].status == Status.IMPLEMENTED
+    assert features["ovation"].location == "lib/actions.ts:10"
+    # Only a literal beside a createNotification() whose `string` argument can't be resolved
+    assert features["follow"].status == Status.PARTIAL
+    assert features["follow"].location == "lib/actions.ts:15"
+    assert features["snap"].status == Status.MISSING
+    assert "1 call sites pass an unresolved variable" in features["snap"].notes
+
+def test_unresolved_alias_leaves_its_types_missing(write_tree):
+    root = write_tree({"lib/actions.ts": ACTIONS})
+    features = _classified(scan_files(root, discover_source_files(root), workers=1))
+
+    assert features["admire"].status == Status.IMPLEMENTED
+    assert features["ovation"].status == Status.MISSING
@@ -0,0 +1,122 @@
+import json
+import os
+
+from pinkquill_analysis import schema as schema_module
+from pinkquill_analysis.index import INDEX_DIRECTORY
+from pinkquill_analysis.schema import (
+    SNAPSHOT_FILENAME,
+    Schema,
+    discover_migrations,
+    load_schema,
+    replay_migrations,
+    verify_type_constraint,
+)
+
+REQUIRED = {"admire": "User admired your post", "follow": "User followed you", "snap": "User snapped for your post"}
+
+INIT = "supabase/migrations/20240101_init.sql"
+TYPES = "supabase/migrations/20240201_types.sql"
+
+FILES = {
+    "lib/reactions-setup.sql": "create table reactions (id uuid primary key, post_id uuid not null);\n",
+    INIT: """create table public.notifications (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null references profiles(id),
+  type text not null,
+  constraint notifications_type_check check (type in ('admire', 'follow', 'poke'))
+);
+create index idx_notifications_user on notifications (user_id, created_at desc);
+alter publication supabase_realtime add table notifications;
+alter table notifications enable row level security;
+""",
+}
+
+NEXT = {
+    TYPES: "alter table notifications drop constraint notifications_type_check;\n"
+           "alter table notifications add constraint notifications_type_check "
+           "check (type = any (array['admire'::text, 'follow'::text, 'snap'::text]));\n",
+}
+
+def _snapshot_path(root):
+    return os.path.join(root, INDEX_DIRECTORY, SNAPSHOT_FILENAME)
+
+def test_replay_order_and_model(write_tree):
+    root = write_tree({**FILES, **NEXT})
+    assert discover_migrations(root) == ["lib/reactions-setup.sql", INIT, TYPES]
+
+    schema = replay_migrations(root)
+    notifications = schema.tables["notifications"]
+    assert list(notifications.columns) == ["id", "user_id", "type"]
+    assert notifications.columns["user_id"].references == "profiles" and not notifications.columns["user_id"].nullable
+    assert notifications.rls_enabled and notifications.created_in == f"{INIT}:1"
+    assert [index.name for index in schema.indexes_on("notifications")] == ["notifications_pkey", "idx_notifications_user"]
+    assert schema.published("notifications") and not schema.published("reactions")
+    # The later migration replaced the constraint
+    assert schema.check("notifications", "notifications_type_check").allowed_values == ["admire", "follow", "snap"]
+
+def test_verify_type_constraint(write_tree):
+    check = verify_type_constraint(replay_migrations(write_tree(FILES)), REQUIRED)
+    assert check.verified
+    assert (check.missing, check.unexpected) == (["snap"], ["poke"])
+
+    schema = replay_migrations(write_tree(NEXT))
+    assert verify_type_constraint(schema, REQUIRED).missing == []
+
+def test_verify_type_constraint_without_a_readable_constraint(write_tree):
+    schema = replay_migrations(write_tree({INIT: FILES[INIT].replace("type in ('admire', 'follow', 'poke')", "length(type) < 40")}))
+    check = verify_type_constraint(schema, REQUIRED)
+    assert check.constraint is not None and not check.verified
+    assert check.missing == []
+
+    check = verify_type_constraint(Schema(), REQUIRED)
+    assert check.constraint is None and not check.verified
+
+def test_appended_migration_resumes_from_the_snapshot(write_tree):
+    root = write_tree(FILES)
+    cold, stats = load_schema(root)
+    assert (stats.parsed, stats.replayed, stats.from_snapshot) == (2, 2, 0)
+
+    warm, stats = load_schema(root)
+    assert (stats.parsed, stats.replayed, stats.from_snapshot) == (0, 0, 2)
+    assert warm == cold
+
+    write_tree(NEXT)
+    schema, stats = load_schema(root)
+    assert (stats.parsed, stats.replayed, stats.from_snapshot) == (1, 1, 2)
+    assert schema == replay_migrations(root)
+
+def test_edited_migration_replays_from_the_start(write_tree):
+    root = write_tree({**FILES, **NEXT})
+    load_schema(root)
+    write_tree({"lib/reactions-setup.sql": FILES["lib/reactions-setup.sql"].replace("post_id", "comment_id")})
+
+    schema, stats = load_schema(root)
+    assert (stats.parsed, stats.replayed, stats.from_snapshot) == (1, 3, 0)
+    assert "comment_id" in schema.tables["reactions"].columns
+
+def test_snapshot_version_change_keeps_the_parses(write_tree, monkeypatch):
+    root = write_tree(FILES)
+    expected, _ = load_schema(root)
+
+    monkeypatch.setattr(schema_module, "SNAPSHOT_VERSION", "test")
+    schema, stats = load_schema(root)
+    assert (stats.parsed, stats.replayed, stats.from_snapshot) == (0, 2, 0)
+    assert schema == expected
+    _, stats = load_schema(root)
+    assert stats.from_snapshot == 2
+
+def test_snapshot_that_doesnt_fit_the_model_is_a_miss(write_tree):
+    root = write_tree(FILES)
+    expected, _ = load_schema(root)
+    with open(_snapshot_path(root), "r", encoding="utf-8") as handle:
+        cache = json.load(handle)
+    # As if written by a model with a field this one doesn't have
+    cache["snapshot"]["schema"]["tables"]["notifications"]["columns"]["type"]["collation"] = "C"
+    with open(_snapshot_path(root), "w", encoding="utf-8") as handle:
+        json.dump(cache, handle)
+
+    schema, stats = load_schema(root)
+    assert (stats.replayed, stats.from_snapshot) == (2, 0)
+    assert schema == expected
+    _, stats = load_schema(root)
+    assert stats.from_snapshot == 2
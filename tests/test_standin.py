@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from pinkquill_analysis.payload import TableColumns
+from pinkquill_analysis.realtime import scan_subscriptions
+from pinkquill_analysis.schema import replay_migrations
+from pinkquill_analysis.standin import _CLOSE, _TEXT, _frame, _read_frame, load_hooks, run_load
+
+HOOKS = "lib/hooks/useNotifications.ts"
+
+SOURCE = """export function useNotifications(userId: string) {
+  const fetchNotifications = async () => {
+    const { data } = await supabase.from('notifications').select('id, type, read, actor:profiles!notifications_actor_id_fkey (username)').eq('user_id', userId).order('created_at', { ascending: false }).limit(50)
+    return data
+  }
+  useEffect(() => {
+    const channel = supabase.channel(`notifications:${userId}`)
+      .on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'notifications', filter: `user_id=eq.${userId}` }, () => fetchNotifications())
+      .subscribe()
+    return () => { supabase.removeChannel(channel) }
+  }, [userId])
+}
+
+export function useUnreadCount(userId: string) {
+  const fetchCount = async () => {
+    const { count } = await supabase.from('notifications').select('*', { count: 'exact', head: true }).eq('user_id', userId).eq('read', false)
+    return count
+  }
+  useEffect(() => {
+    const channel = supabase.channel(`unread:${userId}`)
+      .on('postgres_changes', { event: '*', schema: 'public', table: 'notifications', filter: `user_id=eq.${userId}` }, () => fetchCount())
+      .subscribe()
+    return () => { supabase.removeChannel(channel) }
+  }, [userId])
+}
+
+export function useFeed() {
+  useEffect(() => {
+    const channel = supabase.channel('posts').on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'posts' }, () => {}).subscribe()
+  }, [])
+}
+"""
+
+MIGRATION = {"supabase/migrations/20240101_init.sql": """create table notifications (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null,
+  actor_id uuid,
+  type text not null,
+  read boolean default false,
+  created_at timestamptz default now()
+);
+"""}
+
+NAMES = ("useNotifications", "useUnreadCount")
+
+@pytest.fixture
+def tables(write_tree):
+    return TableColumns(replay_migrations(write_tree(MIGRATION)), {}, {})
+
+def _read(data: bytes):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_frame(reader)
+    return asyncio.run(read())
+
+@pytest.mark.parametrize("size", [0, 125, 126, 65_535, 65_536])
+@pytest.mark.parametrize("mask", [False, True])
+def test_frames_round_trip(size, mask):
+    data = bytes(index % 251 for index in range(size))
+    frame = _frame(_TEXT, data, mask=mask)
+    assert _read(frame) == (_TEXT, data)
+    if mask and size:
+        assert data not in frame
+
+def test_fragmented_frames_are_refused():
+    with pytest.raises(ValueError):
+        _read(bytes((_TEXT, 1)) + b"x")
+    assert _read(_frame(_CLOSE, b"")) == (_CLOSE, b"")
+
+def test_load_hooks(tables):
+    hooks = load_hooks(scan_subscriptions(HOOKS, SOURCE), tables, NAMES)
+
+    # useFeed's broadcast channel isn't one of a user's own
+    assert [(hook.owner, hook.topic("u1")) for hook in hooks] == [
+        ("useNotifications", "realtime:notifications:u1"), ("useUnreadCount", "realtime:unread:u1")]
+    assert hooks[1].config("u1") == [{"event": "*", "schema": "public", "table": "notifications", "filter": "user_id=eq.u1"}]
+    assert [[refetch.query.handler for refetch in hook.refetches] for hook in hooks] == [["fetchNotifications"], ["fetchCount"]]
+    # read = false narrows the count; the list is bound by user_id only
+    assert [hook.refetches[0].literals for hook in hooks] == [0, 1]
+
+    with pytest.raises(RuntimeError, match="useFollowRequests"):
+        load_hooks(scan_subscriptions(HOOKS, SOURCE), tables, ("useNotifications", "useFollowRequests"))
+
+def test_run_load(tables):
+    hooks = load_hooks(scan_subscriptions(HOOKS, SOURCE), tables, NAMES)
+    result = run_load(hooks, tables, users=20, sessions=2, events=60, burst=30, interval=0.01, workers=2)
+
+    assert result.settled
+    assert (result.processes, result.sockets, result.subscriptions) == (2, 40, 80)
+    # Each insert reaches both of its recipient's channels in both sessions, and each rereads once
+    assert result.deliveries == result.selects == 60 * 2 * 2
+    assert len(result.latencies) == len(result.round_trips) == 240
+    assert len(result.messages) == 40 and sum(result.messages) == 480
+    assert all(latency >= 0 for latency in result.latencies)
+
+    with pytest.raises(ValueError, match="none of the hooks hears inserts on posts"):
+        run_load(hooks, tables, table="posts", users=2, events=1)
@@ -0,0 +1,88 @@
+import pytest
+
+from pinkquill_analysis.scanner import scan_source
+from pinkquill_analysis.typeflow import PUNCTUATOR, REGEX, STRING, ModuleFlow, TypeResolver, TypeSet, tokenize
+
+TYPES = "lib/types.ts"
+HOOKS = "lib/hooks/index.ts"
+ACTIONS = "lib/actions.ts"
+
+FILES = {
+    TYPES: "export type ReactionType = 'admire' | 'snap'\nexport type Extra = ReactionType | \"flag\"\n",
+    HOOKS: "export * from '../types'\nexport { Extra as ExtraType } from '../types'\n",
+    ACTIONS: """import { ReactionType, ExtraType } from '@/lib/hooks'
+
+export async function react(userId: string, actorId: string, reaction: ReactionType) {
+  await createNotification(userId, actorId, reaction)
+}
+
+export async function flag(userId: string, actorId: string, kind: ExtraType) {
+  await createNotification(userId, actorId, kind ?? undefined)
+}
+
+export async function relay(userId: string, actorId: string, event) {
+  await createNotification(userId, actorId, event.kind)
+}
+""",
+}
+
+def _argument(code: str) -> TypeSet:
+    return ModuleFlow(tokenize(code)).argument(code.rindex("f(") + 1, 0)
+
+@pytest.mark.parametrize("code, literals", [
+    ('f(a ? "x" : "y")\n', ["x", "y"]),
+    ("const t = 'y'\nf(t ?? 'x')\n", ["x", "y"]),
+    ("f(a && 'x')\n", ["x"]),
+    ("f(('x' as const))\n", ["x"]),
+    ("f(a as 'x' | 'y')\n", ["x", "y"]),
+    # Without semicolons the declaration ends at the line break
+    ('const t = a ? "x" : "y"\nf(t)\n', ["x", "y"]),
+    ("async function g(a) {\n  const t = a ? 'x' : 'y'\n  await f(t)\n}\n", ["x", "y"]),
+    ("let t = 'a'\nif (c) t = 'b'\nf(t)\n", ["a", "b"]),
+    ("const t = c\n  ? 'x'\n  : 'y'\nf(t)\n", ["x", "y"]),
+    ("function g(t: 'x' | 'y' | null) {\n  f(t)\n}\n", ["x", "y"]),
+    # The inner declaration shadows the outer one
+    ("const t = 'x'\nfunction g() {\n  const t = 'y'\n  f(t)\n}\n", ["y"]),
+])
+def test_argument_literals(code, literals):
+    assert _argument(code) == TypeSet(literals)
+
+@pytest.mark.parametrize("code", [
+    "f(event.kind)\n",
+    "f(`re/${x}`)\n",
+    "function g(t) {\n  f(t)\n}\n",
+    "const t = pick(\n  'x')\nf(t)\n",
+])
+def test_arguments_that_cant_be_followed(code):
+    assert _argument(code).unknown
+
+def test_unknown_alternatives_keep_the_literals():
+    assert _argument("f(a ? 'x' : event.kind)\n") == TypeSet(["x"], unknown=True)
+
+def test_tokenize_regex_and_division():
+    tokens = tokenize("const a = /x\\/y/g.test(s) ? 1.5e3 / 2 : 'z'\n")
+    assert [(token.kind, token.text) for token in tokens.items if token.kind in (REGEX, STRING) or token.text == "/"] == [
+        (REGEX, "/x\\/y/g"), (PUNCTUATOR, "/"), (STRING, "'z'"),
+    ]
+
+def test_resolver_follows_imports_and_reexports():
+    scans = {path: scan_source(path, text) for path, text in FILES.items()}
+    resolver = TypeResolver({path: scan.types for path, scan in scans.items() if scan.types})
+
+    resolved = [resolver.resolve(ACTIONS, site.type_set) for site in scans[ACTIONS].call_sites]
+    assert resolved == [
+        (frozenset({"admire", "snap"}), True),
+        # Renamed on re-export, and an alias of an alias
+        (frozenset({"admire", "snap", "flag"}), True),
+        (frozenset(), False),
+    ]
+
+def test_resolver_stops_at_alias_cycles_and_missing_modules():
+    scans = {
+        "a.ts": scan_source("a.ts", "import { B } from './b'\nexport type A = B | 'a'\n"),
+        "b.ts": scan_source("b.ts", "import { A } from './a'\nexport type B = A | 'b'\n"),
+    }
+    resolver = TypeResolver({path: scan.types for path, scan in scans.items()})
+    literals, _ = resolver.resolve("a.ts", TypeSet(names=["A"]))
+    assert literals == {"a", "b"}
+    assert resolver.resolve("a.ts", TypeSet(names=["Missing"])) == (frozenset(), False)
@@ -0,0 +1,120 @@
+import os
+
+import notification_analysis
+from pinkquill_analysis import watch
+from pinkquill_analysis.index import ScanIndex, incremental_scan
+from pinkquill_analysis.watch import RESCAN_ALL, TreeState
+
+from .conftest import touch
+
+ACTIONS = "lib/actions.ts"
+FOLLOW = "components/Follow.tsx"
+HOOK = "lib/hooks/useNotifications.ts"
+
+FILES = {
+    ACTIONS: "export async function admire(u: string, a: string) {\n"
+             "  await createNotification(u, a, 'admire')\n}\n",
+    FOLLOW: "export async function follow(u: string, a: string) {\n"
+            "  await createNotification(u, a, 'follow')\n}\n",
+}
+
+def _state(root):
+    index = ScanIndex(root)
+    scans, _ = incremental_scan(root, workers=1, index=index)
+    return TreeState(root, scans, index)
+
+def _rerun(root):
+    _, stats = incremental_scan(root, workers=1)
+    return stats
+
+def test_edit_is_rescanned_and_saved_to_the_index(write_tree):
+    root = write_tree(FILES)
+    state = _state(root)
+    write_tree({ACTIONS: FILES[ACTIONS].replace("'admire'", "'snap'")})
+
+    assert state.apply({ACTIONS}) == [ACTIONS]
+    assert state.scans[ACTIONS].call_sites[0].type_literals == ["snap"]
+    # The next run finds the index current
+    stats = _rerun(root)
+    assert (stats.rescanned, stats.stat_hits) == (0, 2)
+
+def test_edits_the_report_doesnt_read_are_not_relevant(write_tree):
+    root = write_tree(FILES)
+    state = _state(root)
+
+    touch(os.path.join(root, ACTIONS))
+    write_tree({FOLLOW: FILES[FOLLOW] + "// follows\n"})
+    assert state.apply({ACTIONS, FOLLOW}) == []
+    assert _rerun(root).stat_hits == 2
+
+def test_removed_and_added_files(write_tree):
+    root = write_tree(FILES)
+    state = _state(root)
+    os.remove(os.path.join(root, FOLLOW))
+    write_tree({"app/page.tsx": "export default function Page() { return null }\n"})
+
+    # The page has nothing the report reads
+    assert state.apply({FOLLOW, "app/page.tsx"}) == [FOLLOW]
+    assert [scan.path for scan in state.ordered()] == ["app/page.tsx", ACTIONS]
+    stats = _rerun(root)
+    assert (stats.rescanned, stats.removed, stats.stat_hits) == (0, 0, 2)
+
+def test_rescan_all(write_tree):
+    root = write_tree(FILES)
+    state = _state(root)
+    write_tree({ACTIONS: FILES[ACTIONS].replace("'admire'", "'snap'")})
+    os.remove(os.path.join(root, FOLLOW))
+
+    assert state.apply({RESCAN_ALL}) == [FOLLOW, ACTIONS]
+
+def test_without_an_index(write_tree):
+    root = write_tree(FILES)
+    scans, _ = incremental_scan(root, workers=1)
+    state = TreeState(root, scans)
+    write_tree({ACTIONS: FILES[ACTIONS].replace("'admire'", "'snap'")})
+
+    assert state.apply({ACTIONS}) == [ACTIONS]
+    assert _rerun(root).rescanned == 1
+
+class _ScriptedWatcher:
+    """Applies one edit per wait() and reports it; Ctrl+C once the script runs out."""
+
+    def __init__(self, root, write_tree, edits):
+        self.root, self.write_tree, self.edits = root, write_tree, list(edits)
+        self.closed = False
+
+    def wait(self):
+        if not self.edits:
+            raise KeyboardInterrupt
+        files = self.edits.pop(0)
+        self.write_tree(files)
+        return set(files)
+
+    def close(self):
+        self.closed = True
+
+def test_watch_reports_only_changed_sections(write_tree, monkeypatch, capsys):
+    hook = ("export function useNotifications(userId: string) {\n"
+            "  const fetchAll = async () => {\n"
+            "    return supabase.from('notifications').select('*').eq('user_id', userId).limit(50)\n"
+            "  }\n}\n")
+    root = write_tree({**FILES, HOOK: hook})
+    edits = [
+        {FOLLOW: FILES[FOLLOW] + "// follows\n"},
+        # Query files are always re-advised; this edit leaves every section as it was
+        {HOOK: hook + "// fetches\n"},
+        {ACTIONS: FILES[ACTIONS].replace("'admire'", "'snap'")},
+    ]
+    watcher = _ScriptedWatcher(root, write_tree, edits)
+    monkeypatch.setattr(watch, "create_watcher", lambda *args, **kwargs: watcher)
+
+    notification_analysis.watch_analysis_report(root, workers=1)
+    output = capsys.readouterr().out
+    initial, _, updates = output.partition("Ctrl+C to stop")
+
+    assert "NOTIFICATION" in initial
+    # The comment edits print nothing; the type change re-reports its sections only
+    assert FOLLOW not in updates and HOOK not in updates
+    assert updates.count(" changed: ") == 1
+    assert f"{ACTIONS} changed: " in updates
+    assert watcher.closed
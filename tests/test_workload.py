@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from notification_analysis import _workload_lines
+from pinkquill_analysis import workload
+from pinkquill_analysis.workload import NOTIFICATION_TYPES, WorkloadProfile, generate_rows, generate_workload
+
+COMMENT, REPLY = NOTIFICATION_TYPES.index("comment"), NOTIFICATION_TYPES.index("reply")
+
+def _first_day(profile: WorkloadProfile):
+    rng = np.random.default_rng(profile.seed)
+    followers, activity, reach, owners, _ = workload._population(rng, profile)
+    return workload._generate_day(rng, profile, 0, followers, activity, reach, owners, {"post": 0, "comment": 0}).arrays()
+
+def test_replies_go_to_an_earlier_comment_on_the_post():
+    columns = _first_day(WorkloadProfile(users=2_000, comments=0.2, reply_share=0.5))
+    threads = (columns["type"] == COMMENT) | (columns["type"] == REPLY)
+    comments = {int(comment): (int(post), int(actor), float(time)) for comment, post, actor, time
+                in zip(columns["comment"][threads], columns["post"][threads], columns["actor"][threads], columns["time"][threads])}
+
+    replies = np.flatnonzero(columns["type"] == REPLY)
+    assert len(replies) > 100
+    for row in replies:
+        comment, post, time = int(columns["comment"][row]), int(columns["post"][row]), float(columns["time"][row])
+        earlier = [actor for other, (other_post, actor, other_time) in comments.items()
+                   if other_post == post and other < comment and other_time <= time]
+        assert int(columns["recipient"][row]) in earlier
+
+    # A post's first comment is never a reply
+    for post in set(columns["post"][threads].tolist()):
+        first = min(comment for comment, (other_post, _, _) in comments.items() if other_post == post)
+        assert columns["type"][columns["comment"] == first][0] == COMMENT
+
+def test_rows_match_the_summary():
+    profile = WorkloadProfile(users=500, days=3, seed=7)
+    stats = generate_workload(profile)
+    days = list(generate_rows(profile))
+
+    # rows_per_day buckets by timestamp; engagement spills into the next day
+    assert sum(len(rows["recipient"]) for rows in days) == sum(stats.rows_per_day) == stats.rows
+    by_type = np.bincount(np.concatenate([rows["type"] for rows in days]).astype(np.int64), minlength=len(NOTIFICATION_TYPES))
+    assert dict(zip(NOTIFICATION_TYPES, by_type.tolist())) == stats.by_type
+    # createNotification never notifies the actor
+    assert not any((rows["recipient"] == rows["actor"]).any() for rows in days)
+    assert stats.events == stats.rows + stats.self_notifications
+
+def test_same_seed_same_workload():
+    profile = WorkloadProfile(users=300, days=2, seed=3)
+    first, second = generate_workload(profile), generate_workload(profile)
+    assert (first.rows, first.by_type, first.unread_percentiles) == (second.rows, second.by_type, second.unread_percentiles)
+
+def test_small_runs_report_the_average_per_hour():
+    stats = generate_workload(WorkloadProfile(users=200, days=1))
+    assert 0 < stats.rows_per_second < 1
+    assert f"average    {stats.rows_per_second * 3600:,.1f} rows/hour" in "\n".join(_workload_lines(stats))